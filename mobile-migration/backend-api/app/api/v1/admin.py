@@ -8,7 +8,7 @@ import logging
 import time
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, File, Query, HTTPException, UploadFile, status
 from pydantic import BaseModel, Field
 
 from app.api.deps import require_admin
@@ -393,3 +393,19 @@ async def delete_user(
 
     exec_sql("DELETE FROM users WHERE id = ?", (user_id,))
     return AdminMessageResponse(message=f"User '{user}' deleted successfully")
+
+
+@router.post("/price-history/import", response_model=AdminMessageResponse)
+async def import_price_history(
+    file: UploadFile = File(...), current_user: TokenData = Depends(require_admin),
+):
+    """Load daily closes from a ``symbol,date,close[,currency]`` CSV (admin only)."""
+    from app.services.price_history import import_csv
+
+    if not file.filename or not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="File must be a .csv")
+    try:
+        stored = import_csv(await file.read())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return AdminMessageResponse(message=f"Imported {stored} daily closes")
@@ -4,10 +4,13 @@ Analytics API v1 — TWR, MWRR, Sharpe, Sortino, realized profit, cash reconcili
 Provides performance metrics using the PortfolioService class.
 """
 
+import asyncio
 import time
 import logging
+from datetime import date
 from typing import Optional
 
+import pandas as pd
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, Field
 
@@ -344,7 +347,8 @@ async def list_position_snapshots(
         f"""
         SELECT id, stock_id, stock_symbol, portfolio_id, snapshot_date,
                total_shares, total_cost, avg_cost, realized_pnl,
-               cash_dividends_received, status
+               cash_dividends_received, status,
+               market_price, market_value, market_value_kwd
         FROM position_snapshots
         WHERE {where}
         ORDER BY snapshot_date DESC
@@ -361,3 +365,79 @@ async def list_position_snapshots(
             "count": len(records),
         },
     }
+
+
+# ── Point-in-time holdings ───────────────────────────────────────────
+
+def _holdings_records(df) -> list:
+    if df.empty:
+        return []
+    out = df.assign(date=df["date"].dt.strftime("%Y-%m-%d")).round(6)
+    return out.astype(object).where(out.notna(), None).to_dict(orient="records")
+
+
+@router.get("/holdings-as-of")
+async def holdings_as_of_endpoint(
+    as_of: date = Query(..., description="Date (YYYY-MM-DD); positions at the end of that day"),
+    portfolio: Optional[str] = Query(None),
+    include_closed: bool = Query(False),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Positions, WAC cost and market value held on *as_of*."""
+    from app.services.holdings_service import holdings_as_of
+
+    if portfolio and portfolio not in PORTFOLIO_CCY:
+        raise BadRequestError(f"Unknown portfolio '{portfolio}'")
+    df = await asyncio.to_thread(holdings_as_of, current_user.user_id, as_of, portfolio, include_closed)
+    records = _holdings_records(df)
+    return {
+        "status": "ok",
+        "data": {
+            "as_of": as_of.isoformat(),
+            "positions": records,
+            "count": len(records),
+            "market_value_kwd": round(float(df["market_value_kwd"].sum()), 3) if not df.empty else 0.0,
+        },
+    }
+
+
+@router.get("/holdings-history")
+async def holdings_history_endpoint(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    frequency: str = Query("D", description="D (daily), W (weekly) or M (month-end)"),
+    portfolio: Optional[str] = Query(None),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Per-position holdings and market value over a date range (allocation charts)."""
+    from app.services.holdings_service import holdings_series
+
+    freq = {"D": "D", "W": "W-SAT", "M": "ME"}.get(frequency.upper())
+    if freq is None:
+        raise BadRequestError("frequency must be D, W or M")
+    if start_date > end_date:
+        raise BadRequestError("start_date must be on or before end_date")
+    if portfolio and portfolio not in PORTFOLIO_CCY:
+        raise BadRequestError(f"Unknown portfolio '{portfolio}'")
+
+    days = pd.date_range(start_date, end_date, freq=freq)
+    if freq != "D":
+        days = days.union([pd.Timestamp(end_date)])
+    df = await asyncio.to_thread(holdings_series, current_user.user_id, days, portfolio)
+    records = _holdings_records(df)
+    return {"status": "ok", "data": {"positions": records, "count": len(records)}}
+
+
+@router.post("/position-snapshots/rebuild")
+async def rebuild_position_snapshots(
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Rewrite position_snapshots for the range from the transaction ledger."""
+    from app.services.holdings_service import write_position_snapshots
+
+    if start_date > end_date:
+        raise BadRequestError("start_date must be on or before end_date")
+    written = await asyncio.to_thread(write_position_snapshots, current_user.user_id, start_date, end_date)
+    return {"status": "ok", "data": {"written": written}}
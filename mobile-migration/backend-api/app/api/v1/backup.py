@@ -166,6 +166,10 @@ async def claim_orphaned_data(
             )
         migrated[table] = count
 
+    # The moved rows were keyed with the source user's aliases
+    from app.services.symbol_service import rekey_user
+    rekey_user(uid)
+
     logger.info(
         "Claimed data from user %d → user %d: %s",
         source_user_id, uid, migrated,
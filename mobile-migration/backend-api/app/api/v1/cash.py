@@ -16,7 +16,7 @@ from app.api.deps import get_current_user
 from app.core.security import TokenData
 from app.core.exceptions import NotFoundError, BadRequestError
 from app.core.database import query_df, query_one, query_val, exec_sql
-from app.services.fx_service import convert_to_kwd, PORTFOLIO_CCY
+from app.services.fx_service import convert_to_kwd, convert_series_to_kwd, flow_dates, PORTFOLIO_CCY
 from app.services.audit_service import (
     log_event, CASH_CREATE, CASH_UPDATE, CASH_DELETE, CASH_RESTORE,
 )
@@ -64,10 +64,9 @@ async def list_deposits(
     records = df.to_dict(orient="records") if not df.empty else []
 
     # Calculate KWD total
-    total_kwd = sum(
-        convert_to_kwd(float(r.get("amount", 0)), r.get("currency", "KWD"))
-        for r in records
-    )
+    total_kwd = float(convert_series_to_kwd(
+        df["amount"], df["currency"], flow_dates(df["deposit_date"]),
+    ).sum()) if not df.empty else 0.0
     total_pages = max(1, (total + page_size - 1) // page_size)
 
     return {
@@ -4,6 +4,7 @@ Cron / Scheduler API v1 — price update + snapshot save triggers + status.
 Protected by CRON_SECRET_KEY (header or query param).
 """
 
+import asyncio
 import logging
 import time
 from typing import Optional
@@ -155,51 +156,51 @@ async def trigger_price_update_and_snapshot(
     x_cron_key: Optional[str] = Header(None, alias="X-Cron-Key"),
     key: Optional[str] = Query(None),
     user_id: int = Query(0, description="User whose stocks to update and snapshot to save (0 = all users)"),
+    resume: bool = Query(False, description="Skip users whose run already finished today"),
 ):
     """
     Trigger a full price refresh followed by a snapshot save.
 
-    This is the same as the daily scheduled job — useful for manual testing
-    or external cron services.
-    Use ``user_id=0`` (default) to process **all** users.
+    Runs the same parallel pipeline as the daily scheduled job — useful
+    for manual testing or external cron services.
+    Use ``user_id=0`` (default) to process **all** users.  With
+    ``resume=true`` users already done today are skipped.
     """
     _verify_cron_key(x_cron_key, key)
 
-    from app.cron.snapshot_saver import run_snapshot_save
+    from app.cron.daily_pipeline import run_daily_pipeline
 
     user_ids = _resolve_user_ids(user_id)
     logger.info("🚀 Price update + snapshot triggered via API for user_ids=%s", user_ids)
 
-    all_price_results = {}
-    all_snapshot_results = {}
-    total_updated = 0
-    total_found = 0
-
-    for uid in user_ids:
-        price_result = update_all_prices(user_id=uid)
-        all_price_results[uid] = price_result.to_dict()
-        total_updated += price_result.updated
-        total_found += price_result.stocks_found
-
-        snapshot_result = run_snapshot_save(user_id=uid)
-        all_snapshot_results[uid] = snapshot_result
+    run = await asyncio.to_thread(run_daily_pipeline, user_ids, resume)
+    all_price_results = {uid: r.get("price") for uid, r in run["results"].items()}
+    all_snapshot_results = {uid: r.get("snapshot") for uid, r in run["results"].items()}
+    summary = run["summary"]
 
     _last_run.update({
         "timestamp": int(time.time()),
         "user_ids": user_ids,
         "result": all_price_results,
+        "summary": summary,
     })
     _last_snapshot_run.update({
         "timestamp": int(time.time()),
         "user_ids": user_ids,
         "result": all_snapshot_results,
+        "summary": summary,
     })
 
     return {
-        "status": "ok",
-        "message": f"Prices updated ({total_updated}/{total_found}), snapshots saved for {len(user_ids)} user(s)",
+        "status": "ok" if not (summary["failed"] or summary["timeout"]) else "partial",
+        "message": (
+            f"Prices + snapshots done for {summary['done']}/{summary['users']} user(s)"
+            f" ({summary['failed']} failed, {summary['timeout']} timed out,"
+            f" {summary['resumed_skipped']} already done)"
+        ),
         "data": {
             "prices": all_price_results,
             "snapshots": all_snapshot_results,
+            "summary": summary,
         },
     }
@@ -15,7 +15,10 @@ from fastapi import APIRouter, Depends, Query
 from app.api.deps import get_current_user
 from app.core.security import TokenData
 from app.core.database import query_df
-from app.services.fx_service import convert_to_kwd
+from app.core.json_response import SafeJSONResponse, frame_rows
+from app.services.fx_service import convert_series_to_kwd, flow_dates
+from app.services.portfolio_service import clear_wac_snapshots
+from app.services.symbol_service import STOCKS_BY_KEY, resolve_symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +32,15 @@ async def list_dividends(
     stock_symbol: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(100, ge=1, le=10000),
+    orient: str = Query("records", pattern="^(records|split)$", description="Row layout: 'records' or columnar 'split'"),
     current_user: TokenData = Depends(get_current_user),
 ):
     """
     List all dividend entries (transactions with cash_dividend > 0,
     bonus_shares > 0, or reinvested_dividend > 0).
 
-    Returns KWD-converted totals.
+    Returns KWD-converted totals.  ``orient=split`` returns the rows as
+    ``{"columns": [...], "data": [[...], ...]}``.
     """
     conditions = [
         "t.user_id = ?",
@@ -49,8 +54,8 @@ async def list_dividends(
     params: list = [current_user.user_id]
 
     if stock_symbol:
-        conditions.append("TRIM(t.stock_symbol) = ?")
-        params.append(stock_symbol.strip())
+        conditions.append("t.symbol_key = ?")
+        params.append(resolve_symbol_key(current_user.user_id, stock_symbol))
 
     where = " AND ".join(conditions)
 
@@ -67,13 +72,13 @@ async def list_dividends(
             COALESCE(s.currency, 'KWD')          AS currency,
             t.notes
         FROM transactions t
-        LEFT JOIN stocks s
-            ON TRIM(t.stock_symbol) = TRIM(s.symbol)
-           AND s.user_id = t.user_id
+        LEFT JOIN {STOCKS_BY_KEY} s
+            ON s.user_id = t.user_id
+           AND s.symbol_key = t.symbol_key
         WHERE {where}
         ORDER BY t.txn_date DESC, t.stock_symbol
     """
-    df = query_df(sql, tuple(params))
+    df = query_df(sql, (current_user.user_id, *params))
 
     if df.empty:
         return {
@@ -91,19 +96,14 @@ async def list_dividends(
         }
 
     # KWD conversions
-    df["cash_dividend_kwd"] = df.apply(
-        lambda r: round(convert_to_kwd(float(r["cash_dividend"]), r["currency"]), 3),
-        axis=1,
-    )
-    df["reinvested_kwd"] = df.apply(
-        lambda r: round(convert_to_kwd(float(r["reinvested_dividend"]), r["currency"]), 3),
-        axis=1,
-    )
+    dates = flow_dates(df["txn_date"])
+    df["cash_dividend_kwd"] = convert_series_to_kwd(df["cash_dividend"], df["currency"], dates).round(3)
+    df["reinvested_kwd"] = convert_series_to_kwd(df["reinvested_dividend"], df["currency"], dates).round(3)
 
     total_records = len(df)
     offset = (page - 1) * page_size
     page_df = df.iloc[offset : offset + page_size]
-    records = page_df.to_dict(orient="records")
+    records = frame_rows(page_df, orient)
     total_pages = max(1, (total_records + page_size - 1) // page_size)
 
     totals = {
@@ -113,11 +113,11 @@ async def list_dividends(
         "unique_stocks": int(df["stock_symbol"].nunique()),
     }
 
-    return {
+    return SafeJSONResponse({
         "status": "ok",
         "data": {
             "dividends": records,
-            "count": len(records),
+            "count": len(page_df),
             "totals": totals,
             "pagination": {
                 "page": page,
@@ -126,7 +126,7 @@ async def list_dividends(
                 "total_pages": total_pages,
             },
         },
-    }
+    })
 
 
 # ── Summary by stock ─────────────────────────────────────────────────
@@ -143,17 +143,18 @@ async def dividends_by_stock(
 
     # Dividend rows
     div_df = query_df(
-        """
+        f"""
         SELECT
             t.stock_symbol,
+            t.txn_date,
             COALESCE(t.cash_dividend, 0)        AS cash_dividend,
             COALESCE(t.bonus_shares, 0)          AS bonus_shares,
             COALESCE(t.reinvested_dividend, 0)   AS reinvested_dividend,
             COALESCE(s.currency, 'KWD')          AS currency
         FROM transactions t
-        LEFT JOIN stocks s
-            ON TRIM(t.stock_symbol) = TRIM(s.symbol)
-           AND s.user_id = t.user_id
+        LEFT JOIN {STOCKS_BY_KEY} s
+            ON s.user_id = t.user_id
+           AND s.symbol_key = t.symbol_key
         WHERE t.user_id = ?
           AND COALESCE(t.is_deleted, 0) = 0
           AND (
@@ -162,21 +163,16 @@ async def dividends_by_stock(
               OR COALESCE(t.reinvested_dividend, 0) > 0
           )
         """,
-        (uid,),
+        (uid, uid),
     )
 
     if div_df.empty:
         return {"status": "ok", "data": {"stocks": [], "count": 0}}
 
     # KWD conversion
-    div_df["cash_dividend_kwd"] = div_df.apply(
-        lambda r: convert_to_kwd(float(r["cash_dividend"]), r["currency"]),
-        axis=1,
-    )
-    div_df["reinvested_kwd"] = div_df.apply(
-        lambda r: convert_to_kwd(float(r["reinvested_dividend"]), r["currency"]),
-        axis=1,
-    )
+    dates = flow_dates(div_df["txn_date"])
+    div_df["cash_dividend_kwd"] = convert_series_to_kwd(div_df["cash_dividend"], div_df["currency"], dates)
+    div_df["reinvested_kwd"] = convert_series_to_kwd(div_df["reinvested_dividend"], div_df["currency"], dates)
 
     # Cost basis per stock
     cost_df = query_df(
@@ -237,7 +233,7 @@ async def bonus_shares_list(
     """
     uid = current_user.user_id
 
-    sql = """
+    sql = f"""
         SELECT
             t.id,
             t.stock_symbol,
@@ -248,15 +244,15 @@ async def bonus_shares_list(
             COALESCE(s.currency, 'KWD')  AS currency,
             t.notes
         FROM transactions t
-        LEFT JOIN stocks s
-            ON TRIM(t.stock_symbol) = TRIM(s.symbol)
-           AND s.user_id = t.user_id
+        LEFT JOIN {STOCKS_BY_KEY} s
+            ON s.user_id = t.user_id
+           AND s.symbol_key = t.symbol_key
         WHERE t.user_id = ?
           AND COALESCE(t.is_deleted, 0) = 0
           AND COALESCE(t.bonus_shares, 0) > 0
         ORDER BY t.txn_date DESC, t.stock_symbol
     """
-    df = query_df(sql, (uid,))
+    df = query_df(sql, (uid, uid))
 
     if df.empty:
         return {
@@ -319,7 +315,7 @@ async def delete_dividend(
     import time
 
     row = query_one(
-        """SELECT id FROM transactions
+        """SELECT id, symbol_key, txn_date FROM transactions
            WHERE id = ? AND user_id = ? AND COALESCE(is_deleted, 0) = 0
              AND (COALESCE(cash_dividend, 0) > 0 OR COALESCE(bonus_shares, 0) > 0
                   OR COALESCE(reinvested_dividend, 0) > 0)""",
@@ -334,5 +330,6 @@ async def delete_dividend(
         "UPDATE transactions SET is_deleted = 1, deleted_at = ? WHERE id = ? AND user_id = ?",
         (now, dividend_id, current_user.user_id),
     )
+    clear_wac_snapshots(current_user.user_id, row["symbol_key"], row["txn_date"])
 
     return {"status": "ok", "data": {"id": dividend_id, "message": "Dividend record deleted"}}
@@ -14,7 +14,7 @@ import time
 import logging
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, UploadFile, File
 from fastapi.responses import FileResponse
@@ -23,7 +23,12 @@ from pydantic import BaseModel, Field
 from app.api.deps import get_current_user
 from app.core.security import TokenData
 from app.core.exceptions import NotFoundError, BadRequestError, ConflictError
-from app.core.database import query_all, query_one, query_val, query_df, exec_sql, get_connection
+from app.core.database import query_all, query_one, query_val, query_df, exec_sql, exec_sql_many, get_connection
+from app.services.line_item_matrix import (
+    CAPEX_CODES, CFO_CODES, FCF_CODES, REVENUE_CODES, LineItemMatrix,
+)
+from app.services import market_cache, valuation_engine
+from app.services.stock_screener import SCORE_COLUMNS as SCREENER_SCORE_COLUMNS, screen_stocks
 
 logger = logging.getLogger(__name__)
 
@@ -695,6 +700,55 @@ class MultiplesRequest(BaseModel):
     shares_outstanding: float = 1.0
 
 
+class DCFSensitivityRequest(BaseModel):
+    fcf: float
+    growth_rate_stage1: float
+    growth_rate_stage2: float
+    discount_rate: float
+    stage1_years: int = Field(5, ge=1, le=valuation_engine.MAX_YEARS)
+    stage2_years: int = Field(5, ge=1, le=valuation_engine.MAX_YEARS)
+    terminal_growth: float = 0.025
+    shares_outstanding: float = 1.0
+    cash: float = 0.0
+    debt: float = 0.0
+    # Grid axes; each defaults to the base value ± 2 steps
+    discount_rates: Optional[List[float]] = None
+    growth_rates: Optional[List[float]] = None
+    terminal_growths: Optional[List[float]] = None
+
+
+# A number (held constant) or a distribution spec, e.g.
+# {"dist": "normal", "mean": 0.09, "std": 0.01} — see valuation_engine.draw
+DistSpec = Union[float, Dict[str, Any]]
+
+
+class DCFSimulationRequest(BaseModel):
+    fcf: DistSpec
+    growth_rate_stage1: DistSpec
+    growth_rate_stage2: DistSpec
+    discount_rate: DistSpec
+    terminal_growth: DistSpec = 0.025
+    stage1_years: int = Field(5, ge=1, le=valuation_engine.MAX_YEARS)
+    stage2_years: int = Field(5, ge=1, le=valuation_engine.MAX_YEARS)
+    shares_outstanding: DistSpec = 1.0
+    cash: DistSpec = 0.0
+    debt: DistSpec = 0.0
+    draws: int = Field(10_000, ge=1, le=valuation_engine.MAX_DRAWS)
+    seed: Optional[int] = None
+    current_price: Optional[float] = None
+
+
+class DDMSimulationRequest(BaseModel):
+    last_dividend: DistSpec
+    growth_rate: DistSpec
+    required_return: DistSpec
+    high_growth_years: int = Field(5, ge=1, le=valuation_engine.MAX_YEARS)
+    high_growth_rate: Optional[DistSpec] = None
+    draws: int = Field(10_000, ge=1, le=valuation_engine.MAX_DRAWS)
+    seed: Optional[int] = None
+    current_price: Optional[float] = None
+
+
 # ════════════════════════════════════════════════════════════════════
 # STOCK PROFILES
 # ════════════════════════════════════════════════════════════════════
@@ -3591,6 +3645,15 @@ async def clear_extraction_cache(
     return {"status": "ok", "data": {"message": "Extraction cache cleared."}}
 
 
+@router.get("/extraction-cache/page-stats")
+async def page_extraction_cache_stats(
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Hit rate and size of the shared page-level AI extraction cache."""
+    from app.services.page_extraction_cache import stats
+    return {"status": "ok", "data": stats()}
+
+
 class AiRearrangeRequest(BaseModel):
     statement_type: str = Field(..., description="income, balance, cashflow, or equity")
     periods: Optional[List[str]] = Field(None, description="Specific period_end_dates to check")
@@ -4181,11 +4244,15 @@ async def calculate_metrics(
     _ensure_schema()
     _verify_stock_owner(stock_id, current_user.user_id)
 
+    rows: List[tuple] = []
+    matrix = LineItemMatrix.load(stock_id)
     results = _calculate_all_metrics(
         stock_id,
         body.period_end_date,
         body.fiscal_year,
         body.fiscal_quarter,
+        sink=rows,
+        matrix=matrix,
     )
 
     if not results:
@@ -4194,9 +4261,11 @@ async def calculate_metrics(
     # Also compute growth-derived metrics (CAGR, stability, margin trends)
     # so they appear in the metrics table without requiring a separate Growth tab visit.
     try:
-        _calculate_growth(stock_id)
+        _calculate_growth(stock_id, sink=rows, matrix=matrix)
     except Exception:
-        pass  # non-fatal — per-period metrics already saved
+        pass  # non-fatal — per-period metrics are still saved below
+
+    _upsert_metrics_bulk(rows)
 
     return {"status": "ok", "data": {"metrics": results}}
 
@@ -4235,6 +4304,51 @@ async def get_score(
     return {"status": "ok", "data": score}
 
 
+@router.get("/screener")
+async def get_screener(
+    min_score: Optional[float] = Query(None, ge=0, le=100),
+    sector: Optional[str] = Query(None),
+    exchange: Optional[str] = Query(None),
+    sort_by: str = Query("overall_score"),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Score every analysis stock of the user in one batch and rank them.
+
+    Market inputs (price, beta, volatility) come from each stock's last
+    stored score rather than live yfinance calls.  Read-only — use
+    ``POST /screener/scores`` to store the scores.
+    """
+    _ensure_schema()
+    if sort_by not in SCREENER_SCORE_COLUMNS:
+        raise BadRequestError(
+            f"sort_by must be one of: {', '.join(SCREENER_SCORE_COLUMNS)}"
+        )
+
+    data = screen_stocks(
+        current_user.user_id,
+        min_score=min_score,
+        sector=sector,
+        exchange=exchange,
+        sort_by=sort_by,
+        limit=limit,
+    )
+    return {"status": "ok", "data": data}
+
+
+@router.post("/screener/scores")
+async def save_screener_scores(
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Store today's screener score for each of the user's analysis stocks.
+
+    Stocks that already have a score dated today are left alone.
+    """
+    _ensure_schema()
+    data = screen_stocks(current_user.user_id, limit=500, persist=True)
+    return {"status": "ok", "data": {"persisted": data["persisted"], "total": data["total"]}}
+
+
 @router.get("/stocks/{stock_id}/scores/history")
 async def get_score_history(
     stock_id: int,
@@ -4367,40 +4481,16 @@ async def get_valuation_defaults(
     summary_mos = (stock_row[1] if isinstance(stock_row, (tuple, list)) else stock_row.get("summary_margin_of_safety", 15.0)) if stock_row else 15.0
     stock_exchange = (stock_row[2] if isinstance(stock_row, (tuple, list)) else stock_row.get("exchange", "US")) if stock_row else "US"
 
+    # All line items in one query; every lookup below is resolved in memory
+    matrix = LineItemMatrix.load(stock_id)
+
     # FCF from cash flow
-    fcf_row = query_one(
-        """SELECT li.amount FROM financial_line_items li
-           JOIN financial_statements fs ON fs.id = li.statement_id
-           WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-             AND fs.fiscal_quarter IS NULL
-             AND UPPER(li.line_item_code) IN ('FREE_CASH_FLOW', 'UNLEVERED_FREE_CASH_FLOW', 'LEVERED_FREE_CASH_FLOW')
-           ORDER BY fs.fiscal_year DESC LIMIT 1""",
-        (stock_id,),
-    )
-    fcf_val = (fcf_row[0] if isinstance(fcf_row, (tuple, list)) else fcf_row.get("amount")) if fcf_row else None
+    fcf_val = matrix.latest("cashflow", FCF_CODES, annual_only=True)
 
     # If no explicit FCF, compute from CFO - CapEx
     if fcf_val is None:
-        cfo_row = query_one(
-            """SELECT li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-                 AND fs.fiscal_quarter IS NULL
-                 AND UPPER(li.line_item_code) = 'CASH_FROM_OPERATIONS'
-               ORDER BY fs.fiscal_year DESC LIMIT 1""",
-            (stock_id,),
-        )
-        capex_row = query_one(
-            """SELECT li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-                 AND fs.fiscal_quarter IS NULL
-                 AND UPPER(li.line_item_code) IN ('CAPITAL_EXPENDITURES', 'CAPEX')
-               ORDER BY fs.fiscal_year DESC LIMIT 1""",
-            (stock_id,),
-        )
-        cfo = (cfo_row[0] if isinstance(cfo_row, (tuple, list)) else cfo_row.get("amount")) if cfo_row else None
-        capex = (capex_row[0] if isinstance(capex_row, (tuple, list)) else capex_row.get("amount")) if capex_row else 0
+        cfo = matrix.latest("cashflow", ["CASH_FROM_OPERATIONS"], annual_only=True)
+        capex = matrix.latest("cashflow", CAPEX_CODES, annual_only=True)
         if cfo is not None:
             fcf_val = cfo - abs(capex or 0)
 
@@ -4408,52 +4498,17 @@ async def get_valuation_defaults(
     fcf_history = []
     avg_fcf_growth = None
     # Method 1: explicit FREE_CASH_FLOW per year
-    fcf_hist_rows = query_all(
-        """SELECT fs.fiscal_year, li.amount FROM financial_line_items li
-           JOIN financial_statements fs ON fs.id = li.statement_id
-           WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-             AND fs.fiscal_quarter IS NULL
-             AND UPPER(li.line_item_code) IN ('FREE_CASH_FLOW', 'UNLEVERED_FREE_CASH_FLOW', 'LEVERED_FREE_CASH_FLOW')
-             AND li.amount IS NOT NULL
-           ORDER BY fs.fiscal_year""",
-        (stock_id,),
-    )
-    if fcf_hist_rows:
-        for fr in fcf_hist_rows:
-            fy = fr[0] if isinstance(fr, (tuple, list)) else fr["fiscal_year"]
-            amt = fr[1] if isinstance(fr, (tuple, list)) else fr["amount"]
-            fcf_history.append({"year": fy, "fcf": round(float(amt), 2)})
+    fcf_by_year = matrix.series("cashflow", FCF_CODES, annual_only=True)
+    if fcf_by_year:
+        for fy in sorted(fcf_by_year):
+            fcf_history.append({"year": fy, "fcf": round(fcf_by_year[fy]["amount"], 2)})
     else:
         # Method 2: compute CFO - |CapEx| per year
-        cfo_rows = query_all(
-            """SELECT fs.fiscal_year, li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-                 AND fs.fiscal_quarter IS NULL
-                 AND UPPER(li.line_item_code) IN ('CASH_FROM_OPERATIONS', 'OPERATING_CASH_FLOW')
-                 AND li.amount IS NOT NULL
-               ORDER BY fs.fiscal_year""",
-            (stock_id,),
-        )
-        capex_rows = query_all(
-            """SELECT fs.fiscal_year, li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-                 AND fs.fiscal_quarter IS NULL
-                 AND UPPER(li.line_item_code) IN ('CAPITAL_EXPENDITURES', 'CAPEX')
-                 AND li.amount IS NOT NULL
-               ORDER BY fs.fiscal_year""",
-            (stock_id,),
-        )
-        capex_by_year = {}
-        for cr in (capex_rows or []):
-            fy = cr[0] if isinstance(cr, (tuple, list)) else cr["fiscal_year"]
-            amt = cr[1] if isinstance(cr, (tuple, list)) else cr["amount"]
-            capex_by_year[fy] = float(amt)
-        for cr in (cfo_rows or []):
-            fy = cr[0] if isinstance(cr, (tuple, list)) else cr["fiscal_year"]
-            cfo_amt = float(cr[1] if isinstance(cr, (tuple, list)) else cr["amount"])
-            capex_amt = capex_by_year.get(fy, 0)
+        cfo_by_year = matrix.series("cashflow", CFO_CODES, annual_only=True)
+        capex_by_year = matrix.series("cashflow", CAPEX_CODES, annual_only=True)
+        for fy in sorted(cfo_by_year):
+            cfo_amt = cfo_by_year[fy]["amount"]
+            capex_amt = capex_by_year[fy]["amount"] if fy in capex_by_year else 0
             fcf_history.append({"year": fy, "fcf": round(cfo_amt - abs(capex_amt), 2)})
 
     # Compute average YoY FCF growth rate
@@ -4468,24 +4523,13 @@ async def get_valuation_defaults(
             avg_fcf_growth = round(sum(fcf_growth_rates) / len(fcf_growth_rates), 4)
 
     # Dividends per share history (for DDM growth calculation)
-    div_rows = query_all(
-        """SELECT fs.fiscal_year, li.amount FROM financial_line_items li
-           JOIN financial_statements fs ON fs.id = li.statement_id
-           WHERE fs.stock_id = ? AND fs.statement_type = 'cashflow'
-             AND fs.fiscal_quarter IS NULL
-             AND UPPER(li.line_item_code) = 'DIVIDENDS_PAID'
-           ORDER BY fs.fiscal_year""",
-        (stock_id,),
-    )
+    div_by_year = matrix.series("cashflow", ["DIVIDENDS_PAID"], annual_only=True)
     dps_history = []
     div_growth_rates = []
-    if div_rows and shares and shares > 0:
-        for dr_row in div_rows:
-            fy = dr_row[0] if isinstance(dr_row, (tuple, list)) else dr_row["fiscal_year"]
-            amt = dr_row[1] if isinstance(dr_row, (tuple, list)) else dr_row["amount"]
-            if amt is not None:
-                dps = abs(amt) / shares
-                dps_history.append({"year": fy, "dps": round(dps, 4)})
+    if div_by_year and shares and shares > 0:
+        for fy in sorted(div_by_year):
+            dps = abs(div_by_year[fy]["amount"]) / shares
+            dps_history.append({"year": fy, "dps": round(dps, 4)})
         # Compute growth rates between consecutive years
         for i in range(1, len(dps_history)):
             prev_dps = dps_history[i - 1]["dps"]
@@ -4502,74 +4546,40 @@ async def get_valuation_defaults(
     # Debt and cash (for DCF enterprise-to-equity bridge)
     # ── Cash: pick best single cash line item from latest balance sheet ──
     # Priority: TOTAL_DEBT (pre-computed) > CASH_EQUIVALENTS/CASH_SHORT_TERM_INVESTMENTS > lowercase 'cash'
-    total_cash = None
-    cash_row = query_one(
-        """SELECT li.amount FROM financial_line_items li
-           JOIN financial_statements fs ON fs.id = li.statement_id
-           WHERE fs.stock_id = ? AND fs.statement_type = 'balance'
-             AND fs.fiscal_quarter IS NULL
-             AND UPPER(li.line_item_code) IN (
-               'CASH_AND_EQUIVALENTS','CASH_AND_CASH_EQUIVALENTS',
-               'CASH_EQUIVALENTS','CASH_SHORT_TERM_INVESTMENTS',
-               'CASH','CASH_BALANCES')
-             AND li.amount IS NOT NULL
-           ORDER BY fs.fiscal_year DESC,
-                    CASE UPPER(li.line_item_code)
-                      WHEN 'CASH_SHORT_TERM_INVESTMENTS' THEN 1
-                      WHEN 'CASH_EQUIVALENTS' THEN 2
-                      WHEN 'CASH_AND_CASH_EQUIVALENTS' THEN 3
-                      WHEN 'CASH_AND_EQUIVALENTS' THEN 4
-                      WHEN 'CASH_BALANCES' THEN 5
-                      WHEN 'CASH' THEN 6
-                      ELSE 7 END
-           LIMIT 1""",
-        (stock_id,),
-    )
-    if cash_row:
-        total_cash = cash_row[0] if isinstance(cash_row, (tuple, list)) else cash_row.get("amount")
+    total_cash = matrix.latest("balance", [
+        "CASH_SHORT_TERM_INVESTMENTS", "CASH_EQUIVALENTS",
+        "CASH_AND_CASH_EQUIVALENTS", "CASH_AND_EQUIVALENTS",
+        "CASH_BALANCES", "CASH",
+    ], annual_only=True)
 
     # ── Debt: prefer pre-computed TOTAL_DEBT, else sum individual debt items ──
-    total_debt = None
-    td_row = query_one(
-        """SELECT li.amount FROM financial_line_items li
-           JOIN financial_statements fs ON fs.id = li.statement_id
-           WHERE fs.stock_id = ? AND fs.statement_type = 'balance'
-             AND fs.fiscal_quarter IS NULL
-             AND UPPER(li.line_item_code) = 'TOTAL_DEBT'
-             AND li.amount IS NOT NULL
-           ORDER BY fs.fiscal_year DESC LIMIT 1""",
-        (stock_id,),
-    )
-    if td_row:
-        total_debt = td_row[0] if isinstance(td_row, (tuple, list)) else td_row.get("amount")
-    else:
+    total_debt = matrix.latest("balance", ["TOTAL_DEBT"], annual_only=True)
+    if total_debt is None:
         # Sum individual debt line items from latest year
-        debt_sum_row = query_one(
-            """SELECT SUM(li.amount) as debt_total FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'balance'
-                 AND fs.fiscal_quarter IS NULL
-                 AND fs.fiscal_year = (
-                   SELECT MAX(fs2.fiscal_year) FROM financial_statements fs2
-                   WHERE fs2.stock_id = ? AND fs2.statement_type = 'balance' AND fs2.fiscal_quarter IS NULL)
-                 AND (UPPER(li.line_item_code) IN (
-                       'LONG_TERM_DEBT','SHORT_TERM_DEBT','CURRENT_PORTION_OF_LONG_TERM_DEBT',
-                       'CURRENT_PORTION_LT_DEBT','LONG_TERM_DEBTS','CURRENT_PORTION_OF_LONG_TERM_DEBTS')
-                      OR LOWER(li.line_item_code) LIKE '%borrowing%'
-                      OR LOWER(li.line_item_code) LIKE '%bank_overdraft%'
-                      OR LOWER(li.line_item_code) LIKE '%overdraft%'
-                      OR LOWER(li.line_item_code) LIKE '%bank_facilit%'
-                      OR LOWER(li.line_item_code) LIKE '%islamic_payable%'
-                      OR LOWER(li.line_item_code) LIKE '%due_to_bank%'
-                      OR LOWER(li.line_item_code) LIKE '%short_term_loan%'
-                      OR LOWER(li.line_item_code) LIKE '%murabaha%')
-                 AND li.amount IS NOT NULL""",
-            (stock_id, stock_id),
+        _debt_codes = {
+            "LONG_TERM_DEBT", "SHORT_TERM_DEBT", "CURRENT_PORTION_OF_LONG_TERM_DEBT",
+            "CURRENT_PORTION_LT_DEBT", "LONG_TERM_DEBTS", "CURRENT_PORTION_OF_LONG_TERM_DEBTS",
+        }
+        _debt_patterns = (
+            "borrowing", "bank_overdraft", "overdraft", "bank_facilit",
+            "islamic_payable", "due_to_bank", "short_term_loan", "murabaha",
         )
-        if debt_sum_row:
-            val = debt_sum_row[0] if isinstance(debt_sum_row, (tuple, list)) else debt_sum_row.get("debt_total")
-            if val is not None:
-                total_debt = abs(val)
+        balance_periods = matrix.statement_periods("balance", annual_only=True)
+        balance_years = [fy for _, fy, _ in balance_periods if fy is not None]
+        if balance_years:
+            latest_bs_fy = max(balance_years)
+            debt_codes = matrix.codes(
+                "balance",
+                lambda c: c in _debt_codes or any(pat in c.lower() for pat in _debt_patterns),
+            )
+            debt_vals = [
+                matrix.value("balance", c, ped)
+                for ped, fy, _ in balance_periods if fy == latest_bs_fy
+                for c in debt_codes
+            ]
+            debt_vals = [v for v in debt_vals if v is not None]
+            if debt_vals:
+                total_debt = abs(sum(debt_vals))
 
     # ── Graham-specific defaults: historical EPS avg growth & yfinance data ───
     # Helper: detect subunit codes (fils/cents/halala) for division by 1000
@@ -4579,47 +4589,27 @@ async def get_valuation_defaults(
         low = code_str.lower()
         return 'fils' in low or 'cents' in low or 'halala' in low
 
+    # EPS line items: explicit codes first, then anything named like EPS
+    # (mirrors the SQL ``LIKE '%eps_%'``, where ``_`` matches any character)
+    eps_codes = ["EPS_DILUTED", "EPS_BASIC"] + matrix.codes(
+        "income",
+        lambda c: "earnings_per_share" in c.lower() or "eps" in c.lower()[:-1],
+    )
+
     eps_ttm = latest.get("EPS")
     # Fallback: get EPS directly from income statement line items
     if eps_ttm is None:
-        eps_li_row = query_one(
-            """SELECT li.line_item_code, li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'income'
-                 AND fs.fiscal_quarter IS NULL
-                 AND fs.period_end_date NOT LIKE '%/_3M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_6M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_9M' ESCAPE '/'
-                 AND (UPPER(li.line_item_code) IN ('EPS_DILUTED','EPS_BASIC')
-                      OR LOWER(li.line_item_code) LIKE '%earnings_per_share%'
-                      OR LOWER(li.line_item_code) LIKE '%eps_%')
-               ORDER BY fs.fiscal_year DESC LIMIT 1""",
-            (stock_id,),
-        )
-        if eps_li_row:
-            code = eps_li_row.get("line_item_code", "")
-            val = eps_li_row.get("amount")
-            if val is not None and _is_subunit_code(code):
+        eps_hit = matrix.latest_item("income", eps_codes, annual_only=True, full_year_only=True)
+        if eps_hit:
+            code, val = eps_hit
+            if _is_subunit_code(code):
                 val = val / 1000.0
             eps_ttm = val
     # Last fallback: compute from Net Income / Shares Outstanding
     if eps_ttm is None and shares and shares > 0:
-        ni_row = query_one(
-            """SELECT li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'income'
-                 AND fs.fiscal_quarter IS NULL
-                 AND fs.period_end_date NOT LIKE '%/_3M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_6M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_9M' ESCAPE '/'
-                 AND UPPER(li.line_item_code) = 'NET_INCOME'
-               ORDER BY fs.fiscal_year DESC LIMIT 1""",
-            (stock_id,),
-        )
-        if ni_row:
-            ni_val = ni_row[0] if isinstance(ni_row, (tuple, list)) else ni_row.get("amount")
-            if ni_val is not None:
-                eps_ttm = round(ni_val / shares, 4)
+        ni_val = matrix.latest("income", ["NET_INCOME"], annual_only=True, full_year_only=True)
+        if ni_val is not None:
+            eps_ttm = round(ni_val / shares, 4)
     graham_growth_avg = None
     eps_history = []
     # Fetch multi-year EPS from stock_metrics
@@ -4632,33 +4622,14 @@ async def get_valuation_defaults(
     )
     # Fallback: pull EPS directly from income statement line items
     if not eps_rows:
-        eps_rows_raw = query_all(
-            """SELECT fs.fiscal_year, li.line_item_code, li.amount FROM financial_line_items li
-               JOIN financial_statements fs ON fs.id = li.statement_id
-               WHERE fs.stock_id = ? AND fs.statement_type = 'income'
-                 AND fs.fiscal_quarter IS NULL
-                 AND fs.period_end_date NOT LIKE '%/_3M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_6M' ESCAPE '/'
-                 AND fs.period_end_date NOT LIKE '%/_9M' ESCAPE '/'
-                 AND (UPPER(li.line_item_code) IN ('EPS_DILUTED','EPS_BASIC')
-                      OR LOWER(li.line_item_code) LIKE '%earnings_per_share%'
-                      OR LOWER(li.line_item_code) LIKE '%eps_%')
-                 AND li.amount IS NOT NULL
-               ORDER BY fs.fiscal_year""",
-            (stock_id,),
-        )
-        # Dedupe: keep one EPS per fiscal_year, convert fils/cents if needed
-        seen_years = set()
+        eps_by_year = matrix.series("income", eps_codes, annual_only=True, full_year_only=True)
+        # One EPS per fiscal_year, convert fils/cents if needed
         eps_rows = []
-        for er in (eps_rows_raw or []):
-            fy = er[0] if isinstance(er, (tuple, list)) else er["fiscal_year"]
-            if fy not in seen_years:
-                seen_years.add(fy)
-                code = er[1] if isinstance(er, (tuple, list)) else er.get("line_item_code", "")
-                val = er[2] if isinstance(er, (tuple, list)) else er.get("amount")
-                if val is not None and _is_subunit_code(code):
-                    val = val / 1000.0
-                eps_rows.append((fy, val))
+        for fy in sorted(eps_by_year):
+            val = eps_by_year[fy]["amount"]
+            if _is_subunit_code(eps_by_year[fy]["code"]):
+                val = val / 1000.0
+            eps_rows.append((fy, val))
     if eps_rows:
         for er in eps_rows:
             fy = er[0] if isinstance(er, (tuple, list)) else er.get("fiscal_year", er.get("fiscal_year"))
@@ -4676,7 +4647,7 @@ async def get_valuation_defaults(
             # Graham conservatism: cap at 15%, floor at 0%
             graham_growth_avg = round(min(max(avg_raw, 0), 15), 2)
 
-    # Fetch current price, bond yield & WACC components from yfinance
+    # Current price, bond yield & WACC components (market fundamentals cache)
     current_price_yf = None
     bond_yield_yf = None
     wacc_data: Dict[str, Any] = {}
@@ -4687,29 +4658,26 @@ async def get_valuation_defaults(
         ticker_sym = _resolve_yf_ticker(ticker_sym, current_user.user_id)
         _kw = ticker_sym.upper().endswith(".KW")
         try:
-            import yfinance as yf
-            # Current stock price
-            tk = yf.Ticker(ticker_sym)
-            hist = tk.history(period="5d")
-            if not hist.empty:
-                _cprice = float(hist["Close"].iloc[-1])
+            # Current stock price (cached last close)
+            quote = market_cache.get(ticker_sym, "quote")
+            if quote.get("close") is not None:
+                _cprice = float(quote["close"])
                 if _kw:
                     _cprice = _cprice / 1000.0
                 current_price_yf = round(_cprice, 2)
             # 10Y Treasury yield (proxy for AAA bond yield / risk-free rate)
-            tnx = yf.Ticker("^TNX")
-            tnx_hist = tnx.history(period="5d")
-            if not tnx_hist.empty:
-                bond_yield_yf = round(float(tnx_hist["Close"].iloc[-1]), 2)
+            tnx = market_cache.get("^TNX", "quote")
+            if tnx.get("close") is not None:
+                bond_yield_yf = round(float(tnx["close"]), 2)
 
             # ── WACC components ──────────────────────────────────
-            info = tk.info or {}
+            info = market_cache.get(ticker_sym, "wacc")
             beta = info.get("beta")
 
             # For Kuwait stocks, prefer beta from stockanalysis.com
             # (yfinance often has unreliable beta for KW tickers)
             if _kw and raw_symbol:
-                sa_beta = _fetch_beta_from_stockanalysis(raw_symbol.replace(".KW", "").upper())
+                sa_beta = market_cache.get(raw_symbol.replace(".KW", "").upper(), "beta_sa").get("beta")
                 if sa_beta is not None:
                     beta = sa_beta
 
@@ -5084,7 +5052,7 @@ async def fetch_sector_peers(
     now = int(time.time())
     saved_peers = []
     for psym in peer_symbols:
-        mults = _yf_multiples(psym)
+        mults = _cached_multiples(psym)
         # Use company_name from stockanalysis.com if available
         peer_name = mults.pop("company_name", None) or psym
         if peer_name == psym:
@@ -5159,7 +5127,7 @@ async def add_peer_company(
     if not sym:
         raise BadRequestError("Symbol is required")
 
-    mults = _yf_multiples(sym)
+    mults = _cached_multiples(sym)
     # Use company_name from stockanalysis.com if available
     peer_name = mults.pop("company_name", None) or sym
     sector = ""
@@ -5345,6 +5313,90 @@ async def run_multiples(
     return {"status": "ok", "data": result}
 
 
+def _axis(values: Optional[List[float]], base: float, step: float) -> List[float]:
+    """Explicit grid axis, or *base* ± 2 steps."""
+    if values:
+        return values
+    return [round(base + i * step, 6) for i in range(-2, 3)]
+
+
+@router.post("/stocks/{stock_id}/valuations/dcf/sensitivity")
+async def dcf_sensitivity(
+    stock_id: int,
+    body: DCFSensitivityRequest,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Discount rate × stage-1 growth × terminal growth DCF surface (not saved)."""
+    _ensure_schema()
+    _verify_stock_owner(stock_id, current_user.user_id)
+
+    base = {
+        "fcf": body.fcf, "g2": body.growth_rate_stage2,
+        "s1": body.stage1_years, "s2": body.stage2_years,
+        "shares": body.shares_outstanding, "cash": body.cash, "debt": body.debt,
+    }
+    try:
+        grid = valuation_engine.dcf_sensitivity(
+            base,
+            _axis(body.discount_rates, body.discount_rate, 0.01),
+            _axis(body.growth_rates, body.growth_rate_stage1, 0.02),
+            _axis(body.terminal_growths, body.terminal_growth, 0.005),
+        )
+    except ValueError as exc:
+        raise BadRequestError(str(exc)) from exc
+    base_case = _dcf(
+        body.fcf, body.growth_rate_stage1, body.growth_rate_stage2,
+        body.discount_rate, body.stage1_years, body.stage2_years,
+        body.terminal_growth, body.shares_outstanding, body.cash, body.debt,
+    )
+    grid["base_value"] = base_case.get("intrinsic_value")
+    return {"status": "ok", "data": grid}
+
+
+@router.post("/stocks/{stock_id}/valuations/dcf/simulate")
+async def dcf_simulate(
+    stock_id: int,
+    body: DCFSimulationRequest,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Monte Carlo two-stage DCF → percentile bands (not saved)."""
+    _ensure_schema()
+    _verify_stock_owner(stock_id, current_user.user_id)
+
+    inputs = {
+        "fcf": body.fcf, "g1": body.growth_rate_stage1, "g2": body.growth_rate_stage2,
+        "dr": body.discount_rate, "tg": body.terminal_growth,
+        "s1": body.stage1_years, "s2": body.stage2_years,
+        "shares": body.shares_outstanding, "cash": body.cash, "debt": body.debt,
+    }
+    try:
+        result = valuation_engine.simulate_dcf(inputs, body.draws, body.seed, body.current_price)
+    except (KeyError, ValueError) as exc:
+        raise BadRequestError(f"Invalid simulation input: {exc}") from exc
+    return {"status": "ok", "data": result}
+
+
+@router.post("/stocks/{stock_id}/valuations/ddm/simulate")
+async def ddm_simulate(
+    stock_id: int,
+    body: DDMSimulationRequest,
+    current_user: TokenData = Depends(get_current_user),
+):
+    """Monte Carlo DDM (Gordon or two-stage) → percentile bands (not saved)."""
+    _ensure_schema()
+    _verify_stock_owner(stock_id, current_user.user_id)
+
+    inputs = {
+        "div": body.last_dividend, "gr": body.growth_rate, "rr": body.required_return,
+        "hgy": body.high_growth_years, "hgr": body.high_growth_rate,
+    }
+    try:
+        result = valuation_engine.simulate_ddm(inputs, body.draws, body.seed, body.current_price)
+    except (KeyError, ValueError) as exc:
+        raise BadRequestError(f"Invalid simulation input: {exc}") from exc
+    return {"status": "ok", "data": result}
+
+
 # ════════════════════════════════════════════════════════════════════
 # PDF FILE MANAGEMENT
 # ════════════════════════════════════════════════════════════════════
@@ -5454,12 +5506,18 @@ def _verify_stock_owner(stock_id: int, user_id: int) -> None:
 
 # ── Metrics calculation (mirrors MetricsCalculator) ──────────────────
 
-def _load_items_for_period(stock_id: int, period_end_date: str) -> Dict[str, float]:
+def _load_items_for_period(
+    stock_id: int, period_end_date: str,
+    matrix: Optional[LineItemMatrix] = None,
+) -> Dict[str, float]:
     """Flatten all line items across all statement types for one period.
 
     Keys are uppercased so callers can use ``_get("REVENUE")`` regardless
-    of whether the DB stores ``revenue`` or ``REVENUE``.
+    of whether the DB stores ``revenue`` or ``REVENUE``.  When a preloaded
+    *matrix* is given no query is issued.
     """
+    if matrix is not None:
+        return matrix.period_items(period_end_date)
     rows = query_all(
         """SELECT li.line_item_code, li.amount
            FROM financial_line_items li
@@ -5477,40 +5535,48 @@ def _load_items_for_period(stock_id: int, period_end_date: str) -> Dict[str, flo
     return items
 
 
-def _upsert_metric(
-    stock_id: int, fiscal_year: int, period_end_date: str,
-    metric_type: str, metric_name: str, metric_value: float,
-    fiscal_quarter: Optional[int] = None,
-) -> None:
+_METRIC_UPSERT_SQL = """INSERT INTO stock_metrics
+       (stock_id, fiscal_year, fiscal_quarter, period_end_date,
+        metric_type, metric_name, metric_value, created_at)
+       VALUES (?,?,?,?,?,?,?,?)
+       ON CONFLICT (stock_id, metric_name, period_end_date) DO UPDATE SET
+           fiscal_year = excluded.fiscal_year,
+           fiscal_quarter = excluded.fiscal_quarter,
+           metric_type = excluded.metric_type,
+           metric_value = excluded.metric_value,
+           created_at = excluded.created_at"""
+
+
+def _upsert_metrics_bulk(rows: List[tuple]) -> int:
+    """Persist metric rows in one batched ``INSERT … ON CONFLICT DO UPDATE``.
+
+    Each row is ``(stock_id, fiscal_year, fiscal_quarter, period_end_date,
+    metric_type, metric_name, metric_value)``.  When the same
+    (stock_id, metric_name, period_end_date) key appears more than once the
+    last row wins, matching the old one-at-a-time upsert order.
+    """
+    if not rows:
+        return 0
     now = int(time.time())
-    existing = query_val(
-        "SELECT id FROM stock_metrics WHERE stock_id = ? AND metric_name = ? AND period_end_date = ?",
-        (stock_id, metric_name, period_end_date),
-    )
-    if existing:
-        exec_sql(
-            """UPDATE stock_metrics
-               SET fiscal_year=?, fiscal_quarter=?, metric_type=?, metric_value=?, created_at=?
-               WHERE id=?""",
-            (fiscal_year, fiscal_quarter, metric_type, metric_value, now, existing),
-        )
-    else:
-        exec_sql(
-            """INSERT INTO stock_metrics
-               (stock_id, fiscal_year, fiscal_quarter, period_end_date,
-                metric_type, metric_name, metric_value, created_at)
-               VALUES (?,?,?,?,?,?,?,?)""",
-            (stock_id, fiscal_year, fiscal_quarter, period_end_date,
-             metric_type, metric_name, metric_value, now),
-        )
+    latest: Dict[tuple, tuple] = {}
+    for r in rows:
+        latest[(r[0], r[5], r[3])] = r
+    return exec_sql_many(_METRIC_UPSERT_SQL, [(*r, now) for r in latest.values()])
 
 
 def _calculate_all_metrics(
     stock_id: int, period_end_date: str, fiscal_year: int,
     fiscal_quarter: Optional[int] = None,
+    sink: Optional[List[tuple]] = None,
+    matrix: Optional[LineItemMatrix] = None,
 ) -> Dict[str, Dict[str, Optional[float]]]:
-    """Calculate every metric for one period (mirrors MetricsCalculator)."""
-    items = _load_items_for_period(stock_id, period_end_date)
+    """Calculate every metric for one period (mirrors MetricsCalculator).
+
+    Rows are persisted in one batch, or appended to *sink* when the caller
+    is collecting several periods into a single write.  Pass the stock's
+    *matrix* to read line items from memory.
+    """
+    items = _load_items_for_period(stock_id, period_end_date, matrix)
     if not items:
         return {}
 
@@ -5817,19 +5883,51 @@ def _calculate_all_metrics(
     results["quality"] = qual
 
     # ── persist
-    for category, metrics in results.items():
-        for name, value in metrics.items():
-            if value is not None:
-                _upsert_metric(stock_id, fiscal_year, period_end_date, category, name, value, fiscal_quarter)
+    rows = [
+        (stock_id, fiscal_year, fiscal_quarter, period_end_date, category, name, value)
+        for category, metrics in results.items()
+        for name, value in metrics.items()
+        if value is not None
+    ]
+    if sink is not None:
+        sink.extend(rows)
+    else:
+        _upsert_metrics_bulk(rows)
 
     return results
 
 
 # ── Growth calculation ───────────────────────────────────────────────
 
-def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
+def _calculate_growth(
+    stock_id: int, sink: Optional[List[tuple]] = None,
+    matrix: Optional[LineItemMatrix] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """YoY growth, CAGRs, stability and margin trends for a stock.
+
+    All growth metrics are built in memory and written in one batch, or
+    appended to *sink* when the caller persists them together with the
+    per-period metrics.  Line items come from *matrix* (loaded in one
+    query when not supplied).
+    """
+    rows: List[tuple] = []
+    growth = _build_growth_metrics(stock_id, rows, matrix or LineItemMatrix.load(stock_id))
+    if sink is not None:
+        sink.extend(rows)
+    else:
+        _upsert_metrics_bulk(rows)
+    return growth
+
+
+def _build_growth_metrics(
+    stock_id: int, rows: List[tuple], matrix: LineItemMatrix,
+) -> Dict[str, List[Dict[str, Any]]]:
     import statistics
     growth: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _emit(fiscal_year: int, period: str, name: str, value: float) -> None:
+        rows.append((stock_id, fiscal_year, None, period, "growth", name, value))
+
     growth_items = [
         ("REVENUE", "Revenue Growth", "income"),  # also searches TOTAL_REVENUE below
         ("NET_INCOME", "Net Income Growth", "income"),
@@ -5839,49 +5937,21 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
         ("FREE_CASH_FLOW", "FCF Growth", "cashflow"),
     ]
 
-    # FCF has many names across different statements/sources;
-    # try all variants when looking up a code.
-    _FCF_ALIASES = [
-        "FREE_CASH_FLOW",
-        "UNLEVERED_FREE_CASH_FLOW",
-        "LEVERED_FREE_CASH_FLOW",
-    ]
-
-    # Helper: fetch by-year series for a line item code.
-    # If `codes` (list) is provided, tries each code in order and merges results.
-    def _fetch_series(code: str, stmt_type: str, codes: list = None) -> Dict[int, float]:
-        search_codes = codes or [code]
-        by_year: Dict[int, Dict[str, Any]] = {}
-        for c in search_codes:
-            rows = query_all(
-                """SELECT fs.period_end_date AS period, fs.fiscal_year, li.amount
-                   FROM financial_line_items li
-                   JOIN financial_statements fs ON fs.id = li.statement_id
-                   WHERE fs.stock_id = ? AND fs.statement_type = ?
-                     AND UPPER(li.line_item_code) = UPPER(?)
-                   ORDER BY fs.fiscal_year, fs.period_end_date""",
-                (stock_id, stmt_type, c),
-            )
-            for r in rows:
-                if isinstance(r, (tuple, list)):
-                    rec = {"period": r[0], "fiscal_year": r[1], "amount": r[2]}
-                else:
-                    rec = {"period": r["period"], "fiscal_year": r["fiscal_year"], "amount": r["amount"]}
-                fy = rec["fiscal_year"]
-                # Keep first code's data for each year (don't overwrite)
-                if fy is not None and fy not in by_year:
-                    by_year[fy] = rec
-        return by_year
+    # Helper: by-year series for a line item code.
+    # If `codes` (list) is provided, tries each code in order and merges
+    # results (first code wins per year) — resolved in memory from the matrix.
+    def _fetch_series(code: str, stmt_type: str, codes: list = None) -> Dict[int, Dict[str, Any]]:
+        return matrix.series(stmt_type, codes or [code])
 
     # ── A) Standard YoY growth rates
     for code, label, stmt_type in growth_items:
         # For FCF + OCF, try multiple alias codes to cover naming variations
         if code == "FREE_CASH_FLOW":
-            by_year = _fetch_series(code, stmt_type, codes=_FCF_ALIASES)
+            by_year = _fetch_series(code, stmt_type, codes=FCF_CODES)
         elif code == "CASH_FROM_OPERATIONS":
-            by_year = _fetch_series(code, stmt_type, codes=["CASH_FROM_OPERATIONS", "OPERATING_CASH_FLOW"])
+            by_year = _fetch_series(code, stmt_type, codes=CFO_CODES)
         elif code == "REVENUE":
-            by_year = _fetch_series(code, stmt_type, codes=["REVENUE", "TOTAL_REVENUE", "NET_REVENUE"])
+            by_year = _fetch_series(code, stmt_type, codes=REVENUE_CODES)
         else:
             by_year = _fetch_series(code, stmt_type)
         sorted_years = sorted(by_year.keys())
@@ -5903,10 +5973,7 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
                     "prev_period": prev["period"],
                     "growth": round(g, 4),
                 })
-                _upsert_metric(
-                    stock_id, curr_fy, curr["period"],
-                    "growth", label, round(g, 4),
-                )
+                _emit(curr_fy, curr["period"], label, round(g, 4))
         if rates:
             growth[label] = rates
 
@@ -5942,23 +6009,15 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
                         "prev_period": fcf_by_year[prev_fy]["period"],
                         "growth": round(g, 4),
                     })
-                    _upsert_metric(
-                        stock_id, curr_fy, fcf_by_year[curr_fy]["period"],
-                        "growth", "FCF Growth", round(g, 4),
-                    )
+                    _emit(curr_fy, fcf_by_year[curr_fy]["period"], "FCF Growth", round(g, 4))
             if rates_fcf:
                 growth["FCF Growth"] = rates_fcf
 
     # Get newest fiscal year from the latest period
-    latest_period = query_one(
-        """SELECT MAX(period_end_date) as p, MAX(fiscal_year) as fy
-           FROM financial_statements WHERE stock_id = ?""",
-        (stock_id,),
-    )
+    latest_period = matrix.latest_period()
     if not latest_period:
         return growth
-    latest_fy = latest_period[1] if isinstance(latest_period, (tuple, list)) else latest_period["fy"]
-    latest_pd = latest_period[0] if isinstance(latest_period, (tuple, list)) else latest_period["p"]
+    latest_pd, latest_fy = latest_period
     if not latest_fy or not latest_pd:
         return growth
 
@@ -5969,7 +6028,7 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
     ]
     for code, metric_label, stmt_type in cagr_items:
         if code == "REVENUE":
-            by_year = _fetch_series(code, stmt_type, codes=["REVENUE", "TOTAL_REVENUE", "NET_REVENUE"])
+            by_year = _fetch_series(code, stmt_type, codes=REVENUE_CODES)
         else:
             by_year = _fetch_series(code, stmt_type)
         sorted_years = sorted(by_year.keys())
@@ -5982,15 +6041,13 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
                 if start_val and end_val and start_val > 0 and end_val > 0:
                     cagr = (end_val / start_val) ** (1.0 / n_years) - 1.0
                     metric_name = f"{metric_label} CAGR {n_years}Y"
-                    _upsert_metric(stock_id, latest_fy, latest_pd,
-                                   "growth", metric_name, round(cagr, 4))
+                    _emit(latest_fy, latest_pd, metric_name, round(cagr, 4))
                 # Handle negative-to-positive or positive-to-negative via
                 # simple annualised growth rate (not geometric CAGR)
                 elif start_val and end_val and start_val != 0:
                     annualised = ((end_val - start_val) / abs(start_val)) / n_years
                     metric_name = f"{metric_label} CAGR {n_years}Y"
-                    _upsert_metric(stock_id, latest_fy, latest_pd,
-                                   "growth", metric_name, round(annualised, 4))
+                    _emit(latest_fy, latest_pd, metric_name, round(annualised, 4))
 
     # ── C) Growth stability (stdev of YoY rates)
     for label_stub in ["Revenue Growth", "EPS Growth"]:
@@ -5999,8 +6056,7 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
         recent_rates = [r["growth"] for r in rates_list[-5:]]
         if len(recent_rates) >= 3:
             stdev = statistics.stdev(recent_rates)
-            _upsert_metric(stock_id, latest_fy, latest_pd,
-                           "growth", f"{label_stub} Stability", round(stdev, 4))
+            _emit(latest_fy, latest_pd, f"{label_stub} Stability", round(stdev, 4))
 
     # ── D) Margin trend (3Y delta for Net Margin and Operating Margin)
     for code, metric_label, stmt_type in [
@@ -6008,7 +6064,7 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
         ("OPERATING_INCOME", "Operating Margin", "income"),
     ]:
         margin_by_year = _fetch_series(code, stmt_type)
-        revenue_by_year = _fetch_series("REVENUE", "income", codes=["REVENUE", "TOTAL_REVENUE", "NET_REVENUE"])
+        revenue_by_year = _fetch_series("REVENUE", "income", codes=REVENUE_CODES)
         if latest_fy in margin_by_year and latest_fy in revenue_by_year:
             for n_years in [3]:
                 start_fy = latest_fy - n_years
@@ -6020,28 +6076,29 @@ def _calculate_growth(stock_id: int) -> Dict[str, List[Dict[str, Any]]]:
                     margin_now = margin_by_year[latest_fy]["amount"] / revenue_by_year[latest_fy]["amount"]
                     margin_then = margin_by_year[start_fy]["amount"] / revenue_by_year[start_fy]["amount"]
                     delta = margin_now - margin_then  # positive = improving
-                    _upsert_metric(stock_id, latest_fy, latest_pd,
-                                   "growth", f"{metric_label} Trend 3Y", round(delta, 4))
+                    _emit(latest_fy, latest_pd, f"{metric_label} Trend 3Y", round(delta, 4))
 
     # ── E) Profit-aware growth flag: revenue growing but margins falling
     rev_rates = growth.get("Revenue Growth", [])
     if rev_rates:
         latest_rev_g = rev_rates[-1]["growth"]
         # Check if revenue grew but net margin declined
-        nm_trend = None
-        nm_trend_rows = query_all(
-            "SELECT metric_value FROM stock_metrics WHERE stock_id = ? AND metric_name = ? ORDER BY period_end_date DESC LIMIT 1",
-            (stock_id, "Net Margin Trend 3Y"),
+        # Prefer the trend computed above; fall back to the stored value
+        nm_trend = next(
+            (r[6] for r in reversed(rows) if r[5] == "Net Margin Trend 3Y"), None,
         )
-        if nm_trend_rows:
-            nm_trend = nm_trend_rows[0][0] if isinstance(nm_trend_rows[0], (tuple, list)) else nm_trend_rows[0]["metric_value"]
+        if nm_trend is None:
+            nm_trend_rows = query_all(
+                "SELECT metric_value FROM stock_metrics WHERE stock_id = ? AND metric_name = ? ORDER BY period_end_date DESC LIMIT 1",
+                (stock_id, "Net Margin Trend 3Y"),
+            )
+            if nm_trend_rows:
+                nm_trend = nm_trend_rows[0][0] if isinstance(nm_trend_rows[0], (tuple, list)) else nm_trend_rows[0]["metric_value"]
         if latest_rev_g > 0.03 and nm_trend is not None and nm_trend < -0.02:
             # Revenue growing > 3% but net margin declined > 2pp → penalize
-            _upsert_metric(stock_id, latest_fy, latest_pd,
-                           "growth", "Growth Without Profit", 1.0)
+            _emit(latest_fy, latest_pd, "Growth Without Profit", 1.0)
         else:
-            _upsert_metric(stock_id, latest_fy, latest_pd,
-                           "growth", "Growth Without Profit", 0.0)
+            _emit(latest_fy, latest_pd, "Growth Without Profit", 0.0)
 
     return growth
 
@@ -6052,30 +6109,30 @@ def _compute_stock_score(stock_id: int, user_id: int) -> Dict[str, Any]:
     # ── Auto-recalculate all metrics from financial statements before scoring ──
     # This ensures newly added formulas (ROIC, Accruals Ratio, Net Debt/EBITDA, etc.)
     # are applied even if the user hasn't manually re-triggered metric calculation.
-    periods = query_all(
-        """SELECT DISTINCT period_end_date, fiscal_year, fiscal_quarter
-           FROM financial_statements
-           WHERE stock_id = ?
-           ORDER BY period_end_date""",
-        (stock_id,),
+    # All line items are loaded once and shared by every period's metrics,
+    # the growth pass and the EV inputs below.
+    matrix = LineItemMatrix.load(stock_id)
+    periods = sorted(
+        {(ped, fy, fq) for (_st, ped), (fy, fq) in matrix.meta.items()},
+        key=lambda p: p[0],
     )
-    for p in periods:
-        if isinstance(p, (tuple, list)):
-            ped, fy, fq = p[0], p[1], p[2]
-        else:
-            ped, fy, fq = p["period_end_date"], p["fiscal_year"], p.get("fiscal_quarter")
+    metric_rows: List[tuple] = []
+    for ped, fy, fq in periods:
         if ped and fy:
             try:
-                _calculate_all_metrics(stock_id, ped, fy, fq)
+                _calculate_all_metrics(stock_id, ped, fy, fq, sink=metric_rows, matrix=matrix)
             except Exception:
                 pass  # non-fatal, keep going
 
     # Recalculate growth (CAGRs, stability, trends, profit-aware growth)
     try:
-        _calculate_growth(stock_id)
+        _calculate_growth(stock_id, sink=metric_rows, matrix=matrix)
     except Exception:
         pass
 
+    # Persist every period's metrics in one transaction
+    _upsert_metrics_bulk(metric_rows)
+
     rows = query_all(
         "SELECT metric_name, metric_value FROM stock_metrics WHERE stock_id = ? ORDER BY period_end_date DESC",
         (stock_id,),
@@ -6099,7 +6156,7 @@ def _compute_stock_score(stock_id: int, user_id: int) -> Dict[str, Any]:
         symbol = symbol_row[0] if isinstance(symbol_row, (tuple, list)) else symbol_row.get("symbol")
     if symbol:
         yf_ticker = _resolve_yf_ticker(symbol, user_id)
-        yf_data = _fetch_yfinance_risk_data(yf_ticker)
+        yf_data = market_cache.get(yf_ticker, "risk")
         for k, v in yf_data.items():
             if k not in latest:  # don't overwrite DB metrics
                 latest[k] = v
@@ -6115,39 +6172,21 @@ def _compute_stock_score(stock_id: int, user_id: int) -> Dict[str, Any]:
             if eps and eps > 0:
                 latest["Earnings Yield"] = round(eps / cp, 6)
 
-            # Fetch shares, EBIT, total debt, cash from balance sheet line items
-            li_row = query_one("""
-                SELECT
-                    (SELECT li2.amount FROM financial_line_items li2
-                     JOIN financial_statements fs2 ON li2.statement_id = fs2.id
-                     WHERE fs2.stock_id = ? AND li2.line_item_code IN
-                           ('TOTAL_COMMON_SHARES_OUTSTANDING','DILUTED_SHARES_OUTSTANDING','BASIC_SHARES_OUTSTANDING')
-                     ORDER BY fs2.period_end_date DESC LIMIT 1) AS shares,
-                    (SELECT li2.amount FROM financial_line_items li2
-                     JOIN financial_statements fs2 ON li2.statement_id = fs2.id
-                     WHERE fs2.stock_id = ? AND li2.line_item_code = 'EBIT'
-                     ORDER BY fs2.period_end_date DESC LIMIT 1) AS ebit,
-                    (SELECT li2.amount FROM financial_line_items li2
-                     JOIN financial_statements fs2 ON li2.statement_id = fs2.id
-                     WHERE fs2.stock_id = ? AND li2.line_item_code = 'TOTAL_DEBT'
-                     ORDER BY fs2.period_end_date DESC LIMIT 1) AS total_debt,
-                    (SELECT li2.amount FROM financial_line_items li2
-                     JOIN financial_statements fs2 ON li2.statement_id = fs2.id
-                     WHERE fs2.stock_id = ? AND li2.line_item_code = 'CASH_EQUIVALENTS'
-                     ORDER BY fs2.period_end_date DESC LIMIT 1) AS cash
-            """, (stock_id, stock_id, stock_id, stock_id))
-            if li_row:
-                shares = li_row[0] if isinstance(li_row, (tuple, list)) else li_row.get("shares")
-                ebit = li_row[1] if isinstance(li_row, (tuple, list)) else li_row.get("ebit")
-                total_debt = li_row[2] if isinstance(li_row, (tuple, list)) else li_row.get("total_debt")
-                cash = li_row[3] if isinstance(li_row, (tuple, list)) else li_row.get("cash")
-
-                if shares and shares > 0:
-                    latest["Market Cap"] = cp * shares
-
-                    if ebit and ebit > 0:
-                        ev = cp * shares + (total_debt or 0) - (cash or 0)
-                        latest["EV/EBIT"] = round(ev / ebit, 2)
+            # Shares, EBIT, total debt, cash — latest value of each
+            shares = matrix.latest(None, [
+                "TOTAL_COMMON_SHARES_OUTSTANDING",
+                "DILUTED_SHARES_OUTSTANDING",
+                "BASIC_SHARES_OUTSTANDING",
+            ])
+            ebit = matrix.latest(None, ["EBIT"])
+            total_debt = matrix.latest(None, ["TOTAL_DEBT"])
+            cash = matrix.latest(None, ["CASH_EQUIVALENTS"])
+            if shares and shares > 0:
+                latest["Market Cap"] = cp * shares
+
+                if ebit and ebit > 0:
+                    ev = cp * shares + (total_debt or 0) - (cash or 0)
+                    latest["EV/EBIT"] = round(ev / ebit, 2)
 
     # Also try to compute Discount to Intrinsic Value from latest valuation
     _enrich_intrinsic_discount(stock_id, latest)
@@ -6676,6 +6715,80 @@ def _fetch_yfinance_risk_data(symbol: str) -> Dict[str, float]:
     return data
 
 
+# ── Market fundamentals cache (see app/services/market_cache.py) ─────
+
+def _fetch_last_close(symbol: str) -> Dict[str, Any]:
+    """Last daily close from a 5-day history (raw, no .KW fils conversion)."""
+    import yfinance as yf
+    hist = yf.Ticker(symbol).history(period="5d")
+    if hist is None or hist.empty:
+        return {}
+    return {"close": float(hist["Close"].iloc[-1])}
+
+
+_WACC_INFO_FIELDS = (
+    "beta", "marketCap", "totalDebt", "interestExpense",
+    "incomeBeforeTax", "incomeTaxExpense",
+)
+
+
+def _fetch_wacc_inputs(symbol: str) -> Dict[str, Any]:
+    """The ``ticker.info`` fields used by the WACC defaults."""
+    import yfinance as yf
+    info = yf.Ticker(symbol).info or {}
+    data = {k: info.get(k) for k in _WACC_INFO_FIELDS}
+    return data if any(v is not None for v in data.values()) else {}
+
+
+def _fetch_beta_sa_payload(symbol: str) -> Dict[str, Any]:
+    beta = _fetch_beta_from_stockanalysis(symbol)
+    return {"beta": beta} if beta is not None else {}
+
+
+def _fetch_multiples_payload(symbol: str) -> Dict[str, Any]:
+    mults = _yf_multiples(symbol)
+    return mults if any(v is not None for k, v in mults.items() if k != "company_name") else {}
+
+
+def _cached_multiples(symbol: str) -> Dict[str, Any]:
+    """``_yf_multiples`` through the cache; all-None entry when unavailable."""
+    mults = dict(market_cache.get(symbol, "multiples"))
+    for k in ("pe", "pb", "ps", "pcf", "ev_ebitda", "eps", "price"):
+        mults.setdefault(k, None)
+    return mults
+
+
+def _analysis_yf_tickers() -> List[str]:
+    """Resolved yfinance tickers of every analysis stock (refresher seed)."""
+    rows = query_all("SELECT DISTINCT symbol, user_id FROM analysis_stocks")
+    return [_resolve_yf_ticker(r["symbol"], r["user_id"]) for r in rows if r["symbol"]]
+
+
+def _kw_analysis_symbols() -> List[str]:
+    return [t[:-3].upper() for t in _analysis_yf_tickers() if t.upper().endswith(".KW")]
+
+
+def _peer_symbols() -> List[str]:
+    rows = query_all("SELECT DISTINCT peer_symbol FROM peer_companies")
+    return [r["peer_symbol"] for r in rows if r["peer_symbol"]]
+
+
+def _register_market_cache_groups() -> None:
+    from app.core.config import get_settings
+    cfg = get_settings()
+    market_cache.register("risk", _fetch_yfinance_risk_data, cfg.MARKET_CACHE_TTL_RISK, _analysis_yf_tickers)
+    market_cache.register(
+        "quote", _fetch_last_close, cfg.MARKET_CACHE_TTL_VALUATION,
+        lambda: _analysis_yf_tickers() + ["^TNX"],
+    )
+    market_cache.register("wacc", _fetch_wacc_inputs, cfg.MARKET_CACHE_TTL_VALUATION, _analysis_yf_tickers)
+    market_cache.register("beta_sa", _fetch_beta_sa_payload, cfg.MARKET_CACHE_TTL_BETA, _kw_analysis_symbols)
+    market_cache.register("multiples", _fetch_multiples_payload, cfg.MARKET_CACHE_TTL_MULTIPLES, _peer_symbols)
+
+
+_register_market_cache_groups()
+
+
 def _score_risk_detailed(m: Dict[str, float]):
     """Score risk / downside: volatility, drawdown, balance sheet risk, earnings risk, size."""
     score = 50.0
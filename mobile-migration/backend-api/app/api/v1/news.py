@@ -12,26 +12,30 @@ Categories:
 Endpoints:
   GET  /feed        — paginated live feed with optional symbol/category filtering
   GET  /history     — paginated stored history with date-range filtering
+  GET  /search      — full-text search (ranked, highlighted, keyset-paged)
   GET  /item/{id}   — single news item by NewsId
   GET  /sources     — list available sources
   POST /fetch-all   — bulk-fetch all available Boursa announcements and persist
 """
 
+import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.utils import format_datetime, parsedate_to_datetime
 from hashlib import md5
 from typing import Optional
 
 import httpx
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_, text
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
 from app.core.security import TokenData
 from app.models.news import NewsArticle
+from app.services import news_search
 
 logger = logging.getLogger(__name__)
 
@@ -762,6 +766,17 @@ async def _fetch_all_boursa_sources(lang_code: str) -> list[dict]:
     return merged
 
 
+def _filter_symbols(query, sym_list: list[str]):
+    """Restrict *query* to articles tagged with any of *sym_list* (full-text index when present)."""
+    if not sym_list:
+        return query
+    clause = news_search.symbol_clause(sym_list)
+    if clause is not None:
+        sql, params = clause
+        return query.filter(text(sql).bindparams(**params))
+    return query.filter(or_(*(NewsArticle.related_symbols.ilike(f"%{sym}%") for sym in sym_list)))
+
+
 @router.get("/feed")
 async def news_feed(
     request: Request,
@@ -794,12 +809,8 @@ async def news_feed(
     query = db.query(NewsArticle).order_by(NewsArticle.published_at.desc())
 
     if symbols:
-        from sqlalchemy import or_
         sym_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
-        symbol_filters = [
-            NewsArticle.related_symbols.ilike(f"%{sym}%") for sym in sym_list
-        ]
-        query = query.filter(or_(*symbol_filters))
+        query = _filter_symbols(query, sym_list)
 
     if categories:
         cat_list = [c.strip() for c in categories.split(",") if c.strip()]
@@ -818,6 +829,9 @@ async def news_feed(
         .first()
     )
     last_modified_dt: Optional[datetime] = latest[0] if latest else None
+    if last_modified_dt is not None and last_modified_dt.tzinfo is None:
+        # Stored naive (UTC); format_datetime(usegmt=True) needs an aware value
+        last_modified_dt = last_modified_dt.replace(tzinfo=timezone.utc)
     latest_id: Optional[str] = latest[1] if latest else None
     # ETag combines newest id + total + paging coords so any change invalidates.
     etag_seed = f"{latest_id or ''}|{total}|{cursor or ''}|{limit}|{lang or ''}"
@@ -906,11 +920,7 @@ async def news_history(
     # Symbol filter
     if symbols:
         sym_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
-        from sqlalchemy import or_
-        symbol_filters = [
-            NewsArticle.related_symbols.ilike(f"%{sym}%") for sym in sym_list
-        ]
-        query = query.filter(or_(*symbol_filters))
+        query = _filter_symbols(query, sym_list)
 
     # Category filter
     if categories:
@@ -937,6 +947,51 @@ async def news_history(
     }
 
 
+@router.get("/search")
+async def news_search_endpoint(
+    q: str = Query(..., min_length=2, max_length=200, description="Search text (English or Arabic)"),
+    categories: Optional[str] = Query(None, description="Comma-separated category filters"),
+    lang: Optional[str] = Query(None, description="Filter by language: 'en' or 'ar'"),
+    sort: str = Query("relevance", pattern="^(relevance|recent)$"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Full-text search over stored articles.
+
+    Matches every word of `q` (the last one as a prefix), ranked by
+    relevance — title, then symbols, then summary — or newest first with
+    `sort=recent`.  Each item carries a `snippet` with matches wrapped in
+    `<mark>…</mark>`.  Pass `nextPageCursor` back as `cursor` for the
+    next page.
+    """
+    cat_list = [c.strip() for c in categories.split(",") if c.strip()] if categories else None
+    try:
+        hits, next_cursor = await asyncio.to_thread(
+            news_search.search, q,
+            lang=lang, categories=cat_list, sort=sort, cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    rows = {
+        row.id: row
+        for row in db.query(NewsArticle).filter(NewsArticle.id.in_([h["id"] for h in hits])).all()
+    } if hits else {}
+    items = [
+        {**_db_row_to_item(rows[h["id"]]), "snippet": h["snippet"], "score": round(h["score"], 6)}
+        for h in hits
+        if h["id"] in rows
+    ]
+    return {
+        "items": items,
+        "nextPageCursor": next_cursor,
+        "updatedAt": datetime.utcnow().isoformat(),
+    }
+
+
 @router.get("/item/{news_id}")
 async def news_item(
     news_id: str,
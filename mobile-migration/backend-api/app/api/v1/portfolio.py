@@ -6,9 +6,12 @@ so the frontend never needs to do currency math.
 """
 
 import io
+import json
+import hashlib
 import time
+import base64
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date
 
 import pandas as pd
@@ -17,8 +20,10 @@ from starlette.responses import StreamingResponse
 
 from app.api.deps import get_current_user
 from app.core.security import TokenData
+from app.core.cache import get_cache
 from app.core.exceptions import NotFoundError, BadRequestError
 from app.core.database import query_df, query_one, exec_sql, column_exists
+from app.core.json_response import SafeJSONResponse, frame_rows
 from app.services.portfolio_service import (
     PortfolioService,
     get_complete_overview,
@@ -28,6 +33,7 @@ from app.services.portfolio_service import (
     get_current_holdings,
     build_portfolio_table,
     get_account_balances,
+    clear_wac_snapshots,
 )
 from app.services.fx_service import PORTFOLIO_CCY, get_usd_kwd_rate, convert_to_kwd
 from app.services.audit_service import (
@@ -35,6 +41,7 @@ from app.services.audit_service import (
     ADMIN_ACTION,
 )
 from app.schemas.portfolio import TransactionCreate, TransactionUpdate
+from app.services.symbol_service import resolve_symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -235,6 +242,88 @@ async def fx_rate(current_user: TokenData = Depends(get_current_user)):
 
 # ── Transaction CRUD ─────────────────────────────────────────────────
 
+# Cached COUNT(*) per (user, filters) in the shared cache.  Any transaction
+# write by that user here bumps their generation, which orphans every
+# cached total on all workers; other writers (backup import) are covered
+# by the TTL.
+_TXN_TOTALS_TTL = 60.0
+
+
+def _txn_totals_gen(user_id: int) -> int:
+    return int(get_cache().get(f"txn_totals_gen:{user_id}") or 0)
+
+
+def _invalidate_txn_totals(user_id: int) -> None:
+    get_cache().incr(f"txn_totals_gen:{user_id}")
+
+
+def _count_transactions(user_id: int, where: str, params: tuple) -> int:
+    digest = hashlib.sha1(repr((where, params)).encode()).hexdigest()
+    key = f"txn_total:{user_id}:{_txn_totals_gen(user_id)}:{digest}"
+    total = get_cache().get(key)
+    if total is not None:
+        return total
+    from app.core.database import query_val
+    total = int(query_val(f"SELECT COUNT(*) FROM transactions WHERE {where}", params) or 0)
+    get_cache().set(key, total, ttl=_TXN_TOTALS_TTL)
+    return total
+
+
+def _encode_cursor(txn_date: Optional[str], txn_id: int) -> str:
+    raw = json.dumps([txn_date, int(txn_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        txn_date, txn_id = json.loads(raw)
+        if txn_date is not None and not isinstance(txn_date, str):
+            raise ValueError
+        return txn_date, int(txn_id)
+    except (ValueError, TypeError) as exc:
+        raise BadRequestError("Invalid pagination cursor") from exc
+
+
+_TXN_LIST_COLUMNS = """id, user_id, portfolio, stock_symbol, txn_date, txn_type,
+               shares, purchase_cost, sell_value, bonus_shares, cash_dividend,
+               reinvested_dividend, fees, price_override, planned_cum_shares,
+               broker, reference, notes, category, is_deleted, created_at"""
+
+
+def _keyset_page(where: str, params: list, cursor: str, limit: int) -> pd.DataFrame:
+    """
+    Up to *limit* + 1 rows after *cursor* in ``txn_date DESC, id DESC``
+    order, rows without a date last.  Each leg is a range scan on
+    ``idx_txn_user_del_date``.
+    """
+    after_date, after_id = _decode_cursor(cursor) if cursor else (None, None)
+    frames = []
+    if after_id is None or after_date is not None:
+        keyset, kparams = "", []
+        if after_id is not None:
+            keyset, kparams = " AND (txn_date, id) < (?, ?)", [after_date, after_id]
+        frames.append(query_df(
+            f"""SELECT {_TXN_LIST_COLUMNS} FROM transactions
+                WHERE {where} AND txn_date IS NOT NULL{keyset}
+                ORDER BY txn_date DESC, id DESC LIMIT ?""",
+            tuple(params + kparams + [limit + 1]),
+        ))
+    remaining = limit + 1 - sum(len(f) for f in frames)
+    if remaining > 0:
+        keyset, kparams = "", []
+        if after_id is not None and after_date is None:
+            keyset, kparams = " AND id < ?", [after_id]
+        frames.append(query_df(
+            f"""SELECT {_TXN_LIST_COLUMNS} FROM transactions
+                WHERE {where} AND txn_date IS NULL{keyset}
+                ORDER BY id DESC LIMIT ?""",
+            tuple(params + kparams + [remaining]),
+        ))
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else (frames[0] if frames else pd.DataFrame())
+
+
 @router.get("/transactions")
 async def list_transactions(
     portfolio: Optional[str] = Query(None),
@@ -242,60 +331,80 @@ async def list_transactions(
     txn_type: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor: '' for the first page, then next_cursor"),
+    include_total: bool = Query(False, description="Cursor mode: also return total_items (cached)"),
+    orient: str = Query("records", pattern="^(records|split)$", description="Row layout: 'records' or columnar 'split'"),
     current_user: TokenData = Depends(get_current_user),
 ):
-    """List transactions with optional filters and pagination."""
-    conditions = ["user_id = ?", "COALESCE(is_deleted, 0) = 0"]
+    """List transactions with optional filters and pagination.
+
+    Two pagination modes, both newest first (``txn_date DESC, id DESC``,
+    undated rows last):
+      - ``page`` / ``page_size`` (default): offset pages with totals.
+      - ``cursor``: keyset pages on ``(txn_date, id)`` for infinite scroll —
+        pass ``cursor=`` for the first page, then each response's
+        ``next_cursor``; cost does not grow with depth.  Totals only with
+        ``include_total``.
+
+    ``orient=split`` returns the rows as ``{"columns": [...], "data": [[...], ...]}``.
+    """
+    conditions = ["user_id = ?", "is_deleted = 0"]
     params: list = [current_user.user_id]
 
     if portfolio:
         conditions.append("portfolio = ?")
         params.append(portfolio)
     if stock_symbol:
-        conditions.append("TRIM(stock_symbol) = ?")
-        params.append(stock_symbol.strip())
+        # Alias-resolved key: an equality on idx_txn_user_symkey
+        conditions.append("symbol_key = ?")
+        params.append(resolve_symbol_key(current_user.user_id, stock_symbol))
     if txn_type:
         conditions.append("txn_type = ?")
         params.append(txn_type)
 
     where = " AND ".join(conditions)
 
-    # Count total
-    from app.core.database import query_val
-    total = query_val(f"SELECT COUNT(*) FROM transactions WHERE {where}", tuple(params))
-
-    # Fetch page
-    offset = (page - 1) * page_size
-    sql = f"""
-        SELECT id, user_id, portfolio, stock_symbol, txn_date, txn_type,
-               shares, purchase_cost, sell_value, bonus_shares, cash_dividend,
-               reinvested_dividend, fees, price_override, planned_cum_shares,
-               broker, reference, notes, category, is_deleted, created_at
-        FROM transactions
-        WHERE {where}
-        ORDER BY txn_date DESC, created_at DESC, id DESC
-        LIMIT ? OFFSET ?
-    """
-    params.extend([page_size, offset])
-
-    df = query_df(sql, tuple(params))
-    records = df.to_dict(orient="records") if not df.empty else []
-
-    total_pages = max(1, (total + page_size - 1) // page_size)
-
-    return {
+    if cursor is not None:
+        df = _keyset_page(where, params, cursor, page_size)
+        has_more = len(df) > page_size
+        df = df.iloc[:page_size]
+        next_cursor = None
+        if has_more:
+            last = df.iloc[-1]
+            last_date = last["txn_date"] if isinstance(last["txn_date"], str) else None
+            next_cursor = _encode_cursor(last_date, last["id"])
+        pagination = {"page_size": page_size, "next_cursor": next_cursor, "has_more": has_more}
+        if include_total:
+            pagination["total_items"] = _count_transactions(current_user.user_id, where, tuple(params))
+    else:
+        total = _count_transactions(current_user.user_id, where, tuple(params))
+        offset = (page - 1) * page_size
+        df = query_df(
+            f"""
+            SELECT {_TXN_LIST_COLUMNS}
+            FROM transactions
+            WHERE {where}
+            ORDER BY CASE WHEN txn_date IS NULL THEN 1 ELSE 0 END,
+                     txn_date DESC, id DESC
+            LIMIT ? OFFSET ?
+            """,
+            tuple(params + [page_size, offset]),
+        )
+        pagination = {
+            "page": page,
+            "page_size": page_size,
+            "total_items": total,
+            "total_pages": max(1, (total + page_size - 1) // page_size),
+        }
+
+    return SafeJSONResponse({
         "status": "ok",
         "data": {
-            "transactions": records,
-            "count": len(records),
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_items": total,
-                "total_pages": total_pages,
-            },
+            "transactions": frame_rows(df, orient),
+            "count": len(df),
+            "pagination": pagination,
         },
-    }
+    })
 
 
 @router.get("/transactions/{txn_id}")
@@ -340,6 +449,7 @@ async def create_transaction(
             raise BadRequestError("DIVIDEND_ONLY requires at least one of: cash_dividend, reinvested_dividend, bonus_shares")
 
     now = int(time.time())
+    sym_key = resolve_symbol_key(current_user.user_id, txn.stock_symbol)
 
     # Capture FX rate at transaction time (matches Streamlit's get_current_fx_rate())
     try:
@@ -349,15 +459,15 @@ async def create_transaction(
 
     exec_sql(
         """INSERT INTO transactions
-           (user_id, portfolio, stock_symbol, txn_date, txn_type, shares,
+           (user_id, portfolio, stock_symbol, symbol_key, txn_date, txn_type, shares,
             purchase_cost, sell_value, bonus_shares, cash_dividend,
             reinvested_dividend, fees, price_override, planned_cum_shares,
             broker, reference, notes, category, fx_rate_at_txn,
             source, is_deleted, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'portfolio', ?,
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'portfolio', ?,
                    'MANUAL', 0, ?)""",
         (
-            current_user.user_id, txn.portfolio, txn.stock_symbol,
+            current_user.user_id, txn.portfolio, txn.stock_symbol.strip(), sym_key,
             txn.txn_date, txn.txn_type, txn.shares,
             txn.purchase_cost or 0.0, txn.sell_value or 0.0, txn.bonus_shares or 0,
             txn.cash_dividend or 0.0, txn.reinvested_dividend or 0.0, txn.fees or 0.0,
@@ -366,12 +476,14 @@ async def create_transaction(
         ),
     )
 
+    clear_wac_snapshots(current_user.user_id, sym_key, txn.txn_date)
+
     # ── Auto-create stock record if missing (so price updater can find it)
     from app.core.database import query_val as _qv
     sym_upper = txn.stock_symbol.strip().upper()
     existing_stock = _qv(
-        "SELECT id FROM stocks WHERE TRIM(symbol) = ? AND user_id = ?",
-        (sym_upper, current_user.user_id),
+        "SELECT id FROM stocks WHERE symbol_key = ? AND user_id = ?",
+        (sym_key, current_user.user_id),
     )
     if not existing_stock and txn.txn_type in ("Buy", "Sell"):
         ccy = "USD" if txn.portfolio == "USA" else "KWD"
@@ -380,10 +492,10 @@ async def create_transaction(
         yf_ticker = _yahoo_symbol(sym_upper, ccy)
         exec_sql(
             """INSERT INTO stocks
-               (user_id, symbol, name, portfolio, currency, current_price,
+               (user_id, symbol, symbol_key, name, portfolio, currency, current_price,
                 yf_ticker, price_source, created_at)
-               VALUES (?, ?, ?, ?, ?, 0.0, ?, 'AUTO', ?)""",
-            (current_user.user_id, sym_upper, sym_upper, txn.portfolio,
+               VALUES (?, ?, ?, ?, ?, ?, 0.0, ?, 'AUTO', ?)""",
+            (current_user.user_id, sym_upper, sym_key, sym_upper, txn.portfolio,
              ccy, yf_ticker, int(time.time())),
         )
         logger.info("Auto-created stock record for %s (yf: %s)", sym_upper, yf_ticker)
@@ -403,6 +515,8 @@ async def create_transaction(
         request=request,
     )
 
+    _invalidate_txn_totals(current_user.user_id)
+
     # ── Ledger: recalculate portfolio cash (respects manual_override — matches Streamlit)
     # Streamlit: Buy → cash -= (cost+fees), Sell → cash += (proceeds-fees),
     #            Dividend → cash += cash_dividend
@@ -443,7 +557,7 @@ async def update_transaction(
     # Read old values so we can compute the delta (old → new) for manual-override cash
     existing = query_one(
         "SELECT id, portfolio, txn_type, purchase_cost, sell_value, "
-        "       cash_dividend, fees "
+        "       cash_dividend, fees, symbol_key, txn_date "
         "FROM transactions WHERE id = ? AND user_id = ? AND COALESCE(is_deleted, 0) = 0",
         (txn_id, current_user.user_id),
     )
@@ -463,6 +577,9 @@ async def update_transaction(
     updates = {k: v for k, v in body.model_dump(exclude_unset=True).items() if v is not None}
     if not updates:
         raise BadRequestError("No valid fields to update")
+    if "stock_symbol" in updates:
+        updates["stock_symbol"] = updates["stock_symbol"].strip()
+        updates["symbol_key"] = resolve_symbol_key(current_user.user_id, updates["stock_symbol"])
 
     set_clause = ", ".join(f"{k} = ?" for k in updates)
     params = list(updates.values()) + [txn_id, current_user.user_id]
@@ -471,6 +588,12 @@ async def update_transaction(
         f"UPDATE transactions SET {set_clause} WHERE id = ? AND user_id = ?",
         tuple(params),
     )
+    clear_wac_snapshots(current_user.user_id, existing["symbol_key"], existing["txn_date"])
+    clear_wac_snapshots(
+        current_user.user_id,
+        updates.get("symbol_key", existing["symbol_key"]),
+        updates.get("txn_date", existing["txn_date"]),
+    )
 
     log_event(
         TXN_UPDATE,
@@ -481,6 +604,8 @@ async def update_transaction(
         request=request,
     )
 
+    _invalidate_txn_totals(current_user.user_id)
+
     # ── Ledger: recalculate portfolio cash (respects manual_override — matches Streamlit)
     # Compute new delta from the updated fields (fall back to old values)
     new_txn_type = updates.get("txn_type", existing["txn_type"])
@@ -526,7 +651,7 @@ async def delete_transaction(
     """Soft-delete a transaction."""
     existing = query_one(
         "SELECT id, portfolio, txn_type, purchase_cost, sell_value, "
-        "       cash_dividend, fees "
+        "       cash_dividend, fees, symbol_key, txn_date "
         "FROM transactions WHERE id = ? AND user_id = ? AND COALESCE(is_deleted, 0) = 0",
         (txn_id, current_user.user_id),
     )
@@ -547,6 +672,7 @@ async def delete_transaction(
         "UPDATE transactions SET is_deleted = 1, deleted_at = ? WHERE id = ? AND user_id = ?",
         (now, txn_id, current_user.user_id),
     )
+    clear_wac_snapshots(current_user.user_id, existing["symbol_key"], existing["txn_date"])
 
     log_event(
         TXN_DELETE,
@@ -556,6 +682,8 @@ async def delete_transaction(
         request=request,
     )
 
+    _invalidate_txn_totals(current_user.user_id)
+
     # ── Ledger: recalculate portfolio cash (respects manual_override — matches Streamlit)
     # Reverse the cash effect of the deleted transaction
     svc = PortfolioService(current_user.user_id)
@@ -585,7 +713,7 @@ async def restore_transaction(
     """Restore a soft-deleted transaction."""
     existing = query_one(
         "SELECT id, portfolio, txn_type, purchase_cost, sell_value, "
-        "       cash_dividend, fees "
+        "       cash_dividend, fees, symbol_key, txn_date "
         "FROM transactions WHERE id = ? AND user_id = ? AND is_deleted = 1",
         (txn_id, current_user.user_id),
     )
@@ -605,6 +733,7 @@ async def restore_transaction(
         "UPDATE transactions SET is_deleted = 0, deleted_at = NULL WHERE id = ? AND user_id = ?",
         (txn_id, current_user.user_id),
     )
+    clear_wac_snapshots(current_user.user_id, existing["symbol_key"], existing["txn_date"])
 
     log_event(
         TXN_RESTORE,
@@ -614,6 +743,8 @@ async def restore_transaction(
         request=request,
     )
 
+    _invalidate_txn_totals(current_user.user_id)
+
     # ── Ledger: recalculate portfolio cash (respects manual_override — matches Streamlit)
     # Re-apply the cash effect of the restored transaction
     svc = PortfolioService(current_user.user_id)
@@ -679,6 +810,8 @@ async def delete_all_transactions(
         request=request,
     )
 
+    _invalidate_txn_totals(current_user.user_id)
+
     # ── Ledger: recalculate portfolio cash (respects manual_override — matches Streamlit)
     svc = PortfolioService(current_user.user_id)
     svc.recalc_portfolio_cash()  # force_override=False
@@ -15,6 +15,7 @@ from app.api.deps import get_current_user
 from app.core.security import TokenData
 from app.core.exceptions import NotFoundError, BadRequestError, ConflictError
 from app.core.database import query_df, query_one, query_val, exec_sql, get_connection
+from app.services.symbol_service import rekey_user, symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -153,11 +154,11 @@ async def create_security(
     now = int(time.time())
     exec_sql(
         """INSERT INTO securities_master
-           (security_id, user_id, exchange, canonical_ticker, display_name,
+           (security_id, user_id, exchange, canonical_ticker, symbol_key, display_name,
             isin, currency, country, status, sector, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
         (
-            security_id, uid, exchange, ticker,
+            security_id, uid, exchange, ticker, symbol_key(ticker),
             body.display_name or ticker,
             body.isin, body.currency, body.country,
             body.status, body.sector, now,
@@ -185,6 +186,9 @@ async def create_security(
         except Exception:
             pass  # skip duplicates
 
+    # Transactions / stocks using any of the aliases now key on the ticker
+    rekey_user(uid)
+
     return {
         "status": "ok",
         "data": {
@@ -214,6 +218,9 @@ async def update_security(
     if not updates:
         raise BadRequestError("No valid fields to update")
 
+    if "canonical_ticker" in updates:
+        updates["symbol_key"] = symbol_key(updates["canonical_ticker"])
+
     set_clause = ", ".join(f"{k} = ?" for k in updates)
     params = list(updates.values()) + [security_id, current_user.user_id]
 
@@ -221,6 +228,8 @@ async def update_security(
         f"UPDATE securities_master SET {set_clause} WHERE security_id = ? AND user_id = ?",
         tuple(params),
     )
+    if "canonical_ticker" in updates:
+        rekey_user(current_user.user_id)
 
     return {"status": "ok", "data": {"security_id": security_id, "message": "Security updated"}}
 
@@ -251,6 +260,7 @@ async def delete_security(
             (security_id, current_user.user_id),
         )
         conn.commit()
+    rekey_user(current_user.user_id)
 
     return {"status": "ok", "data": {"security_id": security_id, "message": "Security deleted"}}
 
@@ -305,6 +315,7 @@ async def add_alias(
         (security_id, uid, body.alias_name.strip(), body.alias_type,
          body.valid_from, body.valid_until, now),
     )
+    rekey_user(uid)
 
     return {"status": "ok", "data": {"alias_name": body.alias_name, "message": "Alias added"}}
 
@@ -327,5 +338,6 @@ async def delete_alias(
         "DELETE FROM security_aliases WHERE security_id = ? AND alias_name = ? AND user_id = ?",
         (security_id, alias_name, current_user.user_id),
     )
+    rekey_user(current_user.user_id)
 
     return {"status": "ok", "data": {"alias_name": alias_name, "message": "Alias deleted"}}
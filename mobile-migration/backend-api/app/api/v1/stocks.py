@@ -8,6 +8,7 @@ Includes stock-list browse (Kuwait / US hardcoded reference lists) and
 single-ticker yfinance price fetch for use at stock-creation time.
 """
 
+import asyncio
 import time
 import logging
 from typing import Optional, List
@@ -16,10 +17,14 @@ from fastapi import APIRouter, Depends, Query, Request
 from pydantic import BaseModel, Field
 
 from app.api.deps import get_current_user
+from app.core.config import get_settings
 from app.core.security import TokenData
 from app.core.exceptions import NotFoundError, BadRequestError, ConflictError
 from app.core.database import query_df, query_one, query_val, exec_sql, add_column_if_missing
 from app.data.stock_lists import KUWAIT_STOCKS, US_STOCKS
+from app.services import stock_search
+from app.services.portfolio_service import clear_wac_snapshots
+from app.services.symbol_service import resolve_symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -93,92 +98,51 @@ async def list_stocks(
 async def get_stock_list(
     market: str = Query("Kuwait", description="'Kuwait' or 'US'"),
     search: Optional[str] = Query(None, description="Filter by symbol or name"),
+    limit: int = Query(50, ge=1, le=500, description="Max results when searching"),
 ):
     """
     Return the hardcoded reference stock list for a given market.
     No auth required — this is public reference data.
     Each entry has: symbol, name, yf_ticker.
 
-    For US market: when search is provided and the hardcoded list has < 5
-    results, augment with live yfinance search results.
+    With *search*, results come ranked from the in-memory index (exact,
+    prefix, name word, substring, then fuzzy matches).  For the US market,
+    fewer than 5 hits are augmented with Yahoo search results — cached in
+    ``symbol_lookup_cache``, fetched on the lookup thread pool and waited
+    on for at most ``SYMBOL_LOOKUP_TIMEOUT`` seconds.
     """
     is_us = not market.lower().startswith("k")
-    stocks = KUWAIT_STOCKS if not is_us else US_STOCKS
-
-    if search:
-        q = search.upper()
-        stocks = [
-            s for s in stocks
-            if q in s["symbol"].upper() or q in s["name"].upper()
-        ]
-
-    # For US market: augment with live yfinance search when few hardcoded matches
-    if is_us and search and len(stocks) < 5:
-        try:
-            import yfinance as yf
+    market_name = "Kuwait" if not is_us else "US"
+
+    if not search or not search.strip():
+        stocks = list(KUWAIT_STOCKS if not is_us else US_STOCKS)
+    else:
+        stocks = stock_search.search(market_name, search, limit)
+
+        if is_us and len(stocks) < 5 and stock_search.wants_remote(search):
+            remote = await asyncio.to_thread(stock_search.cached_lookup, search)
+            if remote is None:
+                try:
+                    remote = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(stock_search.submit_lookup(search))),
+                        timeout=get_settings().SYMBOL_LOOKUP_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    remote = None  # keeps running; cached for the next keystroke
             existing_symbols = {s["symbol"].upper() for s in stocks}
-            resp = yf.screen(
-                yf.EquityQuery("is", ["exchange", "NMS", "NYQ", "NGM", "PCX", "BTS", "ASE"]),
-                size=25,
-                sortField="intradaymarketcap",
-                sortAsc=False,
-            )
-            # yfinance screener doesn't support name search, so try lookup
-            # Use yfinance.search for text-based search
-        except Exception:
-            pass
-
-        # Direct ticker lookup: try the search term as a symbol
-        try:
-            import yfinance as yf
-            sym_upper = search.strip().upper()
-            if sym_upper not in existing_symbols:
-                tk = yf.Ticker(sym_upper)
-                info = tk.info or {}
-                # Verify it's a real stock (has a name and market cap)
-                name = info.get("shortName") or info.get("longName")
-                if name and info.get("regularMarketPrice"):
-                    stocks.append({
-                        "symbol": sym_upper,
-                        "name": name,
-                        "yf_ticker": sym_upper,
-                    })
-                    existing_symbols.add(sym_upper)
-        except Exception:
-            pass
-
-        # Also try yfinance search API for broader matches
-        try:
-            import yfinance as yf
-            results = yf.search(search.strip(), max_results=10)
-            if results and "quotes" in results:
-                for qt in results["quotes"]:
-                    sym = qt.get("symbol", "")
-                    name = qt.get("shortname") or qt.get("longname") or ""
-                    exchange = qt.get("exchange", "")
-                    qtype = qt.get("quoteType", "")
-                    # Only include equities/ETFs on US exchanges
-                    if (
-                        sym
-                        and sym.upper() not in existing_symbols
-                        and qtype in ("EQUITY", "ETF")
-                        and not any(c in sym for c in ".:")  # Skip foreign tickers like ABC.L
-                    ):
-                        stocks.append({
-                            "symbol": sym.upper(),
-                            "name": name,
-                            "yf_ticker": sym.upper(),
-                        })
-                        existing_symbols.add(sym.upper())
-        except Exception:
-            pass
+            for entry in remote or []:
+                if len(stocks) >= limit:
+                    break
+                if entry["symbol"].upper() not in existing_symbols:
+                    stocks.append(entry)
+                    existing_symbols.add(entry["symbol"].upper())
 
     return {
         "status": "ok",
         "data": {
             "stocks": stocks,
             "count": len(stocks),
-            "market": "Kuwait" if not is_us else "US",
+            "market": market_name,
         },
     }
 
@@ -264,8 +228,8 @@ async def get_stock_by_symbol(
 ):
     """Get a stock by its symbol."""
     row = query_one(
-        "SELECT * FROM stocks WHERE TRIM(symbol) = ? AND user_id = ?",
-        (symbol.strip(), current_user.user_id),
+        "SELECT * FROM stocks WHERE symbol_key = ? AND user_id = ?",
+        (resolve_symbol_key(current_user.user_id, symbol), current_user.user_id),
     )
     if not row:
         raise NotFoundError("Stock", symbol)
@@ -283,14 +247,15 @@ async def create_stock(
     """Create a new stock entry."""
     uid = current_user.user_id
     symbol = body.symbol.strip().upper()
+    sym_key = resolve_symbol_key(uid, symbol)
 
     # Ensure yf_ticker column exists (additive migration)
     add_column_if_missing("stocks", "yf_ticker", "TEXT")
 
     # Check for duplicate symbol per user
     existing = query_val(
-        "SELECT id FROM stocks WHERE TRIM(symbol) = ? AND user_id = ?",
-        (symbol, uid),
+        "SELECT id FROM stocks WHERE symbol_key = ? AND user_id = ?",
+        (sym_key, uid),
     )
     if existing:
         raise ConflictError(f"Stock '{symbol}' already exists")
@@ -298,11 +263,11 @@ async def create_stock(
     now = int(time.time())
     exec_sql(
         """INSERT INTO stocks
-           (user_id, symbol, name, portfolio, currency, current_price,
+           (user_id, symbol, symbol_key, name, portfolio, currency, current_price,
             yf_ticker, tradingview_symbol, tradingview_exchange, price_source, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
         (
-            uid, symbol, body.name or symbol, body.portfolio,
+            uid, symbol, sym_key, body.name or symbol, body.portfolio,
             body.currency, body.current_price or 0.0,
             body.yf_ticker, body.tradingview_symbol, body.tradingview_exchange,
             body.price_source, now,
@@ -417,25 +382,28 @@ async def merge_stocks(
 
     source_sym = source["symbol"].strip()
     target_sym = target["symbol"].strip()
+    source_key = resolve_symbol_key(uid, source_sym)
+    target_key = resolve_symbol_key(uid, target_sym)
 
     # Count transactions that will be moved
     moved = query_val(
-        "SELECT COUNT(*) FROM transactions WHERE stock_symbol = ? AND user_id = ?",
-        (source_sym, uid),
+        "SELECT COUNT(*) FROM transactions WHERE symbol_key = ? AND user_id = ?",
+        (source_key, uid),
     ) or 0
 
     # Reassign transactions from source symbol to target symbol
     exec_sql(
-        "UPDATE transactions SET stock_symbol = ? WHERE stock_symbol = ? AND user_id = ?",
-        (target_sym, source_sym, uid),
+        "UPDATE transactions SET stock_symbol = ?, symbol_key = ? WHERE symbol_key = ? AND user_id = ?",
+        (target_sym, target_key, source_key, uid),
     )
 
     # Also update portfolio assignment on moved transactions if needed
     target_portfolio = target["portfolio"]
     exec_sql(
-        "UPDATE transactions SET portfolio = ? WHERE stock_symbol = ? AND user_id = ? AND (portfolio IS NULL OR portfolio = ?)",
-        (target_portfolio, target_sym, uid, source["portfolio"]),
+        "UPDATE transactions SET portfolio = ? WHERE symbol_key = ? AND user_id = ? AND (portfolio IS NULL OR portfolio = ?)",
+        (target_portfolio, target_key, uid, source["portfolio"]),
     )
+    clear_wac_snapshots(uid, target_key)
 
     # Delete the source stock record
     exec_sql(
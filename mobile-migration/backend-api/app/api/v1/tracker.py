@@ -6,11 +6,13 @@ Mirrors the Streamlit ``ui_portfolio_tracker()`` logic:
     build_portfolio_table(), adds manual cash, then inserts into
     portfolio_snapshots.
   - Delete all snapshots for the authenticated user.
+  - Backfill missing daily snapshots from transactions + price_history.
 
 NOTE: The read endpoints (GET /analytics/snapshots) already exist in
       analytics.py.  This router only handles write operations.
 """
 
+import asyncio
 import time
 import logging
 from datetime import date
@@ -24,7 +26,7 @@ from app.core.security import TokenData
 from app.core.exceptions import BadRequestError
 from app.core.database import query_df, query_val, exec_sql, add_column_if_missing
 from app.services.portfolio_service import build_portfolio_table, get_total_portfolio_value
-from app.services.fx_service import convert_to_kwd
+from app.services.fx_service import convert_series_to_kwd, flow_dates
 
 logger = logging.getLogger(__name__)
 
@@ -147,7 +149,8 @@ def _sum_deposits_kwd(uid: int, deposit_date: str) -> float:
     """Sum active deposits for a specific date, converting each to KWD.
 
     Matches Streamlit which always stores deposit_cash in KWD
-    (``convert_to_kwd(amount, currency)``).
+    (``convert_to_kwd(amount, currency)``).  With ``FX_DATED_FLOWS`` USD
+    deposits use the rate fixed on *deposit_date*.
     """
     rows = query_df(
         """SELECT amount, COALESCE(currency, 'KWD') AS currency
@@ -158,10 +161,8 @@ def _sum_deposits_kwd(uid: int, deposit_date: str) -> float:
     )
     if rows.empty:
         return 0.0
-    total = 0.0
-    for _, r in rows.iterrows():
-        total += convert_to_kwd(float(r["amount"]), str(r["currency"]))
-    return round(total, 3)
+    amounts = convert_series_to_kwd(rows["amount"], rows["currency"], flow_dates([deposit_date] * len(rows)))
+    return round(float(amounts.sum()), 3)
 
 
 def _calculate_accumulated_cash(uid: int) -> float:
@@ -178,11 +179,7 @@ def _calculate_accumulated_cash(uid: int) -> float:
     )
     if cash_df.empty:
         return 0.0
-    total = 0.0
-    for _, cr in cash_df.iterrows():
-        bal = float(cr["balance"]) if cr["balance"] else 0.0
-        total += convert_to_kwd(bal, str(cr["currency"]))
-    return round(total, 3)
+    return round(float(convert_series_to_kwd(cash_df["balance"], cash_df["currency"]).sum()), 3)
 
 
 def _create_snapshot_for_deposit(uid: int, deposit_date: str, deposit_kwd: float) -> None:
@@ -524,3 +521,27 @@ async def recalculate_snapshots_endpoint(
             "message": f"Recalculated {updated} snapshots",
         },
     }
+
+
+# ── Backfill historical snapshots ────────────────────────────────────
+
+@router.post("/backfill-snapshots")
+async def backfill_snapshots_endpoint(
+    start_date: Optional[date] = Query(None, description="First day (default: first transaction)"),
+    end_date: Optional[date] = Query(None, description="Last day (default: yesterday)"),
+    download: bool = Query(True, description="Download closes missing from price_history"),
+    overwrite: bool = Query(False, description="Also recompute days that already have a snapshot"),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """
+    Reconstruct missing daily snapshots from transactions, deposits and
+    historical closes, then recalculate all derived columns.
+    """
+    from app.services.price_history import backfill_snapshots
+
+    if start_date and end_date and start_date > end_date:
+        raise BadRequestError("start_date must be on or before end_date")
+    result = await asyncio.to_thread(
+        backfill_snapshots, current_user.user_id, start_date, end_date, download, overwrite,
+    )
+    return {"status": "ok", "data": result}
@@ -12,10 +12,11 @@ All heavy computation happens server-side so the mobile client receives
 ready-to-render data.
 """
 
+import asyncio
 import io
 import logging
 from datetime import date, datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 from fastapi import APIRouter, Depends, Query
@@ -23,13 +24,18 @@ from fastapi.responses import StreamingResponse
 
 from app.api.deps import get_current_user
 from app.core.security import TokenData
-from app.core.database import query_df, column_exists, add_column_if_missing, exec_sql
+from app.core.database import (
+    query_all, query_df, query_val, column_exists, add_column_if_missing, exec_sql, exec_sql_many,
+)
+from app.core.json_response import SafeJSONResponse
+from app.core.profiling import span
 from app.services.fx_service import (
-    convert_to_kwd,
-    safe_float,
+    convert_series_to_kwd,
+    flow_dates,
     get_usd_kwd_rate,
     PORTFOLIO_CCY,
 )
+from app.services.symbol_service import STOCKS_BY_KEY, resolve_symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +52,7 @@ def _soft_delete_filter(alias: str = "") -> str:
 
 # ── WAC Engine ───────────────────────────────────────────────────────
 
+@span("wac")
 def _build_position_state(user_id: int):
     """
     CFA/IFRS-compliant WAC calculation — processes ALL non-deleted
@@ -199,232 +206,298 @@ def _build_position_state(user_id: int):
     return position_state, txn_state
 
 
-# ── Main endpoint ────────────────────────────────────────────────────
+# ── Stored WAC snapshots ─────────────────────────────────────────────
 
-@router.get("/trading-summary")
-async def trading_summary(
-    portfolio: Optional[str] = Query(None, description="Filter by portfolio"),
-    txn_type: Optional[str] = Query(None, description="Filter by transaction type"),
-    search: Optional[str] = Query(None, description="Search symbol/notes/portfolio"),
-    source: Optional[str] = Query(None, description="Filter by source (MANUAL, UPLOAD, etc.)"),
-    date_from: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
-    date_to: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(100, ge=1, le=500),
-    current_user: TokenData = Depends(get_current_user),
-):
-    """
-    CFA/IFRS-compliant Trading Section summary — matches Streamlit exactly.
+_WAC_COLUMNS = [
+    ("avg_cost_at_txn", "REAL"),
+    ("realized_pnl_at_txn", "REAL"),
+    ("cost_basis_at_txn", "REAL"),
+    ("shares_held_at_txn", "REAL"),
+]
 
-    Returns:
-      - summary: 12 metric values (buys, sells, deposits, withdrawals,
-        unrealized/realized/total P&L, dividends, fees, net cash flow, return %)
-      - transactions: enriched list with avg_cost, pnl, pnl_pct, status, value
-      - pagination info
+
+def _ensure_wac_snapshots(user_id: int) -> int:
     """
-    user_id = current_user.user_id
+    Stamp the running-WAC columns (``*_at_txn``) on transactions that
+    were never stamped — new, imported or restored rows.
 
-    # 0) Ensure optional columns exist (additive migration — matches Streamlit init_db)
-    _OPTIONAL_COLS = [
-        ("avg_cost_at_txn", "REAL"),
-        ("realized_pnl_at_txn", "REAL"),
-        ("cost_basis_at_txn", "REAL"),
-        ("shares_held_at_txn", "REAL"),
-        ("is_deleted", "INTEGER DEFAULT 0"),
-        ("source", "TEXT"),
-        ("source_reference", "TEXT"),
-        ("category", "TEXT"),
-    ]
-    for col_name, col_type in _OPTIONAL_COLS:
-        try:
-            add_column_if_missing("transactions", col_name, col_type)
-        except Exception:
-            pass  # Best-effort — table may not exist yet
+    The trading summary reads position state from these columns, so the
+    chronological replay in ``_build_position_state`` only runs when a
+    row is missing them.  Stored values are never overwritten; ledger
+    writers clear the stale ones via ``clear_wac_snapshots``.
+    """
+    pending = query_df(
+        f"""SELECT id, stock_symbol, COALESCE(portfolio, 'KFH') AS portfolio
+            FROM transactions
+            WHERE user_id = ? {_soft_delete_filter()}
+              AND (cost_basis_at_txn IS NULL OR shares_held_at_txn IS NULL)""",
+        (user_id,),
+    )
+    if pending.empty:
+        return 0
 
-    # 1) Build WAC position state
     position_state, txn_state = _build_position_state(user_id)
+    params = []
+    for r in pending.itertuples(index=False):
+        snap = txn_state.get(int(r.id))
+        if snap is None:
+            continue
+        avg = snap.get("avg_cost_at_time", 0)
+        if avg <= 0:
+            st = position_state.get((r.stock_symbol, r.portfolio), {})
+            avg = st.get("avg_cost", 0) or st.get("last_known_avg_cost", 0)
+        realized = snap.get("realized_pnl", 0)
+        params.append((
+            round(float(avg), 8) if avg > 0 else None,
+            round(float(realized), 4) if realized else None,
+            round(float(snap["cost_basis"]), 4),
+            round(float(snap["shares_held"]), 6),
+            int(r.id),
+        ))
+    if not params:
+        return 0
 
-    # 2) Fetch all transactions with current prices
-    #    Build SELECT dynamically so missing columns get COALESCE(NULL, 0)
-    soft_del = _soft_delete_filter("t")
+    updated = exec_sql_many(
+        """UPDATE transactions SET
+               avg_cost_at_txn = CASE WHEN COALESCE(avg_cost_at_txn, 0) = 0
+                                      THEN COALESCE(?, avg_cost_at_txn)
+                                      ELSE avg_cost_at_txn END,
+               realized_pnl_at_txn = COALESCE(realized_pnl_at_txn, ?),
+               cost_basis_at_txn = COALESCE(cost_basis_at_txn, ?),
+               shares_held_at_txn = COALESCE(shares_held_at_txn, ?)
+           WHERE id = ?""",
+        params,
+    )
+    logger.info("Backfilled WAC columns for %d rows", updated)
+    return updated
 
-    has_avg_cost = column_exists("transactions", "avg_cost_at_txn")
-    has_realized  = column_exists("transactions", "realized_pnl_at_txn")
-    has_cost_basis = column_exists("transactions", "cost_basis_at_txn")
-    has_shares_held = column_exists("transactions", "shares_held_at_txn")
-    has_category = column_exists("transactions", "category")
 
-    avg_cost_col   = "t.avg_cost_at_txn"       if has_avg_cost    else "NULL AS avg_cost_at_txn"
-    realized_col   = "t.realized_pnl_at_txn"   if has_realized    else "NULL AS realized_pnl_at_txn"
-    cost_basis_col = "t.cost_basis_at_txn"      if has_cost_basis  else "NULL AS cost_basis_at_txn"
-    shares_held_col = "t.shares_held_at_txn"    if has_shares_held else "NULL AS shares_held_at_txn"
-    category_col   = "t.category"               if has_category    else "NULL AS category"
+# ── Summary queries ──────────────────────────────────────────────────
 
-    txn_sql = f"""
-        SELECT
-            t.id,
-            t.stock_symbol AS symbol,
-            t.txn_date AS date,
-            COALESCE(t.portfolio, s.portfolio, 'KFH') AS portfolio,
-            t.txn_type AS type,
-            {category_col},
-            COALESCE(t.shares, 0) AS quantity,
-            COALESCE(t.purchase_cost, 0) AS purchase_cost,
-            COALESCE(t.sell_value, 0) AS sell_value,
-            COALESCE(t.fees, 0) AS fees,
-            COALESCE(t.cash_dividend, 0) AS dividend,
-            COALESCE(t.bonus_shares, 0) AS bonus_shares,
-            t.reinvested_dividend,
-            t.notes,
-            COALESCE(t.source, 'MANUAL') AS source,
-            t.source_reference,
-            COALESCE(s.current_price, 0) AS current_price,
-            COALESCE(s.name, t.stock_symbol) AS company_name,
-            s.id AS stock_id,
-            {avg_cost_col},
-            {realized_col},
-            {cost_basis_col},
-            {shares_held_col}
-        FROM transactions t
-        LEFT JOIN stocks s ON UPPER(t.stock_symbol) = UPPER(s.symbol) AND t.user_id = s.user_id
-        WHERE t.user_id = ? {soft_del}
-        ORDER BY t.txn_date DESC, t.id DESC
+# Row portfolio as listed: the stock's portfolio when the txn has none
+_PF = "COALESCE(t.portfolio, s.portfolio, 'KFH')"
+
+# Binds the user id ahead of the WHERE parameters (see STOCKS_BY_KEY)
+_TXN_FROM = f"""
+    FROM transactions t
+    LEFT JOIN {STOCKS_BY_KEY} s ON s.user_id = t.user_id AND s.symbol_key = t.symbol_key
+"""
+
+
+def _date_param(value: Optional[str]) -> Optional[str]:
+    """``YYYY-MM-DD`` for a parseable date filter; unparseable filters are ignored."""
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+
+def _summary_where(
+    user_id: int, portfolio: Optional[str], date_from: Optional[str], date_to: Optional[str],
+) -> Tuple[List[str], list]:
+    """Conditions shared by the summary cards and the list (portfolio + date range)."""
+    conditions = ["t.user_id = ?", "t.is_deleted = 0"]
+    params: list = [user_id]
+    if portfolio:
+        conditions.append(f"{_PF} = ?")
+        params.append(portfolio)
+    if date_from:
+        conditions.append("t.txn_date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("t.txn_date <= ?")
+        params.append(date_to)
+    return conditions, params
+
+
+def _price_map(user_id: int) -> Dict[str, float]:
     """
-    df = query_df(txn_sql, (user_id,))
+    ``{symbol_key: current_price}`` for the user's priced stocks.
 
-    if df.empty:
-        return {
-            "status": "ok",
-            "data": {
-                "summary": _empty_summary(),
-                "transactions": [],
-                "pagination": {"page": 1, "page_size": page_size, "total_items": 0, "total_pages": 1},
-            },
-        }
+    Keys are alias-resolved, so a transaction under an old ticker finds
+    its canonical stock directly; ``X`` and ``X.KW`` stand in for each
+    other when only one of them is priced.
+    """
+    rows = query_all(
+        """SELECT symbol_key, current_price FROM stocks
+           WHERE user_id = ? AND current_price > 0 AND symbol_key IS NOT NULL""",
+        (user_id,),
+    )
+    prices = {r["symbol_key"]: float(r["current_price"]) for r in rows}
+    for key, price in list(prices.items()):
+        prices.setdefault(key[:-3] if key.endswith(".KW") else f"{key}.KW", price)
+    return prices
+
+
+def _latest_positions(user_id: int, conditions: List[str], params: list) -> pd.DataFrame:
+    """Newest stored WAC snapshot per (symbol, portfolio) among matching rows."""
+    return query_df(
+        f"""
+        SELECT symbol, portfolio, symbol_key, shares_held, cost_basis FROM (
+            SELECT t.stock_symbol AS symbol, {_PF} AS portfolio, t.symbol_key,
+                   t.shares_held_at_txn AS shares_held,
+                   t.cost_basis_at_txn AS cost_basis,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY t.stock_symbol, {_PF}
+                       ORDER BY CASE WHEN t.txn_date IS NULL THEN 1 ELSE 0 END,
+                                t.txn_date DESC, t.id DESC
+                   ) AS rn
+            {_TXN_FROM}
+            WHERE {" AND ".join(conditions)} AND t.stock_symbol IS NOT NULL
+        ) latest
+        WHERE rn = 1
+        """,
+        (user_id, *params),
+    )
 
-    # 3) Build price map fallback (same as ui.py)
-    price_sql = """
-        SELECT UPPER(symbol) as symbol_upper, symbol, current_price
-        FROM stocks WHERE user_id = ? AND current_price > 0
+
+@span("summary")
+def _summary_totals(
+    user_id: int,
+    portfolio: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    prices: Dict[str, float],
+) -> dict:
     """
-    price_df = query_df(price_sql, (user_id,))
-    price_map = {row["symbol_upper"]: row["current_price"] for _, row in price_df.iterrows()}
-
-    def lookup_price(row):
-        if row["current_price"] > 0:
-            return row["current_price"]
-        sym = str(row["symbol"]).upper() if row["symbol"] else ""
-        if not sym:
-            return 0
-        if sym in price_map:
-            return price_map[sym]
-        if sym.endswith(".KW") and sym[:-3] in price_map:
-            return price_map[sym[:-3]]
-        if f"{sym}.KW" in price_map:
-            return price_map[f"{sym}.KW"]
-        for stock_sym, price in price_map.items():
-            if sym in stock_sym or stock_sym in sym:
-                return price
-        return 0
+    The 12 summary metrics, all in KWD, from one aggregate query.
 
-    df["current_price"] = df.apply(lookup_price, axis=1)
-
-    # 4) Assign avg_cost per row — EVERY row gets the WAC snapshot
-    #    Priority: stored DB value > runtime WAC engine > last_known > related symbol
-    def get_avg_cost(row):
-        stored = row.get("avg_cost_at_txn")
-        if stored is not None and pd.notna(stored) and stored > 0:
-            return float(stored)
-        txn_id = row.get("id")
-        # WAC engine records avg_cost_at_time for ALL txn types
-        if txn_id in txn_state:
-            v = txn_state[txn_id].get("avg_cost_at_time", 0)
-            if v > 0:
-                return v
-        # Fallback: current or last_known position WAC
-        sym, port = row.get("symbol", ""), row.get("portfolio", "KFH")
-        key = (sym, port)
-        if key in position_state:
-            ac = position_state[key].get("avg_cost", 0) or position_state[key].get("last_known_avg_cost", 0)
-            if ac > 0:
-                return ac
-        # Cross-symbol fallback: e.g. "AGILITY PLC" → check "AGILITY" position
-        # Handles corporate restructurings / spin-offs
-        for (ps_sym, ps_port), ps_st in position_state.items():
-            if ps_port == port and ps_sym != sym:
-                if ps_sym in sym or sym in ps_sym:
-                    ac = ps_st.get("last_known_avg_cost", 0) or ps_st.get("avg_cost", 0)
-                    if ac > 0:
-                        return ac
-        return 0
+    Flows are summed per (portfolio, day) in SQL and converted to KWD
+    per group — same result as converting row by row.  Unrealized P&L
+    uses the newest stored snapshot of each position in range.
+    """
+    conditions, params = _summary_where(user_id, portfolio, date_from, date_to)
+    agg = query_df(
+        f"""
+        SELECT {_PF} AS portfolio, t.txn_date AS date,
+            SUM(CASE WHEN t.txn_type = 'Buy' THEN COALESCE(t.purchase_cost, 0) ELSE 0 END) AS buys,
+            SUM(CASE WHEN t.txn_type = 'Buy' THEN 1 ELSE 0 END) AS buy_count,
+            SUM(CASE WHEN t.txn_type = 'Sell' THEN COALESCE(t.sell_value, 0) ELSE 0 END) AS sells,
+            SUM(CASE WHEN t.txn_type = 'Sell' THEN 1 ELSE 0 END) AS sell_count,
+            SUM(CASE WHEN t.txn_type = 'Sell' THEN COALESCE(t.realized_pnl_at_txn, 0) ELSE 0 END) AS realized,
+            SUM(CASE WHEN t.txn_type = 'Withdrawal' OR t.category = 'FLOW_OUT'
+                     THEN COALESCE(t.sell_value, 0) ELSE 0 END) AS withdrawals,
+            SUM(CASE WHEN t.txn_type = 'Withdrawal' OR t.category = 'FLOW_OUT'
+                     THEN 1 ELSE 0 END) AS withdrawal_count,
+            SUM(COALESCE(t.cash_dividend, 0)) AS dividends,
+            SUM(CASE WHEN t.txn_type IN ('DIVIDEND_ONLY', 'Dividend') THEN 1 ELSE 0 END) AS dividend_count,
+            SUM(COALESCE(t.fees, 0)) AS fees,
+            COUNT(*) AS txn_count
+        {_TXN_FROM}
+        WHERE {" AND ".join(conditions)}
+        GROUP BY {_PF}, t.txn_date
+        """,
+        (user_id, *params),
+    )
 
-    df["avg_cost"] = df.apply(get_avg_cost, axis=1)
-
-    # 4b) Backfill: persist computed values for rows that don't have them.
-    #     Matches Streamlit recalculate_and_store_avg_costs() — stores all 4 columns:
-    #     avg_cost_at_txn, realized_pnl_at_txn, cost_basis_at_txn, shares_held_at_txn
-    if has_avg_cost:
-        backfill_count = 0
-        for _, row in df.iterrows():
-            txn_id = int(row["id"])
-            snap = txn_state.get(txn_id, {})
-            updates = {}
-
-            # avg_cost_at_txn
-            stored_ac = row.get("avg_cost_at_txn")
-            if (stored_ac is None or pd.isna(stored_ac) or stored_ac == 0) and row["avg_cost"] > 0:
-                updates["avg_cost_at_txn"] = round(float(row["avg_cost"]), 8)
-
-            # realized_pnl_at_txn (Sell transactions)
-            if has_realized:
-                stored_rpnl = row.get("realized_pnl_at_txn")
-                snap_rpnl = snap.get("realized_pnl", 0)
-                if (stored_rpnl is None or pd.isna(stored_rpnl)) and snap_rpnl != 0:
-                    updates["realized_pnl_at_txn"] = round(float(snap_rpnl), 4)
-
-            # cost_basis_at_txn
-            if has_cost_basis:
-                stored_cb = row.get("cost_basis_at_txn")
-                snap_cb = snap.get("cost_basis")
-                if (stored_cb is None or pd.isna(stored_cb)) and snap_cb is not None:
-                    updates["cost_basis_at_txn"] = round(float(snap_cb), 4)
-
-            # shares_held_at_txn
-            if has_shares_held:
-                stored_sh = row.get("shares_held_at_txn")
-                snap_sh = snap.get("shares_held")
-                if (stored_sh is None or pd.isna(stored_sh)) and snap_sh is not None:
-                    updates["shares_held_at_txn"] = round(float(snap_sh), 6)
-
-            if updates:
-                set_clause = ", ".join(f"{k} = ?" for k in updates)
-                vals = list(updates.values()) + [txn_id]
-                try:
-                    exec_sql(f"UPDATE transactions SET {set_clause} WHERE id = ?", tuple(vals))
-                    backfill_count += 1
-                except Exception as exc:
-                    logger.warning("Backfill id=%s failed: %s", txn_id, exc)
-
-        if backfill_count > 0:
-            logger.info("Backfilled WAC columns for %d rows", backfill_count)
-
-    # 5) Realized P&L per row
-    def get_realized_pnl(row):
-        if row.get("type") != "Sell":
-            return 0
-        stored = row.get("realized_pnl_at_txn")
-        if stored is not None and pd.notna(stored):
-            return float(stored)
-        txn_id = row.get("id")
-        if txn_id in txn_state:
-            return txn_state[txn_id].get("realized_pnl", 0)
-        return 0
+    def _sum_kwd(col: str) -> float:
+        if agg.empty:
+            return 0.0
+        ccy = agg["portfolio"].map(PORTFOLIO_CCY).fillna("KWD")
+        dates = flow_dates(pd.to_datetime(agg["date"], errors="coerce"))
+        return float(convert_series_to_kwd(agg[col], ccy, dates).sum())
+
+    def _count(col: str) -> int:
+        return int(agg[col].sum()) if not agg.empty else 0
+
+    total_buys = _sum_kwd("buys")
+    total_sells = _sum_kwd("sells")
+    total_withdrawals = _sum_kwd("withdrawals")
+    total_fees = _sum_kwd("fees")
+    total_realized_pnl = _sum_kwd("realized")
+    total_dividends = _sum_kwd("dividends")
+
+    # Deposits from cash_deposits table (source of truth), converted to KWD
+    # Separate positive (deposits) from negative (withdrawals) — matches overview logic
+    dep_sql = """
+        SELECT amount, currency, portfolio, deposit_date FROM cash_deposits
+        WHERE user_id = ? AND include_in_analysis = 1
+          AND COALESCE(is_deleted, 0) = 0
+    """
+    dep_params: list = [user_id]
+    if portfolio:
+        dep_sql += " AND portfolio = ?"
+        dep_params.append(portfolio)
+    if date_from:
+        dep_sql += " AND deposit_date >= ?"
+        dep_params.append(date_from)
+    if date_to:
+        dep_sql += " AND deposit_date <= ?"
+        dep_params.append(date_to)
+    dep_df = query_df(dep_sql, tuple(dep_params))
+    if not dep_df.empty:
+        dep_df["deposit_date"] = pd.to_datetime(dep_df["deposit_date"], errors="coerce")
+        dep_df["amount_kwd"] = convert_series_to_kwd(
+            dep_df["amount"], dep_df["currency"], flow_dates(dep_df["deposit_date"]),
+        )
+        # Only count positive amounts as deposits (negative = withdrawals)
+        pos_mask = dep_df["amount_kwd"] > 0
+        total_deposits = float(dep_df.loc[pos_mask, "amount_kwd"].sum())
+        deposit_count = int(pos_mask.sum())
+        # Add negative amounts (from cash_deposits) to withdrawals
+        neg_mask = dep_df["amount_kwd"] < 0
+        total_withdrawals += float(dep_df.loc[neg_mask, "amount_kwd"].abs().sum())
+    else:
+        total_deposits = 0.0
+        deposit_count = 0
+
+    # Unrealized P&L of positions still held at their newest row in range
+    total_unrealized_pnl = 0.0
+    latest = _latest_positions(user_id, conditions, params)
+    if not latest.empty:
+        cp = latest["symbol_key"].map(prices).fillna(0.0)
+        shares = pd.to_numeric(latest["shares_held"], errors="coerce").fillna(0.0)
+        cost = pd.to_numeric(latest["cost_basis"], errors="coerce").fillna(0.0)
+        held = (shares > 0) & (cp > 0)
+        if held.any():
+            native = (cp * shares - cost)[held]
+            ccy = latest.loc[held, "portfolio"].map(PORTFOLIO_CCY).fillna("KWD")
+            total_unrealized_pnl = float(convert_series_to_kwd(native, ccy).sum())
+
+    buy_count, sell_count = _count("buy_count"), _count("sell_count")
+    total_pnl = total_unrealized_pnl + total_realized_pnl
+    total_return = total_pnl + total_dividends
+    net_cash_flow = total_sells + total_deposits + total_dividends - total_buys - total_withdrawals - total_fees
+    total_return_pct = (total_return / total_buys * 100) if total_buys > 0 else 0
+
+    return {
+        "total_buys": round(total_buys, 3),
+        "buy_count": buy_count,
+        "total_sells": round(total_sells, 3),
+        "sell_count": sell_count,
+        "total_deposits": round(total_deposits, 3),
+        "deposit_count": deposit_count,
+        "total_withdrawals": round(total_withdrawals, 3),
+        "withdrawal_count": _count("withdrawal_count"),
+        "unrealized_pnl": round(total_unrealized_pnl, 3),
+        "realized_pnl": round(total_realized_pnl, 3),
+        "total_pnl": round(total_pnl, 3),
+        "total_dividends": round(total_dividends, 3),
+        "dividend_count": _count("dividend_count"),
+        "total_fees": round(total_fees, 3),
+        "net_cash_flow": round(net_cash_flow, 3),
+        "total_return_pct": round(total_return_pct, 2),
+        "total_transactions": _count("txn_count"),
+        "total_trades": buy_count + sell_count,
+        "currency": "KWD",
+    }
 
-    df["stored_realized_pnl"] = df.apply(get_realized_pnl, axis=1)
 
-    # 6) Derived columns
+def _enrich_page(df: pd.DataFrame, prices: Dict[str, float], is_open: Dict[Tuple[str, str], bool]) -> None:
+    """Derived list columns (price, value, status, pnl, pnl_pct) for one page, in place."""
+    df["current_price"] = (
+        df["current_price"].where(df["current_price"] > 0, df["symbol_key"].map(prices)).fillna(0.0)
+    )
+    stored_ac = pd.to_numeric(df["avg_cost_at_txn"], errors="coerce")
+    df["avg_cost"] = stored_ac.where(stored_ac > 0, 0.0)
+    df["realized_pnl_at_txn"] = pd.to_numeric(df["realized_pnl_at_txn"], errors="coerce").fillna(0.0)
     df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
+    def closed(r) -> bool:
+        return not is_open.get((r["symbol"], r["portfolio"]), True)
+
     def calc_price(r):
         if r["type"] == "Buy" and r["quantity"] and r["quantity"] > 0:
             return r["purchase_cost"] / r["quantity"]
@@ -432,13 +505,6 @@ async def trading_summary(
             return r["sell_value"] / r["quantity"]
         return 0
 
-    df["price"] = df.apply(calc_price, axis=1)
-
-    df["sell_price"] = df.apply(
-        lambda r: r["sell_value"] / r["quantity"] if r["type"] == "Sell" and r["quantity"] and r["quantity"] > 0 else 0,
-        axis=1,
-    )
-
     def calc_value(r):
         if r["type"] == "Buy":
             return r["purchase_cost"]
@@ -450,330 +516,263 @@ async def trading_summary(
             return r["purchase_cost"] + r["sell_value"]
         return 0
 
-    df["value"] = df.apply(calc_value, axis=1)
-
     def get_status(r):
         t = r["type"]
-        key = (r.get("symbol", ""), r.get("portfolio", "KFH"))
         if t == "Sell":
             return "Realized"
         elif t == "Buy":
-            if key in position_state and not position_state[key].get("position_open", False):
-                return "Closed"
-            return "Unrealized"
+            return "Closed" if closed(r) else "Unrealized"
         elif t in ("DIVIDEND_ONLY", "Dividend"):
             return "Income"
         elif t in ("Bonus Shares", "Bonus"):
             return "Bonus"
         return ""
 
-    df["status"] = df.apply(get_status, axis=1)
-
-    # 7) P&L calculation (CFA-compliant)
+    # P&L calculation (CFA-compliant)
     def calc_pnl(r):
-        typ = r.get("type", "")
-        txn_id = r.get("id")
-        qty = float(r.get("quantity", 0) or 0)
-        key = (r.get("symbol", ""), r.get("portfolio", "KFH"))
+        typ = r["type"]
+        qty = float(r["quantity"] or 0)
+        ac = float(r["avg_cost"] or 0)
 
         if typ == "Buy":
-            if key in position_state and not position_state[key].get("position_open", False):
+            if closed(r):
                 return 0
-            cp = float(r.get("current_price", 0) or 0)
-            ac = float(r.get("avg_cost", 0) or 0)
+            cp = float(r["current_price"] or 0)
             if cp > 0 and qty > 0 and ac > 0:
                 return (cp - ac) * qty
             if cp > 0 and qty > 0:
-                pc = float(r.get("purchase_cost", 0) or 0)
+                pc = float(r["purchase_cost"] or 0)
                 if pc > 0:
                     return (cp - pc / qty) * qty
             return 0
 
         elif typ == "Sell":
-            stored = r.get("stored_realized_pnl", 0)
+            stored = float(r["realized_pnl_at_txn"])
             if stored != 0:
                 return stored
-            if txn_id in txn_state:
-                return txn_state[txn_id].get("realized_pnl", 0)
-            sv = float(r.get("sell_value", 0) or 0)
-            ac = float(r.get("avg_cost", 0) or 0)
-            fees = float(r.get("fees", 0) or 0)
             if qty > 0 and ac > 0:
-                return (sv - fees) - ac * qty
+                return (float(r["sell_value"] or 0) - float(r["fees"] or 0)) - ac * qty
             return 0
 
         elif typ in ("DIVIDEND_ONLY", "Dividend"):
-            return float(r.get("dividend", 0) or 0)
+            return float(r["dividend"] or 0)
 
         return 0
 
     def calc_pnl_pct(r):
-        typ = r.get("type", "")
-        pnl = r.get("pnl", 0)
-        qty = float(r.get("quantity", 0) or 0)
-        ac = float(r.get("avg_cost", 0) or 0)
-        key = (r.get("symbol", ""), r.get("portfolio", "KFH"))
+        typ = r["type"]
+        pnl = r["pnl"]
+        qty = float(r["quantity"] or 0)
+        ac = float(r["avg_cost"] or 0)
 
         if typ == "Buy":
-            if key in position_state and not position_state[key].get("position_open", False):
+            if closed(r):
                 return 0
             if ac > 0 and qty > 0:
                 return (pnl / (ac * qty)) * 100
-            pc = float(r.get("purchase_cost", 0) or 0)
+            pc = float(r["purchase_cost"] or 0)
             if pc > 0:
                 return (pnl / pc) * 100
             return 0
 
         elif typ == "Sell":
-            if ac <= 0:
-                txn_id = r.get("id")
-                if txn_id in txn_state:
-                    ac = txn_state[txn_id].get("avg_cost_at_time", 0)
-            if ac <= 0:
-                stored = r.get("avg_cost_at_txn")
-                if stored is not None and pd.notna(stored):
-                    ac = float(stored)
             if ac > 0 and qty > 0:
                 return (pnl / (ac * qty)) * 100
             return 0
 
         return 0
 
+    df["price"] = df.apply(calc_price, axis=1)
+    df["sell_price"] = df.apply(
+        lambda r: r["sell_value"] / r["quantity"] if r["type"] == "Sell" and r["quantity"] and r["quantity"] > 0 else 0,
+        axis=1,
+    )
+    df["value"] = df.apply(calc_value, axis=1)
+    df["status"] = df.apply(get_status, axis=1)
     df["pnl"] = df.apply(calc_pnl, axis=1)
     df["pnl_pct"] = df.apply(calc_pnl_pct, axis=1)
 
-    # ── Apply date + portfolio filters BEFORE summary so cards reflect them ──
 
-    summary_df = df.copy()
-    if portfolio:
-        summary_df = summary_df[summary_df["portfolio"] == portfolio]
-    if date_from:
-        try:
-            dt_from = pd.Timestamp(date_from)
-            summary_df = summary_df[summary_df["date"] >= dt_from]
-        except Exception:
-            pass
-    if date_to:
+def _trading_summary(
+    user_id: int,
+    portfolio: Optional[str],
+    txn_type: Optional[str],
+    search: Optional[str],
+    source: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    page: int,
+    page_size: int,
+) -> dict:
+    # 0) Ensure optional columns exist (additive migration — matches Streamlit init_db)
+    _OPTIONAL_COLS = _WAC_COLUMNS + [
+        ("is_deleted", "INTEGER DEFAULT 0"),
+        ("source", "TEXT"),
+        ("source_reference", "TEXT"),
+        ("category", "TEXT"),
+    ]
+    for col_name, col_type in _OPTIONAL_COLS:
         try:
-            dt_to = pd.Timestamp(date_to)
-            summary_df = summary_df[summary_df["date"] <= dt_to]
+            add_column_if_missing("transactions", col_name, col_type)
         except Exception:
-            pass
-
-    # ── Helper: convert amount to KWD based on portfolio ─────────────
-
-    def _to_kwd(amount: float, portfolio_name: str) -> float:
-        """Convert a native-currency amount to KWD using portfolio's currency."""
-        ccy = PORTFOLIO_CCY.get(portfolio_name, "KWD")
-        return convert_to_kwd(amount, ccy)
-
-    # ── Summary metrics (CFA-compliant, matches ui.py) ───────────────
-    #    All values converted to KWD for unified total.
-
-    buy_df = summary_df[summary_df["type"] == "Buy"]
-    sell_df = summary_df[summary_df["type"] == "Sell"]
-    withdrawal_df = summary_df[(summary_df["type"] == "Withdrawal") | (summary_df["category"] == "FLOW_OUT")]
-    dividend_df = summary_df[summary_df["type"].isin(["DIVIDEND_ONLY", "Dividend"])]
-
-    # Convert buy/sell/withdrawal/fee/dividend amounts to KWD
-    total_buys = float(buy_df.apply(
-        lambda r: _to_kwd(float(r["purchase_cost"] or 0), r.get("portfolio", "KFH")), axis=1
-    ).sum()) if not buy_df.empty else 0
-    total_sells = float(sell_df.apply(
-        lambda r: _to_kwd(float(r["sell_value"] or 0), r.get("portfolio", "KFH")), axis=1
-    ).sum()) if not sell_df.empty else 0
-    total_withdrawals = float(withdrawal_df.apply(
-        lambda r: _to_kwd(float(r["sell_value"] or 0), r.get("portfolio", "KFH")), axis=1
-    ).sum()) if not withdrawal_df.empty else 0
-    total_fees = float(summary_df.apply(
-        lambda r: _to_kwd(float(r["fees"] or 0), r.get("portfolio", "KFH")), axis=1
-    ).sum())
-
-    # Deposits from cash_deposits table (source of truth), converted to KWD
-    # Separate positive (deposits) from negative (withdrawals) — matches overview logic
-    dep_sql = """
-        SELECT amount, currency, portfolio, deposit_date FROM cash_deposits
-        WHERE user_id = ? AND include_in_analysis = 1
-          AND COALESCE(is_deleted, 0) = 0
-    """
-    dep_params = [user_id]
-    if portfolio:
-        dep_sql += " AND portfolio = ?"
-        dep_params.append(portfolio)
-    dep_df = query_df(dep_sql, tuple(dep_params))
-    if not dep_df.empty:
-        # Apply date filter to deposits too
-        dep_df["deposit_date"] = pd.to_datetime(dep_df["deposit_date"], errors="coerce")
-        if date_from:
-            try:
-                dep_df = dep_df[dep_df["deposit_date"] >= pd.Timestamp(date_from)]
-            except Exception:
-                pass
-        if date_to:
-            try:
-                dep_df = dep_df[dep_df["deposit_date"] <= pd.Timestamp(date_to)]
-            except Exception:
-                pass
-        dep_df["amount_kwd"] = dep_df.apply(
-            lambda r: convert_to_kwd(float(r["amount"]), r.get("currency", "KWD") or "KWD"), axis=1
-        )
-        # Only count positive amounts as deposits (negative = withdrawals)
-        pos_mask = dep_df["amount_kwd"] > 0
-        total_deposits = float(dep_df.loc[pos_mask, "amount_kwd"].sum())
-        deposit_count = int(pos_mask.sum())
-        # Add negative amounts (from cash_deposits) to withdrawals
-        neg_mask = dep_df["amount_kwd"] < 0
-        total_withdrawals += float(dep_df.loc[neg_mask, "amount_kwd"].abs().sum())
-    else:
-        total_deposits = 0.0
-        deposit_count = 0
-
-    # Realized P&L — convert each sell's realized PnL to KWD
-    if "stored_realized_pnl" in summary_df.columns and summary_df["stored_realized_pnl"].notna().any():
-        total_realized_pnl = float(summary_df.apply(
-            lambda r: _to_kwd(float(r.get("stored_realized_pnl", 0) or 0), r.get("portfolio", "KFH")),
-            axis=1,
-        ).sum())
-    else:
-        total_realized_pnl = sum(
-            _to_kwd(s["realized_pnl"], port)
-            for (sym, port), s in position_state.items()
-        )
-
-    # Dividends — convert to KWD
-    total_dividends = float(summary_df.apply(
-        lambda r: _to_kwd(float(r["dividend"] or 0), r.get("portfolio", "KFH")), axis=1
-    ).sum())
-
-    # Unrealized P&L from open positions — convert to KWD
-    total_unrealized_pnl = 0.0
-    if "shares_held_at_txn" in summary_df.columns and summary_df["shares_held_at_txn"].notna().any():
-        latest = summary_df.groupby(["symbol", "portfolio"]).first().reset_index()
-        for _, r in latest.iterrows():
-            sh = safe_float(r.get("shares_held_at_txn"), 0)
-            cb = safe_float(r.get("cost_basis_at_txn"), 0)
-            cp = safe_float(r.get("current_price"), 0)
-            port = r.get("portfolio", "KFH")
-            if sh > 0 and cp > 0:
-                native_pnl = cp * sh - cb
-                total_unrealized_pnl += _to_kwd(native_pnl, port)
-    else:
-        for (sym, port), st in position_state.items():
-            if st.get("position_open") and st["total_shares"] > 0:
-                prices = summary_df[(summary_df["symbol"] == sym) & (summary_df["portfolio"] == port)]["current_price"].dropna()
-                if prices.empty:
-                    prices = summary_df[summary_df["symbol"] == sym]["current_price"].dropna()
-                cp = float(prices.iloc[0]) if not prices.empty else 0
-                if cp > 0:
-                    native_pnl = cp * st["total_shares"] - st["total_cost"]
-                    total_unrealized_pnl += _to_kwd(native_pnl, port)
-
-    total_pnl = total_unrealized_pnl + total_realized_pnl
-    total_return = total_pnl + total_dividends
-    net_cash_flow = total_sells + total_deposits + total_dividends - total_buys - total_withdrawals - total_fees
-    total_return_pct = (total_return / total_buys * 100) if total_buys > 0 else 0
+            pass  # Best-effort — table may not exist yet
 
-    summary = {
-        "total_buys": round(total_buys, 3),
-        "buy_count": len(buy_df),
-        "total_sells": round(total_sells, 3),
-        "sell_count": len(sell_df),
-        "total_deposits": round(total_deposits, 3),
-        "deposit_count": deposit_count,
-        "total_withdrawals": round(total_withdrawals, 3),
-        "withdrawal_count": len(withdrawal_df),
-        "unrealized_pnl": round(total_unrealized_pnl, 3),
-        "realized_pnl": round(total_realized_pnl, 3),
-        "total_pnl": round(total_pnl, 3),
-        "total_dividends": round(total_dividends, 3),
-        "dividend_count": len(dividend_df),
-        "total_fees": round(total_fees, 3),
-        "net_cash_flow": round(net_cash_flow, 3),
-        "total_return_pct": round(total_return_pct, 2),
-        "total_transactions": len(summary_df),
-        "total_trades": len(buy_df) + len(sell_df),
-        "currency": "KWD",
-    }
+    if not query_val(
+        f"SELECT 1 FROM transactions WHERE user_id = ? {_soft_delete_filter()} LIMIT 1", (user_id,),
+    ):
+        return {
+            "summary": _empty_summary(),
+            "transactions": [],
+            "pagination": {"page": 1, "page_size": page_size, "total_items": 0, "total_pages": 1},
+        }
 
-    # ── Apply filters to transaction list ────────────────────────────
+    # 1) Position state = stored running WAC (replayed only for unstamped rows)
+    _ensure_wac_snapshots(user_id)
+    prices = _price_map(user_id)
 
-    filtered = df.copy()
+    # 2) Summary cards honour portfolio + date range only
+    date_from, date_to = _date_param(date_from), _date_param(date_to)
+    summary = _summary_totals(user_id, portfolio, date_from, date_to, prices)
 
-    if portfolio:
-        filtered = filtered[filtered["portfolio"] == portfolio]
+    # 3) List filters, pushed into SQL
+    conditions, params = _summary_where(user_id, portfolio, date_from, date_to)
     if txn_type:
-        filtered = filtered[filtered["type"] == txn_type]
+        conditions.append("t.txn_type = ?")
+        params.append(txn_type)
     if source:
-        filtered = filtered[filtered["source"].astype(str).str.upper() == source.upper()]
-    if date_from:
-        try:
-            dt_from = pd.Timestamp(date_from)
-            filtered = filtered[filtered["date"] >= dt_from]
-        except Exception:
-            pass
-    if date_to:
-        try:
-            dt_to = pd.Timestamp(date_to)
-            filtered = filtered[filtered["date"] <= dt_to]
-        except Exception:
-            pass
+        conditions.append("UPPER(COALESCE(t.source, 'MANUAL')) = ?")
+        params.append(source.strip().upper())
     if search:
-        q = search.strip().lower()
-        words = q.split()
-        for w in words:
-            mask = (
-                filtered["symbol"].astype(str).str.lower().str.contains(w, na=False)
-                | filtered["company_name"].astype(str).str.lower().str.contains(w, na=False)
-                | filtered["portfolio"].astype(str).str.lower().str.contains(w, na=False)
-                | filtered["type"].astype(str).str.lower().str.contains(w, na=False)
-                | filtered["notes"].astype(str).str.lower().str.contains(w, na=False)
-                | filtered["source"].astype(str).str.lower().str.contains(w, na=False)
-            )
-            filtered = filtered[mask]
-
-    total_filtered = len(filtered)
+        fields = [
+            "t.stock_symbol", "COALESCE(s.name, t.stock_symbol)", _PF,
+            "t.txn_type", "t.notes", "COALESCE(t.source, 'MANUAL')",
+        ]
+        for w in search.strip().lower().split():
+            conditions.append("(" + " OR ".join(f"LOWER({f}) LIKE ?" for f in fields) + ")")
+            params.extend([f"%{w}%"] * len(fields))
+    where = " AND ".join(conditions)
+
+    total_filtered = int(query_val(f"SELECT COUNT(*) {_TXN_FROM} WHERE {where}", (user_id, *params)) or 0)
     total_pages = max(1, (total_filtered + page_size - 1) // page_size)
     offset = (page - 1) * page_size
-    page_df = filtered.iloc[offset: offset + page_size]
 
-    # ── Serialize transactions ───────────────────────────────────────
+    # 4) Materialize only the requested page
+    page_df = query_df(
+        f"""
+        SELECT
+            t.id,
+            t.stock_symbol AS symbol,
+            t.symbol_key,
+            t.txn_date AS date,
+            {_PF} AS portfolio,
+            t.txn_type AS type,
+            t.category,
+            COALESCE(t.shares, 0) AS quantity,
+            COALESCE(t.purchase_cost, 0) AS purchase_cost,
+            COALESCE(t.sell_value, 0) AS sell_value,
+            COALESCE(t.fees, 0) AS fees,
+            COALESCE(t.cash_dividend, 0) AS dividend,
+            COALESCE(t.bonus_shares, 0) AS bonus_shares,
+            t.notes,
+            COALESCE(t.source, 'MANUAL') AS source,
+            COALESCE(s.current_price, 0) AS current_price,
+            COALESCE(s.name, t.stock_symbol) AS company_name,
+            s.id AS stock_id,
+            t.avg_cost_at_txn,
+            t.realized_pnl_at_txn
+        {_TXN_FROM}
+        WHERE {where}
+        ORDER BY t.txn_date DESC, t.id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (user_id, *params, page_size, offset),
+    )
 
-    cols = [
-        "id", "date", "symbol", "company_name", "stock_id", "portfolio", "type", "status", "source",
-        "quantity", "avg_cost", "price", "current_price", "sell_price",
-        "value", "pnl", "pnl_pct", "fees", "dividend", "bonus_shares", "notes",
-    ]
     records = []
-    for _, r in page_df.iterrows():
-        rec = {}
-        for c in cols:
-            v = r.get(c)
-            if c == "date":
-                rec[c] = v.strftime("%Y-%m-%d") if pd.notna(v) else None
-            elif isinstance(v, (float, int)):
-                rec[c] = round(float(v), 4) if pd.notna(v) else 0
-            else:
-                rec[c] = str(v) if pd.notna(v) else None
-        # Show current_price only for unrealized positions
-        if rec.get("status") != "Unrealized":
-            rec["current_price"] = 0
-        records.append(rec)
+    if not page_df.empty:
+        # Open/closed state of the page's positions (over all their rows)
+        symbols = sorted(page_df["symbol"].dropna().unique().tolist())
+        is_open: Dict[Tuple[str, str], bool] = {}
+        if symbols:
+            ph = ",".join("?" for _ in symbols)
+            latest = _latest_positions(
+                user_id,
+                ["t.user_id = ?", "t.is_deleted = 0", f"t.stock_symbol IN ({ph})"],
+                [user_id] + symbols,
+            )
+            is_open = {
+                (r.symbol, r.portfolio): bool(r.shares_held and r.shares_held > 0)
+                for r in latest.itertuples(index=False)
+            }
+        _enrich_page(page_df, prices, is_open)
+
+        # ── Serialize transactions ───────────────────────────────────
+        cols = [
+            "id", "date", "symbol", "company_name", "stock_id", "portfolio", "type", "status", "source",
+            "quantity", "avg_cost", "price", "current_price", "sell_price",
+            "value", "pnl", "pnl_pct", "fees", "dividend", "bonus_shares", "notes",
+        ]
+        for _, r in page_df.iterrows():
+            rec = {}
+            for c in cols:
+                v = r.get(c)
+                if c == "date":
+                    rec[c] = v.strftime("%Y-%m-%d") if pd.notna(v) else None
+                elif isinstance(v, (float, int)):
+                    rec[c] = round(float(v), 4) if pd.notna(v) else 0
+                else:
+                    rec[c] = str(v) if pd.notna(v) else None
+            # Show current_price only for unrealized positions
+            if rec.get("status") != "Unrealized":
+                rec["current_price"] = 0
+            records.append(rec)
 
     return {
-        "status": "ok",
-        "data": {
-            "summary": summary,
-            "transactions": records,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_items": total_filtered,
-                "total_pages": total_pages,
-            },
+        "summary": summary,
+        "transactions": records,
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total_items": total_filtered,
+            "total_pages": total_pages,
         },
     }
 
 
+# ── Main endpoint ────────────────────────────────────────────────────
+
+@router.get("/trading-summary")
+async def trading_summary(
+    portfolio: Optional[str] = Query(None, description="Filter by portfolio"),
+    txn_type: Optional[str] = Query(None, description="Filter by transaction type"),
+    search: Optional[str] = Query(None, description="Search symbol/notes/portfolio"),
+    source: Optional[str] = Query(None, description="Filter by source (MANUAL, UPLOAD, etc.)"),
+    date_from: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=500),
+    current_user: TokenData = Depends(get_current_user),
+):
+    """
+    CFA/IFRS-compliant Trading Section summary — matches Streamlit exactly.
+
+    Returns:
+      - summary: 12 metric values (buys, sells, deposits, withdrawals,
+        unrealized/realized/total P&L, dividends, fees, net cash flow, return %)
+      - transactions: enriched list with avg_cost, pnl, pnl_pct, status, value
+      - pagination info
+
+    Filters and paging run in SQL; only the requested page is enriched.
+    Summary cards honour the portfolio and date filters only.
+    """
+    data = await asyncio.to_thread(
+        _trading_summary,
+        current_user.user_id, portfolio, txn_type, search, source,
+        date_from, date_to, page, page_size,
+    )
+    return SafeJSONResponse({"status": "ok", "data": data})
+
+
 @router.patch("/rename-stock")
 async def rename_stock_by_symbol(
     symbol: str = Query(..., description="Stock symbol to rename"),
@@ -786,8 +785,8 @@ async def rename_stock_by_symbol(
     """
     user_id = current_user.user_id
     row = query_df(
-        "SELECT id, name FROM stocks WHERE UPPER(symbol) = UPPER(?) AND user_id = ?",
-        (symbol, user_id),
+        "SELECT id, name FROM stocks WHERE user_id = ? AND symbol_key = ?",
+        (user_id, resolve_symbol_key(user_id, symbol)),
     )
     if row.empty:
         from app.core.exceptions import NotFoundError
@@ -0,0 +1,359 @@
+"""
+Shared cache — one key/value store for the caches that must hold across workers.
+
+Module-level dicts are per process: with N gunicorn workers every worker
+re-fetches the same FX rate and keeps its own ETags.  Those caches go
+through :func:`get_cache` instead, whose backend is chosen by
+``CACHE_BACKEND``:
+
+  * ``memory``  — in-process LRU dict (single worker, tests, dev)
+  * ``sqlite``  — a WAL-mode SQLite file shared by every worker on the
+                  host (``CACHE_SQLITE_PATH``); no outside service needed
+  * ``redis``   — ``REDIS_URL``, shared across hosts (needs ``redis``)
+
+The rate limiter stores its counters in the same backend (see
+:mod:`app.core.limiter`), so limits hold across workers too.
+
+Values are any picklable object; counters made with :meth:`CacheBackend.incr`
+are plain ints.  An unreachable Redis or unwritable SQLite file falls back
+to ``memory`` with a warning rather than failing startup.
+"""
+
+import logging
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Key/value store with optional per-key TTL (seconds)."""
+
+    name: str = ""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Value for *key*, or None when missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store *value*; ``ttl=None`` keeps it until evicted or deleted."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop *key* if present."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add *amount* to a counter and return the new value.
+        *ttl* applies when the counter is created (fixed window)."""
+
+    @abstractmethod
+    def expiry(self, key: str) -> Optional[float]:
+        """Epoch seconds at which *key* expires (None: no TTL or missing)."""
+
+    @abstractmethod
+    def clear(self, prefix: str = "") -> int:
+        """Drop every key starting with *prefix*; returns how many."""
+
+    @property
+    @abstractmethod
+    def limiter_uri(self) -> str:
+        """slowapi/limits ``storage_uri`` backed by the same store."""
+
+
+# ── In-process ───────────────────────────────────────────────────────
+
+def _sizeof(value: Any) -> int:
+    """Approximate payload size: bytes (or lists of them) by length."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe LRU dict; evicts least recently used beyond *max_entries*
+    or, when *max_bytes* is set, beyond that many payload bytes (a single
+    value larger than the cap is not stored).
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 4096, max_bytes: Optional[int] = None):
+        self._max = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _live(self, key: str) -> Optional[Tuple[Any, Optional[float], int]]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            self._drop(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        size = _sizeof(value) if self._max_bytes is not None else 0
+        self._drop(key)
+        if self._max_bytes is not None and size > self._max_bytes:
+            return
+        self._data[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._data) > self._max or (
+            self._max_bytes is not None and self._bytes > self._max_bytes
+        ):
+            self._drop(next(iter(self._data)))
+
+    @property
+    def size_bytes(self) -> int:
+        """Payload bytes held (tracked only when *max_bytes* is set)."""
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._put(key, value, time.time() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                value, expires_at = amount, (time.time() + ttl if ttl else None)
+            else:
+                value, expires_at = int(entry[0]) + amount, entry[1]
+            self._put(key, value, expires_at)
+            return value
+
+    def expiry(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[1] if entry else None
+
+    def clear(self, prefix: str = "") -> int:
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                self._drop(k)
+            return len(keys)
+
+    @property
+    def limiter_uri(self) -> str:
+        return "memory://"
+
+
+# ── SQLite shared file ───────────────────────────────────────────────
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache in its own SQLite file (not the application database, which may
+    be PostgreSQL).  WAL mode lets every worker read while one writes;
+    counters update inside ``BEGIN IMMEDIATE`` so increments never race.
+    """
+
+    name = "sqlite"
+    _PURGE_EVERY = 60.0  # seconds between expired-row sweeps
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self._conn().execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                   key         TEXT PRIMARY KEY,
+                   value       BLOB,
+                   expires_at  REAL
+               )"""
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        return pickle.loads(value) if isinstance(value, bytes) else value
+
+    def _maybe_purge(self, conn: sqlite3.Connection, now: float) -> None:
+        if now - self._last_purge >= self._PURGE_EVERY:
+            self._last_purge = now
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl if ttl else None),
+        )
+        self._maybe_purge(conn, now)
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                value, expires_at = amount, (now + ttl if ttl else None)
+            else:
+                value, expires_at = int(self._decode(row[0])) + amount, row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def expiry(self, key: str) -> Optional[float]:
+        row = self._conn().execute(
+            "SELECT expires_at FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def clear(self, prefix: str = "") -> int:
+        cur = self._conn().execute(
+            "DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix),
+        )
+        return cur.rowcount
+
+    @property
+    def limiter_uri(self) -> str:
+        return f"sqlite:///{self.path}"
+
+
+# ── Redis ────────────────────────────────────────────────────────────
+
+class RedisCache(CacheBackend):
+    """Redis via redis-py; keys are namespaced with *prefix*."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "portfolio:"):
+        import redis  # optional dependency
+
+        self.url = url
+        self._prefix = prefix
+        self._r = redis.Redis.from_url(url, socket_timeout=2.0, socket_connect_timeout=2.0)
+        self._r.ping()
+
+    def _k(self, key: str) -> str:
+        return self._prefix + key
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Any:
+        if raw is None:
+            return None
+        # INCRBY counters are stored as decimal strings, everything else pickled
+        return pickle.loads(raw) if raw[:1] == b"\x80" else int(raw)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._decode(self._r.get(self._k(key)))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._r.set(
+            self._k(key),
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            px=int(ttl * 1000) if ttl else None,
+        )
+
+    def delete(self, key: str) -> None:
+        self._r.delete(self._k(key))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        value = int(self._r.incrby(self._k(key), amount))
+        if ttl and value == amount:  # just created
+            self._r.pexpire(self._k(key), int(ttl * 1000))
+        return value
+
+    def expiry(self, key: str) -> Optional[float]:
+        ms = self._r.pttl(self._k(key))
+        return time.time() + ms / 1000 if ms and ms > 0 else None
+
+    def clear(self, prefix: str = "") -> int:
+        keys = list(self._r.scan_iter(match=self._k(prefix) + "*", count=500))
+        return int(self._r.delete(*keys)) if keys else 0
+
+    @property
+    def limiter_uri(self) -> str:
+        return self.url
+
+
+# ── Factory ──────────────────────────────────────────────────────────
+
+def _sqlite_path() -> str:
+    # Beside the database rather than in a world-writable temp dir: values are pickled
+    settings = get_settings()
+    return settings.CACHE_SQLITE_PATH or settings.database_abs_path + ".cache"
+
+
+@lru_cache()
+def get_cache() -> CacheBackend:
+    """The process-wide cache backend selected by ``CACHE_BACKEND``."""
+    settings = get_settings()
+    kind = (settings.CACHE_BACKEND or "memory").strip().lower()
+    try:
+        if kind == "redis":
+            if not settings.REDIS_URL:
+                raise ValueError("REDIS_URL is not set")
+            backend: CacheBackend = RedisCache(settings.REDIS_URL)
+        elif kind == "sqlite":
+            backend = SQLiteCache(_sqlite_path())
+        else:
+            if kind != "memory":
+                logger.warning("Unknown CACHE_BACKEND %r — using memory", kind)
+            backend = MemoryCache()
+    except Exception as exc:
+        logger.warning("⚠️  %s cache backend unavailable (%s) — using in-process memory", kind, exc)
+        backend = MemoryCache()
+    logger.info("🗄️  Cache backend: %s", backend.name)
+    return backend
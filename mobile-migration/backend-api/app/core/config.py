@@ -45,14 +45,55 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: str = "http://localhost:19006,http://localhost:8081,http://localhost:3000"
 
+    # Response compression (JSON bodies; brotli used when installed)
+    RESPONSE_COMPRESSION: bool = True
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 5
+
+    # Request profiling (SQL counters + Server-Timing header)
+    REQUEST_PROFILING: bool = True
+    SERVER_TIMING_HEADER: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 0   # warn when one statement shape runs > N times per request (0 = off)
+
+    # Prometheus /metrics (multi-worker: set PROMETHEUS_MULTIPROC_DIR, see gunicorn.conf.py)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""             # when set, /metrics requires "Authorization: Bearer <token>"
+
+    # Shared cache + rate-limit counters (see app.core.cache):
+    # "memory" (per worker), "sqlite" (file shared by the workers on one host) or "redis"
+    CACHE_BACKEND: str = "memory"
+    CACHE_SQLITE_PATH: str = ""         # default: <DATABASE_PATH>.cache
+    REDIS_URL: str = ""                 # e.g. redis://localhost:6379/0 (pip install redis)
+
     # FX
     FX_CACHE_TTL: int = 3600  # 1 hour cache for USD/KWD rate
+    FX_DATED_FLOWS: bool = False  # convert dated USD flows at their own date's rate (fx_rates)
+
+    # Market fundamentals cache (yfinance / stockanalysis.com), seconds
+    MARKET_CACHE_TTL_RISK: int = 6 * 3600          # price, beta, volatility, drawdown
+    MARKET_CACHE_TTL_VALUATION: int = 6 * 3600     # price, ^TNX, WACC inputs
+    MARKET_CACHE_TTL_BETA: int = 7 * 86400         # stockanalysis.com beta (KW)
+    MARKET_CACHE_TTL_MULTIPLES: int = 86400        # peer P/E, P/B, EV/EBITDA …
+    MARKET_CACHE_REFRESH_MINUTES: int = 30         # background refresher interval
+
+    # Stock search (typeahead) — remote yfinance lookups for thin US results
+    SYMBOL_LOOKUP_TTL: int = 7 * 86400             # cached lookup results, seconds
+    SYMBOL_LOOKUP_TIMEOUT: float = 1.5             # max wait in a request; the lookup finishes in the background
+
+    # AI page extraction cache (content-addressed Gemini responses)
+    AI_PAGE_CACHE_MAX_MB: int = 256                # LRU-evict above this payload size
+    AI_PAGE_CACHE_MAX_AGE_DAYS: int = 180          # evict entries unused this long
 
     # Cron / Scheduler
     CRON_SECRET_KEY: str = ""           # Required for POST /api/cron/update-prices
     PRICE_UPDATE_HOUR: int = 14         # Hour (24h) in Asia/Kuwait to run daily
     PRICE_UPDATE_MINUTE: int = 0
     PRICE_UPDATE_ENABLED: bool = True   # Set False to disable the built-in scheduler
+    DAILY_JOB_CONCURRENCY: int = 4      # parallel users in the daily price + snapshot job (capped by the DB pool)
+    DAILY_JOB_USER_TIMEOUT: int = 300   # seconds per user before the run stops waiting on them
+    DAILY_JOB_MAX_ATTEMPTS: int = 3     # tries per user, with exponential backoff
+    DAILY_JOB_RETRY_BACKOFF: float = 5.0  # seconds before the first retry (doubles each time)
 
     # AI / Gemini (optional)
     GEMINI_API_KEY: str = ""            # Google Gemini API key for AI analysis
@@ -14,6 +14,7 @@ Both layers share the same underlying connection.
 """
 
 import sqlite3
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Generator, Optional
@@ -23,6 +24,8 @@ from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
 from app.core.config import get_settings
+from app.core import metrics
+from app.core.profiling import record_query
 
 _settings = get_settings()
 _DB_PATH = _settings.database_abs_path
@@ -77,6 +80,40 @@ else:
         cursor.close()
 
 
+def _observe_query(sql: str, seconds: float) -> None:
+    """Feed one statement's timing to the request profile and /metrics."""
+    record_query(sql, seconds)
+    metrics.observe_query(seconds)
+
+
+@event.listens_for(engine, "checkout")
+def _metrics_checkout(dbapi_conn, connection_record, connection_proxy):
+    metrics.connection_checked_out("sqlalchemy", engine.pool.overflow() if _USE_PG else None)
+
+
+@event.listens_for(engine, "checkin")
+def _metrics_checkin(dbapi_conn, connection_record):
+    metrics.connection_checked_in("sqlalchemy", engine.pool.overflow() if _USE_PG else None)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _profile_before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _profile_after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_query_started"].pop()
+    _observe_query(statement, time.perf_counter() - started)
+
+
+@event.listens_for(engine, "handle_error")
+def _profile_failed_execute(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("_query_started"):
+        conn.info["_query_started"].pop()
+
+
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 
@@ -143,6 +180,43 @@ def _ensure_wal_mode(conn: sqlite3.Connection) -> None:
     cur.close()
 
 
+# ── Profiled SQLite connections — feed app.core.profiling ──────────
+
+class _ProfiledCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports each statement's duration."""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _observe_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _observe_query(sql, time.perf_counter() - started)
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (and shortcut methods) are profiled."""
+
+    def cursor(self, factory=_ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _sqlite_connect() -> sqlite3.Connection:
+    return sqlite3.connect(_DB_PATH, check_same_thread=False, factory=_ProfiledConnection)
+
+
 # ── PG cursor proxy — translates ?-style placeholders to %s ─────────
 
 class _PgCursorProxy:
@@ -164,7 +238,11 @@ class _PgCursorProxy:
         is_insert = stripped.upper().lstrip().startswith("INSERT")
         if is_insert and "RETURNING" not in stripped.upper():
             translated = stripped + " RETURNING id"
-        self._cur.execute(translated, params)
+        started = time.perf_counter()
+        try:
+            self._cur.execute(translated, params)
+        finally:
+            _observe_query(translated, time.perf_counter() - started)
         if is_insert:
             row = self._cur.fetchone()
             self._lastrowid = row[0] if row else None
@@ -275,13 +353,15 @@ def get_connection():
         finally:
             raw.close()
     else:
-        conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
-        _ensure_wal_mode(conn)
-        conn.row_factory = sqlite3.Row  # dict-like rows
+        conn = _sqlite_connect()
+        metrics.connection_checked_out("sqlite")
         try:
+            _ensure_wal_mode(conn)
+            conn.row_factory = sqlite3.Row  # dict-like rows
             yield conn
         finally:
             conn.close()
+            metrics.connection_checked_in("sqlite")
 
 
 def get_conn():
@@ -293,7 +373,7 @@ def get_conn():
     if _USE_PG:
         raw = engine.raw_connection()
         return _PgConnProxy(raw)
-    conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
+    conn = _sqlite_connect()
     _ensure_wal_mode(conn)
     return conn
 
@@ -433,6 +513,25 @@ def exec_sql_batch(statements: list[tuple[str, tuple]]) -> None:
             conn.commit()
 
 
+def exec_sql_many(sql: str, params_list: list[tuple]) -> int:
+    """Execute one write statement for many parameter rows in a single transaction.
+
+    Uses ``executemany`` on SQLite and SQLAlchemy's batched executemany on
+    PostgreSQL.  Returns the number of parameter rows submitted.
+    """
+    if not params_list:
+        return 0
+    if _USE_PG:
+        pg_sql, _ = _pg_sql_named(sql, params_list[0])
+        with engine.begin() as conn:
+            conn.execute(text(pg_sql), [_positional_to_named(p) for p in params_list])
+        return len(params_list)
+    with get_connection() as conn:
+        conn.executemany(sql, params_list)
+        conn.commit()
+    return len(params_list)
+
+
 def column_exists(table: str, column: str) -> bool:
     """Check if a column exists in a table."""
     if _USE_PG:
@@ -5,14 +5,37 @@ by converting them to None (JSON null).
 Python's json module rejects these values by default because they
 are not valid JSON.  Pandas DataFrames and financial calculations
 frequently produce them (division by zero, missing data, etc.).
+
+With ``orjson`` installed, encoding is done in one native pass: orjson
+writes NaN / ±Infinity as null and serialises numpy arrays / scalars
+itself, so no Python-level pre-walk of the payload is needed.  Without
+it, the stdlib encoder is used after :func:`_sanitize`.
+
+Endpoints with large payloads can return ``SafeJSONResponse(payload)``
+directly — FastAPI then skips its own ``jsonable_encoder`` walk — and
+may offer DataFrame rows in columnar ``split`` orientation via
+:func:`frame_rows`.
 """
 
+import datetime as _dt
+import decimal
 import json
 import math
 from typing import Any
 
+import numpy as np
+import pandas as pd
 from starlette.responses import JSONResponse as _StarletteJSONResponse
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover — optional speed-up
+    orjson = None
+
+_ORJSON_OPTS = (
+    orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+
 
 def _sanitize(obj: Any) -> Any:
     """Recursively replace NaN / ±Infinity floats with None."""
@@ -27,13 +50,57 @@ def _sanitize(obj: Any) -> Any:
     return obj
 
 
+def _default(obj: Any) -> Any:
+    """Encode types neither encoder handles natively."""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Timestamp, _dt.datetime, _dt.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, pd.DataFrame):
+        return frame_rows(obj)
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode *content* to compact UTF-8 JSON with NaN / ±Inf as null."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTS)
+    return json.dumps(
+        _sanitize(content),
+        default=lambda o: _sanitize(_default(o)),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def frame_rows(df: pd.DataFrame, orient: str = "records") -> Any:
+    """DataFrame rows as a list of dicts (``records``) or, for ``split``,
+    ``{"columns": [...], "data": [[...], ...]}`` — one key list instead of
+    one per row, so large pages are a fraction of the size.
+    """
+    if orient == "split":
+        return df.to_dict(orient="split", index=False)
+    return df.to_dict(orient="records")
+
+
 class SafeJSONResponse(_StarletteJSONResponse):
     """JSONResponse subclass that sanitises NaN / Inf before encoding."""
 
     def render(self, content: Any) -> bytes:
-        return json.dumps(
-            _sanitize(content),
-            ensure_ascii=False,
-            allow_nan=False,
-            separators=(",", ":"),
-        ).encode("utf-8")
+        return dumps(content)
@@ -2,18 +2,68 @@
 Rate limiter — shared slowapi instance.
 
 Kept in its own module to avoid circular imports between main.py and routers.
+
+Counters live in the shared cache backend (``CACHE_BACKEND``, see
+:mod:`app.core.cache`) so a limit holds across gunicorn workers instead
+of being multiplied by their count.  ``memory://`` and ``redis://`` are
+native limits storages; ``sqlite:///<path>`` is registered below.
 """
 
 import os
+import sqlite3
+import time
+from urllib.parse import urlparse
 
+from limits.storage import Storage
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from app.core.cache import SQLiteCache, get_cache
+
 _enabled = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() != "false"
 
+_KEY_PREFIX = "ratelimit:"
+
+
+class SQLiteLimiterStorage(Storage):
+    """limits storage over :class:`SQLiteCache` (fixed-window strategy)."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._cache = SQLiteCache(urlparse(uri).path)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._cache.incr(_KEY_PREFIX + key, amount, ttl=expiry)
+
+    def get(self, key: str) -> int:
+        return int(self._cache.get(_KEY_PREFIX + key) or 0)
+
+    def get_expiry(self, key: str) -> float:
+        return self._cache.expiry(_KEY_PREFIX + key) or time.time()
+
+    def check(self) -> bool:
+        try:
+            self._cache.get(_KEY_PREFIX + "check")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._cache.clear(_KEY_PREFIX)
+
+    def clear(self, key: str) -> None:
+        self._cache.delete(_KEY_PREFIX + key)
+
+
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["120/minute"],          # global default
-    storage_uri="memory://",
+    storage_uri=get_cache().limiter_uri,
     enabled=_enabled,
 )
@@ -23,6 +23,9 @@ _EXTRA_KEYS = frozenset({
     "user_agent",
     "error_code",
     "query_count",
+    "db_ms",
+    "spans",
+    "slow_queries",
 })
 
 
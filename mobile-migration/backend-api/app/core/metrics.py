@@ -0,0 +1,198 @@
+"""
+Prometheus metrics — request latency, database, caches, background jobs.
+
+Exposed at ``GET /metrics`` in the Prometheus text format.
+``prometheus_client`` is optional: without it every recording helper
+below is a no-op and ``/metrics`` answers 503.
+
+Metric families:
+  • ``http_request_duration_seconds{method,route,status}`` — per route template
+  • ``db_query_duration_seconds`` / ``db_connections_in_use{pool}`` /
+    ``db_connection_checkouts_total{pool}`` / ``db_pool_overflow``
+  • ``cache_requests_total{cache,result}`` — fx, image, extraction, ai_page
+  • ``scheduler_job_duration_seconds{job}`` / ``scheduler_job_runs_total{job,outcome}``
+    / ``scheduler_job_last_success_timestamp_seconds{job}``
+  • ``news_poll_cycle_seconds`` / ``news_poll_fetches_total{result}``
+    (``result="not_modified"`` is the 304 rate) / ``news_poll_new_articles_total``
+  • ``extraction_jobs{status}`` — queue depth, read from the DB at scrape time
+
+Multiple gunicorn workers: set ``PROMETHEUS_MULTIPROC_DIR`` to an empty,
+writable directory before the workers start (``gunicorn.conf.py`` does
+this, and drops a dead worker's live gauges in ``child_exit``).  Every
+worker then writes its samples to files there and a scrape of any one
+worker aggregates all of them.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover — metrics are optional
+    prometheus_client = None
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+_JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+_QUEUE_STATUSES = ("queued", "running")
+
+
+if prometheus_client is not None:
+    HTTP_LATENCY = Histogram(
+        "http_request_duration_seconds", "Request latency by route template",
+        ["method", "route", "status"], buckets=_LATENCY_BUCKETS,
+    )
+    DB_QUERY = Histogram(
+        "db_query_duration_seconds", "SQL statement execution time",
+        buckets=_QUERY_BUCKETS,
+    )
+    DB_IN_USE = Gauge(
+        "db_connections_in_use", "Open / checked-out database connections",
+        ["pool"], multiprocess_mode="livesum",
+    )
+    DB_CHECKOUTS = Counter(
+        "db_connection_checkouts_total", "Database connections handed out", ["pool"],
+    )
+    DB_OVERFLOW = Gauge(
+        "db_pool_overflow", "SQLAlchemy pool connections beyond pool_size",
+        multiprocess_mode="livesum",
+    )
+    CACHE_REQUESTS = Counter(
+        "cache_requests_total", "Cache lookups by outcome", ["cache", "result"],
+    )
+    JOB_DURATION = Histogram(
+        "scheduler_job_duration_seconds", "Scheduler job run time",
+        ["job"], buckets=_JOB_BUCKETS,
+    )
+    JOB_RUNS = Counter(
+        "scheduler_job_runs_total", "Scheduler job runs by outcome", ["job", "outcome"],
+    )
+    JOB_LAST_SUCCESS = Gauge(
+        "scheduler_job_last_success_timestamp_seconds", "Unix time of the last successful run",
+        ["job"], multiprocess_mode="max",
+    )
+    NEWS_POLL = Histogram(
+        "news_poll_cycle_seconds", "News poller cycle time", buckets=_LATENCY_BUCKETS,
+    )
+    NEWS_FETCHES = Counter(
+        "news_poll_fetches_total", "Boursa feed requests by result", ["result"],
+    )
+    NEWS_ARTICLES = Counter(
+        "news_poll_new_articles_total", "Articles inserted by the news poller",
+    )
+
+
+# ── Recording helpers (no-ops without prometheus_client) ─────────────
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if prometheus_client is not None:
+        HTTP_LATENCY.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_query(seconds: float) -> None:
+    if prometheus_client is not None:
+        DB_QUERY.observe(seconds)
+
+
+def connection_checked_out(pool: str, overflow: Optional[int] = None) -> None:
+    if prometheus_client is not None:
+        DB_IN_USE.labels(pool).inc()
+        DB_CHECKOUTS.labels(pool).inc()
+        if overflow is not None:
+            DB_OVERFLOW.set(max(overflow, 0))
+
+
+def connection_checked_in(pool: str, overflow: Optional[int] = None) -> None:
+    if prometheus_client is not None:
+        DB_IN_USE.labels(pool).dec()
+        if overflow is not None:
+            DB_OVERFLOW.set(max(overflow, 0))
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def track_job(job: str) -> Iterator[None]:
+    """Time a scheduler job and count its outcome (errors are re-raised)."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        if prometheus_client is not None:
+            JOB_DURATION.labels(job).observe(time.perf_counter() - started)
+            JOB_RUNS.labels(job, outcome).inc()
+            if outcome == "success":
+                JOB_LAST_SUCCESS.labels(job).set(time.time())
+
+
+def observe_news_poll(seconds: float, new_articles: int = 0) -> None:
+    if prometheus_client is not None:
+        NEWS_POLL.observe(seconds)
+        if new_articles:
+            NEWS_ARTICLES.inc(new_articles)
+
+
+def news_fetch(result: str) -> None:
+    """Count one feed request: ``ok``, ``not_modified``, ``error`` or ``skipped``."""
+    if prometheus_client is not None:
+        NEWS_FETCHES.labels(result).inc()
+
+
+# ── Scrape ───────────────────────────────────────────────────────────
+
+class _ExtractionQueueCollector:
+    """``extraction_jobs{status}`` — counted in the DB at scrape time, so
+    the value is the same whichever worker serves the scrape."""
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "extraction_jobs", "Extraction jobs waiting or in progress", labels=["status"],
+        )
+        counts = dict.fromkeys(_QUEUE_STATUSES, 0)
+        try:
+            from app.core.database import query_all
+            ph = ",".join("?" for _ in _QUEUE_STATUSES)
+            for row in query_all(
+                f"SELECT status, COUNT(*) AS n FROM extraction_jobs "
+                f"WHERE status IN ({ph}) GROUP BY status",
+                _QUEUE_STATUSES,
+            ):
+                counts[row["status"]] = int(row["n"])
+        except Exception as exc:  # table not created yet, DB down …
+            logger.debug("metrics: extraction queue query failed: %s", exc)
+            return
+        for status, n in counts.items():
+            family.add_metric([status], n)
+        yield family
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the text exposition format, with its content type."""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    local = CollectorRegistry()
+    local.register(_ExtractionQueueCollector())
+    body = prometheus_client.generate_latest(registry) + prometheus_client.generate_latest(local)
+    return body, prometheus_client.CONTENT_TYPE_LATEST
+
+
+def available() -> bool:
+    return prometheus_client is not None
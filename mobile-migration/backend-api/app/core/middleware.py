@@ -5,9 +5,12 @@ Includes:
   1. Security headers (CSP, HSTS, X-Frame-Options, etc.)
   2. Request body size limit (DoS prevention)
   3. Correlation ID (X-Correlation-ID) for request tracing + contextvar logging
-  4. Request timing (X-Response-Time-Ms) with structured per-request latency logs
+  4. Request timing (X-Response-Time-Ms, Server-Timing) with structured
+     per-request latency / SQL logs and an opt-in N+1 detector
+  5. Response compression (brotli / gzip) for JSON payloads
 """
 
+import gzip
 import logging
 import time
 import uuid
@@ -16,6 +19,7 @@ from fastapi import Request, Response, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
+from app.core import metrics, profiling
 from app.core.config import get_settings
 from app.core.logging_config import correlation_id_var
 
@@ -143,15 +147,40 @@ class CorrelationIDMiddleware(BaseHTTPMiddleware):
 _timing_logger = logging.getLogger("app.request")
 
 # Paths to skip in access logs (noisy health checks, static files)
-_SKIP_LOG_PATHS = frozenset({"/health", "/api/health", "/favicon.ico", "/openapi.json"})
+_SKIP_LOG_PATHS = frozenset({"/health", "/api/health", "/favicon.ico", "/openapi.json", "/metrics"})
+
+
+def _route_template(request: Request) -> str:
+    """Matched route template (``/api/v1/portfolio/transactions/{txn_id}``) for
+    metric labels — bounded cardinality, unlike the raw path.
+
+    Included routers only leave the innermost route's path in the scope, so
+    the router prefix is taken from the concrete path by segment count
+    (no router prefix here contains path parameters).
+    """
+    template = getattr(request.scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    path = request.scope.get("path", "")
+    depth = template.count("/")
+    if ":path}" in template or path.count("/") <= depth:
+        return template
+    return path.rsplit("/", depth)[0] + template
 
 
 class RequestTimingMiddleware(BaseHTTPMiddleware):
     """
     Measures request processing time and adds X-Response-Time-Ms header.
+    Latency is also exported per route template to ``/metrics``.
 
     Emits structured per-request access log with method, path, status,
     duration, and client info. Warns on slow requests (>1s).
+
+    With ``REQUEST_PROFILING`` on, the request also runs under a
+    :mod:`app.core.profiling` profile: SQL count / time, the slowest
+    statements and labelled spans go into the access log and a
+    ``Server-Timing`` header, and repeated statement shapes above
+    ``SQL_N_PLUS_ONE_THRESHOLD`` are logged as likely N+1 queries.
     """
 
     SLOW_THRESHOLD_MS = 1000
@@ -159,14 +188,38 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
     async def dispatch(
         self, request: Request, call_next: RequestResponseEndpoint
     ) -> Response:
+        settings = get_settings()
+        profile = token = None
+        if settings.REQUEST_PROFILING:
+            profile, token = profiling.begin()
+
         start = time.perf_counter()
-        response = await call_next(request)
+        try:
+            response = await call_next(request)
+        finally:
+            if token is not None:
+                profiling.end(token)
         elapsed_ms = (time.perf_counter() - start) * 1000
 
         response.headers["X-Response-Time-Ms"] = f"{elapsed_ms:.1f}"
+        metrics.observe_request(
+            request.method, _route_template(request), response.status_code, elapsed_ms / 1000,
+        )
+        if profile is not None and settings.SERVER_TIMING_HEADER:
+            response.headers["Server-Timing"] = profile.server_timing(elapsed_ms)
 
         path = request.url.path
         if path not in _SKIP_LOG_PATHS:
+            extra = {
+                "method": request.method,
+                "path": path,
+                "status_code": response.status_code,
+                "duration_ms": round(elapsed_ms, 1),
+                "client_ip": request.client.host if request.client else "",
+                "user_agent": (request.headers.get("user-agent") or "")[:120],
+            }
+            if profile is not None:
+                extra.update(profile.log_fields())
             level = logging.WARNING if elapsed_ms > self.SLOW_THRESHOLD_MS else logging.INFO
             _timing_logger.log(
                 level,
@@ -175,14 +228,86 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
                 path,
                 response.status_code,
                 elapsed_ms,
-                extra={
-                    "method": request.method,
-                    "path": path,
-                    "status_code": response.status_code,
-                    "duration_ms": round(elapsed_ms, 1),
-                    "client_ip": request.client.host if request.client else "",
-                    "user_agent": (request.headers.get("user-agent") or "")[:120],
-                },
+                extra=extra,
             )
 
+            threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+            if profile is not None and threshold > 0:
+                for shape, count in profile.repeated(threshold):
+                    _timing_logger.warning(
+                        "Possible N+1: %s %s ran %d× — %s",
+                        request.method, path, count, shape[:200],
+                        extra={"method": request.method, "path": path, "query_count": count},
+                    )
+
         return response
+
+
+# ── Response compression ─────────────────────────────────────────────
+
+try:
+    import brotli
+except ImportError:  # brotli is optional — gzip only
+    brotli = None
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Codings in an Accept-Encoding header, minus any with q=0."""
+    accepted = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    """
+    Compresses JSON responses for clients that accept it.
+
+    Prefers brotli (when the ``brotli`` package is installed) over gzip.
+    Bodies smaller than ``RESPONSE_COMPRESSION_MIN_BYTES``, non-JSON
+    responses (file downloads, streams) and already-encoded responses
+    pass through untouched.
+    """
+
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        response = await call_next(request)
+
+        settings = get_settings()
+        if not settings.RESPONSE_COMPRESSION:
+            return response
+        if "content-encoding" in response.headers:
+            return response
+        if not response.headers.get("content-type", "").startswith("application/json"):
+            return response
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            coding = "br"
+        elif "gzip" in accepted:
+            coding = "gzip"
+        else:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        compress = len(body) >= settings.RESPONSE_COMPRESSION_MIN_BYTES
+        if compress:
+            if coding == "br":
+                body = brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL)
+
+        out = Response(content=body, status_code=response.status_code, background=response.background)
+        # Keep repeated headers (Set-Cookie) intact; only the length changes
+        out.raw_headers = [
+            (k, v) for k, v in response.raw_headers if k != b"content-length"
+        ] + [(b"content-length", str(len(body)).encode())]
+        if compress:
+            out.headers["content-encoding"] = coding
+            out.headers.add_vary_header("Accept-Encoding")
+        return out
@@ -0,0 +1,250 @@
+"""
+Schema Migrations — versioned, run once per database rather than per boot.
+
+``schema_version`` records every step that has been applied.  On startup
+:func:`run_migrations` reads ``MAX(version)`` — one query — and a worker
+that finds the schema current goes straight to serving.  Otherwise it
+takes the migration lock (a PostgreSQL advisory lock, or a file lock next
+to the SQLite database), re-checks, and applies the pending steps in
+order; workers booting at the same time wait on the lock and then find
+nothing to do.
+
+Every step must be idempotent (``IF NOT EXISTS`` / ``add_column_if_missing``)
+— a database created before this table existed replays them all once.
+To change the schema, edit :mod:`app.core.schema` as usual and append a
+step here (re-running ``ensure_all_tables`` is a valid step).
+
+Data backfills are not migrations: :func:`start_backfills` runs them once
+per boot in a background thread, in whichever worker gets the lock first.
+
+Run ``python -m app.core.migrations`` to migrate ahead of a deploy.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+from app.core.config import get_settings
+from app.core.database import exec_sql, exec_sql_many, query_all, query_val
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# pg_advisory_lock key (arbitrary, constant across deploys)
+_LOCK_KEY = 48_151_623
+# How long a booting worker waits for another one's migration run
+_LOCK_WAIT_SECONDS = 600
+
+
+# ── Steps ────────────────────────────────────────────────────────────
+
+def _core_schema() -> None:
+    from app.core.schema import ensure_all_tables
+    ensure_all_tables()
+
+
+def _fundamental_schema() -> None:
+    from app.api.v1.fundamental import _ensure_schema
+    _ensure_schema()
+
+
+def _news_search_index() -> None:
+    from app.services.news_search import ensure_search_index
+    ensure_search_index()
+
+
+# (version, description, step) — append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = [
+    (1, "core schema (ensure_all_tables)", _core_schema),
+    (2, "fundamental analysis tables", _fundamental_schema),
+    (3, "news full-text index", _news_search_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table() -> None:
+    exec_sql("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version     INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at  INTEGER NOT NULL
+        )
+    """)
+
+
+def current_version() -> int:
+    """Highest applied migration (0 on a database that predates versioning)."""
+    try:
+        return int(query_val("SELECT MAX(version) FROM schema_version") or 0)
+    except Exception:
+        return 0
+
+
+# ── Lock ─────────────────────────────────────────────────────────────
+
+@contextmanager
+def _pg_lock(blocking: bool) -> Iterator[bool]:
+    from sqlalchemy import text
+    from app.core.database import engine
+
+    # Autocommit: an idle open transaction would trip idle_in_transaction_session_timeout,
+    # and polling keeps each statement well under statement_timeout.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        deadline = time.monotonic() + (_LOCK_WAIT_SECONDS if blocking else 0)
+        while True:
+            got = bool(conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _LOCK_KEY}).scalar())
+            if got or time.monotonic() >= deadline:
+                break
+            time.sleep(0.5)
+        if blocking and not got:
+            raise TimeoutError("Timed out waiting for the schema migration lock")
+        try:
+            yield got
+        finally:
+            if got:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+
+
+@contextmanager
+def _file_lock(blocking: bool) -> Iterator[bool]:
+    path = settings.database_abs_path + ".migrate.lock"
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            import fcntl
+        except ImportError:  # Windows dev machines
+            fcntl = None
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                got = True
+            except BlockingIOError:
+                got = False
+            unlock = lambda: fcntl.flock(fd, fcntl.LOCK_UN)  # noqa: E731
+        else:
+            import msvcrt
+            deadline = time.monotonic() + (_LOCK_WAIT_SECONDS if blocking else 0)
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    got = True
+                    break
+                except OSError:
+                    got = False
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(0.5)
+            if blocking and not got:
+                raise TimeoutError("Timed out waiting for the schema migration lock")
+            unlock = lambda: msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)  # noqa: E731
+        try:
+            yield got
+        finally:
+            if got:
+                unlock()
+    finally:
+        os.close(fd)
+
+
+def migration_lock(blocking: bool = True):
+    """Cross-process lock for migrations and backfills; yields whether it was acquired."""
+    return _pg_lock(blocking) if settings.use_postgres else _file_lock(blocking)
+
+
+# ── Runner ───────────────────────────────────────────────────────────
+
+def run_migrations() -> int:
+    """Apply pending migrations; returns how many this process applied."""
+    if current_version() >= LATEST_VERSION:
+        logger.info("✅  Schema current (version %d)", LATEST_VERSION)
+        return 0
+
+    with migration_lock():
+        _ensure_version_table()
+        version = current_version()
+        applied = 0
+        for step_version, description, step in MIGRATIONS:
+            if step_version <= version:
+                continue
+            t0 = time.perf_counter()
+            step()
+            exec_sql(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (step_version, description, int(time.time())),
+            )
+            applied += 1
+            logger.info(
+                "🧱 Migration %d applied (%s) in %.0f ms",
+                step_version, description, (time.perf_counter() - t0) * 1000,
+            )
+    if applied:
+        logger.info("🏁  Schema migrated to version %d", LATEST_VERSION)
+    return applied
+
+
+# ── Backfills (background, once per boot) ────────────────────────────
+
+def _backfill_symbol_keys() -> None:
+    from app.services.symbol_service import backfill_symbol_keys
+    backfill_symbol_keys()
+
+
+def _backfill_yf_tickers() -> None:
+    from app.data.stock_lists import KUWAIT_STOCKS, US_STOCKS
+
+    ticker_map = {s["symbol"].upper(): s["yf_ticker"] for s in (*KUWAIT_STOCKS, *US_STOCKS)}
+    missing = query_all("SELECT id, symbol FROM stocks WHERE yf_ticker IS NULL OR yf_ticker = ''")
+    params = [
+        (ticker_map[sym], r["id"])
+        for r in missing
+        if (sym := str(r["symbol"]).strip().upper()) in ticker_map
+    ]
+    updated = exec_sql_many("UPDATE stocks SET yf_ticker = ? WHERE id = ?", params)
+    if updated:
+        logger.info("Backfilled yf_ticker for %d existing stocks", updated)
+
+
+def _recover_extraction_jobs() -> None:
+    from app.api.v1.fundamental import recover_stale_jobs
+    recovered = recover_stale_jobs()
+    if recovered:
+        logger.info("♻️  Recovered %d stale extraction job(s) at startup", recovered)
+
+
+BACKFILLS: List[Tuple[str, Callable[[], None]]] = [
+    ("symbol_key", _backfill_symbol_keys),
+    ("yf_ticker", _backfill_yf_tickers),
+    ("stale extraction jobs", _recover_extraction_jobs),
+]
+
+
+def run_backfills() -> None:
+    """Run every backfill unless another worker is already doing so."""
+    with migration_lock(blocking=False) as got:
+        if not got:
+            logger.info("Backfills already running in another worker — skipped")
+            return
+        for name, backfill in BACKFILLS:
+            try:
+                backfill()
+            except Exception as e:
+                logger.warning("⚠️  %s backfill skipped: %s", name, e)
+
+
+def start_backfills() -> threading.Thread:
+    """Run :func:`run_backfills` in a daemon thread."""
+    thread = threading.Thread(target=run_backfills, daemon=True, name="startup-backfills")
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    from app.core.logging_config import setup_logging
+    setup_logging()
+    run_migrations()
+    run_backfills()
@@ -0,0 +1,165 @@
+"""
+Request profiling — per-request SQL counters and labelled timing spans.
+
+``RequestTimingMiddleware`` opens a :class:`RequestProfile` for every
+request in a contextvar.  While it is active:
+
+  • every SQL statement — raw sqlite3 connections from
+    ``app.core.database``, its PostgreSQL cursor proxy and the SQLAlchemy
+    engine — is counted and timed (:func:`record_query`)
+  • :class:`span` blocks / decorated functions add labelled durations
+    (``wac``, ``cash``, ``mwrr``, ``http`` …)
+
+At the end of the request the profile becomes a ``Server-Timing``
+header and extra fields on the access log line.  With
+``SQL_N_PLUS_ONE_THRESHOLD`` > 0, a warning is logged when one request
+runs the same statement shape more than that many times.
+
+Outside a request (cron jobs, scripts) recording is a no-op.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_KEPT = 5
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+_WS_RE = re.compile(r"\s+")
+_STR_RE = re.compile(r"'(?:[^']|'')*'")
+_NUM_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_.-]")
+# Only data statements count towards N+1 detection — not per-connection
+# PRAGMAs or schema probes.
+_DATA_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def statement_shape(sql: str) -> str:
+    """SQL with literals and IN-lists collapsed, for grouping repeats."""
+    s = _WS_RE.sub(" ", sql).strip()
+    s = _STR_RE.sub("?", s)
+    s = _NUM_RE.sub("?", s)
+    s = s.replace("%s", "?")
+    s = _LIST_RE.sub("(?…)", s)
+    return s[:300]
+
+
+class RequestProfile:
+    """Mutable per-request accumulator (shared by the request's tasks/threads)."""
+
+    __slots__ = ("started", "query_count", "db_seconds", "shapes", "slowest", "spans")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: List[Tuple[float, str]] = []
+        self.spans: Dict[str, List[float]] = {}  # name → [count, seconds]
+
+    def add_query(self, sql: str, seconds: float) -> None:
+        shape = statement_shape(sql)
+        self.query_count += 1
+        self.db_seconds += seconds
+        self.shapes[shape] += 1
+        if len(self.slowest) < SLOWEST_KEPT:
+            self.slowest.append((seconds, shape))
+            self.slowest.sort(reverse=True)
+        elif seconds > self.slowest[-1][0]:
+            self.slowest[-1] = (seconds, shape)
+            self.slowest.sort(reverse=True)
+
+    def add_span(self, name: str, seconds: float) -> None:
+        entry = self.spans.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Data statement shapes run more than *threshold* times."""
+        return [
+            (s, n) for s, n in self.shapes.most_common()
+            if n > threshold and s.lstrip("( ").upper().startswith(_DATA_VERBS)
+        ]
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        """``Server-Timing`` header value (durations in ms)."""
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"']
+        for name, (count, secs) in self.spans.items():
+            token = _TOKEN_RE.sub("_", name)
+            desc = f';desc="{count}x"' if count > 1 else ""
+            parts.append(f"{token};dur={secs * 1000:.1f}{desc}")
+        if total_ms is not None:
+            parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def log_fields(self) -> Dict[str, Any]:
+        """Extra fields for the structured access log."""
+        return {
+            "query_count": self.query_count,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "spans": {
+                name: round(secs * 1000, 1) for name, (_, secs) in self.spans.items()
+            } or None,
+            "slow_queries": [
+                {"ms": round(secs * 1000, 1), "sql": shape[:160]} for secs, shape in self.slowest
+            ] or None,
+        }
+
+
+# ── Lifecycle ────────────────────────────────────────────────────────
+
+def begin() -> Tuple[RequestProfile, Any]:
+    """Start profiling the current request; returns (profile, reset token)."""
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def end(token: Any) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+# ── Recording ────────────────────────────────────────────────────────
+
+def record_query(sql: str, seconds: float) -> None:
+    """Count one executed statement against the active request (if any)."""
+    profile = _current.get()
+    if profile is not None:
+        profile.add_query(sql, seconds)
+
+
+class span(ContextDecorator):
+    """Time a labelled phase of the current request.
+
+    Usable as ``with span("wac"):`` or as a ``@span("mwrr")`` decorator;
+    repeated spans with the same name accumulate.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._started = 0.0
+
+    def _recreate_cm(self) -> "span":
+        # A decorated function may run concurrently — one timer per call
+        return span(self.name)
+
+    def __enter__(self) -> "span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        profile = _current.get()
+        if profile is not None:
+            profile.add_span(self.name, time.perf_counter() - self._started)
+        return False
@@ -1,9 +1,11 @@
 """
 Database Schema Initialization — ensures ALL tables exist at startup.
 
-Called from main.py lifespan.  Every CREATE is IF NOT EXISTS so it's
-safe to run on every boot, even against a production database that
-already has the tables.
+Applied by the versioned migrations in :mod:`app.core.migrations`
+(once per database, not once per boot).  Every CREATE is IF NOT EXISTS
+so it is safe to re-run, even against a production database that
+already has the tables.  Rows written before a new column existed are
+filled by the background backfills there, not here.
 
 Supports both SQLite (AUTOINCREMENT) and PostgreSQL (SERIAL).
 """
@@ -475,6 +477,14 @@ def ensure_all_tables() -> None:
     except Exception as e:
         logger.warning("⚠️  news_articles table creation skipped: %s", e)
 
+    # ── 13b. News full-text index (FTS5 / tsvector) ─────────────────
+    try:
+        from app.services.news_search import ensure_search_index
+        ensure_search_index()
+        logger.info("✅  news full-text index ensured")
+    except Exception as e:
+        logger.warning("⚠️  news full-text index skipped: %s", e)
+
     # ── 14. Market Data Cache ────────────────────────────────────────
     try:
         exec_sql(f"""
@@ -518,6 +528,110 @@ def ensure_all_tables() -> None:
     except Exception as e:
         logger.warning("⚠️  market_data table creation skipped: %s", e)
 
+    # ── 14b. Market Fundamentals Cache (yfinance / stockanalysis) ────
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS market_fundamentals_cache (
+                ticker          TEXT NOT NULL,
+                field_group     TEXT NOT NULL,
+                payload         TEXT NOT NULL,
+                fetched_at      INTEGER NOT NULL,
+                PRIMARY KEY (ticker, field_group)
+            )
+        """)
+        logger.info("✅  market_fundamentals_cache table ensured")
+    except Exception as e:
+        logger.warning("⚠️  market_fundamentals_cache table creation skipped: %s", e)
+
+    # ── 14c. AI Page Extraction Cache (content-addressed) ────────────
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS ai_page_cache (
+                page_hash       TEXT NOT NULL,
+                prompt_version  TEXT NOT NULL,
+                model           TEXT NOT NULL,
+                page_count      INTEGER NOT NULL DEFAULT 1,
+                payload         TEXT NOT NULL,
+                size_bytes      INTEGER NOT NULL DEFAULT 0,
+                hit_count       INTEGER NOT NULL DEFAULT 0,
+                created_at      INTEGER NOT NULL,
+                last_used_at    INTEGER NOT NULL,
+                PRIMARY KEY (page_hash, prompt_version, model)
+            )
+        """)
+        exec_sql("CREATE INDEX IF NOT EXISTS idx_ai_page_cache_used ON ai_page_cache(last_used_at)")
+        logger.info("✅  ai_page_cache table ensured")
+    except Exception as e:
+        logger.warning("⚠️  ai_page_cache table creation skipped: %s", e)
+
+    # ── 14d. FX rates (daily fixings for dated currency conversion) ──
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS fx_rates (
+                pair        TEXT NOT NULL,
+                rate_date   TEXT NOT NULL,
+                rate        REAL NOT NULL,
+                source      TEXT NOT NULL DEFAULT 'yfinance',
+                fetched_at  INTEGER NOT NULL,
+                PRIMARY KEY (pair, rate_date)
+            )
+        """)
+        logger.info("✅  fx_rates table ensured")
+    except Exception as e:
+        logger.warning("⚠️  fx_rates table creation skipped: %s", e)
+
+    # ── 14e. Daily job status (per-user progress, resumable runs) ────
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS daily_job_status (
+                job_name    TEXT NOT NULL,
+                run_date    TEXT NOT NULL,
+                user_id     INTEGER NOT NULL,
+                status      TEXT NOT NULL DEFAULT 'pending',
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                error       TEXT,
+                duration_ms REAL,
+                started_at  INTEGER,
+                finished_at INTEGER,
+                PRIMARY KEY (job_name, run_date, user_id)
+            )
+        """)
+        logger.info("✅  daily_job_status table ensured")
+    except Exception as e:
+        logger.warning("⚠️  daily_job_status table creation skipped: %s", e)
+
+    # ── 14f. Price history (daily closes, shared across users) ───────
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS price_history (
+                symbol      TEXT NOT NULL,
+                price_date  TEXT NOT NULL,
+                close       REAL NOT NULL,
+                currency    TEXT NOT NULL DEFAULT 'KWD',
+                source      TEXT NOT NULL DEFAULT 'yfinance',
+                fetched_at  INTEGER NOT NULL,
+                PRIMARY KEY (symbol, price_date)
+            )
+        """)
+        logger.info("✅  price_history table ensured")
+    except Exception as e:
+        logger.warning("⚠️  price_history table creation skipped: %s", e)
+
+    # ── 14g. Symbol lookup cache (remote stock-search results) ───────
+    try:
+        exec_sql("""
+            CREATE TABLE IF NOT EXISTS symbol_lookup_cache (
+                market      TEXT NOT NULL,
+                query       TEXT NOT NULL,
+                results     TEXT NOT NULL,
+                fetched_at  INTEGER NOT NULL,
+                PRIMARY KEY (market, query)
+            )
+        """)
+        logger.info("✅  symbol_lookup_cache table ensured")
+    except Exception as e:
+        logger.warning("⚠️  symbol_lookup_cache table creation skipped: %s", e)
+
     # ── 15. Push Tokens (Expo push notification tokens) ──────────────
     try:
         exec_sql(f"""
@@ -568,11 +682,29 @@ def ensure_all_tables() -> None:
         add_column_if_missing("transactions", "is_deleted", "INTEGER DEFAULT 0")
         add_column_if_missing("transactions", "deleted_at", "INTEGER")
         add_column_if_missing("transactions", "category", "TEXT DEFAULT 'portfolio'")
+        # List filters compare these directly so the composite indexes apply
+        exec_sql("UPDATE transactions SET is_deleted = 0 WHERE is_deleted IS NULL")
+        exec_sql(
+            "UPDATE transactions SET stock_symbol = TRIM(stock_symbol) "
+            "WHERE stock_symbol IS NOT NULL AND stock_symbol <> TRIM(stock_symbol)"
+        )
+
+        # -- position_snapshots (market value at the snapshot date) --
+        add_column_if_missing("position_snapshots", "market_price", "REAL")
+        add_column_if_missing("position_snapshots", "market_value", "REAL")
+        add_column_if_missing("position_snapshots", "market_value_kwd", "REAL")
 
         # -- portfolio_cash --
         add_column_if_missing("portfolio_cash", "manual_override", "INTEGER DEFAULT 0")
         add_column_if_missing("portfolio_cash", "last_updated", "INTEGER")
 
+        # -- news_articles (dedupe fallback when the URL changes) --
+        add_column_if_missing("news_articles", "content_hash", "TEXT")
+
+        # -- normalized symbol keys (see app.services.symbol_service) --
+        for table in ("transactions", "stocks", "position_snapshots", "securities_master"):
+            add_column_if_missing(table, "symbol_key", "TEXT")
+
         logger.info("✅  Additive column migrations applied")
     except Exception as e:
         logger.warning("⚠️  Additive column migrations skipped: %s", e)
@@ -661,11 +793,15 @@ def _ensure_indexes() -> None:
         # Stocks
         ("idx_stocks_user",          "stocks",                 "user_id"),
         ("idx_stocks_symbol",        "stocks",                 "symbol"),
+        ("idx_stocks_user_symkey",   "stocks",                 "user_id, symbol_key"),
         # Transactions
         ("idx_txn_user",             "transactions",           "user_id"),
         ("idx_txn_symbol",           "transactions",           "stock_symbol"),
         ("idx_txn_user_ptf",         "transactions",           "user_id, portfolio"),
         ("idx_txn_date",             "transactions",           "txn_date"),
+        ("idx_txn_user_del_date",    "transactions",           "user_id, is_deleted, txn_date, id"),
+        ("idx_txn_user_symbol",      "transactions",           "user_id, stock_symbol"),
+        ("idx_txn_user_symkey",      "transactions",           "user_id, symbol_key"),
         # Cash deposits
         ("idx_cashdep_user",         "cash_deposits",          "user_id"),
         ("idx_cashdep_user_ptf",     "cash_deposits",          "user_id, portfolio"),
@@ -679,8 +815,11 @@ def _ensure_indexes() -> None:
         ("idx_possn_user",           "position_snapshots",     "user_id"),
         ("idx_possn_symbol",         "position_snapshots",     "stock_symbol"),
         ("idx_possn_date",           "position_snapshots",     "snapshot_date"),
+        ("idx_possn_user_date",      "position_snapshots",     "user_id, snapshot_date"),
+        ("idx_possn_user_symkey",    "position_snapshots",     "user_id, symbol_key"),
         # Securities
         ("idx_secmaster_user",       "securities_master",      "user_id"),
+        ("idx_secmaster_user_symkey", "securities_master",     "user_id, symbol_key"),
         ("idx_secalias_secid",       "security_aliases",       "security_id"),
         # PFM
         ("idx_pfmsnap_user",         "pfm_snapshots",          "user_id"),
@@ -690,6 +829,7 @@ def _ensure_indexes() -> None:
         # News
         ("idx_news_published",       "news_articles",          "published_at"),
         ("idx_news_category",        "news_articles",          "category"),
+        ("ix_news_articles_content_hash", "news_articles",     "content_hash"),
         # Push tokens
         ("idx_pushtok_user",         "push_tokens",            "user_id"),
         # External accounts & portfolio transactions
@@ -737,6 +877,7 @@ def _upgrade_real_to_float8() -> None:
         "position_snapshots": [
             "total_shares", "total_cost", "avg_cost",
             "realized_pnl", "cash_dividends_received",
+            "market_price", "market_value", "market_value_kwd",
         ],
         "pfm_snapshots": ["total_assets", "total_liabilities", "net_worth"],
         "pfm_assets": ["quantity", "price", "value_kwd"],
@@ -749,6 +890,9 @@ def _upgrade_real_to_float8() -> None:
         "ledger_entries": [
             "quantity", "price_per_unit", "total_value", "fees",
         ],
+        "fx_rates": ["rate"],
+        "daily_job_status": ["duration_ms"],
+        "price_history": ["close"],
     }
 
     for table, cols in upgrades.items():
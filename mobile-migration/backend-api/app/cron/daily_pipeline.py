@@ -0,0 +1,263 @@
+"""
+Daily Pipeline — parallel, resumable price-then-snapshot run for all users.
+
+Used by the scheduler's daily job, its startup catch-up and
+``POST /cron/update-prices-and-snapshot``.  One run:
+
+  1. Picks the users to process (every user holding a stock, unless
+     given), skipping those already ``done`` for today in
+     ``daily_job_status`` — a crashed run resumes where it stopped
+     (see :func:`needs_catch_up`).
+  2. Builds one shared price map (one Yahoo quote per distinct ticker).
+  3. Runs price update + snapshot save per user on a bounded thread
+     pool.  Concurrency is capped by the DB pool so request traffic keeps
+     connections.  Failed users are retried with exponential backoff; a
+     user running past ``DAILY_JOB_USER_TIMEOUT`` is marked ``timeout``
+     and no longer waited on.  A user whose quotes could not be fetched
+     still gets a snapshot but ends ``failed``, so a resume retries it.
+  4. Returns (and logs) per-user results plus a p50 / p95 duration summary.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.core.database import engine, exec_sql, query_all
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "daily_price_snapshot"
+
+# SQLite has a single writer; more threads would only queue on its lock
+_SQLITE_MAX_WORKERS = 2
+
+
+# ── Status table ─────────────────────────────────────────────────────
+
+def _set_status(
+    run_date: str,
+    user_id: int,
+    status: str,
+    *,
+    new_attempt: bool = False,
+    error: Optional[str] = None,
+    duration_ms: Optional[float] = None,
+) -> None:
+    now = int(time.time())
+    finished = now if status in ("done", "failed", "timeout") else None
+    exec_sql(
+        """INSERT INTO daily_job_status
+               (job_name, run_date, user_id, status, attempts, error, duration_ms,
+                started_at, finished_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (job_name, run_date, user_id) DO UPDATE SET
+               status = excluded.status,
+               attempts = daily_job_status.attempts + excluded.attempts,
+               error = excluded.error,
+               duration_ms = COALESCE(excluded.duration_ms, daily_job_status.duration_ms),
+               started_at = COALESCE(excluded.started_at, daily_job_status.started_at),
+               finished_at = excluded.finished_at""",
+        (JOB_NAME, run_date, user_id, status, 1 if new_attempt else 0, error,
+         duration_ms, now if new_attempt else None, finished),
+    )
+
+
+def _done_users(run_date: str) -> set:
+    rows = query_all(
+        "SELECT user_id FROM daily_job_status WHERE job_name = ? AND run_date = ? AND status = 'done'",
+        (JOB_NAME, run_date),
+    )
+    return {int(r["user_id"]) for r in rows}
+
+
+def needs_catch_up(run_date: Optional[str] = None) -> bool:
+    """Whether today's run never started or left users not ``done``
+    (pending / running after a crash, failed, timed out)."""
+    row = query_all(
+        """SELECT COUNT(*) AS n,
+                  SUM(CASE WHEN status = 'done' THEN 0 ELSE 1 END) AS unfinished
+           FROM daily_job_status WHERE job_name = ? AND run_date = ?""",
+        (JOB_NAME, run_date or str(date.today())),
+    )[0]
+    return not row["n"] or bool(row["unfinished"])
+
+
+def get_run_status(run_date: Optional[str] = None) -> List[dict]:
+    """Per-user rows of the daily job for *run_date* (default today)."""
+    rows = query_all(
+        """SELECT user_id, status, attempts, error, duration_ms, started_at, finished_at
+           FROM daily_job_status WHERE job_name = ? AND run_date = ?
+           ORDER BY user_id""",
+        (JOB_NAME, run_date or str(date.today())),
+    )
+    return [dict(r.items()) for r in rows]
+
+
+# ── Per-user work ────────────────────────────────────────────────────
+
+def _users_with_stocks() -> List[int]:
+    rows = query_all(
+        "SELECT DISTINCT user_id FROM stocks WHERE symbol IS NOT NULL AND symbol != ''"
+    )
+    return [int(r[0]) for r in rows] if rows else [1]
+
+
+def _max_workers(n_users: int) -> int:
+    settings = get_settings()
+    limit = max(1, settings.DAILY_JOB_CONCURRENCY)
+    if settings.use_postgres:
+        # Each user holds at most one connection at a time; leave half
+        # the pool for API requests arriving during the run.
+        limit = min(limit, max(1, engine.pool.size() // 2))
+    else:
+        limit = min(limit, _SQLITE_MAX_WORKERS)
+    return max(1, min(limit, n_users))
+
+
+def _process_user(
+    user_id: int,
+    run_date: str,
+    price_map: Dict[str, Optional[dict]],
+    started: Dict[int, float],
+    abandoned: set,
+) -> dict:
+    """Price update + snapshot for one user with retries; never raises."""
+    from app.cron.price_updater import run_price_update
+    from app.cron.snapshot_saver import run_snapshot_save
+
+    settings = get_settings()
+    started[user_id] = time.monotonic()
+    delay = settings.DAILY_JOB_RETRY_BACKOFF
+    attempts = 0
+    price_info = snapshot_info = None
+    error = None
+
+    while True:
+        attempts += 1
+        _set_status(run_date, user_id, "running", new_attempt=True)
+        try:
+            price_info = run_price_update(user_id=user_id, price_map=price_map)
+            if not price_info.get("success"):
+                raise RuntimeError(f"price update: {price_info.get('error')}")
+            snapshot_info = run_snapshot_save(user_id=user_id)
+            if not snapshot_info.get("success"):
+                raise RuntimeError(f"snapshot: {snapshot_info.get('error')}")
+            failed_quotes = price_info.get("result", {}).get("failed", 0)
+            if failed_quotes:
+                raise RuntimeError(f"price update: {failed_quotes} quote fetch(es) failed")
+            status, error = "done", None
+            break
+        except Exception as exc:
+            error = str(exc)
+            if attempts >= settings.DAILY_JOB_MAX_ATTEMPTS or user_id in abandoned:
+                status = "failed"
+                break
+            logger.warning(
+                "Daily job: user %d attempt %d failed (%s) — retrying in %.0fs",
+                user_id, attempts, error, delay,
+            )
+            time.sleep(delay)
+            delay *= 2
+
+    duration_ms = round((time.monotonic() - started[user_id]) * 1000, 1)
+    if user_id not in abandoned:
+        _set_status(run_date, user_id, status, error=error, duration_ms=duration_ms)
+    return {
+        "status": status,
+        "attempts": attempts,
+        "duration_ms": duration_ms,
+        "error": error,
+        "price": price_info,
+        "snapshot": snapshot_info,
+    }
+
+
+# ── Run ──────────────────────────────────────────────────────────────
+
+def _summary(results: Dict[int, dict], skipped: int, wall_s: float, workers: int) -> dict:
+    durations = [r["duration_ms"] for r in results.values() if r.get("duration_ms") is not None]
+    p50, p95 = (np.percentile(durations, [50, 95]).round(1).tolist() if durations else (None, None))
+    by_status: Dict[str, int] = {}
+    for r in results.values():
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    return {
+        "users": len(results),
+        "resumed_skipped": skipped,
+        "done": by_status.get("done", 0),
+        "failed": by_status.get("failed", 0),
+        "timeout": by_status.get("timeout", 0),
+        "workers": workers,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "wall_seconds": round(wall_s, 2),
+    }
+
+
+def run_daily_pipeline(user_ids: Optional[Iterable[int]] = None, resume: bool = True) -> dict:
+    """
+    Run the daily price update + snapshot for *user_ids* (default: every
+    user with stocks).  With ``resume=False`` users already done today
+    run again.  Returns ``{"run_date", "results": {uid: ...},
+    "summary": {...}}``.
+    """
+    from app.services.price_service import build_price_map
+
+    settings = get_settings()
+    t0 = time.monotonic()
+    run_date = str(date.today())
+    users = list(user_ids) if user_ids is not None else _users_with_stocks()
+    done = _done_users(run_date) if resume else set()
+    todo = [uid for uid in users if uid not in done]
+    skipped = len(users) - len(todo)
+    if skipped:
+        logger.info("🔁 Daily job: resuming — %d user(s) already done for %s", skipped, run_date)
+
+    results: Dict[int, dict] = {}
+    workers = _max_workers(len(todo)) if todo else 0
+    if todo:
+        for uid in todo:
+            _set_status(run_date, uid, "pending")
+        price_map = build_price_map(todo)
+
+        started: Dict[int, float] = {}
+        abandoned: set = set()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="daily-job")
+        pending = {
+            pool.submit(_process_user, uid, run_date, price_map, started, abandoned): uid
+            for uid in todo
+        }
+        timeout = settings.DAILY_JOB_USER_TIMEOUT
+        try:
+            while pending:
+                finished, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    results[pending.pop(fut)] = fut.result()
+                now = time.monotonic()
+                for fut, uid in list(pending.items()):
+                    began = started.get(uid)
+                    if began is None or now - began <= timeout:
+                        continue
+                    # Threads cannot be killed: stop waiting and let the
+                    # next run pick this user up again.
+                    del pending[fut]
+                    abandoned.add(uid)
+                    error = f"timed out after {timeout}s"
+                    _set_status(run_date, uid, "timeout", error=error, duration_ms=timeout * 1000.0)
+                    results[uid] = {"status": "timeout", "duration_ms": timeout * 1000.0, "error": error}
+                    logger.error("Daily job: user %d %s", uid, error)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    summary = _summary(results, skipped, time.monotonic() - t0, workers)
+    logger.info(
+        "🏁 Daily job %s: %d done, %d failed, %d timed out, %d resumed-skip "
+        "(workers=%d, p50=%sms, p95=%sms, %.1fs)",
+        run_date, summary["done"], summary["failed"], summary["timeout"], skipped,
+        workers, summary["p50_ms"], summary["p95_ms"], summary["wall_seconds"],
+    )
+    return {"run_date": run_date, "results": results, "summary": summary}
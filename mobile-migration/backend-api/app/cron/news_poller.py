@@ -8,7 +8,8 @@ outside market hours (announcements can still arrive post-close).
 Features:
   • HTTP caching via ETag / If-Modified-Since — skips processing on 304
   • Exponential backoff on failures / rate-limits (max 5 min)
-  • Per-cycle metrics (poll count, articles, notifications, errors)
+  • Per-cycle metrics (poll count, articles, notifications, errors), also
+    exported to /metrics (cycle time, fetch results incl. the 304 rate)
   • Health-check data (last success time, thread alive, current interval)
 
 Detects new articles, persists them, and triggers push notifications
@@ -24,6 +25,9 @@ from datetime import datetime
 
 import httpx
 
+from app.core import metrics
+from app.core.cache import get_cache
+
 logger = logging.getLogger(__name__)
 
 BOURSA_API = "https://www.boursakuwait.com.kw/data-api/client-services"
@@ -45,7 +49,10 @@ _poller_thread: threading.Thread | None = None
 _poller_stop = threading.Event()
 
 # ── HTTP caching (ETag / Last-Modified) per RT+lang combo ────────────
-_http_cache: dict[str, dict] = {}  # {f"{rt}_{lang}": {"etag": str|None, "last_modified": str|None}}
+# Kept in the shared cache (app.core.cache) so a worker skips a feed
+# another worker has already ingested.
+# {"etag": str|None, "last_modified": str|None} under f"news_http:{rt}_{lang}"
+_HTTP_CACHE_TTL = 86400
 
 # ── Exponential backoff on failures ──────────────────────────────────
 _failure_counts: dict[str, int] = {}  # {f"{rt}_{lang}": consecutive_failure_count}
@@ -86,8 +93,10 @@ def _poller_loop() -> None:
     """Background thread loop — adaptively polls Boursa news."""
     logger.info("📰 News poller thread started")
     while not _poller_stop.is_set():
+        started = time.perf_counter()
         try:
             result = poll_boursa_news()
+            metrics.observe_news_poll(time.perf_counter() - started, result.get("new_articles", 0))
             _poll_metrics["poll_count"] += 1
             _poll_metrics["last_poll"] = datetime.utcnow().isoformat()
             _poll_metrics["new_articles_total"] += result.get("new_articles", 0)
@@ -95,6 +104,7 @@ def _poller_loop() -> None:
             if result.get("new_articles", 0) > 0 or result.get("cache_hits", 0) > 0:
                 _poll_metrics["last_success"] = datetime.utcnow().isoformat()
         except Exception as e:
+            metrics.observe_news_poll(time.perf_counter() - started)
             _poll_metrics["errors"].append({
                 "time": datetime.utcnow().isoformat(),
                 "error": str(e),
@@ -189,12 +199,13 @@ def _poll_single_language(boursa_lang: str) -> dict:
                 #  here we just reduce frequency of retries for flapping sources)
                 if fail_count >= 3:
                     logger.debug("Skipping RT=%s L=%s (backoff, %d consecutive failures)", rt, boursa_lang, fail_count)
+                    metrics.news_fetch("skipped")
                     continue
 
             try:
                 # Build conditional request headers for HTTP caching
                 req_headers: dict[str, str] = {}
-                cached = _http_cache.get(cache_key)
+                cached = get_cache().get(f"news_http:{cache_key}")
                 if cached:
                     if cached.get("etag"):
                         req_headers["If-None-Match"] = cached["etag"]
@@ -211,25 +222,28 @@ def _poll_single_language(boursa_lang: str) -> dict:
                 if resp.status_code == 304:
                     cache_hits += 1
                     _poll_metrics["cache_hits"] += 1
+                    metrics.news_fetch("not_modified")
                     _failure_counts[cache_key] = 0
                     continue
 
                 resp.raise_for_status()
 
                 # Update cache with response headers
-                _http_cache[cache_key] = {
+                get_cache().set(f"news_http:{cache_key}", {
                     "etag": resp.headers.get("ETag"),
                     "last_modified": resp.headers.get("Last-Modified"),
-                }
+                }, ttl=_HTTP_CACHE_TTL)
 
                 data = resp.json()
                 if isinstance(data, list):
                     raw.extend(data)
 
                 _failure_counts[cache_key] = 0  # reset on success
+                metrics.news_fetch("ok")
 
             except httpx.HTTPStatusError as e:
                 _failure_counts[cache_key] = _failure_counts.get(cache_key, 0) + 1
+                metrics.news_fetch("error")
                 if e.response.status_code == 429:
                     backoff_s = min(300, 15 * (2 ** _failure_counts[cache_key]))
                     logger.warning(
@@ -240,6 +254,7 @@ def _poll_single_language(boursa_lang: str) -> dict:
                     logger.warning("HTTP %d RT=%s L=%s: %s", e.response.status_code, rt, boursa_lang, e)
             except Exception as e:
                 _failure_counts[cache_key] = _failure_counts.get(cache_key, 0) + 1
+                metrics.news_fetch("error")
                 logger.warning("Poll RT=%s L=%s failed (fail #%d): %s", rt, boursa_lang, _failure_counts[cache_key], e)
 
     if not raw:
@@ -7,6 +7,7 @@ This module adds logging, state tracking, and error recovery.
 
 import logging
 import time
+from typing import Dict, Optional
 
 from app.services.price_service import update_all_prices
 
@@ -16,17 +17,20 @@ logger = logging.getLogger(__name__)
 _last_run: dict = {}
 
 
-def run_price_update(user_id: int = 1) -> dict:
+def run_price_update(user_id: int = 1, price_map: Optional[Dict[str, Optional[dict]]] = None) -> dict:
     """
     Execute a full price update cycle.
 
+    *price_map* (from ``build_price_map``) lets a multi-user run share one
+    set of quotes instead of fetching per user.
+
     Returns:
         dict with timestamp and result summary.
     """
     logger.info("⏰ Scheduled price update starting (user_id=%d)…", user_id)
 
     try:
-        result = update_all_prices(user_id=user_id)
+        result = update_all_prices(user_id=user_id, price_map=price_map)
 
         run_info = {
             "timestamp": int(time.time()),
@@ -7,14 +7,19 @@ Daily workflow (when PRICE_UPDATE_ENABLED):
   1. Price update runs at PRICE_UPDATE_HOUR:PRICE_UPDATE_MINUTE (Asia/Kuwait)
   2. Snapshot save runs SNAPSHOT_DELAY_MINUTES later (default 5 min)
      — ensures the snapshot reflects the freshly-fetched prices.
+  Users are processed in parallel by ``app.cron.daily_pipeline``.
+  A start after today's slot (restart, deploy, crash mid-run) catches up
+  once on today's run; users already done are skipped.
 """
 
+import functools
 import logging
 import os
 import sys
 import tempfile
 from typing import Optional
 
+from app.core import metrics
 from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -31,34 +36,19 @@ def _run_daily_price_then_snapshot(user_id: int | None = None) -> dict:
     **every** user that has at least one stock — so all users benefit
     from the automated daily update.
 
-    By running both in a single job we guarantee ordering
-    (snapshot always uses the freshest prices).
-    Also updates the in-memory tracking dicts in the cron API router
-    so the /status endpoint reflects the last scheduler run.
+    Users are processed in parallel by ``daily_pipeline`` (bounded pool,
+    per-user retries / timeout, resumable via ``daily_job_status``); each
+    user's snapshot still runs after their own price update, from one
+    shared price map.  Also updates the in-memory tracking dicts in the
+    cron API router so the /status endpoint reflects the last scheduler run.
     """
     import time
-    from app.core.database import query_all
-    from app.cron.price_updater import run_price_update
-    from app.cron.snapshot_saver import run_snapshot_save
+    from app.cron.daily_pipeline import run_daily_pipeline
 
-    # Determine which users to process
-    if user_id is not None:
-        user_ids = [user_id]
-    else:
-        rows = query_all(
-            "SELECT DISTINCT user_id FROM stocks WHERE symbol IS NOT NULL AND symbol != ''"
-        )
-        user_ids = [int(r[0]) for r in rows] if rows else [1]
-        logger.info("🔄 Scheduler: updating prices for %d user(s): %s", len(user_ids), user_ids)
-
-    all_price_results = {}
-    all_snapshot_results = {}
-
-    for uid in user_ids:
-        price_result = run_price_update(user_id=uid)
-        snapshot_result = run_snapshot_save(user_id=uid)
-        all_price_results[uid] = price_result
-        all_snapshot_results[uid] = snapshot_result
+    run = run_daily_pipeline([user_id] if user_id is not None else None)
+    user_ids = sorted(run["results"])
+    all_price_results = {uid: r.get("price") for uid, r in run["results"].items()}
+    all_snapshot_results = {uid: r.get("snapshot") for uid, r in run["results"].items()}
 
     # Update the cron API status tracking so /status shows scheduler runs
     try:
@@ -67,21 +57,63 @@ def _run_daily_price_then_snapshot(user_id: int | None = None) -> dict:
             "timestamp": int(time.time()),
             "source": "scheduler",
             "user_ids": user_ids,
-            "result": {
-                uid: r.to_dict() if hasattr(r, "to_dict") else r
-                for uid, r in all_price_results.items()
-            },
+            "result": all_price_results,
+            "summary": run["summary"],
         })
         _last_snapshot_run.update({
             "timestamp": int(time.time()),
             "source": "scheduler",
             "user_ids": user_ids,
             "result": all_snapshot_results,
+            "summary": run["summary"],
         })
     except Exception:
         pass  # non-critical — don't let tracking break the job
 
-    return {"price": all_price_results, "snapshot": all_snapshot_results}
+    return {"price": all_price_results, "snapshot": all_snapshot_results, "summary": run["summary"]}
+
+
+def _daily_slot_passed(now=None) -> bool:
+    """Whether today's PRICE_UPDATE_HOUR:MINUTE (Asia/Kuwait) is behind us."""
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+
+    settings = get_settings()
+    now = now or datetime.now(ZoneInfo("Asia/Kuwait"))
+    return (now.hour, now.minute) >= (settings.PRICE_UPDATE_HOUR, settings.PRICE_UPDATE_MINUTE)
+
+
+def _catch_up_daily_run() -> Optional[dict]:
+    """Resume today's daily run if its slot passed without it finishing."""
+    from app.cron.daily_pipeline import needs_catch_up
+
+    if not _daily_slot_passed() or not needs_catch_up():
+        return None
+    logger.info("🔁 Daily price + snapshot run missed or unfinished today — catching up")
+    return _run_daily_price_then_snapshot()
+
+
+def _run_market_cache_refresh() -> dict:
+    """Warm and re-fetch stale yfinance / stockanalysis.com cache entries."""
+    # Importing the fundamental package registers the cache field groups
+    import app.api.v1.fundamental  # noqa: F401
+    from app.services.market_cache import refresh_due
+    return refresh_due()
+
+
+def _run_page_cache_prune() -> int:
+    """Evict old / oversized AI page-extraction cache entries."""
+    from app.services.page_extraction_cache import prune
+    return prune()
+
+
+def _instrumented(job_id: str, func):
+    """Wrap a job so its duration and outcome are exported to /metrics."""
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        with metrics.track_job(job_id):
+            return func(*args, **kwargs)
+    return run
 
 
 def _acquire_scheduler_lock() -> bool:
@@ -133,6 +165,7 @@ def start_scheduler() -> None:
     try:
         from apscheduler.schedulers.background import BackgroundScheduler
         from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.date import DateTrigger
         from apscheduler.triggers.interval import IntervalTrigger
     except ImportError:
         logger.warning(
@@ -147,7 +180,7 @@ def start_scheduler() -> None:
     try:
         from app.api.v1.fundamental import recover_stale_jobs
         _scheduler.add_job(
-            recover_stale_jobs,
+            _instrumented("stale_extraction_sweep", recover_stale_jobs),
             trigger=IntervalTrigger(minutes=5),
             id="stale_extraction_sweep",
             name="Stale extraction job sweep",
@@ -157,6 +190,35 @@ def start_scheduler() -> None:
     except Exception as exc:
         logger.warning("Could not schedule stale-job sweep: %s", exc)
 
+    # ── Market fundamentals cache refresher ──────────────────────
+    try:
+        _scheduler.add_job(
+            _instrumented("market_cache_refresh", _run_market_cache_refresh),
+            trigger=IntervalTrigger(minutes=settings.MARKET_CACHE_REFRESH_MINUTES),
+            id="market_cache_refresh",
+            name="Market fundamentals cache refresh",
+            replace_existing=True,
+        )
+        logger.info(
+            "🔄 Market fundamentals cache refresh scheduled (every %d min)",
+            settings.MARKET_CACHE_REFRESH_MINUTES,
+        )
+    except Exception as exc:
+        logger.warning("Could not schedule market cache refresh: %s", exc)
+
+    # ── AI page-extraction cache eviction (daily) ────────────────
+    try:
+        _scheduler.add_job(
+            _instrumented("page_cache_prune", _run_page_cache_prune),
+            trigger=IntervalTrigger(hours=24),
+            id="page_cache_prune",
+            name="AI page-extraction cache eviction",
+            replace_existing=True,
+        )
+        logger.info("🧹 AI page-extraction cache eviction scheduled (daily)")
+    except Exception as exc:
+        logger.warning("Could not schedule page cache eviction: %s", exc)
+
     # ── News polling (adaptive: 15s market hours / 5m off-hours) ───
     try:
         from app.cron.news_poller import start_news_poller
@@ -173,11 +235,22 @@ def start_scheduler() -> None:
             timezone="Asia/Kuwait",
         )
         _scheduler.add_job(
-            _run_daily_price_then_snapshot,
+            _instrumented("daily_price_and_snapshot", _run_daily_price_then_snapshot),
             trigger=price_trigger,
             id="daily_price_and_snapshot",
             name="Daily price update + snapshot save",
             replace_existing=True,
+            misfire_grace_time=3600,
+            coalesce=True,
+        )
+        # One-off: finish today's run if the process was down (or died
+        # mid-run) at the scheduled time.
+        _scheduler.add_job(
+            _instrumented("daily_price_and_snapshot_catch_up", _catch_up_daily_run),
+            trigger=DateTrigger(),
+            id="daily_price_and_snapshot_catch_up",
+            name="Daily price update + snapshot catch-up",
+            replace_existing=True,
         )
         logger.info(
             "🕐 Daily price update + snapshot scheduled — daily at %02d:%02d Asia/Kuwait",
@@ -12,7 +12,7 @@ from datetime import date
 
 from app.core.database import query_df, query_val, exec_sql
 from app.services.portfolio_service import get_total_portfolio_value
-from app.services.fx_service import convert_to_kwd
+from app.services.fx_service import convert_series_to_kwd, flow_dates
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +30,8 @@ def _sum_deposits_kwd(uid: int, deposit_date: str) -> float:
     )
     if rows.empty:
         return 0.0
-    total = 0.0
-    for _, r in rows.iterrows():
-        total += convert_to_kwd(float(r["amount"]), str(r["currency"]))
-    return round(total, 3)
+    amounts = convert_series_to_kwd(rows["amount"], rows["currency"], flow_dates([deposit_date] * len(rows)))
+    return round(float(amounts.sum()), 3)
 
 
 def run_snapshot_save(user_id: int = 1) -> dict:
@@ -132,6 +130,13 @@ def run_snapshot_save(user_id: int = 1) -> dict:
         from app.api.v1.tracker import recalculate_all_snapshots
         recalculate_all_snapshots(user_id)
 
+        # 9. Today's per-position rows (non-fatal)
+        try:
+            from app.services.holdings_service import write_position_snapshots
+            write_position_snapshots(user_id, date.today(), date.today(), dates=[today])
+        except Exception as exc:
+            logger.warning("📌 Position snapshots for %s skipped: %s", today, exc)
+
         run_info = {
             "timestamp": now,
             "snapshot_date": today,
@@ -212,3 +212,13 @@ US_STOCKS: List[Dict[str, str]] = [
     {"symbol": "REGN", "name": "Regeneron Pharmaceuticals Inc.", "yf_ticker": "REGN"},
     {"symbol": "VRTX", "name": "Vertex Pharmaceuticals Inc.", "yf_ticker": "VRTX"},
 ]
+
+
+# Alternate names users type for listed symbols (Streamlit KUWAIT_VARIATIONS)
+SYMBOL_ALIASES: Dict[str, str] = {
+    "AGILITY": "AGLTY",
+    "AGILITY PLC": "AGLTY",
+    "MABNEE": "MABANEE",
+    "H-SOFT": "HUMANSOFT",
+    "INCYTE": "INCY",
+}
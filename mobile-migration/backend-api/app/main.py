@@ -5,18 +5,21 @@ Main application entry point.
 Run with:  uvicorn app.main:app --reload --port 8004
 """
 
+import hmac
 import logging
 from contextlib import asynccontextmanager
 
 import pandas as pd
 pd.set_option("future.no_silent_downcasting", True)
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from app.core import metrics
 from app.core.config import get_settings
 from app.core.database import check_db_exists
 from app.core.limiter import limiter
@@ -27,6 +30,7 @@ from app.core.middleware import (
     PrivateNetworkAccessMiddleware,
     CorrelationIDMiddleware,
     RequestTimingMiddleware,
+    CompressionMiddleware,
 )
 from app.core.json_response import SafeJSONResponse
 
@@ -64,53 +68,23 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("✅  Database found: %s", settings.database_abs_path)
 
-        # ── Schema initialization — create ALL tables ────────────
-        from app.core.schema import ensure_all_tables
-        ensure_all_tables()
-
-        # ── Additive migration: news_articles.content_hash for dedupe fallback ──
+        # ── Schema migrations — versioned, no-op when current ────
+        from app.core.migrations import run_migrations, start_backfills
         try:
-            from app.core.database import add_column_if_missing, exec_sql
-            add_column_if_missing("news_articles", "content_hash", "TEXT")
-            exec_sql("CREATE INDEX IF NOT EXISTS ix_news_articles_content_hash ON news_articles(content_hash)")
+            run_migrations()
         except Exception as e:
-            logger.warning("news_articles.content_hash migration skipped: %s", e)
+            logger.error("⛔  Schema migration failed: %s", e)
+            raise
 
-        # ── Extraction jobs: ensure table + recover stale jobs ───
-        try:
-            from app.api.v1.fundamental import _ensure_schema as _ensure_fundamental_schema
-            from app.api.v1.fundamental import recover_stale_jobs
-            _ensure_fundamental_schema()
-            recovered = recover_stale_jobs()
-            if recovered:
-                logger.info("♻️  Recovered %d stale extraction job(s) at startup", recovered)
-        except Exception as e:
-            logger.warning("Extraction job recovery skipped: %s", e)
+        # ── Data backfills + stale-job recovery (background) ─────
+        start_backfills()
 
-        # ── Backfill yf_ticker for existing stocks ───────────────
-        try:
-            from app.core.database import exec_sql, query_df
-            from app.data.stock_lists import KUWAIT_STOCKS, US_STOCKS
-            ticker_map = {}
-            for s in KUWAIT_STOCKS:
-                ticker_map[s["symbol"].upper()] = s["yf_ticker"]
-            for s in US_STOCKS:
-                ticker_map[s["symbol"].upper()] = s["yf_ticker"]
-            missing = query_df(
-                "SELECT id, symbol FROM stocks WHERE yf_ticker IS NULL OR yf_ticker = ''"
-            )
-            if missing is not None and not missing.empty:
-                updated = 0
-                for _, row in missing.iterrows():
-                    sym = str(row["symbol"]).strip().upper()
-                    yf = ticker_map.get(sym)
-                    if yf:
-                        exec_sql("UPDATE stocks SET yf_ticker = ? WHERE id = ?", (yf, row["id"]))
-                        updated += 1
-                if updated:
-                    logger.info("Backfilled yf_ticker for %d existing stocks", updated)
-        except Exception as e:
-            logger.warning("yf_ticker backfill skipped: %s", e)
+    # ── Stock search index (typeahead over the reference lists) ─────
+    try:
+        from app.services.stock_search import build_index
+        build_index()
+    except Exception as e:
+        logger.warning("Stock search index build skipped: %s", e)
     start_scheduler()
 
     # ── Production security audit ────────────────────────────────────
@@ -168,6 +142,9 @@ app.add_middleware(RequestSizeLimitMiddleware)
 app.add_middleware(CorrelationIDMiddleware)
 app.add_middleware(RequestTimingMiddleware)
 
+# ── Compression (outermost of ours, so timing excludes it) ──────────
+app.add_middleware(CompressionMiddleware)
+
 # ── CORS Middleware ──────────────────────────────────────────────────
 # NOTE: allow_origins=["*"] + allow_credentials=True is spec-invalid.
 # Starlette echoes origin on preflight but returns "*" on actual requests,
@@ -248,3 +225,20 @@ async def health_tables():
         return {"status": "ok", "table_count": len(tables), "tables": tables}
     except Exception as e:
         return {"status": "error", "error": str(e)}
+
+
+# ── Prometheus metrics (no JWT; optional bearer token) ──────────────
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint — aggregated across workers, see app.core.metrics."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}"):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    if not metrics.available():
+        return Response("prometheus_client not installed\n", status_code=503, media_type="text/plain")
+    body, content_type = await run_in_threadpool(metrics.render)
+    return Response(body, media_type=content_type)
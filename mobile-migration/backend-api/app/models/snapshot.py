@@ -56,6 +56,9 @@ class PositionSnapshot(Base):
     realized_pnl: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     cash_dividends_received: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     status: Mapped[Optional[str]] = mapped_column(String(20), nullable=True, default="OPEN")
+    market_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    market_value: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    market_value_kwd: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
     def __repr__(self) -> str:
         return f"<PositionSnapshot id={self.id} symbol={self.stock_symbol} date={self.snapshot_date}>"
@@ -15,6 +15,8 @@ import pandas as pd
 
 from app.core.database import query_df, exec_sql, exec_sql_fetchone
 from app.services.fx_service import PORTFOLIO_CCY
+from app.services.portfolio_service import clear_wac_snapshots
+from app.services.symbol_service import alias_keys, resolve_symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -128,6 +130,7 @@ def import_transactions_excel(
         return result
 
     now = int(time.time())
+    aliases = alias_keys(user_id)
     total_imported = 0
     total_skipped = 0
 
@@ -159,10 +162,11 @@ def import_transactions_excel(
                 if not existing:
                     exec_sql(
                         """INSERT INTO stocks
-                           (user_id, symbol, name, portfolio, currency,
+                           (user_id, symbol, symbol_key, name, portfolio, currency,
                             current_price, last_updated)
-                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                        (user_id, symbol, stock_name, port, ccy, price, now),
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                        (user_id, symbol, resolve_symbol_key(user_id, symbol, aliases),
+                         stock_name, port, ccy, price, now),
                     )
                     s_imp += 1
                 else:
@@ -205,16 +209,17 @@ def import_transactions_excel(
 
                 exec_sql(
                     """INSERT INTO transactions
-                       (user_id, portfolio, stock_symbol, txn_date, txn_type,
+                       (user_id, portfolio, stock_symbol, symbol_key, txn_date, txn_type,
                         shares, purchase_cost, sell_value, bonus_shares,
                         cash_dividend, reinvested_dividend, fees,
                         broker, reference, notes,
                         category, is_deleted, created_at)
-                       VALUES (?,?,?,?,?, ?,?,?,?, ?,?,?, ?,?,?, ?,0,?)""",
+                       VALUES (?,?,?,?,?,?, ?,?,?,?, ?,?,?, ?,?,?, ?,0,?)""",
                     (
                         user_id,
                         row_port,
                         symbol,
+                        resolve_symbol_key(user_id, symbol, aliases),
                         txn_date,
                         txn_type,
                         _safe_num(row, "shares"),
@@ -236,6 +241,9 @@ def import_transactions_excel(
                 t_skip += 1
                 result["errors"].append({"sheet": "Transactions", "row": idx + 2, "error": str(exc)})
 
+        if t_imp:
+            # Imported rows can land before already-stamped ones
+            clear_wac_snapshots(user_id)
         total_imported += t_imp
         total_skipped += t_skip
         result["sheets"]["transactions"] = {"imported": t_imp, "skipped": t_skip}
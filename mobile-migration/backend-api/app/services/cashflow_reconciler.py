@@ -13,6 +13,7 @@ Takes raw AI-extracted cash flow rows and applies accounting rules to:
 
 Public API:
   - detect_cashflow_pages(pdf_bytes) → list of 0-indexed page numbers
+  - is_cashflow_page_text(text) → bool, the per-page test behind it
   - reconcile_cashflow(raw_items, periods) → ReconcileResult
   - validate_cashflow_metrics(rows, periods) → dict of validated CF metrics
 
@@ -58,6 +59,18 @@ _CF_MEDIUM_SIGNALS: List[str] = [
 ]
 
 
+def is_cashflow_page_text(text: str) -> bool:
+    """True when *text* (one page) carries a strong or 3+ medium CF signals."""
+    text = text.lower()
+    if any(re.search(pattern, text) for pattern in _CF_STRONG_SIGNALS):
+        return True
+    hits = sum(
+        1 for pattern in _CF_MEDIUM_SIGNALS
+        if re.search(pattern, text)
+    )
+    return hits >= 3
+
+
 def detect_cashflow_pages(pdf_bytes: bytes) -> List[int]:
     """Detect pages that likely contain a cash flow statement.
 
@@ -67,26 +80,11 @@ def detect_cashflow_pages(pdf_bytes: bytes) -> List[int]:
     import fitz  # PyMuPDF
 
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    cf_pages: List[int] = []
-
-    for page_idx in range(len(doc)):
-        page = doc[page_idx]
-        text = page.get_text("text").lower()
-
-        # Check strong signals first
-        for pattern in _CF_STRONG_SIGNALS:
-            if re.search(pattern, text):
-                cf_pages.append(page_idx)
-                break
-        else:
-            # Count medium signal hits
-            hits = sum(
-                1 for pattern in _CF_MEDIUM_SIGNALS
-                if re.search(pattern, text)
-            )
-            if hits >= 3:
-                cf_pages.append(page_idx)
-
+    cf_pages: List[int] = [
+        page_idx for page_idx in range(len(doc))
+        if is_cashflow_page_text(doc[page_idx].get_text("text"))
+    ]
+    max_page = doc.page_count - 1
     doc.close()
 
     # If we found CF pages, also include immediately adjacent pages
@@ -95,12 +93,6 @@ def detect_cashflow_pages(pdf_bytes: bytes) -> List[int]:
         expanded = set(cf_pages)
         for p in cf_pages:
             expanded.add(p + 1)  # next page might be continuation
-        # Filter to valid page range
-        max_page = doc.page_count - 1 if hasattr(doc, 'page_count') else max(cf_pages) + 1
-        # Re-open to get page count
-        doc2 = fitz.open(stream=pdf_bytes, filetype="pdf")
-        max_page = doc2.page_count - 1
-        doc2.close()
         expanded = {p for p in expanded if 0 <= p <= max_page}
         cf_pages = sorted(expanded)
 
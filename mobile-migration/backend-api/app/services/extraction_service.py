@@ -24,6 +24,9 @@ import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.core import metrics
+from app.core.cache import MemoryCache
+
 logger = logging.getLogger(__name__)
 
 # ════════════════════════════════════════════════════════════════════
@@ -403,23 +406,30 @@ MODEL_FALLBACK_ORDER = [
 RATE_LIMIT_DELAY = 30   # seconds to wait after 429
 API_MAX_RETRIES = 3     # retries per model before fallback
 
-# In-memory image cache: pdf_hash → list of PNG bytes
-# Avoids re-rendering PDFs between extraction and validation steps.
-_IMAGE_CACHE: Dict[str, List[bytes]] = {}
-_IMAGE_CACHE_MAX = 5  # Keep at most 5 PDFs in memory
+# Page-cache key component.  Prompt text is hashed into the key as well;
+# bump this when response parsing changes what a cached reply means.
+PROMPT_VERSION = "1"
+
+# Rendered-page cache: pdf_hash → list of PNG bytes.  Kept in process
+# under an entry and byte cap rather than in the shared cache: a PDF's
+# pages run to megabytes, too big to pickle into SQLite / Redis, and a
+# validation on another worker just re-renders.
+_IMAGE_CACHE_TTL = 1800  # extraction and validation run minutes apart
+_IMAGE_CACHE_MAX = 5  # PDFs
+_IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_IMAGE_CACHE = MemoryCache(max_entries=_IMAGE_CACHE_MAX, max_bytes=_IMAGE_CACHE_MAX_BYTES)
 
 
 def _cache_images(h: str, images: List[bytes]) -> None:
-    """Store rendered images in memory, evict oldest if over limit."""
-    if len(_IMAGE_CACHE) >= _IMAGE_CACHE_MAX:
-        oldest = next(iter(_IMAGE_CACHE))
-        del _IMAGE_CACHE[oldest]
-    _IMAGE_CACHE[h] = images
+    """Store rendered images for a PDF hash."""
+    _IMAGE_CACHE.set(h, images, ttl=_IMAGE_CACHE_TTL)
 
 
 def _get_cached_images(h: str) -> Optional[List[bytes]]:
     """Retrieve cached images for a given PDF hash."""
-    return _IMAGE_CACHE.get(h)
+    images = _IMAGE_CACHE.get(h)
+    metrics.cache_lookup("image", hit=images is not None)
+    return images
 
 
 # ════════════════════════════════════════════════════════════════════
@@ -470,6 +480,7 @@ def _get_cached(stock_id: int, h: str) -> Optional[ExtractionResult]:
         (stock_id, h),
     )
     if not row:
+        metrics.cache_lookup("extraction", hit=False)
         return None
 
     try:
@@ -489,6 +500,7 @@ def _get_cached(stock_id: int, h: str) -> Optional[ExtractionResult]:
                 "DELETE FROM extraction_cache WHERE stock_id = ? AND pdf_hash = ?",
                 (stock_id, h),
             )
+            metrics.cache_lookup("extraction", hit=False)
             return None
 
         result.cached = True
@@ -496,9 +508,11 @@ def _get_cached(stock_id: int, h: str) -> Optional[ExtractionResult]:
         result.model_used = row["model_used"] or ""
         result.pages_processed = row["pages"] or 0
         logger.info("Cache hit for stock %d (hash %s…)", stock_id, h[:12])
+        metrics.cache_lookup("extraction", hit=True)
         return result
     except Exception:
         logger.warning("Corrupt cache entry for stock %d, ignoring", stock_id)
+        metrics.cache_lookup("extraction", hit=False)
         return None
 
 
@@ -533,26 +547,47 @@ def _set_cache(
 # PDF → IMAGES
 # ════════════════════════════════════════════════════════════════════
 
-def pdf_to_images(pdf_bytes: bytes, dpi: int = 250) -> List[bytes]:
-    """Convert each PDF page to a PNG image at *dpi* resolution."""
+def pdf_to_images(
+    pdf_bytes: bytes, dpi: int = 250, pages: Optional[List[int]] = None,
+) -> List[bytes]:
+    """Convert PDF pages to PNG images at *dpi* resolution.
+
+    *pages* (0-based) limits rendering to those pages, in that order;
+    by default every page is rendered.
+    """
     import fitz  # PyMuPDF
 
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     images: List[bytes] = []
     scale = dpi / 72
     mat = fitz.Matrix(scale, scale)
-    for page in doc:
-        pix = page.get_pixmap(matrix=mat)
+    indices = range(len(doc)) if pages is None else [p for p in pages if 0 <= p < len(doc)]
+    for idx in indices:
+        pix = doc[idx].get_pixmap(matrix=mat)
         images.append(pix.tobytes("png"))
     doc.close()
     return images
 
 
+def _render_selected_pages(pdf_bytes: bytes):
+    """Select statement pages and render them.
+
+    Returns ``(selection, images, {page_index: image})``; images are in
+    page order.
+    """
+    from app.services.page_selector import select_pages_or_full
+
+    selection = select_pages_or_full(pdf_bytes)
+    pages = selection.pages
+    images = pdf_to_images(pdf_bytes, pages=pages)
+    return selection, images, dict(zip(pages, images))
+
+
 # ════════════════════════════════════════════════════════════════════
 # PROMPTS
 # ════════════════════════════════════════════════════════════════════
 
-def _build_extraction_prompt(n_pages: int, existing_codes: Optional[List[Dict[str, str]]] = None) -> str:
+def _build_extraction_prompt(n_pages: int) -> str:
     """
     The "Perfect" Self-Correcting Extraction Prompt with Native Visual
     Table Mapping.
@@ -797,31 +832,6 @@ return ONLY this JSON — no markdown fences, no commentary, no explanation:
 • Verify horizontal alignment — a label and its value must be on the same
   row in the image.  If they are not visually aligned, do NOT pair them.
 """
-    # Inject existing codes so the AI reuses them for continuity
-    if existing_codes:
-        codes_block = "\n".join(
-            f'  - key: "{c["code"]}"  label: "{c["name"]}"  (type: {c["type"]})'
-            for c in existing_codes
-        )
-        prompt += f"""
-
-### EXISTING LINE ITEM KEYS (MANDATORY REUSE)
-This stock ALREADY has financial data with these line item keys from
-previously uploaded reports. You MUST reuse the EXACT same "key" value
-for any line item that matches the same financial concept, even if the
-wording in the new PDF differs slightly.
-
-{codes_block}
-
-RULES FOR REUSE:
-• If a line item in the new PDF matches any of the above concepts,
-  use the EXISTING key — do NOT invent a new variant.
-• Example: if existing key is "provision_for_staff_indemnity" and the
-  new PDF says "Provision for indemnity", use "provision_for_staff_indemnity".
-• Only create a NEW key for line items that genuinely do not exist above.
-• This ensures data continuity across multiple report periods.
-"""
-    return prompt
 
 
 def _build_retry_prompt(
@@ -1853,10 +1863,7 @@ RULES:
 """
 
 
-def _build_cashflow_extraction_prompt(
-    n_pages: int,
-    existing_codes: Optional[List[Dict[str, str]]] = None,
-) -> str:
+def _build_cashflow_extraction_prompt(n_pages: int) -> str:
     """Dedicated prompt for cash flow statement extraction.
 
     Uses stricter rules than the generic prompt:
@@ -1997,24 +2004,6 @@ Return ONLY a JSON array (no markdown fences, no commentary):
 • Return ONE object with ALL periods merged if CF spans multiple pages.
 • Each item's "values" must cover ALL periods.
 • Include "section" and "row_kind" for every item.
-"""
-
-    if existing_codes:
-        cf_codes = [c for c in existing_codes if c.get("type") == "cashflow"]
-        if cf_codes:
-            codes_block = "\n".join(
-                f'  - key: "{c["code"]}"  label: "{c["name"]}"'
-                for c in cf_codes
-            )
-            prompt += f"""
-### EXISTING CASH FLOW KEYS (MANDATORY REUSE)
-This stock already has cash flow data with these exact keys.
-Reuse the EXACT same "key" for matching concepts:
-
-{codes_block}
-
-If the new PDF has the same concept with different wording, use the existing key.
-Only create new keys for genuinely new line items.
 """
 
     return prompt
@@ -2025,16 +2014,23 @@ async def _targeted_extract(
     stmt_type: str,
     page_images: List[bytes],
     model_name: str = "gemini-2.5-flash",
+    use_cache: bool = True,
 ) -> List[ExtractedStatement]:
-    """Extract a single statement type from page images (fallback)."""
-    prompt = _build_targeted_prompt(stmt_type, len(page_images))
+    """Extract a single statement type from page images (fallback).
+
+    Cash flow uses the dedicated cash flow prompt.
+    """
+    prompt = (
+        _build_cashflow_extraction_prompt(len(page_images)) if stmt_type == "cashflow"
+        else _build_targeted_prompt(stmt_type, len(page_images))
+    )
     try:
-        raw_text = await _call_gemini(api_key, prompt, page_images, model_name)
+        raw_text = await _cached_gemini(api_key, prompt, page_images, model_name, use_cache)
         raw_json = _unwrap_to_statement_list(_parse_ai_json(raw_text))
         if not raw_json:
             return []
         stmts = _raw_to_statements(raw_json)
-        stmts = _normalize_statements(stmts)
+        stmts = [s for s in _normalize_statements(stmts) if s.statement_type == stmt_type]
         logger.info(
             "Targeted fallback extracted %s: %d items",
             stmt_type,
@@ -2051,6 +2047,7 @@ async def _fallback_missing_types(
     existing_statements: List[ExtractedStatement],
     page_images: List[bytes],
     model_name: str = "gemini-2.5-flash",
+    use_cache: bool = True,
 ) -> List[ExtractedStatement]:
     """Check for missing core statement types and extract them individually.
 
@@ -2072,7 +2069,7 @@ async def _fallback_missing_types(
     )
 
     tasks = [
-        _targeted_extract(api_key, st, page_images, model_name)
+        _targeted_extract(api_key, st, page_images, model_name, use_cache)
         for st in sorted(missing)
     ]
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -2091,6 +2088,11 @@ async def _fallback_missing_types(
 # GEMINI API CALL
 # ════════════════════════════════════════════════════════════════════
 
+def _models_to_try(model_name: str) -> List[str]:
+    """Models ``_call_gemini`` tries for *model_name*, in order."""
+    return [model_name] if model_name not in MODEL_FALLBACK_ORDER else list(MODEL_FALLBACK_ORDER)
+
+
 async def _call_gemini(
     api_key: str,
     prompt: str,
@@ -2102,6 +2104,17 @@ async def _call_gemini(
     Uses response_mime_type='application/json' to force clean JSON output.
     Model fallback and rate-limit retry matching Streamlit's approach.
     """
+    text, _ = await _call_gemini_with_model(api_key, prompt, page_images, model_name)
+    return text
+
+
+async def _call_gemini_with_model(
+    api_key: str,
+    prompt: str,
+    page_images: List[bytes],
+    model_name: str = "gemini-2.5-flash",
+) -> Tuple[str, str]:
+    """``_call_gemini`` that also returns the model which answered."""
     import asyncio
 
     from google import genai
@@ -2114,10 +2127,7 @@ async def _call_gemini(
     for png in page_images:
         parts.append(Image.open(io.BytesIO(png)))
 
-    models_to_try = (
-        [model_name] if model_name not in MODEL_FALLBACK_ORDER
-        else MODEL_FALLBACK_ORDER
-    )
+    models_to_try = _models_to_try(model_name)
 
     last_error: Exception | None = None
 
@@ -2140,7 +2150,7 @@ async def _call_gemini(
                         f"(finish_reason="
                         f"{getattr(response.candidates[0], 'finish_reason', '?')})"
                     )
-                return response.text
+                return response.text, m
 
             except Exception as exc:
                 last_error = exc
@@ -2164,6 +2174,118 @@ async def _call_gemini(
     raise RuntimeError(f"All Gemini models failed. Last error: {last_error}")
 
 
+async def _cached_gemini(
+    api_key: str,
+    prompt: str,
+    page_images: List[bytes],
+    model_name: str = "gemini-2.5-flash",
+    use_cache: bool = True,
+) -> str:
+    """``_call_gemini`` behind the content-addressed page cache.
+
+    The key is (page-image hashes, PROMPT_VERSION + prompt digest, model).
+    *prompt* must not carry anything stock-specific — the prompts passed
+    here are fixed per statement type and page count, so the same pages
+    are never sent twice across stocks, users and PDFs.  Replies are
+    stored under the model that answered and looked up along the fallback
+    chain of *model_name*.  Only replies that parse into at least one
+    statement are stored.  ``use_cache=False`` skips the lookup but still
+    refreshes the entry.
+    """
+    from app.services import page_extraction_cache as page_cache
+
+    unit_key = page_cache.unit_hash(page_images)
+    version = page_cache.prompt_version(PROMPT_VERSION, prompt)
+    if use_cache:
+        cached = page_cache.get(unit_key, version, _models_to_try(model_name))
+        if cached is not None:
+            logger.info(
+                "Page cache hit (%d page(s), %s…)", len(page_images), unit_key[:12],
+            )
+            return cached
+
+    raw_text, answered_by = await _call_gemini_with_model(api_key, prompt, page_images, model_name)
+    try:
+        if _unwrap_to_statement_list(_parse_ai_json(raw_text)):
+            page_cache.put(unit_key, version, answered_by, raw_text, len(page_images))
+    except ValueError:
+        pass
+    return raw_text
+
+
+def _page_units(
+    selection, image_by_page: Dict[int, bytes],
+) -> List[Tuple[Optional[str], List[bytes]]]:
+    """Split selected pages into ``(statement type, images)`` units for the first pass.
+
+    Each statement type's candidate pages form one unit (a page claimed by
+    several types goes to the first), so an upload that shares pages with
+    an earlier one only re-sends the units that changed.  Scanned or
+    unclassified documents stay a single unit of type None.
+    """
+    units: List[Tuple[Optional[str], List[bytes]]] = []
+    claimed: set = set()
+    for stmt_type in ("balance", "income", "cashflow", "equity"):
+        pages = [
+            p for p in selection.by_type.get(stmt_type, [])
+            if p not in claimed and p in image_by_page
+        ]
+        if pages:
+            claimed.update(pages)
+            units.append((stmt_type, [image_by_page[p] for p in pages]))
+    if not units:
+        units.append((None, [image_by_page[p] for p in sorted(image_by_page)]))
+    return units
+
+
+def _unit_prompt(stmt_type: Optional[str], n_pages: int) -> str:
+    """First-pass prompt for a page unit: cash flow pages get the dedicated prompt."""
+    if stmt_type == "cashflow":
+        return _build_cashflow_extraction_prompt(n_pages)
+    return _build_extraction_prompt(n_pages)
+
+
+def _code_token(text: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", (text or "").lower()).strip("_")
+
+
+def _apply_existing_codes(
+    statements: List[ExtractedStatement],
+    existing_codes: Optional[List[Dict[str, str]]],
+) -> int:
+    """Rename extracted item keys to the stock's existing line-item codes.
+
+    Prompts stay stock-independent so the page cache can be shared; code
+    continuity is restored here instead.  An item whose key or label
+    matches an existing code or name of the same statement type takes that
+    code, unless another item of the statement already has it.  Fuzzier
+    matching still happens at persist time.  Returns how many keys changed.
+    """
+    if not existing_codes:
+        return 0
+    by_type: Dict[str, Dict[str, str]] = {}
+    for c in existing_codes:
+        index = by_type.setdefault(c.get("type", ""), {})
+        index.setdefault(_code_token(c["code"]), c["code"])
+        if c.get("name"):
+            index.setdefault(_code_token(c["name"]), c["code"])
+
+    changed = 0
+    for stmt in statements:
+        index = by_type.get(stmt.statement_type)
+        if not index:
+            continue
+        used = {item.key for item in stmt.items}
+        for item in stmt.items:
+            code = index.get(_code_token(item.key)) or index.get(_code_token(item.label_raw))
+            if code and code != item.key and code not in used:
+                used.discard(item.key)
+                used.add(code)
+                item.key = code
+                changed += 1
+    return changed
+
+
 # ════════════════════════════════════════════════════════════════════
 # RAW JSON → TYPED DATACLASSES
 # ════════════════════════════════════════════════════════════════════
@@ -2731,52 +2853,48 @@ async def extract_cashflow_to_stage(
     api_key: str,
     model_name: str = "gemini-2.5-flash",
     existing_codes: Optional[List[Dict[str, str]]] = None,
+    cf_images: Optional[List[bytes]] = None,
+    use_cache: bool = True,
 ) -> List[ExtractedStatement]:
     """Extract ONLY the cash flow statement using dedicated page detection
     and a cash-flow-specific prompt.
 
     Steps:
-    1. Detect cash flow pages via keyword heuristics
-    2. Convert only those pages to images
+    1. Select cash flow pages via the shared page selector
+    2. Render only those pages to images
     3. Send to Gemini with the dedicated CF prompt
-    4. Parse and return statements (no caching, no arithmetic retry)
+    4. Parse and return statements (page cache only, no arithmetic retry)
 
     The caller (persist layer) handles staging and reconciliation.
     Falls back to all pages if page detection finds nothing.
+    *cf_images* skips steps 1–2 when the caller already rendered them.
     """
-    from app.services.cashflow_reconciler import detect_cashflow_pages
+    if cf_images is None:
+        from app.services.page_selector import select_pages_or_full
 
-    # Step 1: Detect cash flow pages
-    cf_page_indices = detect_cashflow_pages(pdf_bytes)
+        # Step 1: Select cash flow pages
+        selection = select_pages_or_full(pdf_bytes)
+        cf_page_indices = selection.by_type.get("cashflow", [])
 
-    # Step 2: Convert to images
-    all_images = pdf_to_images(pdf_bytes)
-    if not all_images:
-        raise ValueError("PDF has no pages.")
-
-    if cf_page_indices:
-        # Use only CF pages
-        cf_images = [
-            all_images[i] for i in cf_page_indices
-            if i < len(all_images)
-        ]
+        # Step 2: Render only those pages (all pages when none were found)
+        if cf_page_indices:
+            cf_images = pdf_to_images(pdf_bytes, pages=cf_page_indices)
+            logger.info(
+                "Cash flow extraction: using %d detected CF pages out of %d total",
+                len(cf_images), selection.total_pages,
+            )
         if not cf_images:
-            cf_images = all_images  # fallback
-        logger.info(
-            "Cash flow extraction: using %d detected CF pages out of %d total",
-            len(cf_images), len(all_images),
-        )
-    else:
-        # Fallback: use all pages
-        cf_images = all_images
-        logger.warning(
-            "Cash flow page detection found no CF pages — using all %d pages",
-            len(all_images),
-        )
+            cf_images = pdf_to_images(pdf_bytes)
+            logger.warning(
+                "Cash flow page detection found no CF pages — using all %d pages",
+                len(cf_images),
+            )
+    if not cf_images:
+        raise ValueError("PDF has no pages.")
 
     # Step 3: Build CF-specific prompt and extract
-    prompt = _build_cashflow_extraction_prompt(len(cf_images), existing_codes)
-    raw_text = await _call_gemini(api_key, prompt, cf_images, model_name)
+    prompt = _build_cashflow_extraction_prompt(len(cf_images))
+    raw_text = await _cached_gemini(api_key, prompt, cf_images, model_name, use_cache)
 
     logger.info("CF extraction raw response: %d chars", len(raw_text))
     raw_json = _unwrap_to_statement_list(_parse_ai_json(raw_text))
@@ -2791,6 +2909,7 @@ async def extract_cashflow_to_stage(
 
     # Only keep cashflow type
     cf_stmts = [s for s in statements if s.statement_type == "cashflow"]
+    _apply_existing_codes(cf_stmts, existing_codes)
 
     # Apply unit_scale
     for stmt in cf_stmts:
@@ -2827,8 +2946,9 @@ async def extract_financials(
     Full self-reflective extraction pipeline.
 
     1. Hash PDF → check cache
-    2. Convert PDF → 200 DPI images
-    3. Send to AI with self-reflective prompt
+    2. Select statement pages locally → render only those
+    3. Send to AI with self-reflective prompt, one call per statement's
+       pages; page units seen before are served from the page cache
     4. Parse JSON → verify arithmetic
     5. If verification fails, retry with targeted prompt (up to MAX_RETRIES)
     6. Cache final result
@@ -2843,23 +2963,54 @@ async def extract_financials(
         if cached:
             return cached
 
-    # ── Step 2: PDF → images ─────────────────────────────────────────
-    page_images = pdf_to_images(pdf_bytes)
+    # ── Step 2: Select statement pages → images ──────────────────────
+    # Only candidate pages are rendered and sent; the full document is
+    # rendered lazily if a statement type turns out to be missing.
+    selection, page_images, image_by_page = _render_selected_pages(pdf_bytes)
     if not page_images:
         raise ValueError("PDF has no pages.")
     _cache_images(h, page_images)  # cache for validation step
 
+    _all_images: List[bytes] = []
+
+    def _full_document_images() -> List[bytes]:
+        if selection.is_full:
+            return page_images
+        if not _all_images:
+            _all_images.extend(pdf_to_images(pdf_bytes))
+            logger.info("Widening to the full document (%d pages)", len(_all_images))
+        return _all_images
+
+    def _images_for(stmt_type: str) -> List[bytes]:
+        pages = selection.by_type.get(stmt_type)
+        if not pages:
+            return _full_document_images()
+        return [image_by_page[p] for p in pages if p in image_by_page]
+
     logger.info(
-        "Extraction pipeline: %s (%d pages, %.1f KB)",
-        filename, len(page_images), len(pdf_bytes) / 1024,
+        "Extraction pipeline: %s (%d of %d pages, %.1f KB)",
+        filename, len(page_images), selection.total_pages, len(pdf_bytes) / 1024,
     )
 
     # ── Step 3: First extraction pass ────────────────────────────────
-    prompt = _build_extraction_prompt(len(page_images), existing_codes=existing_codes)
-    raw_text = await _call_gemini(api_key, prompt, page_images, model_name)
-    logger.info("Raw AI response length: %d chars", len(raw_text))
+    # One call per statement unit (cash flow pages with the dedicated
+    # cash flow prompt), so on a cold cache each page is sent once and
+    # units with pages seen before never reach the model.
+    import asyncio as _aio
+
+    units = _page_units(selection, image_by_page)
+    unit_texts = await _aio.gather(*[
+        _cached_gemini(
+            api_key, _unit_prompt(unit_type, len(unit)), unit, model_name, use_cache,
+        )
+        for unit_type, unit in units
+    ])
+    raw_json = []
+    for unit_text in unit_texts:
+        raw_json.extend(_unwrap_to_statement_list(_parse_ai_json(unit_text)))
+    raw_text = "\n".join(unit_texts)
+    logger.info("Raw AI response length: %d chars (%d unit(s))", len(raw_text), len(units))
     logger.debug("Raw AI response (first 500): %s", raw_text[:500])
-    raw_json = _unwrap_to_statement_list(_parse_ai_json(raw_text))
 
     # Preserve first-pass raw text for debugging zero-statement results
     _first_pass_raw_text = raw_text
@@ -2903,25 +3054,36 @@ async def extract_financials(
         )
 
     # ── Step 3b: Fallback for missing statement types ────────────────
+    # Widen on miss: types missing from the candidate pages are searched
+    # in the full document.
+    missing_core = _VALID_EXTRACT_TYPES - {s.statement_type for s in statements}
     statements = await _fallback_missing_types(
-        api_key, statements, page_images, model_name,
+        api_key, statements,
+        _full_document_images() if missing_core else page_images,
+        model_name, use_cache,
     )
     statements = _merge_same_type_statements(statements)
 
     # ── Step 3c: Re-extract incomplete statement types ───────────────
+    # Skipped for types that were just re-extracted in 3b, and for cash
+    # flow when its pages already went out with the cash flow prompt —
+    # the same pages and prompt would only repeat the answer.
     MIN_ITEMS = {"balance": 10, "cashflow": 8, "income": 8, "equity": 4}
+    already_targeted = set(missing_core)
+    if any(unit_type == "cashflow" for unit_type, _ in units):
+        already_targeted.add("cashflow")
     incomplete_types = [
         s.statement_type for s in statements
         if len(s.items) < MIN_ITEMS.get(s.statement_type, 8)
+        and s.statement_type not in already_targeted
     ]
     if incomplete_types:
-        import asyncio as _aio
         logger.warning(
             "Incomplete extraction detected for %s — re-extracting",
             incomplete_types,
         )
         re_tasks = [
-            _targeted_extract(api_key, st, page_images, model_name)
+            _targeted_extract(api_key, st, _images_for(st), model_name, use_cache)
             for st in incomplete_types
         ]
         re_results = await _aio.gather(*re_tasks, return_exceptions=True)
@@ -2948,39 +3110,10 @@ async def extract_financials(
                 logger.error("Re-extraction failed for %s: %s", st_type, result)
         statements = _merge_same_type_statements(statements)
 
-    # ── Step 3d: Dedicated cash flow extraction ──────────────────────
-    # Use the CF-specific prompt with page detection for better results.
-    # Replace the generic cashflow extraction with the dedicated one.
-    cf_existing = next(
-        (s for s in statements if s.statement_type == "cashflow"), None,
-    )
-    cf_item_count = len(cf_existing.items) if cf_existing else 0
-
-    try:
-        cf_stmts = await extract_cashflow_to_stage(
-            pdf_bytes=pdf_bytes,
-            api_key=api_key,
-            model_name=model_name,
-            existing_codes=existing_codes,
-        )
-        if cf_stmts:
-            new_cf_count = sum(len(s.items) for s in cf_stmts)
-            if new_cf_count >= cf_item_count:
-                # Replace generic CF with dedicated CF extraction
-                statements = [
-                    s for s in statements if s.statement_type != "cashflow"
-                ] + cf_stmts
-                logger.info(
-                    "Dedicated CF extraction replaced generic: %d → %d items",
-                    cf_item_count, new_cf_count,
-                )
-            else:
-                logger.info(
-                    "Dedicated CF extraction had fewer items (%d vs %d) — keeping generic",
-                    new_cf_count, cf_item_count,
-                )
-    except Exception as exc:
-        logger.warning("Dedicated CF extraction failed (non-fatal): %s", exc)
+    # Carry the stock's existing line-item codes over to this extraction
+    renamed = _apply_existing_codes(statements, existing_codes)
+    if renamed:
+        logger.info("Mapped %d extracted keys onto existing line-item codes", renamed)
 
     # Apply unit_scale
     for stmt in statements:
@@ -3127,10 +3260,11 @@ async def validate_extraction(
 
     statements = cached.statements
 
-    # Reuse cached images from extraction step, or re-render
+    # Reuse cached images from extraction step, or re-render the same
+    # selected pages
     page_images = _get_cached_images(h)
     if not page_images:
-        page_images = pdf_to_images(pdf_bytes)
+        _, page_images, _ = _render_selected_pages(pdf_bytes)
         if not page_images:
             raise ValueError("PDF has no pages.")
         _cache_images(h, page_images)
@@ -1,16 +1,28 @@
 """
 FX (Foreign Exchange) Service
 
-Handles USD→KWD conversion with 1-hour caching.
+Handles USD→KWD conversion with 1-hour caching (shared across workers).
 Extracts and de-Streamlit-ifies the logic from legacy ui.py.
+
+Column-wise conversion (``convert_series_to_kwd``) resolves the rate once
+per call instead of once per row.  Historical daily USD→KWD fixings are
+kept in the ``fx_rates`` table and backfilled from Yahoo Finance on demand,
+so dated flows can be converted at the rate of their own date.
 """
 
 import time
 import random
 import logging
+from datetime import date, timedelta
 from typing import Optional
 
+import numpy as np
+import pandas as pd
+
+from app.core import metrics
+from app.core.cache import get_cache
 from app.core.config import get_settings
+from app.core.profiling import span
 
 logger = logging.getLogger(__name__)
 _settings = get_settings()
@@ -19,6 +31,9 @@ _settings = get_settings()
 DEFAULT_USD_TO_KWD: float = 0.307190  # Approximate fallback rate
 BASE_CCY = "KWD"
 USD_CCY = "USD"
+USD_KWD_PAIR = "USDKWD"
+_FX_TICKER = "KWD=X"
+_ASOF_TOLERANCE_DAYS = 7  # weekends / holidays use the last prior fixing
 
 PORTFOLIO_CCY: dict[str, str] = {
     "KFH": "KWD",
@@ -26,26 +41,34 @@ PORTFOLIO_CCY: dict[str, str] = {
     "USA": "USD",
 }
 
-# ── In-memory FX cache ──────────────────────────────────────────────
-_fx_cache: dict[str, dict] = {}
+# ── FX cache (shared across workers, see app.core.cache) ────────────
+# convert_to_kwd() may run per row, so the shared entry is fronted by a
+# short per-process copy instead of a backend round-trip on every call.
+_LOCAL_TTL = 60.0
+_local_rate: Optional[tuple[float, float]] = None  # (rate, monotonic expiry)
 
 
 def _cache_key() -> str:
-    return "usd_kwd"
+    return "fx:usd_kwd"
 
 
 def _get_cached_rate() -> Optional[float]:
     """Return cached rate if still fresh, else None."""
-    entry = _fx_cache.get(_cache_key())
-    if entry is None:
-        return None
-    if time.time() - entry["ts"] > _settings.FX_CACHE_TTL:
-        return None  # expired
-    return entry["rate"]
+    global _local_rate
+    if _local_rate is not None and time.monotonic() < _local_rate[1]:
+        metrics.cache_lookup("fx", hit=True)
+        return _local_rate[0]
+    rate = get_cache().get(_cache_key())
+    metrics.cache_lookup("fx", hit=rate is not None)
+    if rate is not None:
+        _local_rate = (rate, time.monotonic() + min(_LOCAL_TTL, _settings.FX_CACHE_TTL))
+    return rate
 
 
 def _set_cached_rate(rate: float) -> None:
-    _fx_cache[_cache_key()] = {"rate": rate, "ts": time.time()}
+    global _local_rate
+    get_cache().set(_cache_key(), rate, ttl=_settings.FX_CACHE_TTL)
+    _local_rate = (rate, time.monotonic() + min(_LOCAL_TTL, _settings.FX_CACHE_TTL))
 
 
 # ── Public API ──────────────────────────────────────────────────────
@@ -70,8 +93,9 @@ def fetch_usd_kwd_rate(max_retries: int = 3) -> float:
 
     for attempt in range(1, max_retries + 1):
         try:
-            ticker = yf.Ticker("KWD=X")
-            hist = ticker.history(period="5d", interval="1d", auto_adjust=False)
+            ticker = yf.Ticker(_FX_TICKER)
+            with span("fx"):
+                hist = ticker.history(period="5d", interval="1d", auto_adjust=False)
             if hist is not None and not hist.empty and "Close" in hist.columns:
                 rate = float(hist["Close"].dropna().iloc[-1])
                 if rate > 0:
@@ -93,10 +117,11 @@ def get_usd_kwd_rate() -> float:
     return fetch_usd_kwd_rate()
 
 
-def convert_to_kwd(amount: float, ccy: str) -> float:
+def convert_to_kwd(amount: float, ccy: str, usd_kwd_rate: Optional[float] = None) -> float:
     """
     Convert *amount* from *ccy* to KWD.
-    No Streamlit dependency – uses cached or live FX rate.
+    No Streamlit dependency – uses *usd_kwd_rate* if given, else the
+    cached or live FX rate.
     """
     if amount is None:
         return 0.0
@@ -111,11 +136,182 @@ def convert_to_kwd(amount: float, ccy: str) -> float:
     if ccy == "KWD":
         return amount
     if ccy == "USD":
-        rate = get_usd_kwd_rate()
+        rate = usd_kwd_rate or get_usd_kwd_rate()
         return amount * rate
     return amount  # other currencies pass-through
 
 
+# ── Vectorized conversion ───────────────────────────────────────────
+
+def convert_series_to_kwd(
+    amounts,
+    currencies,
+    dates=None,
+    usd_kwd_rate: Optional[float] = None,
+) -> pd.Series:
+    """
+    Convert a column of *amounts* to KWD in one operation.
+
+    *currencies* is a column aligned with *amounts* (by position) or a
+    single code.  Semantics match :func:`convert_to_kwd`: missing or
+    non-numeric amounts are 0.0, missing currencies are KWD, USD is
+    multiplied by the USD→KWD rate, anything else passes through.
+
+    The rate is resolved once — *usd_kwd_rate* if given, else the
+    cached/live rate.  With *dates* (aligned like *currencies*) each USD
+    row uses the fixing for its own date instead (see
+    :func:`get_usd_kwd_rates`).  Returns a float Series on the index of
+    *amounts*.
+    """
+    if not isinstance(amounts, pd.Series):
+        amounts = pd.Series(amounts, dtype=object)
+    out = pd.to_numeric(amounts, errors="coerce").astype(float).fillna(0.0)
+    if out.empty:
+        return out
+
+    if currencies is None or isinstance(currencies, str):
+        ccy = np.full(len(out), currencies or BASE_CCY, dtype=object)
+    else:
+        ccy = np.asarray(currencies, dtype=object)
+    usd = ccy == USD_CCY
+    if not usd.any():
+        return out
+
+    if dates is None:
+        out[usd] = out[usd] * (usd_kwd_rate or get_usd_kwd_rate())
+    else:
+        usd_dates = np.asarray(dates, dtype=object)[usd]
+        out[usd] = out[usd] * get_usd_kwd_rates(usd_dates).to_numpy()
+    return out
+
+
+# ── Historical (dated) rates ────────────────────────────────────────
+
+_history_misses: set[date] = set()  # dates Yahoo had no fixing for (this process)
+
+
+def get_usd_kwd_rates(dates) -> pd.Series:
+    """
+    USD→KWD rate for each of *dates*, positionally aligned.
+
+    Fixings come from the ``fx_rates`` table; dates it does not cover are
+    backfilled from Yahoo Finance in one history download and stored.
+    Non-trading days use the last prior fixing (up to a week back).
+    Today, future dates, unparseable dates and anything still uncovered
+    use the current rate.
+    """
+    ts = pd.to_datetime(pd.Series(np.asarray(dates, dtype=object)), errors="coerce")
+    current = get_usd_kwd_rate()
+    rates = pd.Series(current, index=ts.index, dtype=float)
+
+    day = ts.dt.normalize()
+    today = pd.Timestamp(date.today())
+    past = day.notna() & (day < today)
+    if not past.any():
+        return rates
+
+    wanted = day[past]
+    table = _load_rates(wanted.min() - pd.Timedelta(days=_ASOF_TOLERANCE_DAYS), wanted.max())
+    found = _asof(table, wanted)
+
+    missing = found.isna() & ~wanted.dt.date.isin(_history_misses)
+    if missing.any():
+        lo, hi = wanted[missing].min(), wanted[missing].max()
+        if _backfill_rates(lo - pd.Timedelta(days=_ASOF_TOLERANCE_DAYS), hi):
+            table = _load_rates(wanted.min() - pd.Timedelta(days=_ASOF_TOLERANCE_DAYS), wanted.max())
+            found = _asof(table, wanted)
+        _history_misses.update(wanted[found.isna()].dt.date)
+
+    rates[past] = found.fillna(current).to_numpy()
+    return rates
+
+
+def _asof(table: pd.Series, days: pd.Series) -> pd.Series:
+    """Last fixing on or before each day, within the as-of tolerance."""
+    if table.empty:
+        return pd.Series(np.nan, index=days.index)
+    idx = table.index.to_numpy()
+    when = days.to_numpy()
+    pos = np.searchsorted(idx, when, side="right") - 1
+    ok = pos >= 0
+    pos = np.clip(pos, 0, None)
+    ok &= (when - idx[pos]) <= np.timedelta64(_ASOF_TOLERANCE_DAYS, "D")
+    return pd.Series(np.where(ok, table.to_numpy()[pos], np.nan), index=days.index)
+
+
+def _load_rates(start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+    """Stored fixings between *start* and *end* as a date-indexed Series."""
+    from app.core.database import query_df
+
+    try:
+        df = query_df(
+            """SELECT rate_date, rate FROM fx_rates
+               WHERE pair = ? AND rate_date BETWEEN ? AND ?
+               ORDER BY rate_date""",
+            (USD_KWD_PAIR, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")),
+        )
+    except Exception as exc:
+        logger.warning("fx_rates read failed: %s", exc)
+        return pd.Series(dtype=float)
+    if df.empty:
+        return pd.Series(dtype=float)
+    return pd.Series(
+        df["rate"].astype(float).to_numpy(),
+        index=pd.to_datetime(df["rate_date"]),
+    )
+
+
+def _backfill_rates(start: pd.Timestamp, end: pd.Timestamp) -> int:
+    """Download daily USD→KWD closes for [start, end] into ``fx_rates``."""
+    try:
+        import yfinance as yf
+    except ImportError:
+        logger.warning("yfinance not installed – cannot backfill fx_rates")
+        return 0
+    from app.core.database import exec_sql_many
+
+    try:
+        with span("fx"):
+            hist = yf.Ticker(_FX_TICKER).history(
+                start=start.strftime("%Y-%m-%d"),
+                end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+                interval="1d",
+                auto_adjust=False,
+            )
+    except Exception as exc:
+        logger.warning("USD/KWD history fetch failed: %s", exc)
+        return 0
+    if hist is None or hist.empty or "Close" not in hist.columns:
+        return 0
+
+    closes = hist["Close"].dropna()
+    closes = closes[closes > 0]
+    now = int(time.time())
+    rows = [
+        (USD_KWD_PAIR, ts.strftime("%Y-%m-%d"), float(rate), "yfinance", now)
+        for ts, rate in closes.items()
+    ]
+    try:
+        n = exec_sql_many(
+            """INSERT INTO fx_rates (pair, rate_date, rate, source, fetched_at)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(pair, rate_date) DO UPDATE SET
+                   rate = excluded.rate, source = excluded.source,
+                   fetched_at = excluded.fetched_at""",
+            rows,
+        )
+    except Exception as exc:
+        logger.warning("fx_rates write failed: %s", exc)
+        return 0
+    logger.info("Backfilled %d USD/KWD fixings (%s → %s)", n, start.date(), end.date())
+    return n
+
+
+def flow_dates(dates):
+    """*dates* when ``FX_DATED_FLOWS`` is on, else None (convert at today's rate)."""
+    return dates if _settings.FX_DATED_FLOWS else None
+
+
 def safe_float(v, default: float = 0.0) -> float:
     """Safely convert a value to float."""
     try:
@@ -0,0 +1,255 @@
+"""
+Holdings Engine — point-in-time positions from the transaction ledger.
+
+Answers "what did I hold on date X" for any date or date range without
+replaying each symbol through ``compute_holdings_avg_cost``.  The ledger
+is read in one query and the weighted-average-cost rules are evaluated
+as grouped cumulative sums / products per (portfolio, symbol):
+
+  shares_i = Σ Δshares                      Buy +qty, Sell −qty, bonus +qty
+  g_i      = 1 − sold_i / shares_before_i   (1 for anything but a sell)
+  cost_i   = cost_{i−1} · g_i + buy_i       buy_i = purchase_cost + fees
+           = P_i · Σ_{j≤i} buy_j / P_j      P_i = Π_{j≤i} g_j
+  realized = Σ (sell_value − fees) − (1 − g_i) · cost_{i−1}
+
+A full exit (g = 0) starts a new segment so P never reaches zero.  Sells
+with nothing held are ignored, as in ``compute_holdings_avg_cost``;
+results agree with it for any ledger whose sells never exceed the
+position held.
+
+The per-transaction states are carried forward onto the requested dates
+and priced from ``price_history`` (see ``app.services.price_history``).
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import exec_sql, exec_sql_many, query_df
+from app.services.fx_service import get_usd_kwd_rates
+from app.services.price_history import _ticker_map, load_closes
+from app.services.symbol_service import alias_keys, resolve_symbol_key
+
+logger = logging.getLogger(__name__)
+
+_STATE_COLS = ["shares", "cost_basis", "realized_pnl", "cash_div"]
+_EPS = 1e-9
+_PRICE_LOOKBACK_DAYS = 14  # a close this old still prices the first day
+
+
+# ── Ledger → per-transaction states ──────────────────────────────────
+
+def load_ledger(user_id: int, portfolio: Optional[str] = None) -> pd.DataFrame:
+    """All active portfolio transactions of *user_id*, in WAC order."""
+    where = "AND portfolio = ?" if portfolio else ""
+    params = (user_id, portfolio) if portfolio else (user_id,)
+    return query_df(
+        f"""SELECT id, portfolio, TRIM(stock_symbol) AS symbol, txn_date, txn_type,
+                   COALESCE(shares, 0) AS shares, COALESCE(bonus_shares, 0) AS bonus_shares,
+                   COALESCE(purchase_cost, 0) AS purchase_cost, COALESCE(sell_value, 0) AS sell_value,
+                   COALESCE(cash_dividend, 0) AS cash_dividend, COALESCE(fees, 0) AS fees,
+                   COALESCE(created_at, 0) AS created_at
+            FROM transactions
+            WHERE user_id = ? AND COALESCE(category, 'portfolio') = 'portfolio'
+              AND COALESCE(is_deleted, 0) = 0 AND txn_date IS NOT NULL
+              AND stock_symbol IS NOT NULL AND TRIM(stock_symbol) != '' {where}
+            ORDER BY txn_date ASC, created_at ASC, id ASC""",
+        params,
+    )
+
+
+def position_states(ledger: pd.DataFrame) -> pd.DataFrame:
+    """
+    Position state after every transaction: ``portfolio, symbol, txn_date``
+    plus ``shares, cost_basis, realized_pnl, cash_div`` (cumulative).
+    """
+    if ledger.empty:
+        return pd.DataFrame(columns=["portfolio", "symbol", "txn_date"] + _STATE_COLS)
+
+    t = ledger.sort_values(["portfolio", "symbol", "txn_date", "created_at", "id"], kind="stable")
+    t = t.reset_index(drop=True)
+    keys = [t["portfolio"], t["symbol"]]
+    is_buy = t["txn_type"].eq("Buy").to_numpy()
+    is_sell = t["txn_type"].eq("Sell").to_numpy()
+    qty = t["shares"].to_numpy(dtype=float)
+    bonus = t["bonus_shares"].clip(lower=0).to_numpy(dtype=float)
+    buys = np.where(is_buy, qty, 0.0)
+
+    # Sells with nothing held do not move shares; one correction pass
+    # over the naive running total finds them.
+    naive = pd.Series(buys - np.where(is_sell, qty, 0.0) + bonus).groupby(keys).cumsum()
+    naive_before = naive.to_numpy() - (buys - np.where(is_sell, qty, 0.0) + bonus)
+    sell_ok = is_sell & (qty > 0) & (naive_before > _EPS)
+
+    delta = buys - np.where(sell_ok, qty, 0.0) + bonus
+    shares = pd.Series(delta).groupby(keys).cumsum().to_numpy()
+    before = shares - delta  # the row's own bonus lands after its sell
+    frac = np.where(sell_ok, np.minimum(qty / np.where(before > _EPS, before, 1.0), 1.0), 0.0)
+
+    g = 1.0 - frac
+    closed = g <= _EPS
+    seg = pd.Series(closed).groupby(keys).cumsum()
+    seg_keys = keys + [seg]
+    buy_cost = np.where(is_buy, t["purchase_cost"] + t["fees"], 0.0)
+    p = pd.Series(np.where(closed, 1.0, g)).groupby(seg_keys).cumprod().to_numpy()
+    cost = p * pd.Series(buy_cost / p).groupby(seg_keys).cumsum().to_numpy()
+    cost = np.where(closed, 0.0, cost)
+
+    prev_cost = pd.Series(cost).groupby(keys).shift(1).fillna(0.0).to_numpy()
+    realized = np.where(sell_ok, (t["sell_value"] - t["fees"]).to_numpy() - frac * prev_cost, 0.0)
+
+    out = t[["portfolio", "symbol", "txn_date"]].copy()
+    out["shares"] = np.clip(shares, 0.0, None)
+    out["cost_basis"] = np.where(out["shares"] > 0, np.clip(cost, 0.0, None), 0.0)
+    out["realized_pnl"] = pd.Series(realized).groupby(keys).cumsum().to_numpy()
+    out["cash_div"] = t["cash_dividend"].groupby(keys).cumsum().to_numpy()
+    return out
+
+
+# ── States → dates ───────────────────────────────────────────────────
+
+def holdings_series(
+    user_id: int,
+    dates: Iterable,
+    portfolio: Optional[str] = None,
+    include_closed: bool = False,
+) -> pd.DataFrame:
+    """
+    Positions at the end of each of *dates*, long format: ``date,
+    portfolio, symbol, ticker, currency, shares, cost_basis, avg_cost,
+    realized_pnl, cash_div, close, market_value, market_value_kwd,
+    unrealized_pnl``.  Closes are the last stored close on or before the
+    date (NaN when ``price_history`` has none).  Closed positions are
+    dropped unless *include_closed*.
+    """
+    days = pd.DatetimeIndex(pd.to_datetime(list(dates))).normalize().unique().sort_values()
+    states = position_states(load_ledger(user_id, portfolio))
+    if states.empty or days.empty:
+        return pd.DataFrame()
+
+    states["txn_date"] = pd.to_datetime(states["txn_date"], errors="coerce").dt.normalize()
+    states = states.dropna(subset=["txn_date"])
+    states["key"] = states["portfolio"] + "|" + states["symbol"]
+    # End-of-day state per position, carried forward onto *days*
+    wide = states.groupby(["txn_date", "key"])[_STATE_COLS].last().unstack("key")
+    grid = wide.index.union(days)
+    wide = wide.reindex(grid).ffill().reindex(days)
+
+    long = wide.stack("key", future_stack=True).dropna(subset=["shares"])
+    long.index.names = ["date", "key"]
+    long = long.reset_index()
+    if not include_closed:
+        long = long[long["shares"] > _EPS]
+    if long.empty:
+        return pd.DataFrame()
+    long[["portfolio", "symbol"]] = long["key"].str.split("|", n=1, expand=True)
+
+    meta = _ticker_map(user_id, long[["portfolio", "symbol"]].drop_duplicates())
+    long = long.merge(meta, on=["portfolio", "symbol"], how="left").drop(columns="key")
+
+    # Prices: last stored close on or before each day
+    closes = load_closes(meta["ticker"], days[0].date() - timedelta(days=_PRICE_LOOKBACK_DAYS), days[-1].date())
+    if closes.empty:
+        long["close"] = np.nan
+    else:
+        closes = closes.reindex(closes.index.union(days)).ffill().reindex(days)
+        px = closes.stack(future_stack=True).rename("close").rename_axis(["date", "ticker"]).reset_index()
+        long = long.merge(px, on=["date", "ticker"], how="left")
+
+    fx = pd.Series(1.0, index=days)
+    if long["currency"].eq("USD").any():
+        fx = pd.Series(get_usd_kwd_rates(days.strftime("%Y-%m-%d")).to_numpy(dtype=float), index=days)
+    rate = np.where(long["currency"].eq("USD"), long["date"].map(fx), 1.0)
+
+    long["avg_cost"] = np.where(long["shares"] > _EPS, long["cost_basis"] / long["shares"].where(long["shares"] > _EPS, 1.0), 0.0)
+    long["market_value"] = long["shares"] * long["close"]
+    long["market_value_kwd"] = long["market_value"] * rate
+    long["unrealized_pnl"] = long["market_value"] - long["cost_basis"]
+    cols = ["date", "portfolio", "symbol", "ticker", "currency", "shares", "cost_basis", "avg_cost",
+            "realized_pnl", "cash_div", "close", "market_value", "market_value_kwd", "unrealized_pnl"]
+    return long[cols].sort_values(["date", "portfolio", "symbol"]).reset_index(drop=True)
+
+
+def holdings_as_of(
+    user_id: int,
+    as_of: date,
+    portfolio: Optional[str] = None,
+    include_closed: bool = False,
+) -> pd.DataFrame:
+    """Positions held at the end of *as_of* (see :func:`holdings_series`)."""
+    return holdings_series(user_id, [as_of], portfolio, include_closed)
+
+
+# ── position_snapshots writer ────────────────────────────────────────
+
+def write_position_snapshots(
+    user_id: int,
+    start: date,
+    end: date,
+    dates: Optional[Iterable] = None,
+) -> int:
+    """
+    Replace *user_id*'s ``position_snapshots`` in [start, end] with one row
+    per open position per day, plus a ``CLOSED`` row on the day a position
+    is exited.  Days default to the user's ``portfolio_snapshots`` dates in
+    the range (every calendar day when there are none).  Returns the
+    number of rows written.
+    """
+    if dates is None:
+        snap_dates = query_df(
+            "SELECT snapshot_date FROM portfolio_snapshots WHERE user_id = ? AND snapshot_date BETWEEN ? AND ?",
+            (user_id, start.isoformat(), end.isoformat()),
+        )["snapshot_date"]
+        dates = snap_dates if not snap_dates.empty else pd.date_range(start, end, freq="D")
+
+    series = holdings_series(user_id, dates, include_closed=True)
+    rows = []
+    if not series.empty:
+        prev_shares = series.groupby(["portfolio", "symbol"])["shares"].shift(1).fillna(0.0)
+        is_open = series["shares"] > _EPS
+        series = series.assign(status=np.where(is_open, "OPEN", "CLOSED"))[is_open | (prev_shares > _EPS)]
+
+        ids = query_df(
+            "SELECT id, TRIM(symbol) AS symbol, portfolio FROM stocks WHERE user_id = ? ORDER BY id",
+            (user_id,),
+        )
+        stock_ids = {(r.portfolio, r.symbol): r.id for r in ids.itertuples(index=False)}
+        by_symbol = {r.symbol: r.id for r in ids.itertuples(index=False)}
+        pf_ids = {
+            r.name: r.id for r in query_df(
+                "SELECT id, name FROM portfolios WHERE user_id = ?", (user_id,),
+            ).itertuples(index=False)
+        }
+
+        aliases = alias_keys(user_id)
+
+        def _num(v, digits):
+            return None if pd.isna(v) else round(float(v), digits)
+
+        for r in series.itertuples(index=False):
+            rows.append((
+                user_id, stock_ids.get((r.portfolio, r.symbol), by_symbol.get(r.symbol)),
+                r.symbol, resolve_symbol_key(user_id, r.symbol, aliases),
+                pf_ids.get(r.portfolio), r.date.strftime("%Y-%m-%d"),
+                round(float(r.shares), 6), round(float(r.cost_basis), 3), round(float(r.avg_cost), 6),
+                round(float(r.realized_pnl), 3), round(float(r.cash_div), 3), r.status,
+                _num(r.close, 6), _num(r.market_value, 3), _num(r.market_value_kwd, 3),
+            ))
+
+    exec_sql(
+        "DELETE FROM position_snapshots WHERE user_id = ? AND snapshot_date BETWEEN ? AND ?",
+        (user_id, start.isoformat(), end.isoformat()),
+    )
+    written = exec_sql_many(
+        """INSERT INTO position_snapshots
+               (user_id, stock_id, stock_symbol, symbol_key, portfolio_id, snapshot_date,
+                total_shares, total_cost, avg_cost, realized_pnl, cash_dividends_received,
+                status, market_price, market_value, market_value_kwd)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    logger.info("📌 Position snapshots user %d %s→%s: %d rows", user_id, start, end, written)
+    return written
@@ -481,8 +481,8 @@ class IntegrityService:
             FROM transactions t
             WHERE t.user_id = ?
               AND COALESCE(t.category, 'portfolio') = 'portfolio' {sd}
-              AND TRIM(t.stock_symbol) NOT IN (
-                  SELECT TRIM(symbol) FROM stocks WHERE user_id = ?
+              AND t.symbol_key NOT IN (
+                  SELECT symbol_key FROM stocks WHERE user_id = ? AND symbol_key IS NOT NULL
               )
             """,
             (self.user_id, self.user_id),
@@ -495,8 +495,8 @@ class IntegrityService:
             FROM stocks s
             WHERE s.user_id = ?
               AND COALESCE(s.current_price, 0) = 0
-              AND TRIM(s.symbol) IN (
-                  SELECT DISTINCT TRIM(stock_symbol)
+              AND s.symbol_key IN (
+                  SELECT DISTINCT symbol_key
                   FROM transactions
                   WHERE user_id = ?
                     AND COALESCE(category, 'portfolio') = 'portfolio' {sd}
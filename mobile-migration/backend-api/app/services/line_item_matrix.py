@@ -0,0 +1,251 @@
+"""
+Line-Item Matrix — single-query loader for a stock's financial line items.
+
+Fetches every statement and line item of one analysis stock in ONE joined
+query and pivots it into a ``(statement_type, CODE) × period`` NumPy array.
+Alias groups (REVENUE / TOTAL_REVENUE / NET_REVENUE, the FCF variants, …)
+are resolved in memory, so metrics, growth, scoring and valuation defaults
+no longer issue one ``UPPER(line_item_code) = UPPER(?)`` query per code,
+alias or period.
+
+Codes are upper-cased on load; the first occurrence of a code within a
+statement wins (same rule as the per-period loader it replaces).
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.database import query_all
+
+logger = logging.getLogger(__name__)
+
+# ── Alias groups (priority order) ────────────────────────────────────
+REVENUE_CODES = ("REVENUE", "TOTAL_REVENUE", "NET_REVENUE")
+FCF_CODES = ("FREE_CASH_FLOW", "UNLEVERED_FREE_CASH_FLOW", "LEVERED_FREE_CASH_FLOW")
+CFO_CODES = ("CASH_FROM_OPERATIONS", "OPERATING_CASH_FLOW")
+CAPEX_CODES = ("CAPITAL_EXPENDITURES", "CAPEX")
+
+# Period suffixes used for interim (year-to-date) statements
+_PARTIAL_SUFFIXES = ("_3M", "_6M", "_9M")
+
+
+def is_partial_period(period_end_date: str) -> bool:
+    """True for interim YTD periods such as ``2024-09-30_9M``."""
+    return str(period_end_date).endswith(_PARTIAL_SUFFIXES)
+
+
+class LineItemMatrix:
+    """All line items of one stock, pivoted into a dense array.
+
+    Attributes:
+        stock_id:  Analysis stock id.
+        keys:      Row labels — ``(statement_type, CODE)`` in load order.
+        periods:   Column labels — period_end_date strings, sorted.
+        values:    ``float64`` array of shape ``(len(keys), len(periods))``;
+                   ``NaN`` where the statement has no such line item.
+        meta:      ``(statement_type, period_end_date) → (fiscal_year,
+                   fiscal_quarter)`` for every statement of the stock.
+    """
+
+    def __init__(
+        self,
+        stock_id: int,
+        keys: List[Tuple[str, str]],
+        periods: List[str],
+        values: np.ndarray,
+        meta: Dict[Tuple[str, str], Tuple[Optional[int], Optional[int]]],
+    ):
+        self.stock_id = stock_id
+        self.keys = keys
+        self.periods = periods
+        self.values = values
+        self.meta = meta
+        self._row = {k: i for i, k in enumerate(keys)}
+        self._col = {p: j for j, p in enumerate(periods)}
+
+    # ── loading ──────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, stock_id: int) -> "LineItemMatrix":
+        """Fetch all statements + line items of *stock_id* in one query."""
+        rows = query_all(
+            """SELECT fs.statement_type, fs.period_end_date, fs.fiscal_year,
+                      fs.fiscal_quarter, li.line_item_code, li.amount
+               FROM financial_statements fs
+               LEFT JOIN financial_line_items li ON li.statement_id = fs.id
+               WHERE fs.stock_id = ?
+               ORDER BY fs.id, li.id""",
+            (stock_id,),
+        )
+        return cls.from_rows(stock_id, rows)
+
+    @classmethod
+    def from_rows(cls, stock_id: int, rows: Iterable) -> "LineItemMatrix":
+        """Pivot ``(statement_type, period, fy, fq, code, amount)`` rows."""
+        keys: Dict[Tuple[str, str], int] = {}
+        meta: Dict[Tuple[str, str], Tuple[Optional[int], Optional[int]]] = {}
+        cells: Dict[Tuple[int, str], float] = {}
+
+        for r in rows:
+            stmt_type, period, fy, fq, code, amount = (r[i] for i in range(6))
+            meta.setdefault((stmt_type, period), (fy, fq))
+            if code is None or amount is None:
+                continue
+            key = (stmt_type, str(code).upper())
+            ki = keys.setdefault(key, len(keys))
+            # First occurrence of a duplicate (stmt, code, period) wins
+            cells.setdefault((ki, period), float(amount))
+
+        periods = sorted({p for _, p in meta})
+        col = {p: j for j, p in enumerate(periods)}
+        values = np.full((len(keys), len(periods)), np.nan)
+        if cells:
+            ki = np.fromiter((k for k, _ in cells), dtype=np.int64, count=len(cells))
+            pj = np.fromiter((col[p] for _, p in cells), dtype=np.int64, count=len(cells))
+            amt = np.fromiter(cells.values(), dtype=np.float64, count=len(cells))
+            values[ki, pj] = amt
+
+        return cls(stock_id, list(keys), periods, values, meta)
+
+    # ── lookups ──────────────────────────────────────────────────────
+
+    def __bool__(self) -> bool:
+        return bool(self.periods)
+
+    def value(self, stmt_type: str, code: str, period: str) -> Optional[float]:
+        """Single cell, or None when missing."""
+        i = self._row.get((stmt_type, code.upper()))
+        j = self._col.get(period)
+        if i is None or j is None:
+            return None
+        v = self.values[i, j]
+        return None if np.isnan(v) else float(v)
+
+    def codes(
+        self, stmt_type: Optional[str] = None,
+        predicate: Optional[Callable[[str], bool]] = None,
+    ) -> List[str]:
+        """Codes present (optionally for one statement type / matching *predicate*)."""
+        out: List[str] = []
+        for st, code in self.keys:
+            if stmt_type is not None and st != stmt_type:
+                continue
+            if predicate is not None and not predicate(code):
+                continue
+            if code not in out:
+                out.append(code)
+        return out
+
+    def period_items(self, period_end_date: str) -> Dict[str, float]:
+        """Flatten every statement type for one period → ``{CODE: amount}``."""
+        j = self._col.get(period_end_date)
+        if j is None:
+            return {}
+        col = self.values[:, j]
+        items: Dict[str, float] = {}
+        for i in np.flatnonzero(~np.isnan(col)):
+            code = self.keys[i][1]
+            if code not in items:
+                items[code] = float(col[i])
+        return items
+
+    def statement_periods(
+        self, stmt_type: Optional[str] = None, *,
+        annual_only: bool = False, full_year_only: bool = False,
+    ) -> List[Tuple[str, Optional[int], Optional[int]]]:
+        """``(period, fiscal_year, fiscal_quarter)`` sorted by (fy, period).
+
+        *annual_only* drops statements with a fiscal_quarter; *full_year_only*
+        additionally drops interim ``_3M/_6M/_9M`` periods.  Without a
+        *stmt_type* each period is listed once.
+        """
+        seen: Dict[str, Tuple[str, Optional[int], Optional[int]]] = {}
+        for (st, period), (fy, fq) in self.meta.items():
+            if stmt_type is not None and st != stmt_type:
+                continue
+            if annual_only and fq is not None:
+                continue
+            if full_year_only and is_partial_period(period):
+                continue
+            seen.setdefault(period, (period, fy, fq))
+        return sorted(seen.values(), key=lambda t: (t[1] is not None, t[1] or 0, t[0]))
+
+    def series(
+        self, stmt_type: str, codes: Iterable[str], *,
+        annual_only: bool = False, full_year_only: bool = False,
+    ) -> Dict[int, Dict[str, Any]]:
+        """By-fiscal-year series for the first alias present in each year.
+
+        Returns ``{fiscal_year: {"period", "fiscal_year", "amount", "code"}}``.
+        Codes are tried in priority order and a year already filled by an
+        earlier alias is never overwritten.
+        """
+        periods = self.statement_periods(
+            stmt_type, annual_only=annual_only, full_year_only=full_year_only,
+        )
+        by_year: Dict[int, Dict[str, Any]] = {}
+        for code in codes:
+            i = self._row.get((stmt_type, code.upper()))
+            if i is None:
+                continue
+            row = self.values[i]
+            for period, fy, _fq in periods:
+                if fy is None or fy in by_year:
+                    continue
+                v = row[self._col[period]]
+                if not np.isnan(v):
+                    by_year[fy] = {
+                        "period": period, "fiscal_year": fy,
+                        "amount": float(v), "code": code.upper(),
+                    }
+        return by_year
+
+    def latest(
+        self, stmt_type: Optional[str], codes: Iterable[str], *,
+        annual_only: bool = False, full_year_only: bool = False,
+    ) -> Optional[float]:
+        """Most recent value among *codes* (alias priority breaks ties)."""
+        hit = self.latest_item(
+            stmt_type, codes, annual_only=annual_only, full_year_only=full_year_only,
+        )
+        return hit[1] if hit else None
+
+    def latest_item(
+        self, stmt_type: Optional[str], codes: Iterable[str], *,
+        annual_only: bool = False, full_year_only: bool = False,
+    ) -> Optional[Tuple[str, float]]:
+        """Like :meth:`latest` but returns ``(CODE, amount)``.
+
+        Without a *stmt_type* the latest period_end_date across every
+        statement type wins.
+        """
+        codes = [c.upper() for c in codes]
+        stmt_types = [stmt_type] if stmt_type else sorted({st for st, _ in self.keys})
+        best: Optional[Tuple[Tuple, str, float]] = None
+        for st in stmt_types:
+            periods = self.statement_periods(
+                st, annual_only=annual_only, full_year_only=full_year_only,
+            )
+            for period, fy, _fq in reversed(periods):
+                j = self._col[period]
+                hit = None
+                for code in codes:
+                    i = self._row.get((st, code))
+                    if i is not None and not np.isnan(self.values[i, j]):
+                        hit = (code, float(self.values[i, j]))
+                        break
+                if hit:
+                    rank = (fy or 0, period) if stmt_type else (period,)
+                    if best is None or rank > best[0]:
+                        best = (rank, hit[0], hit[1])
+                    break
+        return (best[1], best[2]) if best else None
+
+    def latest_period(self) -> Optional[Tuple[str, Optional[int]]]:
+        """``(MAX(period_end_date), MAX(fiscal_year))`` across all statements."""
+        if not self.meta:
+            return None
+        fys = [fy for fy, _ in self.meta.values() if fy is not None]
+        return max(self.periods), (max(fys) if fys else None)
@@ -0,0 +1,168 @@
+"""
+Market Fundamentals Cache — persistent TTL cache for slow market lookups.
+
+yfinance ``info``/``history`` calls and stockanalysis.com scrapes take
+seconds each.  Results are stored in ``market_fundamentals_cache`` keyed
+by ``(ticker, field_group)`` and served with stale-while-revalidate
+semantics:
+
+  * fresh entry            → returned directly
+  * stale entry            → returned directly, refresh started in a
+                             background thread (one per key)
+  * missing entry          → fetched synchronously and stored
+
+Each field group registers its fetcher and TTL via :func:`register`.
+A scheduler job calls :func:`refresh_due` to warm seeded tickers and
+re-fetch stale entries, so request paths rarely see a miss.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.database import exec_sql, query_all, query_one
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Group:
+    fetcher: Callable[[str], Optional[Dict[str, Any]]]
+    ttl: int
+    seed: Optional[Callable[[], Iterable[str]]] = None
+
+
+_groups: Dict[str, _Group] = {}
+_inflight: set = set()
+_inflight_lock = threading.Lock()
+
+
+def register(
+    field_group: str,
+    fetcher: Callable[[str], Optional[Dict[str, Any]]],
+    ttl: int,
+    seed: Optional[Callable[[], Iterable[str]]] = None,
+) -> None:
+    """Register a field group.
+
+    *fetcher* takes a ticker and returns a JSON-serialisable dict; an
+    empty/None result is treated as a failed fetch and never cached.
+    *seed* optionally lists tickers the background refresher keeps warm.
+    """
+    _groups[field_group] = _Group(fetcher, ttl, seed)
+
+
+# ── Storage ──────────────────────────────────────────────────────────
+
+def _read(ticker: str, field_group: str) -> Optional[Tuple[Dict[str, Any], int]]:
+    row = query_one(
+        "SELECT payload, fetched_at FROM market_fundamentals_cache WHERE ticker = ? AND field_group = ?",
+        (ticker, field_group),
+    )
+    if not row:
+        return None
+    try:
+        return json.loads(row["payload"]), int(row["fetched_at"])
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return None
+
+
+def _write(ticker: str, field_group: str, payload: Dict[str, Any]) -> None:
+    exec_sql(
+        """INSERT INTO market_fundamentals_cache (ticker, field_group, payload, fetched_at)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT(ticker, field_group) DO UPDATE SET
+               payload = excluded.payload, fetched_at = excluded.fetched_at""",
+        (ticker, field_group, json.dumps(payload, default=str), int(time.time())),
+    )
+
+
+# ── Fetching ─────────────────────────────────────────────────────────
+
+def refresh(ticker: str, field_group: str) -> Optional[Dict[str, Any]]:
+    """Fetch *ticker* now and store it.  Returns the payload or None on failure."""
+    group = _groups[field_group]
+    try:
+        payload = group.fetcher(ticker)
+    except Exception as exc:
+        logger.warning("market cache: %s/%s fetch failed: %s", field_group, ticker, exc)
+        return None
+    if not payload:
+        return None
+    try:
+        _write(ticker, field_group, payload)
+    except Exception as exc:
+        logger.warning("market cache: %s/%s write failed: %s", field_group, ticker, exc)
+    return payload
+
+
+def _refresh_in_background(ticker: str, field_group: str) -> None:
+    key = (ticker, field_group)
+    with _inflight_lock:
+        if key in _inflight:
+            return
+        _inflight.add(key)
+
+    def _run():
+        try:
+            refresh(ticker, field_group)
+        finally:
+            with _inflight_lock:
+                _inflight.discard(key)
+
+    threading.Thread(target=_run, daemon=True, name=f"mcache-{field_group}-{ticker}").start()
+
+
+def get(ticker: str, field_group: str) -> Dict[str, Any]:
+    """Cached payload for *ticker*; ``{}`` when nothing could be fetched."""
+    group = _groups[field_group]
+    cached = _read(ticker, field_group)
+    if cached is not None:
+        payload, fetched_at = cached
+        if time.time() - fetched_at > group.ttl:
+            _refresh_in_background(ticker, field_group)
+        return payload
+    return refresh(ticker, field_group) or {}
+
+
+# ── Background refresher ─────────────────────────────────────────────
+
+def refresh_due(max_fetches: int = 100) -> Dict[str, int]:
+    """Warm seeded tickers and re-fetch stale entries (scheduler job).
+
+    Missing seeded tickers go first, then the stalest entries.  At most
+    *max_fetches* network fetches run per call so one pass stays short.
+    """
+    now = int(time.time())
+    todo: List[Tuple[str, str]] = []
+
+    for name, group in _groups.items():
+        rows = query_all(
+            "SELECT ticker, fetched_at FROM market_fundamentals_cache WHERE field_group = ? ORDER BY fetched_at",
+            (name,),
+        )
+        known = {r["ticker"]: int(r["fetched_at"]) for r in rows}
+        if group.seed is not None:
+            try:
+                seeds = list(dict.fromkeys(group.seed()))
+            except Exception as exc:
+                logger.warning("market cache: seed for %s failed: %s", name, exc)
+                seeds = []
+            todo.extend((t, name) for t in seeds if t and t not in known)
+        todo.extend((t, name) for t, ts in known.items() if now - ts > group.ttl)
+
+    done = failed = 0
+    for ticker, name in todo[:max_fetches]:
+        if refresh(ticker, name) is None:
+            failed += 1
+        else:
+            done += 1
+    if todo:
+        logger.info(
+            "market cache refresh: %d refreshed, %d failed, %d deferred",
+            done, failed, max(0, len(todo) - max_fetches),
+        )
+    return {"refreshed": done, "failed": failed, "pending": max(0, len(todo) - max_fetches)}
@@ -0,0 +1,397 @@
+"""
+News Search — full-text index over ``news_articles``.
+
+SQLite keeps an FTS5 table ``news_fts`` (rowid = article id) in sync
+through insert/update/delete triggers; PostgreSQL has a stored generated
+``search_vector`` tsvector column with a GIN index.  Either way a search
+is an index lookup instead of ``ILIKE '%…%'`` over every row.
+
+Bilingual handling, the same on both engines:
+  * Arabic is folded before indexing and querying — diacritics and
+    tatweel dropped, أ/إ/آ/ٱ → ا, ى → ي, ة → ه — so spelling variants
+    of a company name meet.
+  * English is stemmed (FTS5 ``porter``, PG ``english``), which leaves
+    Arabic tokens untouched.
+  * Columns are weighted title > related symbols > summary.
+
+:func:`search` ranks matches (or orders them by date), returns a
+highlighted snippet per hit, and pages with a keyset cursor.  The FTS5
+table holds folded text, so on SQLite the snippet is cut from the stored
+title / summary in Python (:func:`highlight`) rather than by
+``snippet()``, which would show the folded spelling.
+:func:`symbol_clause` lets the feed/history symbol filters use the
+index too.  Without the index (old SQLite build, PG < 12) both fall
+back to ``LIKE``.
+"""
+
+import base64
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.database import column_exists, exec_sql, query_all, query_val
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# ── Arabic folding ───────────────────────────────────────────────────
+
+_AR_REPLACE = {"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه"}
+# tatweel + harakat (fathatan … sukun) + superscript alef
+_AR_DROP = "ـ" + "".join(chr(c) for c in range(0x064B, 0x0653)) + "ٰ"
+_AR_TABLE = str.maketrans({**_AR_REPLACE, **{ch: None for ch in _AR_DROP}})
+
+_TOKEN = re.compile(r"[^\W_]+")
+_MAX_TERMS = 8
+
+# bm25 column weights: title, summary, related_symbols
+_FTS_WEIGHTS = "10.0, 2.0, 5.0"
+_MARK = ("<mark>", "</mark>")
+_SNIPPET_TOKENS = 16
+
+
+def fold(text: Optional[str]) -> str:
+    """Arabic-folded *text* (what gets indexed)."""
+    return (text or "").translate(_AR_TABLE)
+
+
+def _sqlite_fold(expr: str) -> str:
+    for src, dst in (*_AR_REPLACE.items(), *((ch, "") for ch in _AR_DROP)):
+        expr = f"replace({expr}, '{src}', '{dst}')"
+    return expr
+
+
+def _pg_fold(expr: str) -> str:
+    src = "".join(_AR_REPLACE) + _AR_DROP
+    dst = "".join(_AR_REPLACE.values())  # translate() drops chars past the end of dst
+    return f"translate({expr}, '{src}', '{dst}')"
+
+
+def terms(query: str) -> List[str]:
+    """Folded search terms of *query* (at most ``_MAX_TERMS``)."""
+    return _TOKEN.findall(fold(query).lower())[:_MAX_TERMS]
+
+
+# ── Snippets ─────────────────────────────────────────────────────────
+
+def _token_spans(text: str) -> List[Tuple[str, int, int]]:
+    """``(folded token, start, end)`` with offsets into the original *text*.
+    Folds per character (Arabic, case, Latin accents as FTS5's
+    ``remove_diacritics``) and remembers where each folded char came from."""
+    chars: List[str] = []
+    origin: List[int] = []
+    for i, ch in enumerate(text):
+        for f in fold(ch).lower():
+            for base in unicodedata.normalize("NFKD", f):
+                if not unicodedata.combining(base):
+                    chars.append(base)
+                    origin.append(i)
+    folded = "".join(chars)
+    spans = []
+    for m in _TOKEN.finditer(folded):
+        end = origin[m.end() - 1] + 1
+        while end < len(text) and not fold(text[end]):  # trailing harakat / tatweel
+            end += 1
+        spans.append((m.group(), origin[m.start()], end))
+    return spans
+
+
+def _matches(token: str, words: List[str]) -> bool:
+    # Prefix either way, or a long shared prefix, stands in for the
+    # porter stemming the index applies ("banks" ~ "banking")
+    for w in words:
+        if token.startswith(w) or w.startswith(token):
+            return True
+        common = len(os.path.commonprefix([token, w]))
+        if common >= 4 and common >= min(len(token), len(w)) - 3:
+            return True
+    return False
+
+
+def highlight(title: Optional[str], summary: Optional[str], words: List[str]) -> Optional[str]:
+    """
+    Snippet of the original *summary* (else *title*) around the first
+    match of the folded *words*, matches wrapped in ``<mark>``, at most
+    ``_SNIPPET_TOKENS`` tokens with ``…`` where text was cut.
+    """
+    fallback = None
+    for text in (summary, title):
+        if not text:
+            continue
+        spans = _token_spans(text)
+        hits = [i for i, (tok, _, _) in enumerate(spans) if _matches(tok, words)]
+        if not hits:
+            fallback = fallback or (text, spans, [])
+            continue
+        return _cut(text, spans, hits)
+    return _cut(*fallback) if fallback else None
+
+
+def _cut(text: str, spans: List[Tuple[str, int, int]], hits: List[int]) -> str:
+    if not spans:
+        return text[:200]
+    first = max(0, (hits[0] if hits else 0) - 3)
+    window = spans[first:first + _SNIPPET_TOKENS]
+    start = 0 if first == 0 else window[0][1]
+    end = len(text) if first + _SNIPPET_TOKENS >= len(spans) else window[-1][2]
+    out, pos = [], start
+    for i, (_, a, b) in enumerate(window, start=first):
+        if i in hits:
+            out += [text[pos:a], _MARK[0], text[a:b], _MARK[1]]
+            pos = b
+    out.append(text[pos:end])
+    return ("…" if start > 0 else "") + "".join(out) + ("…" if end < len(text) else "")
+
+
+# ── Index DDL ────────────────────────────────────────────────────────
+
+def _ensure_sqlite_index() -> None:
+    exec_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary, related_symbols,
+            tokenize = 'porter unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    cols = "(rowid, title, summary, related_symbols)"
+
+    def values(row: str) -> str:
+        return (
+            f"({row}.id, {_sqlite_fold(f'{row}.title')}, "
+            f"{_sqlite_fold(f'{row}.summary')}, {row}.related_symbols)"
+        )
+
+    exec_sql(f"""
+        CREATE TRIGGER IF NOT EXISTS news_fts_ai AFTER INSERT ON news_articles BEGIN
+            INSERT INTO news_fts {cols} VALUES {values('new')};
+        END
+    """)
+    exec_sql("""
+        CREATE TRIGGER IF NOT EXISTS news_fts_ad AFTER DELETE ON news_articles BEGIN
+            DELETE FROM news_fts WHERE rowid = old.id;
+        END
+    """)
+    exec_sql(f"""
+        CREATE TRIGGER IF NOT EXISTS news_fts_au
+        AFTER UPDATE OF title, summary, related_symbols ON news_articles BEGIN
+            DELETE FROM news_fts WHERE rowid = old.id;
+            INSERT INTO news_fts {cols} VALUES {values('new')};
+        END
+    """)
+    # Articles stored before the index existed
+    exec_sql(f"""
+        INSERT INTO news_fts {cols}
+        SELECT a.id, {_sqlite_fold('a.title')}, {_sqlite_fold('a.summary')}, a.related_symbols
+        FROM news_articles a
+        WHERE NOT EXISTS (SELECT 1 FROM news_fts f WHERE f.rowid = a.id)
+    """)
+
+
+def _ensure_pg_index() -> None:
+    if not column_exists("news_articles", "search_vector"):
+        def vec(col: str, weight: str) -> str:
+            folded = _pg_fold(f"COALESCE({col}, '')")
+            return f"setweight(to_tsvector('english'::regconfig, {folded}), '{weight}')"
+
+        exec_sql(f"""
+            ALTER TABLE news_articles ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                {vec('title', 'A')} || {vec('related_symbols', 'B')} || {vec('summary', 'C')}
+            ) STORED
+        """)
+    exec_sql("CREATE INDEX IF NOT EXISTS idx_news_search ON news_articles USING GIN (search_vector)")
+
+
+def ensure_search_index() -> None:
+    """Create the full-text index (and fill it for existing articles)."""
+    if settings.use_postgres:
+        _ensure_pg_index()
+    else:
+        _ensure_sqlite_index()
+
+
+_available: Optional[bool] = None
+
+
+def search_available() -> bool:
+    """Whether the full-text index exists (checked once per process)."""
+    global _available
+    if _available is None:
+        try:
+            if settings.use_postgres:
+                _available = column_exists("news_articles", "search_vector")
+            else:
+                _available = bool(query_val(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'news_fts'"
+                ))
+        except Exception:
+            _available = False
+    return _available
+
+
+# ── Query building ───────────────────────────────────────────────────
+
+def _fts_match(words: List[str]) -> str:
+    """FTS5 query: every term, the last one as a prefix (typeahead)."""
+    quoted = [f'"{w}"' for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _pg_tsquery(words: List[str]) -> str:
+    return " & ".join(words[:-1] + [f"{words[-1]}:*"])
+
+
+def symbol_clause(symbols: List[str]) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    ``(sql, params)`` restricting ``news_articles`` to any of *symbols* via
+    the index, for ``query.filter(text(sql).bindparams(**params))``.
+    None when the index is unavailable (caller keeps its ILIKE filter).
+    """
+    if not search_available():
+        return None
+    token_lists = [t for t in (_TOKEN.findall(s.lower()) for s in symbols) if t]
+    if not token_lists:
+        return None
+    if settings.use_postgres:
+        q = " | ".join("(" + " <-> ".join(f"{t}:B" for t in toks) + ")" for toks in token_lists)
+        return "news_articles.search_vector @@ to_tsquery('english', :sym_q)", {"sym_q": q}
+    q = "related_symbols : (" + " OR ".join('"' + " ".join(toks) + '"' for toks in token_lists) + ")"
+    return (
+        "news_articles.id IN (SELECT rowid FROM news_fts WHERE news_fts MATCH :sym_q)",
+        {"sym_q": q},
+    )
+
+
+def encode_cursor(key: Any, article_id: int) -> str:
+    raw = json.dumps([key, int(article_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """``(sort key, id)`` from *cursor*; ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, article_id = json.loads(raw)
+        if not isinstance(key, (str, int, float)):
+            raise ValueError
+        return key, int(article_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid search cursor") from exc
+
+
+# ── Search ───────────────────────────────────────────────────────────
+
+def _search_sql(words: List[str]) -> Tuple[str, List[Any], str, List[Any], str, Optional[str]]:
+    """``(from, from params, match, match params, score, snippet)`` for this
+    backend, over ``news_articles a``.  Higher score is better everywhere;
+    a None snippet is built by :func:`highlight`."""
+    if not search_available():
+        likes = " AND ".join("(a.title LIKE ? OR a.summary LIKE ? OR a.related_symbols LIKE ?)" for _ in words)
+        return (
+            "news_articles a", [],
+            likes, [f"%{w}%" for w in words for _ in range(3)],
+            "0.0", "substr(COALESCE(a.summary, a.title), 1, 200)",
+        )
+    if settings.use_postgres:
+        opts = f"StartSel={_MARK[0]}, StopSel={_MARK[1]}, MaxWords=30, MinWords=12, MaxFragments=1"
+        return (
+            "news_articles a, to_tsquery('english', ?) q", [_pg_tsquery(words)],
+            "a.search_vector @@ q", [],
+            "ts_rank(a.search_vector, q)",
+            f"ts_headline('english', COALESCE(a.summary, a.title), q, '{opts}')",
+        )
+    return (
+        "news_fts JOIN news_articles a ON a.id = news_fts.rowid", [],
+        "news_fts MATCH ?", [_fts_match(words)],
+        f"-bm25(news_fts, {_FTS_WEIGHTS})",
+        None,
+    )
+
+
+def search(
+    query: str,
+    *,
+    lang: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+    sort: str = "relevance",
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Matching articles as ``[{id, score, snippet}]`` (best first, or newest
+    first with ``sort="recent"``) plus the cursor of the next page.
+    Raises ValueError for a malformed *cursor*.
+    """
+    words = terms(query)
+    if not words:
+        return [], None
+    if not search_available():
+        sort = "recent"
+    after = decode_cursor(cursor) if cursor else None
+    frm, frm_params, match, match_params, score, snippet = _search_sql(words)
+
+    where = [match]
+    params: List[Any] = [*frm_params, *match_params]
+    if lang:
+        where.append("a.language = ?")
+        params.append(lang)
+    if categories:
+        where.append(f"a.category IN ({', '.join('?' * len(categories))})")
+        params.extend(categories)
+
+    if sort == "recent":
+        order = "a.published_at DESC, a.id DESC"
+        if after:
+            where.append("(a.published_at < ? OR (a.published_at = ? AND a.id < ?))")
+            params.extend([after[0], after[0], after[1]])
+    else:
+        order = "score DESC, a.id ASC"
+        if after:
+            where.append(f"({score} < ? OR ({score} = ? AND a.id > ?))")
+            params.extend([after[0], after[0], after[1]])
+
+    # Page first; snippets (and scores for "recent") only for the rows shown
+    page = query_all(
+        f"""SELECT a.id, a.published_at{f', {score} AS score' if sort != 'recent' else ''}
+            FROM {frm}
+            WHERE {' AND '.join(where)}
+            ORDER BY {order}
+            LIMIT ?""",
+        (*params, limit + 1),
+    )
+    if not page:
+        return [], None
+    ids = [int(r["id"]) for r in page[:limit]]
+    detail = {
+        int(r["id"]): r
+        for r in query_all(
+            f"""SELECT a.id, {score} AS score, {snippet or 'NULL'} AS snippet, a.title, a.summary
+                FROM {frm}
+                WHERE {match} AND a.id IN ({', '.join('?' * len(ids))})""",
+            (*frm_params, *match_params, *ids),
+        )
+    }
+    hits = []
+    for i in ids:
+        row = detail.get(i)
+        if row is None:
+            hits.append({"id": i, "score": 0.0, "snippet": None})
+            continue
+        hits.append({
+            "id": i,
+            "score": float(row["score"] or 0.0),
+            "snippet": row["snippet"] if snippet else highlight(row["title"], row["summary"], words),
+        })
+
+    next_cursor = None
+    if len(page) > limit:
+        last = page[limit - 1]
+        key = str(last["published_at"]) if sort == "recent" else float(last["score"] or 0.0)
+        next_cursor = encode_cursor(key, last["id"])
+    return hits, next_cursor
@@ -0,0 +1,210 @@
+"""
+Page Extraction Cache — content-addressed cache for Gemini page extractions.
+
+``extraction_cache`` only helps when the *same* PDF is re-uploaded for the
+*same* stock.  This cache sits one level lower: the raw model response is
+stored under ``(page_hash, prompt_version, model)`` where ``page_hash`` is
+the SHA-256 of the rendered page image, so identical statement pages are
+reused across stocks, users and otherwise different PDFs (a quarterly
+repeating last year's balance sheet page, a re-scanned report with one
+new page, …).  That only holds while the prompt carries nothing
+stock-specific: callers key on a base prompt and apply per-stock details
+(existing line-item codes) to the parsed reply.
+
+``model`` is the model that actually answered; a lookup passes the
+caller's fallback chain and takes the first model with an entry.
+
+A multi-page statement is sent to the model as one unit; its key is the
+hash of the ordered page hashes (see :func:`unit_hash`), so changing any
+one page only invalidates the unit it belongs to.
+
+Entries are evicted by age (last use) and by total payload size, least
+recently used first.  Hit/miss counters are kept per process and exposed
+together with table totals by :func:`stats`.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core import metrics
+from app.core.database import exec_sql, exec_sql_many, query_all, query_one
+
+logger = logging.getLogger(__name__)
+
+_PRUNE_INTERVAL = 600  # seconds between opportunistic prunes on write
+
+_counters: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+_counters_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def _bump(name: str, n: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += n
+
+
+# ── Keys ─────────────────────────────────────────────────────────────
+
+def page_hash(png_bytes: bytes) -> str:
+    """SHA-256 of one rendered page image."""
+    return hashlib.sha256(png_bytes).hexdigest()
+
+
+def unit_hash(page_images: Sequence[bytes]) -> str:
+    """Key for a unit of pages sent together (a single page keys as itself)."""
+    hashes = [page_hash(png) for png in page_images]
+    if len(hashes) == 1:
+        return hashes[0]
+    return hashlib.sha256("|".join(hashes).encode()).hexdigest()
+
+
+def prompt_version(version: str, prompt: str) -> str:
+    """``<version>:<prompt digest>`` — any change to the prompt text is a miss."""
+    return f"{version}:{hashlib.sha256(prompt.encode()).hexdigest()[:16]}"
+
+
+# ── Lookup / store ───────────────────────────────────────────────────
+
+def get(unit_key: str, version: str, models: Sequence[str]) -> Optional[str]:
+    """Cached model response for a page unit, or None.
+
+    *models* is in order of preference; the first one with an entry wins.
+    """
+    try:
+        rows = query_all(
+            f"""SELECT model, payload FROM ai_page_cache
+                WHERE page_hash = ? AND prompt_version = ?
+                  AND model IN ({', '.join('?' * len(models))})""",
+            (unit_key, version, *models),
+        )
+    except Exception as exc:
+        logger.warning("page cache: read failed: %s", exc)
+        return None
+    by_model = {r["model"]: r["payload"] for r in rows}
+    model = next((m for m in models if m in by_model), None)
+    if model is None:
+        _bump("misses")
+        metrics.cache_lookup("ai_page", hit=False)
+        return None
+    _bump("hits")
+    metrics.cache_lookup("ai_page", hit=True)
+    try:
+        exec_sql(
+            """UPDATE ai_page_cache SET hit_count = hit_count + 1, last_used_at = ?
+               WHERE page_hash = ? AND prompt_version = ? AND model = ?""",
+            (int(time.time()), unit_key, version, model),
+        )
+    except Exception as exc:
+        logger.debug("page cache: hit bookkeeping failed: %s", exc)
+    return by_model[model]
+
+
+def put(unit_key: str, version: str, model: str, payload: str, page_count: int = 1) -> None:
+    """Store *model*'s response for a page unit (replaces an existing entry)."""
+    now = int(time.time())
+    try:
+        exec_sql(
+            """INSERT INTO ai_page_cache
+                   (page_hash, prompt_version, model, page_count, payload,
+                    size_bytes, hit_count, created_at, last_used_at)
+               VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)
+               ON CONFLICT(page_hash, prompt_version, model) DO UPDATE SET
+                   payload = excluded.payload, size_bytes = excluded.size_bytes,
+                   page_count = excluded.page_count, created_at = excluded.created_at,
+                   last_used_at = excluded.last_used_at""",
+            (unit_key, version, model, page_count, payload,
+             len(payload.encode("utf-8")), now, now),
+        )
+    except Exception as exc:
+        logger.warning("page cache: write failed: %s", exc)
+        return
+    _bump("writes")
+
+    global _last_prune
+    if time.time() - _last_prune > _PRUNE_INTERVAL:
+        _last_prune = time.time()
+        prune()
+
+
+# ── Eviction ─────────────────────────────────────────────────────────
+
+def prune(max_bytes: Optional[int] = None, max_age_days: Optional[int] = None) -> int:
+    """Evict entries unused for *max_age_days*, then LRU down to *max_bytes*.
+
+    Defaults come from ``AI_PAGE_CACHE_MAX_MB`` / ``AI_PAGE_CACHE_MAX_AGE_DAYS``.
+    Returns the number of entries removed.
+    """
+    from app.core.config import get_settings
+
+    s = get_settings()
+    if max_bytes is None:
+        max_bytes = s.AI_PAGE_CACHE_MAX_MB * 1024 * 1024
+    if max_age_days is None:
+        max_age_days = s.AI_PAGE_CACHE_MAX_AGE_DAYS
+
+    cutoff = int(time.time()) - max_age_days * 86400
+    removed = 0
+    try:
+        stale = query_all(
+            "SELECT page_hash, prompt_version, model FROM ai_page_cache WHERE last_used_at < ?",
+            (cutoff,),
+        )
+        removed += exec_sql_many(
+            "DELETE FROM ai_page_cache WHERE page_hash = ? AND prompt_version = ? AND model = ?",
+            [(r["page_hash"], r["prompt_version"], r["model"]) for r in stale],
+        )
+
+        total = int(query_one("SELECT COALESCE(SUM(size_bytes), 0) AS n FROM ai_page_cache")["n"])
+        if total > max_bytes:
+            victims: List[tuple] = []
+            rows = query_all(
+                """SELECT page_hash, prompt_version, model, size_bytes
+                   FROM ai_page_cache ORDER BY last_used_at, created_at"""
+            )
+            for r in rows:
+                if total <= max_bytes:
+                    break
+                victims.append((r["page_hash"], r["prompt_version"], r["model"]))
+                total -= int(r["size_bytes"] or 0)
+            removed += exec_sql_many(
+                "DELETE FROM ai_page_cache WHERE page_hash = ? AND prompt_version = ? AND model = ?",
+                victims,
+            )
+    except Exception as exc:
+        logger.warning("page cache: prune failed: %s", exc)
+        return removed
+
+    if removed:
+        _bump("evicted", removed)
+        logger.info("page cache: evicted %d entries", removed)
+    return removed
+
+
+# ── Metrics ──────────────────────────────────────────────────────────
+
+def stats() -> Dict[str, Any]:
+    """Process hit/miss counters plus table totals."""
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    out: Dict[str, Any] = {
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+    }
+    try:
+        row = query_one(
+            """SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS size_bytes,
+                      COALESCE(SUM(hit_count), 0) AS total_hits
+               FROM ai_page_cache"""
+        )
+        out.update(
+            entries=int(row["entries"]),
+            size_bytes=int(row["size_bytes"]),
+            total_hits=int(row["total_hits"]),
+        )
+    except Exception as exc:
+        logger.warning("page cache: stats query failed: %s", exc)
+    return out
@@ -0,0 +1,177 @@
+"""
+Statement Page Selector — local page-relevance prefilter for AI extraction.
+
+Annual reports run to 100+ pages, but the primary statements live on a
+handful of them.  Before any Gemini call this module scores every page
+from its text layer and picks candidate pages per statement type, so
+only those pages are rendered and uploaded.
+
+Signals (no OCR, no AI):
+  * statement-title keyword hits and header-line matches (same keyword
+    lists as ``stock_analysis.extraction.pdf_classifier``)
+  * the cash-flow detector from ``cashflow_reconciler``
+  * number density and currency/unit markers, to tell statement tables
+    from narrative pages that merely mention a statement
+
+Callers widen on miss: a scanned PDF (no text layer), or a core
+statement type with no candidate page, falls back to the full document.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from app.services.cashflow_reconciler import is_cashflow_page_text
+
+logger = logging.getLogger(__name__)
+
+CORE_TYPES = ("balance", "income", "cashflow")
+
+# Statement-type keywords (English + Arabic)
+_STATEMENT_KEYWORDS: Dict[str, List[str]] = {
+    "income": [
+        "income statement", "statement of profit", "profit or loss",
+        "statement of operations", "statement of earnings",
+        "profit and loss", "statement of comprehensive income",
+        "consolidated statement of income",
+        "بيان الدخل", "قائمة الأرباح", "بيان الربح والخسارة",
+        "قائمة الدخل الموحدة",
+    ],
+    "balance": [
+        "statement of financial position", "balance sheet",
+        "consolidated statement of financial position",
+        "قائمة المركز المالي", "الميزانية العمومية",
+    ],
+    "cashflow": [
+        "statement of cash flows", "cash flow statement",
+        "cash flows from operating", "cash flow from operations",
+        "consolidated statement of cash flows",
+        "قائمة التدفقات النقدية", "بيان التدفقات النقدية",
+    ],
+    "equity": [
+        "statement of changes in equity", "changes in equity",
+        "changes in shareholders equity",
+        "قائمة التغيرات في حقوق الملكية", "بيان التغيرات في حقوق المساهمين",
+    ],
+}
+
+_FINANCIAL_MARKERS = [
+    r"\bKD\b", r"\bKWD\b", r"\bUSD\b", r"\bSAR\b", r"\bAED\b",
+    r"thousand", r"million", r"'000", r"\(000\)", r"\bfils\b",
+    r"total\s+assets", r"total\s+liabilities", r"total\s+equity",
+    r"net\s+income", r"revenue", r"gross\s+profit",
+]
+
+_NUMBER_RE = re.compile(r"\(?-?\d{1,3}(?:,\d{3})+(?:\.\d+)?\)?|\b\d{4,}\b")
+
+_MIN_TEXT_CHARS = 40        # below this a page counts as image-only
+_MIN_NUMBERS = 12           # a statement table has at least this many figures
+_TEXT_COVERAGE_MIN = 0.5    # fewer text pages than this → treat PDF as scanned
+
+
+@dataclass
+class PageSelection:
+    """Candidate pages (0-based) per statement type."""
+    total_pages: int
+    by_type: Dict[str, List[int]] = field(default_factory=dict)
+    scanned: bool = False
+
+    @property
+    def pages(self) -> List[int]:
+        """Union of all candidate pages, or every page when nothing was found."""
+        union = sorted({p for pages in self.by_type.values() for p in pages})
+        return union or list(range(self.total_pages))
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.pages) >= self.total_pages
+
+    def missing_core_types(self) -> List[str]:
+        return [t for t in CORE_TYPES if not self.by_type.get(t)]
+
+    def for_type(self, stmt_type: str) -> List[int]:
+        """Candidates for one type, or every page when none were found."""
+        return self.by_type.get(stmt_type) or list(range(self.total_pages))
+
+
+def _score_page(text: str) -> Dict[str, float]:
+    """Per-type relevance; only types whose title keywords appear score."""
+    low = text.lower()
+    numbers = len(_NUMBER_RE.findall(text))
+    if numbers < _MIN_NUMBERS:
+        return {}
+    markers = sum(1 for m in _FINANCIAL_MARKERS if re.search(m, text, re.IGNORECASE))
+    density = min(30.0, numbers * 0.5)
+
+    scores: Dict[str, float] = {}
+    for stmt_type, keywords in _STATEMENT_KEYWORDS.items():
+        kw_hits = sum(1 for kw in keywords if kw in low)
+        headers = sum(
+            1 for kw in keywords
+            if re.search(r"(?:^|\n)\s*" + re.escape(kw), low)
+        )
+        if kw_hits or headers:
+            scores[stmt_type] = kw_hits * 10 + headers * 15 + markers * 3 + density
+    if is_cashflow_page_text(text):
+        scores["cashflow"] = scores.get("cashflow", 0.0) + 25
+    return scores
+
+
+def select_statement_pages(
+    pdf_bytes: bytes,
+    max_per_type: int = 3,
+) -> PageSelection:
+    """Pick candidate pages per statement type from the PDF text layer.
+
+    The best *max_per_type* pages per type are kept, plus the page right
+    after each one when it looks like a continuation (numeric, no other
+    statement title).
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    texts = [page.get_text("text") or "" for page in doc]
+    doc.close()
+
+    n = len(texts)
+    selection = PageSelection(total_pages=n)
+    text_pages = sum(1 for t in texts if len(t.strip()) >= _MIN_TEXT_CHARS)
+    if n == 0 or text_pages < n * _TEXT_COVERAGE_MIN:
+        selection.scanned = True
+        logger.info("Page selection: %d/%d text pages — using full document", text_pages, n)
+        return selection
+
+    page_scores = [_score_page(t) for t in texts]
+    for stmt_type in _STATEMENT_KEYWORDS:
+        ranked = sorted(
+            ((i, sc[stmt_type]) for i, sc in enumerate(page_scores) if stmt_type in sc),
+            key=lambda x: x[1], reverse=True,
+        )
+        best = {i for i, _ in ranked[:max_per_type]}
+        for i in list(best):
+            nxt = i + 1
+            if nxt < n and not page_scores[nxt] and len(_NUMBER_RE.findall(texts[nxt])) >= _MIN_NUMBERS:
+                best.add(nxt)
+        if best:
+            selection.by_type[stmt_type] = sorted(best)
+
+    logger.info(
+        "Page selection: %d of %d pages (%s)",
+        len(selection.pages), n,
+        ", ".join(f"{t}={p}" for t, p in selection.by_type.items()) or "none",
+    )
+    return selection
+
+
+def select_pages_or_full(pdf_bytes: bytes) -> PageSelection:
+    """``select_statement_pages`` that never raises (full document on error)."""
+    try:
+        return select_statement_pages(pdf_bytes)
+    except Exception as exc:
+        logger.warning("Page selection failed, using full document: %s", exc)
+        import fitz  # PyMuPDF
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        n = len(doc)
+        doc.close()
+        return PageSelection(total_pages=n)
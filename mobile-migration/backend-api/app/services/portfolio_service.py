@@ -25,13 +25,17 @@ import numpy as np
 import pandas as pd
 
 from app.core.database import query_df, query_val, query_one, get_conn, exec_sql, column_exists
+from app.core.profiling import span
 from app.services.fx_service import (
     convert_to_kwd,
+    convert_series_to_kwd,
+    flow_dates,
     safe_float,
     get_usd_kwd_rate,
     PORTFOLIO_CCY,
     DEFAULT_USD_TO_KWD,
 )
+from app.services.symbol_service import STOCKS_BY_KEY, symbol_key
 
 logger = logging.getLogger(__name__)
 
@@ -77,17 +81,18 @@ def _fetch_pe_from_stockanalysis(symbol: str, currency: str) -> Optional[float]:
         url = f"https://stockanalysis.com/quote/kwse/{base.upper()}/statistics/"
 
     try:
-        resp = httpx.get(
-            url,
-            timeout=12,
-            follow_redirects=True,
-            headers={
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
-                )
-            },
-        )
+        with span("http"):
+            resp = httpx.get(
+                url,
+                timeout=12,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": (
+                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+                    )
+                },
+            )
         if resp.status_code != 200:
             logger.debug("StockAnalysis P/E: %s returned %s", url, resp.status_code)
             return None
@@ -186,6 +191,34 @@ def compute_holdings_avg_cost(tx: pd.DataFrame) -> dict:
     }
 
 
+def clear_wac_snapshots(
+    user_id: int, sym_key: Optional[str] = None, since: Optional[str] = None,
+) -> None:
+    """
+    Drop the stored running-WAC columns (``*_at_txn``) a ledger write made stale.
+
+    Every row of ``sym_key`` dated on or after ``since`` loses its snapshot
+    (undated rows sort first in the replay, so they only go when ``since``
+    is None).  Without ``sym_key`` the whole user ledger is cleared.  The
+    trading summary re-stamps cleared rows from a fresh replay.
+    """
+    conditions = ["user_id = ?"]
+    params: list = [user_id]
+    if sym_key:
+        conditions.append("symbol_key = ?")
+        params.append(sym_key)
+    if since:
+        conditions.append("txn_date >= ?")
+        params.append(since)
+    exec_sql(
+        f"""UPDATE transactions SET
+                avg_cost_at_txn = NULL, realized_pnl_at_txn = NULL,
+                cost_basis_at_txn = NULL, shares_held_at_txn = NULL
+            WHERE {" AND ".join(conditions)}""",
+        tuple(params),
+    )
+
+
 # =====================================================================
 #   PortfolioService — class wrapping ALL portfolio business logic
 # =====================================================================
@@ -277,7 +310,7 @@ class PortfolioService:
         all_txs = query_df(
             f"""
             SELECT
-                id, TRIM(stock_symbol) AS stock_symbol, txn_date, txn_type,
+                id, TRIM(stock_symbol) AS stock_symbol, symbol_key, txn_date, txn_type,
                 purchase_cost, sell_value, shares,
                 bonus_shares, cash_dividend,
                 price_override, planned_cum_shares,
@@ -296,19 +329,24 @@ class PortfolioService:
             return pd.DataFrame()
 
         unique_symbols = [s.strip() for s in all_txs["stock_symbol"].str.strip().unique()]
+        key_of = {
+            sym: key if isinstance(key, str) and key else symbol_key(sym)
+            for sym, key in zip(all_txs["stock_symbol"], all_txs["symbol_key"])
+        }
 
-        # Fetch stock metadata
+        # Fetch stock metadata (keyed by symbol_key)
         stock_lookup: Dict[str, dict] = {}
         has_pe_col = column_exists("stocks", "pe_ratio")
         has_prev_close_col = column_exists("stocks", "previous_close")
-        if unique_symbols:
-            ph = ",".join(["?" for _ in unique_symbols])
+        unique_keys = sorted({key_of[sym] for sym in unique_symbols if key_of.get(sym)})
+        if unique_keys:
+            ph = ",".join(["?" for _ in unique_keys])
             pe_select = ", pe_ratio" if has_pe_col else ""
             prev_close_select = ", previous_close" if has_prev_close_col else ""
             meta_df = query_df(
                 f"""
                 SELECT
-                    TRIM(symbol) AS symbol,
+                    symbol_key,
                     COALESCE(name,'')            AS name,
                     COALESCE(current_price,0)    AS current_price,
                     COALESCE(portfolio,'KFH')    AS portfolio,
@@ -316,13 +354,13 @@ class PortfolioService:
                     tradingview_symbol, tradingview_exchange,
                     yf_ticker{pe_select}{prev_close_select}
                 FROM stocks
-                WHERE TRIM(symbol) IN ({ph}) AND user_id = ?
+                WHERE user_id = ? AND symbol_key IN ({ph})
                 """,
-                tuple(unique_symbols) + (self.user_id,),
+                (self.user_id,) + tuple(unique_keys),
             )
             if not meta_df.empty:
                 for _, srow in meta_df.iterrows():
-                    stock_lookup[srow["symbol"].strip()] = {
+                    stock_lookup[srow["symbol_key"]] = {
                         "name": srow["name"],
                         "current_price": srow["current_price"],
                         "portfolio": srow["portfolio"],
@@ -332,11 +370,15 @@ class PortfolioService:
                         "previous_close": srow.get("previous_close") if has_prev_close_col else None,
                     }
 
-        # Build rows per symbol
+        # Build rows per symbol (FX rate resolved once, only if needed)
+        has_usd = portfolio_name == "USA" or any(
+            m.get("currency") == "USD" for m in stock_lookup.values()
+        )
+        usd_kwd_rate = get_usd_kwd_rate() if has_usd else None
         rows: List[dict] = []
         for sym in unique_symbols:
             sym = sym.strip()
-            meta = stock_lookup.get(sym, {
+            meta = stock_lookup.get(key_of.get(sym), {
                 "name": sym,
                 "current_price": 0.0,
                 "portfolio": portfolio_name,
@@ -349,7 +391,8 @@ class PortfolioService:
                 currency = "USD"
 
             tx = all_txs[all_txs["stock_symbol"].str.strip() == sym].copy()
-            h = compute_holdings_avg_cost(tx)
+            with span("wac"):
+                h = compute_holdings_avg_cost(tx)
 
             qty = h["shares"]
             if qty <= 0.001:
@@ -390,17 +433,17 @@ class PortfolioService:
                             """
                             UPDATE stocks
                             SET pe_ratio = ?, last_updated = ?
-                            WHERE TRIM(symbol) = ? AND user_id = ?
+                            WHERE symbol_key = ? AND user_id = ?
                             """,
-                            (fetched_pe, int(time.time()), sym, self.user_id),
+                            (fetched_pe, int(time.time()), key_of.get(sym), self.user_id),
                         )
                     except Exception as exc:
                         logger.debug("Unable to persist StockAnalysis P/E for %s: %s", sym, exc)
 
-            mkt_val_kwd = convert_to_kwd(mkt_value, currency)
-            unreal_kwd = convert_to_kwd(unreal, currency)
-            total_pnl_kwd = convert_to_kwd(total_pnl, currency)
-            total_cost_kwd = convert_to_kwd(total_cost, currency)
+            mkt_val_kwd = convert_to_kwd(mkt_value, currency, usd_kwd_rate)
+            unreal_kwd = convert_to_kwd(unreal, currency, usd_kwd_rate)
+            total_pnl_kwd = convert_to_kwd(total_pnl, currency, usd_kwd_rate)
+            total_cost_kwd = convert_to_kwd(total_cost, currency, usd_kwd_rate)
 
             rows.append({
                 "company": f"{display_name} - {sym}".strip(),
@@ -446,6 +489,7 @@ class PortfolioService:
     #  Cash reconciliation (5-source UNION ALL — ui.py L10517-10640)
     # ------------------------------------------------------------------
 
+    @span("cash")
     def recalc_portfolio_cash(
         self,
         force_override: bool = False,
@@ -649,14 +693,14 @@ class PortfolioService:
                 COALESCE(s.currency, 'KWD') AS currency,
                 COALESCE(t.category, 'portfolio') AS category
             FROM transactions t
-            LEFT JOIN stocks s
-                ON UPPER(t.stock_symbol) = UPPER(s.symbol) AND s.user_id = t.user_id
+            LEFT JOIN {STOCKS_BY_KEY} s
+                ON s.user_id = t.user_id AND s.symbol_key = t.symbol_key
             WHERE t.user_id = ? {soft_del}
             ORDER BY t.stock_symbol, t.portfolio, t.txn_date ASC, t.id ASC
         """
 
         try:
-            df = query_df(sql, (self.user_id,))
+            df = query_df(sql, (self.user_id, self.user_id))
         except Exception:
             df = pd.DataFrame()
 
@@ -678,15 +722,18 @@ class PortfolioService:
         total_loss_kwd = 0.0
         details: List[dict] = []
 
+        usd_kwd_rate = get_usd_kwd_rate() if (df["currency"] == "USD").any() else None
+
         if has_stored:
-            sells = df[df["txn_type"] == "Sell"].copy()
+            sells = df[(df["txn_type"] == "Sell") & df["realized_pnl_at_txn"].notna()].copy()
+            sells["realized_pnl_kwd"] = convert_series_to_kwd(
+                sells["realized_pnl_at_txn"], sells["currency"],
+                flow_dates(sells["txn_date"]), usd_kwd_rate,
+            )
             for _, row in sells.iterrows():
-                stored_pnl = row.get("realized_pnl_at_txn")
-                if pd.isna(stored_pnl):
-                    continue
-                profit = float(stored_pnl)
+                profit = float(row["realized_pnl_at_txn"])
                 ccy = row.get("currency", "KWD")
-                profit_kwd = convert_to_kwd(profit, ccy)
+                profit_kwd = float(row["realized_pnl_kwd"])
                 total_realized_kwd += profit_kwd
                 if profit_kwd >= 0:
                     total_profit_kwd += profit_kwd
@@ -731,7 +778,7 @@ class PortfolioService:
                         cost_of_sold = avg_cost_ps * qty
                         proceeds = safe_float(row.get("sell_value"), 0.0)
                         profit = proceeds - cost_of_sold
-                        profit_kwd = convert_to_kwd(profit, ccy)
+                        profit_kwd = convert_to_kwd(profit, ccy, usd_kwd_rate)
 
                         total_realized_kwd += profit_kwd
                         if profit_kwd >= 0:
@@ -1399,6 +1446,7 @@ class PortfolioService:
     #  TWR — Time-Weighted Return (GIPS Modified Dietz)
     # ------------------------------------------------------------------
 
+    @span("twr")
     def calculate_twr(
         self,
         start_date: Optional[date] = None,
@@ -1475,6 +1523,7 @@ class PortfolioService:
     #  MWRR — Money-Weighted Return (XIRR Newton + bisection)
     # ------------------------------------------------------------------
 
+    @span("mwrr")
     def calculate_mwrr(
         self,
         start_date: Optional[date] = None,
@@ -0,0 +1,358 @@
+"""
+Price History — stored daily closes and historical snapshot backfill.
+
+``price_history`` keeps one close per (Yahoo ticker, date), shared by all
+users, in the quote currency (KWD — already converted from fils — or
+USD).  It is fed by:
+
+  • :func:`download_history` — one bulk ``yf.download`` for many tickers
+  • :func:`import_csv`       — local ``symbol,date,close[,currency]`` files
+  • the daily price update   — each run appends that day's closes
+
+:func:`backfill_snapshots` rebuilds missing ``portfolio_snapshots`` for a
+user from transactions, deposits and these closes in one vectorized
+pass over the date range, so TWR and risk metrics see a dense daily
+series instead of only the days someone pressed "save snapshot".
+"""
+
+import io
+import logging
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import exec_sql_many, query_df
+from app.services.fx_service import PORTFOLIO_CCY, get_usd_kwd_rates
+
+logger = logging.getLogger(__name__)
+
+# Stored history counts as covering a range when it reaches this close to
+# the range end (weekends / holidays have no bar).
+_COVERAGE_SLACK_DAYS = 4
+
+
+# ── Storage ──────────────────────────────────────────────────────────
+
+def store_closes(rows: pd.DataFrame, source: str) -> int:
+    """Upsert ``symbol, price_date, close, currency`` rows; returns the count."""
+    if rows.empty:
+        return 0
+    rows = rows.dropna(subset=["symbol", "price_date", "close"])
+    rows = rows[rows["close"] > 0]
+    now = int(time.time())
+    return exec_sql_many(
+        """INSERT INTO price_history (symbol, price_date, close, currency, source, fetched_at)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT (symbol, price_date) DO UPDATE SET
+               close = excluded.close, currency = excluded.currency,
+               source = excluded.source, fetched_at = excluded.fetched_at""",
+        [
+            (str(r.symbol), str(r.price_date), round(float(r.close), 6), str(r.currency), source, now)
+            for r in rows.itertuples(index=False)
+        ],
+    )
+
+
+def _default_currency(symbol: str) -> str:
+    return "KWD" if symbol.upper().endswith(".KW") else "USD"
+
+
+def download_history(tickers: Dict[str, str], start: date, end: date) -> int:
+    """
+    Bulk-download daily closes for ``{yahoo_ticker: currency}`` over
+    [start, end] with a single ``yf.download`` call and store them.
+    ``.KW`` closes arrive in fils and are stored in KWD.
+    """
+    if not tickers:
+        return 0
+    try:
+        import yfinance as yf
+    except ImportError:
+        logger.warning("yfinance not installed – cannot download price history")
+        return 0
+
+    symbols = sorted(tickers)
+    try:
+        raw = yf.download(
+            symbols,
+            start=start.isoformat(),
+            end=(end + timedelta(days=1)).isoformat(),
+            interval="1d",
+            auto_adjust=False,
+            group_by="column",
+            progress=False,
+            threads=True,
+        )
+    except Exception as exc:
+        logger.warning("Price history download failed: %s", exc)
+        return 0
+    if raw is None or raw.empty:
+        return 0
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        closes = raw["Close"]
+    else:
+        closes = raw[["Close"]].rename(columns={"Close": symbols[0]})
+
+    long = (
+        closes.rename_axis("price_date").reset_index()
+        .melt(id_vars="price_date", var_name="symbol", value_name="close")
+        .dropna(subset=["close"])
+    )
+    long["price_date"] = pd.to_datetime(long["price_date"]).dt.strftime("%Y-%m-%d")
+    long["currency"] = long["symbol"].map(tickers).fillna(long["symbol"].map(_default_currency))
+    is_fils = long["currency"].eq("KWD") & long["symbol"].str.upper().str.endswith(".KW")
+    long.loc[is_fils, "close"] = long.loc[is_fils, "close"] / 1000.0
+    stored = store_closes(long[["symbol", "price_date", "close", "currency"]], "yfinance")
+    logger.info("📈 Price history: stored %d closes for %d tickers", stored, len(symbols))
+    return stored
+
+
+def import_csv(data: Union[bytes, str, Path]) -> int:
+    """
+    Import closes from CSV with columns ``symbol, date, close`` and an
+    optional ``currency`` (default: KWD for ``.KW`` tickers, else USD).
+    Symbols are Yahoo tickers; KWD closes are in KWD, not fils.
+    """
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+    df = pd.read_csv(source)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = {"symbol", "date", "close"} - set(df.columns)
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+    df["symbol"] = df["symbol"].astype(str).str.strip().str.upper()
+    df["price_date"] = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    df["close"] = pd.to_numeric(df["close"], errors="coerce")
+    if "currency" in df.columns:
+        df["currency"] = df["currency"].fillna(df["symbol"].map(_default_currency)).str.upper()
+    else:
+        df["currency"] = df["symbol"].map(_default_currency)
+    return store_closes(df[["symbol", "price_date", "close", "currency"]], "csv")
+
+
+def load_closes(tickers: Iterable[str], start: date, end: date) -> pd.DataFrame:
+    """Stored closes as a wide frame: DatetimeIndex × ticker (NaN where no bar)."""
+    tickers = sorted(set(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    ph = ",".join("?" for _ in tickers)
+    df = query_df(
+        f"""SELECT symbol, price_date, close FROM price_history
+            WHERE symbol IN ({ph}) AND price_date BETWEEN ? AND ?""",
+        tuple(tickers) + (start.isoformat(), end.isoformat()),
+    )
+    if df.empty:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    df["price_date"] = pd.to_datetime(df["price_date"])
+    return df.pivot_table(index="price_date", columns="symbol", values="close", aggfunc="last")
+
+
+def _uncovered(tickers: Dict[str, str], start: date, end: date) -> Dict[str, str]:
+    """Tickers whose stored history does not span [start, end]."""
+    ph = ",".join("?" for _ in tickers)
+    cov = query_df(
+        f"""SELECT symbol, MIN(price_date) AS first, MAX(price_date) AS last
+            FROM price_history WHERE symbol IN ({ph}) GROUP BY symbol""",
+        tuple(tickers),
+    )
+    have = {r.symbol: (r.first, r.last) for r in cov.itertuples(index=False)}
+    lo = (start + timedelta(days=_COVERAGE_SLACK_DAYS)).isoformat()
+    hi = (end - timedelta(days=_COVERAGE_SLACK_DAYS)).isoformat()
+    return {
+        t: ccy for t, ccy in tickers.items()
+        if t not in have or have[t][0] > lo or have[t][1] < hi
+    }
+
+
+# ── Snapshot backfill ────────────────────────────────────────────────
+
+def _user_positions(user_id: int) -> pd.DataFrame:
+    return query_df(
+        """SELECT portfolio, TRIM(stock_symbol) AS symbol, txn_date, txn_type,
+                  COALESCE(shares, 0) AS shares, COALESCE(bonus_shares, 0) AS bonus_shares,
+                  COALESCE(purchase_cost, 0) AS purchase_cost, COALESCE(sell_value, 0) AS sell_value,
+                  COALESCE(cash_dividend, 0) AS cash_dividend, COALESCE(fees, 0) AS fees
+           FROM transactions
+           WHERE user_id = ? AND COALESCE(category, 'portfolio') = 'portfolio'
+             AND COALESCE(is_deleted, 0) = 0 AND txn_date IS NOT NULL""",
+        (user_id,),
+    )
+
+
+def _ticker_map(user_id: int, keys: pd.DataFrame) -> pd.DataFrame:
+    """Per (portfolio, symbol): Yahoo ticker and quote currency."""
+    from app.services.price_service import _yahoo_symbol
+
+    stocks = query_df(
+        """SELECT TRIM(symbol) AS symbol, portfolio, COALESCE(currency, 'KWD') AS currency, yf_ticker
+           FROM stocks WHERE user_id = ?""",
+        (user_id,),
+    )
+    by_symbol = {r.symbol: r for r in stocks.itertuples(index=False)}
+    out = []
+    for pf, sym in keys[["portfolio", "symbol"]].itertuples(index=False):
+        meta = by_symbol.get(sym)
+        ccy = "USD" if pf == "USA" else (meta.currency if meta is not None else PORTFOLIO_CCY.get(pf, "KWD"))
+        ticker = (meta.yf_ticker if meta is not None and meta.yf_ticker else None) or _yahoo_symbol(sym, ccy)
+        out.append((pf, sym, ticker.upper(), ccy))
+    return pd.DataFrame(out, columns=["portfolio", "symbol", "ticker", "currency"])
+
+
+def _daily_cash(user_id: int, txns: pd.DataFrame, days: pd.DatetimeIndex) -> pd.DataFrame:
+    """Cumulative cash per portfolio (native currency) — same formula as
+    ``recalc_portfolio_cash`` — as a days × portfolio frame."""
+    deposits = query_df(
+        """SELECT portfolio, deposit_date AS flow_date,
+                  CASE WHEN LOWER(COALESCE(source, 'deposit')) = 'withdrawal'
+                       THEN -1 * COALESCE(amount, 0) ELSE COALESCE(amount, 0) END AS amount
+           FROM cash_deposits
+           WHERE user_id = ? AND COALESCE(include_in_analysis, 1) = 1
+             AND COALESCE(is_deleted, 0) = 0 AND deposit_date IS NOT NULL""",
+        (user_id,),
+    )
+    typ = txns["txn_type"]
+    trade_cash = (
+        np.where(typ == "Buy", -txns["purchase_cost"], 0.0)
+        + np.where(typ == "Sell", txns["sell_value"], 0.0)
+        + txns["cash_dividend"].clip(lower=0)
+        - txns["fees"].clip(lower=0)
+    )
+    flows = pd.concat([
+        deposits.rename(columns={"flow_date": "date"}),
+        pd.DataFrame({"portfolio": txns["portfolio"], "date": txns["txn_date"], "amount": trade_cash}),
+    ], ignore_index=True)
+    flows = flows[flows["portfolio"].isin(PORTFOLIO_CCY.keys())]
+    flows["date"] = pd.to_datetime(flows["date"], errors="coerce")
+    flows = flows.dropna(subset=["date"])
+    if flows.empty:
+        return pd.DataFrame(index=days)
+    before = flows[flows["date"] < days[0]].groupby("portfolio")["amount"].sum()
+    daily = (
+        flows[flows["date"] >= days[0]]
+        .pivot_table(index="date", columns="portfolio", values="amount", aggfunc="sum")
+        .reindex(days, fill_value=0.0)
+        .reindex(columns=sorted(set(before.index) | set(flows["portfolio"])), fill_value=0.0)
+        .fillna(0.0)
+    )
+    return daily.cumsum() + before.reindex(daily.columns, fill_value=0.0)
+
+
+def backfill_snapshots(
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    download: bool = True,
+    overwrite: bool = False,
+) -> dict:
+    """
+    Reconstruct missing daily snapshots for *user_id* over [start, end].
+
+    Defaults: from the first transaction to yesterday (today's row is the
+    live daily job's).  Snapshot days are the trading days of the user's
+    instruments.  ``portfolio_value`` = Σ shares held × close (→ KWD at
+    that day's USD/KWD rate) + cash from the ``recalc_portfolio_cash``
+    formula as of that day.  Days where a held position has no close yet
+    are skipped.  Existing snapshots are kept unless *overwrite*.  Derived
+    columns are then rebuilt by ``recalculate_all_snapshots`` and the
+    range's ``position_snapshots`` rewritten.
+    """
+    txns = _user_positions(user_id)
+    result = {"created": 0, "updated": 0, "skipped_unpriced": 0, "downloaded": 0}
+    if txns.empty:
+        return result
+
+    txns["txn_date"] = pd.to_datetime(txns["txn_date"], errors="coerce")
+    txns = txns.dropna(subset=["txn_date"])
+    first_txn = txns["txn_date"].min().date()
+    start = max(start or first_txn, first_txn)
+    end = end or (date.today() - timedelta(days=1))
+    if start > end:
+        return result
+    result.update(start=start.isoformat(), end=end.isoformat())
+
+    # ── Holdings: days × (portfolio, symbol) share counts ──────────
+    txns["key"] = txns["portfolio"].astype(str) + "|" + txns["symbol"].astype(str)
+    typ = txns["txn_type"]
+    txns["delta"] = (
+        np.where(typ == "Buy", txns["shares"], 0.0)
+        - np.where(typ == "Sell", txns["shares"], 0.0)
+        + txns["bonus_shares"]
+    )
+    cal = pd.date_range(txns["txn_date"].min(), end, freq="D")
+    shares = (
+        txns.pivot_table(index="txn_date", columns="key", values="delta", aggfunc="sum")
+        .reindex(cal, fill_value=0.0).fillna(0.0).cumsum().clip(lower=0.0)
+    )
+    shares[shares < 0.001] = 0.0
+
+    keys = pd.DataFrame([k.split("|", 1) for k in shares.columns], columns=["portfolio", "symbol"])
+    tmap = _ticker_map(user_id, keys)
+    tmap.index = shares.columns
+    tickers = dict(zip(tmap["ticker"], tmap["currency"]))
+
+    # ── Closes (download what is not stored yet) ───────────────────
+    lookback = start - timedelta(days=10)  # a bar before start to carry forward
+    if download:
+        need = _uncovered(tickers, lookback, end)
+        if need:
+            result["downloaded"] = download_history(need, lookback, end)
+    raw_closes = load_closes(tickers, lookback, end)
+    days = raw_closes.index[(raw_closes.index >= pd.Timestamp(start)) & raw_closes.notna().any(axis=1)]
+    if days.empty:
+        return result
+    closes = raw_closes.reindex(cal).ffill().reindex(days)
+    held = shares.reindex(days)
+
+    # ── Value: Σ shares × close × FX + cash ────────────────────────
+    px = closes.reindex(columns=tmap["ticker"]).to_numpy()
+    qty = held.to_numpy()
+    unpriced = ((qty > 0) & np.isnan(px)).any(axis=1)
+    native = np.nan_to_num(qty * px)
+
+    is_usd = (tmap["currency"] == "USD").to_numpy()
+    cash = _daily_cash(user_id, txns, days)
+    usd_cash_cols = [pf for pf in cash.columns if PORTFOLIO_CCY.get(pf) == "USD"]
+    fx = np.ones(len(days))
+    if is_usd.any() or usd_cash_cols:
+        fx = get_usd_kwd_rates(days.strftime("%Y-%m-%d")).to_numpy(dtype=float)
+
+    stocks_kwd = native[:, ~is_usd].sum(axis=1) + native[:, is_usd].sum(axis=1) * fx
+    cash_kwd = cash.drop(columns=usd_cash_cols).sum(axis=1).to_numpy()
+    if usd_cash_cols:
+        cash_kwd = cash_kwd + cash[usd_cash_cols].sum(axis=1).to_numpy() * fx
+    values = pd.Series(np.round(stocks_kwd + cash_kwd, 3), index=days)[~unpriced]
+    result["skipped_unpriced"] = int(unpriced.sum())
+
+    # ── Write ──────────────────────────────────────────────────────
+    existing = set(query_df(
+        "SELECT snapshot_date FROM portfolio_snapshots WHERE user_id = ? AND snapshot_date BETWEEN ? AND ?",
+        (user_id, start.isoformat(), end.isoformat()),
+    )["snapshot_date"].astype(str))
+    now = int(time.time())
+    dated = [(d.strftime("%Y-%m-%d"), float(v)) for d, v in values.items()]
+    new_rows = [(user_id, d, v, now) for d, v in dated if d not in existing]
+    result["created"] = exec_sql_many(
+        "INSERT INTO portfolio_snapshots (user_id, snapshot_date, portfolio_value, created_at) VALUES (?, ?, ?, ?)",
+        new_rows,
+    )
+    if overwrite:
+        result["updated"] = exec_sql_many(
+            "UPDATE portfolio_snapshots SET portfolio_value = ?, created_at = ? WHERE user_id = ? AND snapshot_date = ?",
+            [(v, now, user_id, d) for d, v in dated if d in existing],
+        )
+
+    if result["created"] or result["updated"]:
+        from app.api.v1.tracker import recalculate_all_snapshots
+        from app.services.holdings_service import write_position_snapshots
+        recalculate_all_snapshots(user_id)
+        write_position_snapshots(user_id, start, end)
+    logger.info(
+        "📸 Snapshot backfill user %d %s→%s: %d created, %d updated, %d unpriced day(s) skipped",
+        user_id, start, end, result["created"], result["updated"], result["skipped_unpriced"],
+    )
+    return result
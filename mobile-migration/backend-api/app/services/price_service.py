@@ -13,9 +13,10 @@ Handles:
 import time
 import logging
 from dataclasses import dataclass, field
-from typing import Optional, Dict
+from typing import Dict, Iterable, Optional
 
 from app.core.database import get_conn, add_column_if_missing
+from app.data.stock_lists import SYMBOL_ALIASES
 
 logger = logging.getLogger(__name__)
 
@@ -40,13 +41,7 @@ def _ensure_maps():
         logger.warning("stock_lists.py not found — falling back to suffix rules")
 
 # Variation aliases matching Streamlit's KUWAIT_VARIATIONS
-_VARIATIONS: Dict[str, str] = {
-    "AGILITY": "AGLTY",
-    "AGILITY PLC": "AGLTY",
-    "MABNEE": "MABANEE",
-    "H-SOFT": "HUMANSOFT",
-    "INCYTE": "INCY",
-}
+_VARIATIONS: Dict[str, str] = SYMBOL_ALIASES
 
 
 # ── Yahoo symbol mapping ─────────────────────────────────────────────
@@ -133,11 +128,132 @@ class PriceUpdateResult:
         }
 
 
+# ── Quotes ───────────────────────────────────────────────────────────
+
+def _fetch_quote(yf, yahoo_sym: str) -> Optional[dict]:
+    """
+    Latest close, previous close and P/E for one Yahoo ticker, or None
+    when Yahoo has no recent data.  Prices are raw (fils for ``.KW``) —
+    callers apply ``_normalise_kwd_price`` with the stock's currency.
+    Network errors propagate.
+    """
+    ticker = yf.Ticker(yahoo_sym)
+
+    # Use 5d window so weekends / holidays still return data
+    hist = ticker.history(period="5d", interval="1d")
+
+    # yfinance ≥ 1.0 may return MultiIndex columns
+    if hist is not None and hist.columns.nlevels > 1:
+        hist.columns = hist.columns.get_level_values(0)
+
+    if hist is None or hist.empty or "Close" not in hist.columns:
+        return None
+
+    closes = hist["Close"].dropna()
+    quote = {
+        "close": float(closes.iloc[-1]),
+        "previous_close": float(closes.iloc[-2]) if len(closes) >= 2 else None,
+        "pe_ratio": None,
+        "close_date": closes.index[-1].strftime("%Y-%m-%d"),
+    }
+
+    # Fetch P/E ratio from ticker info
+    try:
+        info = ticker.info
+        pe_val = info.get("trailingPE") or info.get("forwardPE")
+        if pe_val is not None:
+            quote["pe_ratio"] = round(float(pe_val), 2)
+    except Exception as pe_exc:
+        logger.debug("P/E fetch failed for %s: %s", yahoo_sym, pe_exc)
+    return quote
+
+
+def _eligible_stocks(cur, user_id: int, only_with_holdings: bool) -> list:
+    """``(id, symbol, currency, yf_ticker, net_shares)`` rows to price for *user_id*."""
+    if only_with_holdings:
+        cur.execute(
+            """
+            SELECT s.id, s.symbol, s.currency, s.yf_ticker,
+                COALESCE(
+                    SUM(CASE WHEN t.txn_type = 'Buy'  THEN t.shares ELSE 0 END) -
+                    SUM(CASE WHEN t.txn_type = 'Sell' THEN t.shares ELSE 0 END),
+                0) AS net_shares
+            FROM stocks s
+            LEFT JOIN transactions t
+                ON s.symbol = t.stock_symbol AND s.user_id = t.user_id
+            WHERE s.user_id = ?
+              AND s.symbol IS NOT NULL AND s.symbol != ''
+            GROUP BY s.id, s.symbol, s.currency, s.yf_ticker
+            HAVING COALESCE(
+                    SUM(CASE WHEN t.txn_type = 'Buy'  THEN t.shares ELSE 0 END) -
+                    SUM(CASE WHEN t.txn_type = 'Sell' THEN t.shares ELSE 0 END),
+                   0) > 0.001
+            """,
+            (user_id,),
+        )
+    else:
+        cur.execute(
+            """
+            SELECT s.id, s.symbol, s.currency, s.yf_ticker, 0 AS net_shares
+            FROM stocks s
+            WHERE s.user_id = ?
+              AND s.symbol IS NOT NULL AND s.symbol != ''
+            """,
+            (user_id,),
+        )
+    return cur.fetchall()
+
+
+def build_price_map(
+    user_ids: Iterable[int],
+    only_with_holdings: bool = True,
+) -> Dict[str, Optional[dict]]:
+    """
+    Fetch one quote per distinct Yahoo ticker held by any of *user_ids*.
+
+    Returns ``{yahoo_symbol: quote | None}`` for ``update_all_prices(...,
+    price_map=...)`` so a multi-user run hits Yahoo once per ticker
+    instead of once per (user, ticker).  ``None`` marks tickers Yahoo has
+    no data for; tickers whose fetch raised are left out, so
+    ``update_all_prices`` fetches them again and counts them as failed if
+    that fails too.
+    """
+    try:
+        import yfinance as yf
+    except ImportError:
+        logger.error("yfinance is not installed – cannot build price map.")
+        return {}
+
+    tickers = set()
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        for uid in user_ids:
+            for _, symbol, currency, stored_yf_ticker, _ in _eligible_stocks(cur, uid, only_with_holdings):
+                tickers.add(stored_yf_ticker or _yahoo_symbol(symbol, currency))
+    finally:
+        conn.close()
+
+    t0 = time.time()
+    price_map: Dict[str, Optional[dict]] = {}
+    for yahoo_sym in sorted(tickers):
+        try:
+            price_map[yahoo_sym] = _fetch_quote(yf, yahoo_sym)
+        except Exception as exc:
+            logger.warning("❌ quote %s: %s", yahoo_sym, exc)
+    logger.info(
+        "Price map: %d/%d tickers quoted (%.1fs)",
+        sum(q is not None for q in price_map.values()), len(tickers), time.time() - t0,
+    )
+    return price_map
+
+
 # ── Core updater ─────────────────────────────────────────────────────
 
 def update_all_prices(
     user_id: int = 1,
     only_with_holdings: bool = True,
+    price_map: Optional[Dict[str, Optional[dict]]] = None,
 ) -> PriceUpdateResult:
     """
     Fetch the latest closing price for every stock in the ``stocks`` table
@@ -150,6 +266,10 @@ def update_all_prices(
     only_with_holdings : bool
         If True, only update stocks that have a positive share balance
         (i.e. net buys − sells > 0.001).  Saves API calls on dead positions.
+    price_map : dict, optional
+        Quotes from :func:`build_price_map`.  When given, prices come from
+        the map and Yahoo is only called for tickers missing from it
+        (their shared fetch failed).
     """
     # Lazy-import so the module loads even if yfinance is missing in test envs
     try:
@@ -162,45 +282,14 @@ def update_all_prices(
 
     t0 = time.time()
     result = PriceUpdateResult()
+    history_rows = []
 
     conn = get_conn()
     cur = conn.cursor()
 
     try:
         # ── Fetch eligible stocks ────────────────────────────────────
-        if only_with_holdings:
-            cur.execute(
-                """
-                SELECT s.id, s.symbol, s.currency, s.yf_ticker,
-                    COALESCE(
-                        SUM(CASE WHEN t.txn_type = 'Buy'  THEN t.shares ELSE 0 END) -
-                        SUM(CASE WHEN t.txn_type = 'Sell' THEN t.shares ELSE 0 END),
-                    0) AS net_shares
-                FROM stocks s
-                LEFT JOIN transactions t
-                    ON s.symbol = t.stock_symbol AND s.user_id = t.user_id
-                WHERE s.user_id = ?
-                  AND s.symbol IS NOT NULL AND s.symbol != ''
-                GROUP BY s.id, s.symbol, s.currency, s.yf_ticker
-                HAVING COALESCE(
-                        SUM(CASE WHEN t.txn_type = 'Buy'  THEN t.shares ELSE 0 END) -
-                        SUM(CASE WHEN t.txn_type = 'Sell' THEN t.shares ELSE 0 END),
-                       0) > 0.001
-                """,
-                (user_id,),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT s.id, s.symbol, s.currency, s.yf_ticker, 0 AS net_shares
-                FROM stocks s
-                WHERE s.user_id = ?
-                  AND s.symbol IS NOT NULL AND s.symbol != ''
-                """,
-                (user_id,),
-            )
-
-        stocks = cur.fetchall()
+        stocks = _eligible_stocks(cur, user_id, only_with_holdings)
         result.stocks_found = len(stocks)
         logger.info("Price updater: found %d stocks to update", len(stocks))
 
@@ -213,37 +302,22 @@ def update_all_prices(
             try:
                 # Prefer stored yf_ticker if available, else derive from symbol+currency
                 yahoo_sym = stored_yf_ticker if stored_yf_ticker else _yahoo_symbol(symbol, currency)
-                ticker = yf.Ticker(yahoo_sym)
+                if price_map is not None and yahoo_sym in price_map:
+                    quote = price_map[yahoo_sym]
+                else:
+                    quote = _fetch_quote(yf, yahoo_sym)
 
-                # Use 5d window so weekends / holidays still return data
-                hist = ticker.history(period="5d", interval="1d")
-
-                # yfinance ≥ 1.0 may return MultiIndex columns
-                if hist is not None and hist.columns.nlevels > 1:
-                    hist.columns = hist.columns.get_level_values(0)
-
-                if hist is None or hist.empty or "Close" not in hist.columns:
+                if quote is None:
                     logger.warning("No data for %s (yahoo: %s)", symbol, yahoo_sym)
                     result.skipped += 1
                     result.details.append({"symbol": symbol, "status": "no_data"})
                     continue
 
-                closes = hist["Close"].dropna()
-                raw_price = float(closes.iloc[-1])
-                price = _normalise_kwd_price(raw_price, currency)
+                price = _normalise_kwd_price(quote["close"], currency)
                 previous_close = None
-                if len(closes) >= 2:
-                    previous_close = _normalise_kwd_price(float(closes.iloc[-2]), currency)
-
-                # Fetch P/E ratio from ticker info
-                pe_ratio = None
-                try:
-                    info = ticker.info
-                    pe_val = info.get("trailingPE") or info.get("forwardPE")
-                    if pe_val is not None:
-                        pe_ratio = round(float(pe_val), 2)
-                except Exception as pe_exc:
-                    logger.debug("P/E fetch failed for %s: %s", yahoo_sym, pe_exc)
+                if quote["previous_close"] is not None:
+                    previous_close = _normalise_kwd_price(quote["previous_close"], currency)
+                pe_ratio = quote["pe_ratio"]
 
                 cur.execute(
                     """
@@ -258,6 +332,8 @@ def update_all_prices(
                     (round(price, 6), int(time.time()), pe_ratio, previous_close, stock_id, user_id),
                 )
                 conn.commit()
+                if quote.get("close_date"):
+                    history_rows.append((yahoo_sym, quote["close_date"], price, currency))
 
                 result.updated += 1
                 result.details.append({
@@ -277,6 +353,18 @@ def update_all_prices(
     finally:
         conn.close()
 
+    # Each run extends the stored daily closes used by snapshot backfill
+    if history_rows:
+        try:
+            import pandas as pd
+            from app.services.price_history import store_closes
+            store_closes(
+                pd.DataFrame(history_rows, columns=["symbol", "price_date", "close", "currency"]),
+                "daily_update",
+            )
+        except Exception as exc:
+            logger.warning("Price history append failed: %s", exc)
+
     result.elapsed_sec = time.time() - t0
     logger.info(
         "Price update complete: %d updated, %d failed, %d skipped (%.1fs)",
@@ -0,0 +1,350 @@
+"""
+Stock Screener — batch scoring of every analysis stock a user owns.
+
+``_compute_stock_score`` scores one stock per request and calls yfinance
+inline.  The screener instead:
+
+  1. Loads the latest value of every metric for all of the user's
+     ``analysis_stocks`` in one query and pivots it to a stock × metric
+     DataFrame.
+  2. Fills market-derived inputs (price, beta, volatility, drawdown,
+     market cap, EV/EBIT) from each stock's most recent ``stock_scores``
+     snapshot — no network calls.
+  3. Scores the five pillars column-wise with ``np.select`` using the
+     same bands as the per-stock ``_score_*_detailed`` functions.
+  4. Optionally persists one ``stock_scores`` row per stock in a single
+     batch, skipping stocks already scored today — listing the screener
+     never writes.
+"""
+
+import json
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import exec_sql_many, query_df
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS = (
+    "overall_score", "fundamental_score", "valuation_score",
+    "growth_score", "quality_score", "risk_score",
+)
+
+# Inputs that only come from live market data (yfinance) in the per-stock
+# path; the screener reuses the last stored snapshot of each.
+MARKET_FIELDS = (
+    "Current Price", "Beta", "1Y Volatility", "Max Drawdown 1Y",
+    "Market Cap", "EV/EBIT",
+)
+
+
+# ── Loading ──────────────────────────────────────────────────────────
+
+def load_metric_frame(user_id: int) -> pd.DataFrame:
+    """One row per analysis stock: profile columns + latest value of each metric."""
+    raw = query_df(
+        """SELECT a.id AS stock_id, a.symbol, a.company_name, a.sector,
+                  a.exchange, m.metric_name, m.metric_value
+           FROM analysis_stocks a
+           LEFT JOIN stock_metrics m ON m.stock_id = a.id
+           WHERE a.user_id = ?
+           ORDER BY a.id, m.period_end_date DESC""",
+        (user_id,),
+    )
+    if raw.empty:
+        return raw
+
+    profile = (
+        raw[["stock_id", "symbol", "company_name", "sector", "exchange"]]
+        .drop_duplicates("stock_id")
+        .set_index("stock_id")
+    )
+    latest = (
+        raw.dropna(subset=["metric_name"])
+        .drop_duplicates(["stock_id", "metric_name"], keep="first")
+        .pivot(index="stock_id", columns="metric_name", values="metric_value")
+        .astype(float)
+    )
+    return profile.join(latest, how="left")
+
+
+def _attach_market_snapshot(df: pd.DataFrame, user_id: int) -> None:
+    """Fill MARKET_FIELDS from each stock's most recent stored score."""
+    snaps = query_df(
+        """SELECT s.stock_id, s.details
+           FROM stock_scores s
+           JOIN analysis_stocks a ON a.id = s.stock_id
+           WHERE a.user_id = ? AND s.details IS NOT NULL
+           ORDER BY s.stock_id, s.created_at DESC, s.id DESC""",
+        (user_id,),
+    )
+    for col in MARKET_FIELDS:
+        if col not in df.columns:
+            df[col] = np.nan
+    if snaps.empty:
+        return
+
+    snaps = snaps.drop_duplicates("stock_id", keep="first")
+    for sid, details in zip(snaps["stock_id"], snaps["details"]):
+        if sid not in df.index:
+            continue
+        try:
+            d = json.loads(details) if isinstance(details, str) else (details or {})
+        except (json.JSONDecodeError, TypeError):
+            continue
+        for col in MARKET_FIELDS:
+            v = d.get(col)
+            if v is not None and pd.isna(df.at[sid, col]):
+                df.at[sid, col] = float(v)
+
+
+def _attach_intrinsic_discount(df: pd.DataFrame, user_id: int) -> None:
+    """Average IV of the latest run per model type → discount vs price."""
+    vm = query_df(
+        """SELECT v.stock_id, v.model_type, v.intrinsic_value
+           FROM valuation_models v
+           JOIN analysis_stocks a ON a.id = v.stock_id
+           WHERE a.user_id = ? AND v.intrinsic_value IS NOT NULL
+           ORDER BY v.created_at DESC""",
+        (user_id,),
+    )
+    df["Intrinsic Value"] = np.nan
+    df["Discount to Intrinsic Value"] = np.nan
+    if vm.empty:
+        return
+
+    vm = vm[vm["intrinsic_value"] > 0].drop_duplicates(["stock_id", "model_type"])
+    avg_iv = vm.groupby("stock_id")["intrinsic_value"].mean().reindex(df.index)
+    price = df["Current Price"]
+    ok = avg_iv.notna() & (price > 0)
+    df.loc[ok, "Intrinsic Value"] = avg_iv[ok].round(2)
+    df.loc[ok, "Discount to Intrinsic Value"] = ((avg_iv - price) / avg_iv)[ok].round(4)
+
+
+def _derive_price_ratios(df: pd.DataFrame) -> None:
+    """P/B and Earnings Yield from the snapshot price (as the per-stock path does)."""
+    price = df["Current Price"]
+    bvps = _col(df, "Book Value / Share")
+    eps = _col(df, "EPS")
+    has_price = price > 0
+    df["P/B"] = np.where(has_price & (bvps > 0), (price / bvps).round(4), _col(df, "P/B"))
+    df["Earnings Yield"] = np.where(
+        has_price & (eps > 0), (eps / price).round(6), _col(df, "Earnings Yield"),
+    )
+
+
+# ── Vectorised pillar scores ─────────────────────────────────────────
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return df[name].astype(float)
+    return pd.Series(np.nan, index=df.index, dtype=float)
+
+
+def _pts(x: pd.Series, conds: List[np.ndarray], pts: List[float], default: float) -> np.ndarray:
+    """``np.select`` over the bands; missing values score 0."""
+    out = np.select(conds, pts, default=default)
+    return np.where(x.isna().to_numpy(), 0.0, out)
+
+
+def _clip(total: np.ndarray) -> np.ndarray:
+    return np.clip(50.0 + total, 0.0, 100.0)
+
+
+def _fundamental(df: pd.DataFrame) -> np.ndarray:
+    roic, roe, nm = _col(df, "ROIC"), _col(df, "ROE"), _col(df, "Net Margin")
+    trend, cr = _col(df, "Net Margin Trend 3Y"), _col(df, "Current Ratio")
+    de, ic = _col(df, "Debt-to-Equity"), _col(df, "Interest Coverage")
+    return _clip(
+        _pts(roic, [roic > 0.20, roic > 0.12, roic > 0.06, roic < 0], [15, 10, 4, -12], 0)
+        + _pts(roe, [roe > 0.20, roe > 0.12, roe > 0.05, roe < 0], [8, 5, 2, -8], 0)
+        + _pts(nm, [nm > 0.20, nm > 0.10, nm > 0.03, nm < 0], [8, 5, 2, -8], 0)
+        + _pts(trend, [trend > 0.03, trend > 0, trend < -0.03, trend < 0], [6, 3, -6, -2], 0)
+        + _pts(cr, [(cr >= 1.5) & (cr <= 3.0), cr >= 1.0], [6, 3], -6)
+        + _pts(de, [de < 0.3, de < 0.7, de < 1.5, de > 2.5], [6, 3, 0, -8], -3)
+        + _pts(ic, [ic > 8, ic > 3, ic < 1.5], [5, 2, -8], 0)
+    )
+
+
+def _valuation(df: pd.DataFrame) -> np.ndarray:
+    ey, disc, pr = _col(df, "Earnings Yield"), _col(df, "Discount to Intrinsic Value"), _col(df, "Payout Ratio")
+    bvps = _col(df, "Book Value / Share")
+    # EV/EBIT and P/B only count when positive
+    ev = _col(df, "EV/EBIT").where(lambda s: s > 0)
+    pb = _col(df, "P/B").where(lambda s: s > 0)
+    return _clip(
+        _pts(ey, [ey > 0.08, ey > 0.05, ey > 0.02, ey > 0], [12, 6, 0, -5], -10)
+        + _pts(ev, [ev < 10, ev < 15, ev < 25, ev < 40], [8, 4, 0, -4], -8)
+        + _pts(pb, [pb < 1.0, pb < 2.0, pb < 5.0], [6, 3, 0], -6)
+        + _pts(disc, [disc > 0.40, disc > 0.20, disc > 0.10, disc > -0.10, disc > -0.20, disc > -0.40],
+               [18, 12, 6, 0, -5, -10], -15)
+        + _pts(pr, [(pr >= 0.20) & (pr <= 0.60), pr > 1.0, pr >= 0], [6, -6, 0], -3)
+        + _pts(bvps, [bvps > 0], [4], 0)
+    )
+
+
+def _prefer(a: pd.Series, b: pd.Series) -> pd.Series:
+    """``a or b`` — falls back when *a* is missing or zero."""
+    return a.where(a.notna() & (a != 0), b)
+
+
+def _growth(df: pd.DataFrame) -> np.ndarray:
+    rev = _prefer(_col(df, "Revenue CAGR 5Y"), _col(df, "Revenue CAGR 3Y"))
+    eps = _prefer(_col(df, "EPS CAGR 5Y"), _col(df, "EPS CAGR 3Y"))
+    rg, eg = _col(df, "Revenue Growth"), _col(df, "EPS Growth")
+    stab, gwp = _col(df, "Revenue Growth Stability"), _col(df, "Growth Without Profit")
+    return _clip(
+        _pts(rev, [rev > 0.15, rev > 0.07, rev > 0.02, rev < -0.05], [10, 6, 2, -8], 0)
+        + _pts(eps, [eps > 0.15, eps > 0.07, eps > 0, eps < -0.10], [10, 6, 2, -8], -2)
+        + _pts(rg, [rg > 0.10, rg > 0.03, rg < -0.05], [8, 4, -8], 0)
+        + _pts(eg, [eg > 0.10, eg > 0, eg < -0.10], [8, 3, -8], -2)
+        + _pts(stab, [stab < 0.05, stab < 0.10, stab > 0.25], [5, 2, -5], 0)
+        + _pts(gwp, [gwp > 0], [-6], 0)
+    )
+
+
+def _quality(df: pd.DataFrame) -> np.ndarray:
+    cfo, fcf, ar = _col(df, "CFO / Net Income"), _col(df, "FCF Margin"), _col(df, "Accruals Ratio")
+    roic, om = _col(df, "ROIC"), _col(df, "Operating Margin Trend 3Y")
+    return _clip(
+        _pts(cfo, [cfo > 1.2, cfo > 0.8, cfo > 0.5], [12, 6, 0], -10)
+        + _pts(fcf, [fcf > 0.15, fcf > 0.08, fcf > 0], [10, 5, 2], -8)
+        + _pts(ar, [ar < -0.05, ar < 0.03, ar < 0.10], [10, 4, 0], -10)
+        + _pts(roic, [roic > 0.15, roic > 0.08, roic > 0], [8, 4, 0], -6)
+        + _pts(om, [om > 0.02, om > 0, om < -0.02], [5, 2, -5], 0)
+    )
+
+
+def _risk(df: pd.DataFrame) -> np.ndarray:
+    vol, dd = _col(df, "1Y Volatility"), _col(df, "Max Drawdown 1Y")
+    nd, ic = _col(df, "Net Debt / EBITDA"), _col(df, "Interest Coverage")
+    stab, mcap, beta = _col(df, "Revenue Growth Stability"), _col(df, "Market Cap"), _col(df, "Beta")
+    return _clip(
+        _pts(vol, [vol < 0.15, vol < 0.25, vol < 0.40], [8, 3, -3], -10)
+        + _pts(dd, [dd > -0.10, dd > -0.20, dd > -0.35], [6, 2, -3], -8)
+        + _pts(nd, [nd < 0, nd < 1.5, nd < 3.0, nd < 5.0], [8, 5, 0, -5], -10)
+        + _pts(ic, [ic > 8, ic > 3, ic > 1.5], [5, 2, -3], -8)
+        + _pts(stab, [stab < 0.05, stab < 0.10, stab > 0.25], [5, 2, -5], 0)
+        + _pts(mcap, [mcap > 50e9, mcap > 10e9, mcap > 2e9, mcap > 300e6], [5, 3, 0, -2], -3)
+        + _pts(beta, [beta < 0.7, beta < 1.2, beta < 1.8], [4, 2, -2], -5)
+    )
+
+
+def score_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Pillar + overall scores for every row of a stock × metric frame.
+
+    Weights match ``_compute_stock_score``: Fund 30%, Quality 25%,
+    Growth 25%, Valuation 20%, with risk as a deduction of up to 15%.
+    """
+    fund, val = _fundamental(df), _valuation(df)
+    growth, quality, risk = _growth(df), _quality(df), _risk(df)
+    base = fund * 0.30 + quality * 0.25 + growth * 0.25 + val * 0.20
+    penalty = (1.0 - risk / 100.0) * 0.15
+    return pd.DataFrame({
+        "overall_score": base * (1.0 - penalty),
+        "fundamental_score": fund,
+        "valuation_score": val,
+        "growth_score": growth,
+        "quality_score": quality,
+        "risk_score": risk,
+        "risk_penalty_pct": penalty * 100,
+    }, index=df.index).round(1)
+
+
+# ── Persistence ──────────────────────────────────────────────────────
+
+def persist_scores(
+    scores: pd.DataFrame, details: pd.DataFrame, user_id: int,
+) -> int:
+    """Insert one ``stock_scores`` row per stock in a single batch.
+
+    Stocks that already have a score dated today (from an earlier run or
+    the live per-stock path) are skipped, so history gets at most one
+    screener row per stock per day.
+    """
+    today = date.today().isoformat()
+    now = int(time.time())
+    if scores.empty:
+        return 0
+    ids = [int(sid) for sid in scores.index]
+    existing = query_df(
+        f"""SELECT DISTINCT stock_id FROM stock_scores
+            WHERE scoring_date = ? AND stock_id IN ({', '.join('?' * len(ids))})""",
+        (today, *ids),
+    )
+    scored_today = set() if existing.empty else set(existing["stock_id"].astype(int))
+    rows = []
+    for sid, s in scores.iterrows():
+        if int(sid) in scored_today:
+            continue
+        d = details.loc[sid].dropna().to_dict()
+        rows.append((
+            int(sid), today, s["overall_score"], s["fundamental_score"],
+            s["valuation_score"], s["growth_score"], s["quality_score"],
+            s["risk_score"], json.dumps(d), user_id, now,
+        ))
+    return exec_sql_many(
+        """INSERT INTO stock_scores
+           (stock_id, scoring_date, overall_score, fundamental_score,
+            valuation_score, growth_score, quality_score, risk_score, details,
+            created_by_user_id, created_at)
+           VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
+        rows,
+    ) if rows else 0
+
+
+# ── Public entry point ──────────────────────────────────────────────
+
+def screen_stocks(
+    user_id: int,
+    *,
+    min_score: Optional[float] = None,
+    sector: Optional[str] = None,
+    exchange: Optional[str] = None,
+    sort_by: str = "overall_score",
+    limit: int = 50,
+    persist: bool = False,
+) -> Dict[str, Any]:
+    """Score, filter and rank all of a user's analysis stocks.
+
+    With *persist* the scores are also stored (see :func:`persist_scores`)
+    and ``persisted`` reports how many rows were written.
+    """
+    df = load_metric_frame(user_id)
+    if df.empty:
+        return {"stocks": [], "count": 0, "total": 0, "persisted": 0}
+
+    _attach_market_snapshot(df, user_id)
+    _attach_intrinsic_discount(df, user_id)
+    _derive_price_ratios(df)
+
+    scores = score_frame(df)
+    # Stocks without any metrics are listed but never scored or persisted
+    metric_cols = [c for c in df.columns if c not in ("symbol", "company_name", "sector", "exchange")]
+    has_data = df[metric_cols].notna().any(axis=1)
+    scores.loc[~has_data, list(SCORE_COLUMNS) + ["risk_penalty_pct"]] = np.nan
+
+    persisted = 0
+    if persist and has_data.any():
+        persisted = persist_scores(scores[has_data], df.loc[has_data, metric_cols], user_id)
+
+    out = df[["symbol", "company_name", "sector", "exchange"]].join(scores)
+    total = len(out)
+    if min_score is not None:
+        out = out[out["overall_score"] >= min_score]
+    if sector:
+        out = out[out["sector"].fillna("").str.lower() == sector.lower()]
+    if exchange:
+        out = out[out["exchange"].fillna("").str.upper() == exchange.upper()]
+
+    out = out.sort_values(sort_by, ascending=False, na_position="last").head(limit)
+    out.insert(0, "rank", range(1, len(out) + 1))
+    out = out.reset_index()
+    out = out.astype(object).where(out.notna(), None)
+    stocks = out.to_dict(orient="records")
+    return {"stocks": stocks, "count": len(stocks), "total": total, "persisted": persisted}
@@ -0,0 +1,310 @@
+"""
+Stock Search — in-memory typeahead index over the reference stock lists.
+
+``KUWAIT_STOCKS`` / ``US_STOCKS`` and the known symbol aliases are
+indexed once per process (at startup, or on first use).  Symbols,
+Yahoo tickers, aliases and name words sit in sorted key lists, so a
+prefix lookup is a bisect rather than a scan.  :func:`search` ranks
+
+  0. exact symbol / Yahoo ticker / alias
+  1. symbol prefix
+  2. alias or Yahoo-ticker prefix
+  3. name prefix
+  4. every query word starts a word of the name
+  5. substring of symbol or name
+  6. fuzzy (typo-tolerant) match on symbol or a name word
+
+and never touches the network.
+
+US searches with few local hits can be widened with Yahoo's search.
+Those results live in ``symbol_lookup_cache`` for ``SYMBOL_LOOKUP_TTL``
+and are served stale-while-revalidate (see :mod:`market_cache`); a
+lookup slower than the caller's timeout still lands in the cache for
+the next keystroke.  Lookups run on their own small thread pool, so
+stragglers never tie up the default executor, and every Yahoo call has
+a timeout.
+"""
+
+import bisect
+import difflib
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.database import exec_sql, query_one
+from app.data.stock_lists import KUWAIT_STOCKS, SYMBOL_ALIASES, US_STOCKS
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[A-Z0-9]+")
+
+# Key kinds in _MarketIndex.symbol_keys
+_SYMBOL, _ALT = 0, 1
+
+# Queries shorter than this never go to the network
+_REMOTE_MIN_CHARS = 2
+_TICKER_LIKE = re.compile(r"^[A-Z][A-Z0-9.\-]{0,6}$")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(str(text).upper().replace("'", ""))
+
+
+def _compact(text: str) -> str:
+    return "".join(_words(text))
+
+
+@dataclass
+class _MarketIndex:
+    entries: List[Dict[str, str]]
+    symbols: List[str] = field(default_factory=list)         # compact symbol per entry
+    names: List[str] = field(default_factory=list)           # normalized name per entry
+    symbol_keys: List[Tuple[str, int, int]] = field(default_factory=list)  # (key, kind, entry)
+    word_keys: List[Tuple[str, int]] = field(default_factory=list)         # (name word, entry)
+    fuzzy: Dict[str, List[int]] = field(default_factory=dict)              # key -> entries
+
+
+def _build_market(stocks: List[Dict[str, str]]) -> _MarketIndex:
+    aliases_of: Dict[str, List[str]] = {}
+    for alias, target in SYMBOL_ALIASES.items():
+        aliases_of.setdefault(target.upper(), []).append(alias)
+
+    ix = _MarketIndex(entries=[
+        {"symbol": s["symbol"], "name": s["name"], "yf_ticker": s["yf_ticker"]} for s in stocks
+    ])
+    for i, s in enumerate(stocks):
+        sym = _compact(s["symbol"])
+        name_words = _words(s["name"])
+        ix.symbols.append(sym)
+        ix.names.append(" ".join(name_words))
+
+        ix.symbol_keys.append((sym, _SYMBOL, i))
+        alts = {_compact(a) for a in aliases_of.get(s["symbol"].upper(), [])}
+        alts.add(_compact(s["yf_ticker"]))
+        alts.discard(sym)
+        ix.symbol_keys.extend((a, _ALT, i) for a in alts if a)
+        ix.word_keys.extend((w, i) for w in set(name_words))
+
+        for key in {sym, *alts, *(w for w in name_words if len(w) >= 3)}:
+            if key:
+                ix.fuzzy.setdefault(key, []).append(i)
+
+    ix.symbol_keys.sort()
+    ix.word_keys.sort()
+    return ix
+
+
+_index: Optional[Dict[str, _MarketIndex]] = None
+_index_lock = threading.Lock()
+
+
+def build_index() -> None:
+    """(Re)build the search index from the reference lists."""
+    global _index
+    index = {"Kuwait": _build_market(KUWAIT_STOCKS), "US": _build_market(US_STOCKS)}
+    _index = index
+    logger.info(
+        "🔎 Stock search index built: %s",
+        ", ".join(f"{m}={len(ix.entries)}" for m, ix in index.items()),
+    )
+
+
+def _market_index(market: str) -> _MarketIndex:
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                build_index()
+    return _index[market]
+
+
+def _prefixed(keys: list, prefix: str):
+    """Items of sorted *keys* (tuples keyed on [0]) whose key starts with *prefix*."""
+    i = bisect.bisect_left(keys, (prefix,))
+    while i < len(keys) and keys[i][0].startswith(prefix):
+        yield keys[i]
+        i += 1
+
+
+def search(market: str, query: str, limit: int = 50) -> List[Dict[str, str]]:
+    """Ranked reference-list matches for *query* in *market* ("Kuwait" / "US")."""
+    ix = _market_index(market)
+    q = _compact(query)
+    words = _words(query)
+    if not q:
+        return []
+
+    best: Dict[int, int] = {}
+
+    def hit(i: int, rank: int) -> None:
+        if rank < best.get(i, 99):
+            best[i] = rank
+
+    for key, kind, i in _prefixed(ix.symbol_keys, q):
+        hit(i, 0 if key == q else (1 if kind == _SYMBOL else 2))
+
+    phrase = " ".join(words)
+    matched = None
+    for w in words:
+        found = {i for _, i in _prefixed(ix.word_keys, w)}
+        matched = found if matched is None else matched & found
+    for i in matched or ():
+        hit(i, 3 if ix.names[i].startswith(phrase) else 4)
+
+    if len(best) < limit:
+        for i, (sym, name) in enumerate(zip(ix.symbols, ix.names)):
+            if q in sym or phrase in name:
+                hit(i, 5)
+
+    # Typos: the whole query against symbols, aliases and single name words
+    if len(best) < limit and len(q) >= 3:
+        near = [k for k in ix.fuzzy if abs(len(k) - len(q)) <= 2]
+        for key in difflib.get_close_matches(q, near, n=limit, cutoff=0.75):
+            for i in ix.fuzzy[key]:
+                hit(i, 6)
+
+    ranked = sorted(best, key=lambda i: (best[i], len(ix.symbols[i]), i))[:limit]
+    return [dict(ix.entries[i]) for i in ranked]
+
+
+# ── Remote lookup (US) ───────────────────────────────────────────────
+
+_inflight: set = set()
+_inflight_lock = threading.Lock()
+
+# Few workers: lookups are rare, and a hung Yahoo should only stall these
+_LOOKUP_WORKERS = 2
+_lookup_pool = ThreadPoolExecutor(max_workers=_LOOKUP_WORKERS, thread_name_prefix="symbol-lookup")
+
+# Seconds for the direct-ticker probe
+_PROBE_TIMEOUT = 5
+
+
+def _cache_key(query: str) -> str:
+    return " ".join(_words(query))
+
+
+def wants_remote(query: str) -> bool:
+    """Whether *query* is long enough to be worth a network lookup."""
+    return len(_compact(query)) >= _REMOTE_MIN_CHARS
+
+
+def _fetch_us(query: str) -> List[Dict[str, str]]:
+    import yfinance as yf
+
+    out: List[Dict[str, str]] = []
+    seen: set = set()
+    quotes = yf.Search(
+        query.strip(), max_results=10, news_count=0, lists_count=0,
+        recommended=0, timeout=10,
+    ).quotes or []
+    for qt in quotes:
+        sym = (qt.get("symbol") or "").upper()
+        # Only equities/ETFs on US exchanges (skip foreign tickers like ABC.L)
+        if sym and sym not in seen and qt.get("quoteType") in ("EQUITY", "ETF") and not any(c in sym for c in ".:"):
+            out.append({
+                "symbol": sym,
+                "name": qt.get("shortname") or qt.get("longname") or "",
+                "yf_ticker": sym,
+            })
+            seen.add(sym)
+
+    # Direct ticker lookup: the query itself may be a symbol search missed
+    sym = query.strip().upper()
+    if sym not in seen and _TICKER_LIKE.match(sym):
+        meta = _probe_ticker(yf, sym)
+        name = meta.get("shortName") or meta.get("longName")
+        # Verify it's a real stock (has a name and a price)
+        if name and meta.get("regularMarketPrice"):
+            out.append({"symbol": sym, "name": name, "yf_ticker": sym})
+    return out
+
+
+def _probe_ticker(yf, sym: str) -> dict:
+    """
+    Chart metadata (name, price) for *sym*, or ``{}``.  Unlike
+    ``Ticker.info`` the chart request takes a timeout; the intraday
+    period matches what ``get_history_metadata`` would fetch itself, so
+    it reads the cached response instead of making an untimed call.
+    """
+    ticker = yf.Ticker(sym)
+    try:
+        df = ticker.history(period="5d", interval="1h", prepost=True, timeout=_PROBE_TIMEOUT)
+        if df is None or df.empty:
+            return {}
+        return ticker.get_history_metadata() or {}
+    except Exception as exc:
+        logger.debug("Ticker probe %s failed: %s", sym, exc)
+        return {}
+
+
+def submit_lookup(query: str, market: str = "US") -> Future:
+    """
+    Start :func:`remote_lookup` for *query* on the lookup pool.  The
+    future resolves to its result; await it with a timeout and the lookup
+    still finishes (and caches) after the caller gives up.
+    """
+    return _lookup_pool.submit(remote_lookup, query, market)
+
+
+def remote_lookup(query: str, market: str = "US") -> Optional[List[Dict[str, str]]]:
+    """
+    Query Yahoo for *query* now and cache the result.  Returns None when
+    the same query is already being looked up or the fetch failed (an
+    empty list is a real, cacheable answer).
+    """
+    key = _cache_key(query)
+    with _inflight_lock:
+        if (market, key) in _inflight:
+            return None
+        _inflight.add((market, key))
+    try:
+        try:
+            results = _fetch_us(query)
+        except Exception as exc:
+            logger.warning("Symbol lookup '%s' failed: %s", key, exc)
+            return None
+        now = int(time.time())
+        try:
+            exec_sql(
+                """INSERT INTO symbol_lookup_cache (market, query, results, fetched_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(market, query) DO UPDATE SET
+                       results = excluded.results, fetched_at = excluded.fetched_at""",
+                (market, key, json.dumps(results), now),
+            )
+            exec_sql(
+                "DELETE FROM symbol_lookup_cache WHERE fetched_at < ?",
+                (now - 2 * get_settings().SYMBOL_LOOKUP_TTL,),
+            )
+        except Exception as exc:
+            logger.warning("Symbol lookup cache write failed: %s", exc)
+        return results
+    finally:
+        with _inflight_lock:
+            _inflight.discard((market, key))
+
+
+def cached_lookup(query: str, market: str = "US") -> Optional[List[Dict[str, str]]]:
+    """
+    Cached remote results for *query*, or None on a miss.  A stale entry
+    is still returned and refreshed in a background thread.
+    """
+    row = query_one(
+        "SELECT results, fetched_at FROM symbol_lookup_cache WHERE market = ? AND query = ?",
+        (market, _cache_key(query)),
+    )
+    if not row:
+        return None
+    try:
+        results = json.loads(row["results"])
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if time.time() - int(row["fetched_at"]) > get_settings().SYMBOL_LOOKUP_TTL:
+        submit_lookup(query, market)
+    return results
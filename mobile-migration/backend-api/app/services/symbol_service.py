@@ -0,0 +1,137 @@
+"""
+Symbol Service — the one normalizer for stock symbols.
+
+``transactions``, ``stocks``, ``position_snapshots`` and
+``securities_master`` carry a persisted ``symbol_key`` column, indexed
+with ``(user_id, symbol_key)``, so joins and filters compare plain
+columns instead of ``UPPER(TRIM(...))`` expressions that force full scans.
+
+A key is the trimmed, upper-cased symbol; when the user has registered
+it as an alias in the securities master (``security_aliases``), the key
+is the canonical ticker of that security instead — "AGILITY" and
+"AGLTY" land on the same key once aliased.
+
+Writers set ``symbol_key`` via :func:`resolve_symbol_key`; alias edits
+re-key the user's rows with :func:`rekey_user`; :func:`backfill_symbol_keys`
+fills rows written before the column existed.  Joins from transactions go
+through :data:`STOCKS_BY_KEY`, since an alias leaves two ``stocks`` rows
+on one key.
+"""
+
+import logging
+from typing import Dict, Optional
+
+from app.core.database import exec_sql, exec_sql_many, query_all
+
+logger = logging.getLogger(__name__)
+
+# (table, source column) for every table carrying symbol_key
+KEYED_TABLES = (
+    ("transactions", "stock_symbol"),
+    ("stocks", "symbol"),
+    ("position_snapshots", "stock_symbol"),
+    ("securities_master", "canonical_ticker"),
+)
+
+# ``stocks`` with one row per (user_id, symbol_key), for joins.  Once
+# "AGLTY" is aliased to "AGILITY" both stock rows share a key and a plain
+# join would count each transaction twice; the row whose own symbol is
+# the key (the canonical one) wins, then the oldest.  Takes the user id as
+# a parameter so the ranking seeks idx_stocks_user_symkey instead of
+# numbering every user's stocks.
+STOCKS_BY_KEY = """(
+    SELECT * FROM (
+        SELECT st.*, ROW_NUMBER() OVER (
+            PARTITION BY st.symbol_key
+            ORDER BY CASE WHEN UPPER(TRIM(st.symbol)) = st.symbol_key THEN 0 ELSE 1 END, st.id
+        ) AS key_rank
+        FROM stocks st
+        WHERE st.user_id = ? AND st.symbol_key IS NOT NULL
+    ) ranked
+    WHERE key_rank = 1
+)"""
+
+
+def symbol_key(symbol: Optional[str]) -> Optional[str]:
+    """Trimmed, upper-cased symbol (``None`` for blanks) — same as SQL ``UPPER(TRIM(x))``."""
+    if symbol is None:
+        return None
+    key = str(symbol).strip().upper()
+    return key or None
+
+
+def alias_keys(user_id: int) -> Dict[str, str]:
+    """``{alias key: canonical key}`` from the user's securities master."""
+    rows = query_all(
+        """SELECT a.alias_name, m.canonical_ticker
+           FROM security_aliases a
+           JOIN securities_master m
+             ON m.security_id = CAST(a.security_id AS TEXT) AND m.user_id = a.user_id
+           WHERE a.user_id = ?""",
+        (user_id,),
+    )
+    out: Dict[str, str] = {}
+    for r in rows:
+        alias, canonical = symbol_key(r["alias_name"]), symbol_key(r["canonical_ticker"])
+        if alias and canonical and alias != canonical:
+            out[alias] = canonical
+    return out
+
+
+def resolve_symbol_key(
+    user_id: int,
+    symbol: Optional[str],
+    aliases: Optional[Dict[str, str]] = None,
+) -> Optional[str]:
+    """Key for *symbol*, mapped to its canonical ticker when it is an alias.
+    Pass *aliases* (from :func:`alias_keys`) when resolving many symbols."""
+    key = symbol_key(symbol)
+    if key is None:
+        return None
+    if aliases is None:
+        aliases = alias_keys(user_id)
+    return aliases.get(key, key)
+
+
+def _apply_aliases(table: str, aliases_by_user: Dict[int, Dict[str, str]]) -> None:
+    params = [
+        (canonical, uid, alias)
+        for uid, aliases in aliases_by_user.items()
+        for alias, canonical in aliases.items()
+    ]
+    exec_sql_many(
+        f"UPDATE {table} SET symbol_key = ? WHERE user_id = ? AND symbol_key = ?",
+        params,
+    )
+
+
+def rekey_user(user_id: int) -> None:
+    """Recompute ``symbol_key`` on all of a user's rows (after alias changes)."""
+    aliases = alias_keys(user_id)
+    for table, column in KEYED_TABLES:
+        exec_sql(
+            f"UPDATE {table} SET symbol_key = UPPER(TRIM({column})) WHERE user_id = ?",
+            (user_id,),
+        )
+        if table != "securities_master":
+            _apply_aliases(table, {user_id: aliases})
+
+
+def backfill_symbol_keys() -> None:
+    """Fill ``symbol_key`` where it is still NULL (rows predating the column)."""
+    users = {
+        int(r[0]) for r in query_all("SELECT DISTINCT user_id FROM security_aliases WHERE user_id IS NOT NULL")
+    }
+    aliases_by_user = {uid: alias_keys(uid) for uid in users}
+    for table, column in KEYED_TABLES:
+        pending = query_all(f"SELECT DISTINCT user_id FROM {table} WHERE symbol_key IS NULL AND {column} IS NOT NULL")
+        if not pending:
+            continue
+        exec_sql(
+            f"UPDATE {table} SET symbol_key = UPPER(TRIM({column})) "
+            f"WHERE symbol_key IS NULL AND {column} IS NOT NULL"
+        )
+        if table != "securities_master":
+            touched = {int(r[0]) for r in pending}
+            _apply_aliases(table, {u: a for u, a in aliases_by_user.items() if u in touched})
+        logger.info("🔑 symbol_key backfilled on %s", table)
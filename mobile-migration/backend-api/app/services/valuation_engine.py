@@ -0,0 +1,246 @@
+"""
+Valuation Engine — vectorized DCF / DDM for sensitivity grids and Monte Carlo.
+
+``_dcf`` / ``_ddm`` in the fundamental router value one scenario per call
+with a Python loop per projection year.  The functions here take NumPy
+arrays for every rate input and broadcast them against a year axis, so a
+full discount-rate × growth × terminal-growth surface or 10k+ random
+draws are valued in a single call.
+
+Conventions match the scalar models exactly:
+  * two-stage DCF: FCF grows at g1 for s1 years, then g2 for s2 years;
+    Gordon terminal value on the final-year FCF; equity = EV + cash − debt
+  * DDM: Gordon growth, or high-growth phase + Gordon terminal value
+  * scenarios where the discount rate does not exceed terminal growth
+    are NaN (the scalar models return an error for these)
+"""
+
+import logging
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+MAX_DRAWS = 200_000
+MAX_GRID_CELLS = 250_000
+MAX_YEARS = 50  # per projection stage
+# Scenarios × projection years held in memory at once (~80 MB per array)
+MAX_SCENARIO_YEARS = 10_000_000
+
+
+# ── Core vectorized models ───────────────────────────────────────────
+
+def dcf_per_share(
+    fcf, g1, g2, dr, s1: int = 5, s2: int = 5, tg=0.025,
+    shares=1.0, cash=0.0, debt=0.0,
+) -> np.ndarray:
+    """Two-stage DCF intrinsic value per share for broadcastable inputs."""
+    fcf, g1, g2, dr, tg = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (fcf, g1, g2, dr, tg))
+    )
+    years = np.arange(1, s1 + s2 + 1, dtype=float)
+    stage1 = np.minimum(years, s1)
+    stage2 = np.maximum(years - s1, 0)
+
+    x = lambda a: a[..., None]  # noqa: E731 — append the year axis
+    cf = x(fcf) * (1 + x(g1)) ** stage1 * (1 + x(g2)) ** stage2
+    disc = (1 + x(dr)) ** years
+    pv_fcfs = (cf / disc).sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tv = cf[..., -1] * (1 + tg) / (dr - tg)
+        pv_tv = tv / disc[..., -1]
+        ev = pv_fcfs + pv_tv
+        equity = ev + np.asarray(cash, dtype=float) - np.asarray(debt, dtype=float)
+        shares = np.asarray(shares, dtype=float)
+        per_share = np.where(shares != 0, equity / np.where(shares != 0, shares, 1.0), 0.0)
+    return np.where(dr > tg, per_share, np.nan)
+
+
+def ddm_value(div, gr, rr, hgy: int = 5, hgr=None) -> np.ndarray:
+    """Dividend discount value per share for broadcastable inputs.
+
+    With *hgr* (high-growth rate) the first *hgy* dividends grow at *hgr*
+    before the Gordon terminal value; without it, single-stage Gordon.
+    """
+    div, gr, rr = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (div, gr, rr)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if hgr is None:
+            iv = div * (1 + gr) / (rr - gr)
+        else:
+            hgr = np.asarray(hgr, dtype=float)
+            years = np.arange(1, hgy + 1, dtype=float)
+            x = lambda a: np.asarray(a)[..., None]  # noqa: E731
+            d = x(div) * (1 + x(hgr)) ** years
+            disc = (1 + x(rr)) ** years
+            pv_div = (d / disc).sum(axis=-1)
+            d_last = div * (1 + hgr) ** hgy
+            tv = d_last * (1 + gr) / (rr - gr)
+            iv = pv_div + tv / (1 + rr) ** hgy
+    return np.where(rr > gr, iv, np.nan)
+
+
+# ── Sensitivity grid ─────────────────────────────────────────────────
+
+def dcf_sensitivity(
+    base: Dict[str, Any],
+    discount_rates: Sequence[float],
+    growth_rates: Sequence[float],
+    terminal_growths: Sequence[float],
+) -> Dict[str, Any]:
+    """Discount rate × stage-1 growth × terminal growth surface.
+
+    *base* carries the remaining DCF inputs (``fcf``, ``g2``, ``s1``,
+    ``s2``, ``shares``, ``cash``, ``debt``).  ``values[i][j][k]`` is the
+    per-share value for ``discount_rates[i]``, ``growth_rates[j]``,
+    ``terminal_growths[k]``; invalid cells (dr ≤ tg) are None.
+    """
+    dr = np.asarray(discount_rates, dtype=float)
+    g1 = np.asarray(growth_rates, dtype=float)
+    tg = np.asarray(terminal_growths, dtype=float)
+    cells = dr.size * g1.size * tg.size
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(f"Sensitivity grid too large ({cells} cells, max {MAX_GRID_CELLS}).")
+    _check_years(cells, base.get("s1", 5), base.get("s2", 5))
+
+    surface = dcf_per_share(
+        base["fcf"], g1[None, :, None], base["g2"], dr[:, None, None],
+        base.get("s1", 5), base.get("s2", 5), tg[None, None, :],
+        base.get("shares", 1.0), base.get("cash", 0.0), base.get("debt", 0.0),
+    )
+    valid = surface[np.isfinite(surface)]
+    return {
+        "discount_rates": dr.tolist(),
+        "growth_rates": g1.tolist(),
+        "terminal_growths": tg.tolist(),
+        "values": _nan_to_none(np.round(surface, 2)),
+        "min": round(float(valid.min()), 2) if valid.size else None,
+        "max": round(float(valid.max()), 2) if valid.size else None,
+        "cells": int(cells),
+        "valid_cells": int(valid.size),
+    }
+
+
+# ── Monte Carlo ──────────────────────────────────────────────────────
+
+def draw(spec: Any, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Sample *n* values from a distribution spec.
+
+    A plain number is a constant.  A dict selects the distribution:
+    ``{"dist": "normal", "mean", "std"}``,
+    ``{"dist": "uniform", "low", "high"}`` or
+    ``{"dist": "triangular", "low", "mode", "high"}``.
+    Optional ``min`` / ``max`` clip the draws.
+    Raises ValueError for an unknown distribution or non-numeric parameters.
+    """
+    try:
+        if not isinstance(spec, dict):
+            return np.full(n, float(spec))
+        kind = spec.get("dist", "normal")
+        if kind == "normal":
+            out = rng.normal(float(spec["mean"]), float(spec.get("std", 0.0)), n)
+        elif kind == "uniform":
+            out = rng.uniform(float(spec["low"]), float(spec["high"]), n)
+        elif kind == "triangular":
+            out = rng.triangular(float(spec["low"]), float(spec["mode"]), float(spec["high"]), n)
+        else:
+            raise ValueError(f"Unknown distribution '{kind}'.")
+        if "min" in spec or "max" in spec:
+            out = np.clip(out, float(spec.get("min", -np.inf)), float(spec.get("max", np.inf)))
+    except TypeError as exc:
+        raise ValueError(f"Distribution parameters must be numbers: {spec!r}") from exc
+    return out
+
+
+def distribution_summary(
+    values: np.ndarray, current_price: Optional[float] = None, bins: int = 30,
+) -> Dict[str, Any]:
+    """Percentile bands, moments and a histogram of the finite draws."""
+    finite = values[np.isfinite(values)]
+    out: Dict[str, Any] = {"draws": int(values.size), "valid_draws": int(finite.size)}
+    if not finite.size:
+        out.update(percentiles={}, mean=None, std=None, histogram=None)
+        return out
+    pct = np.percentile(finite, PERCENTILES)
+    out["percentiles"] = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, pct)}
+    out["mean"] = round(float(finite.mean()), 2)
+    out["std"] = round(float(finite.std()), 2)
+    # Histogram over the 1st–99th percentile so a few extreme draws
+    # (dr barely above tg) don't flatten it
+    lo, hi = np.percentile(finite, (1, 99))
+    counts, edges = np.histogram(np.clip(finite, lo, hi), bins=bins, range=(lo, hi))
+    out["histogram"] = {"counts": counts.tolist(), "edges": np.round(edges, 2).tolist()}
+    if current_price is not None:
+        out["current_price"] = current_price
+        out["prob_undervalued"] = round(float((finite > current_price).mean()), 4)
+    return out
+
+
+def simulate_dcf(
+    inputs: Dict[str, Any], n: int = 10_000, seed: Optional[int] = None,
+    current_price: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Monte Carlo two-stage DCF.
+
+    *inputs* maps ``fcf, g1, g2, dr, tg, shares, cash, debt`` to a number
+    or a distribution spec (see :func:`draw`); ``s1`` / ``s2`` are ints.
+    """
+    n = _check_draws(n)
+    _check_years(n, inputs.get("s1", 5), inputs.get("s2", 5))
+    rng = np.random.default_rng(seed)
+    d = {k: draw(inputs[k], n, rng) for k in ("fcf", "g1", "g2", "dr", "tg")}
+    values = dcf_per_share(
+        d["fcf"], d["g1"], d["g2"], d["dr"],
+        int(inputs.get("s1", 5)), int(inputs.get("s2", 5)), d["tg"],
+        draw(inputs.get("shares", 1.0), n, rng),
+        draw(inputs.get("cash", 0.0), n, rng),
+        draw(inputs.get("debt", 0.0), n, rng),
+    )
+    return {"model": "dcf", **distribution_summary(values, current_price)}
+
+
+def simulate_ddm(
+    inputs: Dict[str, Any], n: int = 10_000, seed: Optional[int] = None,
+    current_price: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Monte Carlo DDM over ``div, gr, rr`` and optional ``hgr`` (``hgy`` int)."""
+    n = _check_draws(n)
+    _check_years(n, inputs.get("hgy", 5))
+    rng = np.random.default_rng(seed)
+    hgr = inputs.get("hgr")
+    values = ddm_value(
+        draw(inputs["div"], n, rng), draw(inputs["gr"], n, rng), draw(inputs["rr"], n, rng),
+        int(inputs.get("hgy", 5)), None if hgr is None else draw(hgr, n, rng),
+    )
+    return {"model": "ddm", **distribution_summary(values, current_price)}
+
+
+# ── helpers ──────────────────────────────────────────────────────────
+
+def _check_draws(n: int) -> int:
+    if n < 1 or n > MAX_DRAWS:
+        raise ValueError(f"draws must be between 1 and {MAX_DRAWS}.")
+    return int(n)
+
+
+def _check_years(scenarios: int, *stage_years: int) -> None:
+    """Reject negative/oversized stages and grids too large to hold in memory."""
+    years = 0
+    for y in stage_years:
+        if not 0 <= int(y) <= MAX_YEARS:
+            raise ValueError(f"Projection years must be between 0 and {MAX_YEARS}.")
+        years += int(y)
+    if scenarios * years > MAX_SCENARIO_YEARS:
+        raise ValueError(
+            f"Too many scenarios for {years} projection years "
+            f"({scenarios * years:,} values, max {MAX_SCENARIO_YEARS:,})."
+        )
+
+
+def _nan_to_none(arr: np.ndarray) -> list:
+    """Nested lists with NaN/inf replaced by None (JSON-safe)."""
+    obj = arr.astype(object)
+    obj[~np.isfinite(arr)] = None
+    return obj.tolist()
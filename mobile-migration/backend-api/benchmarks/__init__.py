@@ -0,0 +1,12 @@
+"""
+Benchmarks — reproducible timings of the backend's hot paths.
+
+  • ``datagen`` — seeded synthetic portfolio generator (users, stocks,
+                  transactions, deposits, snapshots, news) for a temp DB
+  • ``run``     — times the hot paths and writes / compares JSON results
+
+Usage::
+
+    python -m benchmarks.run --transactions 5000 --out bench.json
+    python -m benchmarks.run --transactions 5000 --compare bench.json
+"""
@@ -0,0 +1,192 @@
+"""
+Synthetic portfolio data generator for benchmarks.
+
+Fills the configured database (import this module only after
+``DATABASE_PATH`` points at a scratch DB) with deterministic data from a
+seeded ``numpy`` generator: the same :class:`GenConfig` always produces
+the same rows, so timings from different runs are comparable.
+
+Per user:
+  • stocks split between the KWD (``KFH``) and USD (``USA``) portfolios,
+    with prices and P/E set so nothing is fetched over the network
+  • chronological Buy / Sell / dividend transactions (sells never exceed
+    the shares held)
+  • cash deposits, and one portfolio snapshot per business day
+Shared: news articles tagged with the generated symbols.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import exec_sql, exec_sql_many, query_val
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIOS = (("KFH", "KWD"), ("USA", "USD"))
+NEWS_CATEGORIES = (
+    "company_announcement", "financial", "dividend", "earnings", "market_news",
+)
+
+
+@dataclass
+class GenConfig:
+    """Sizes are per user except ``news`` (shared)."""
+
+    users: int = 1
+    stocks: int = 40
+    transactions: int = 2000
+    deposits: int = 100
+    snapshots: int = 750
+    news: int = 5000
+    seed: int = 42
+    start: str = "2019-01-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def generate(cfg: GenConfig) -> List[int]:
+    """Create ``cfg.users`` users with data; returns their ids."""
+    rng = np.random.default_rng(cfg.seed)
+    start = date.fromisoformat(cfg.start)
+    user_ids, symbols = [], []
+    for n in range(cfg.users):
+        uid = create_user(f"bench{n}")
+        symbols = _stocks(uid, cfg.stocks, rng)
+        _transactions(uid, symbols, cfg.transactions, start, rng)
+        _deposits(uid, cfg.deposits, start, rng)
+        _snapshots(uid, cfg.snapshots, start, rng)
+        user_ids.append(uid)
+    if symbols:
+        _news(cfg.news, [s for s, _ in symbols], start, rng)
+    return user_ids
+
+
+def create_user(username: str) -> int:
+    """Insert a bare user row and return its id."""
+    exec_sql(
+        "INSERT INTO users (username, password_hash, name, created_at) VALUES (?, ?, ?, ?)",
+        (username, "!", username, int(time.time())),
+    )
+    return int(query_val("SELECT id FROM users WHERE username = ?", (username,)))
+
+
+# ── Builders ─────────────────────────────────────────────────────────
+
+def _stocks(uid: int, count: int, rng: np.random.Generator) -> List[tuple]:
+    """Insert *count* stocks; returns ``[(symbol, portfolio), ...]``."""
+    now = int(time.time())
+    rows, out = [], []
+    for i in range(count):
+        pf, ccy = PORTFOLIOS[i % len(PORTFOLIOS)]
+        sym = f"{'KW' if ccy == 'KWD' else 'US'}{i:03d}"
+        price = round(float(rng.uniform(0.1, 2.0) if ccy == "KWD" else rng.uniform(10, 400)), 3)
+        rows.append((
+            uid, sym, sym, f"{sym} Holding Co.", pf, ccy, price,
+            round(price * float(rng.uniform(0.97, 1.03)), 3),
+            round(float(rng.uniform(5, 40)), 2), now, now,
+        ))
+        out.append((sym, pf))
+    exec_sql_many(
+        """INSERT INTO stocks (user_id, symbol, symbol_key, name, portfolio, currency, current_price,
+                               previous_close, pe_ratio, last_updated, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    return out
+
+
+def _transactions(
+    uid: int, symbols: List[tuple], count: int, start: date, rng: np.random.Generator,
+) -> None:
+    days = np.sort(rng.integers(0, max((date.today() - start).days, 1), count))
+    held: Dict[tuple, float] = {}
+    now = int(time.time())
+    rows = []
+    for k, d in enumerate(days):
+        sym, pf = symbols[int(rng.integers(len(symbols)))]
+        txn_date = str(start + timedelta(days=int(d)))
+        price = float(rng.uniform(0.1, 2.0) if pf == "KFH" else rng.uniform(10, 400))
+        qty = float(rng.integers(1, 50) * (100 if pf == "KFH" else 1))
+        have = held.get((sym, pf), 0.0)
+        roll = rng.random()
+        if roll < 0.15 and have > 0:
+            qty = min(qty, have)
+            held[(sym, pf)] = have - qty
+            row = ("Sell", qty, None, round(qty * price, 3), 0.0)
+        elif roll < 0.25 and have > 0:
+            row = ("DIVIDEND_ONLY", 0.0, None, None, round(have * price * 0.02, 3))
+        else:
+            held[(sym, pf)] = have + qty
+            row = ("Buy", qty, round(qty * price, 3), None, 0.0)
+        typ, shares, cost, sell, div = row
+        rows.append((
+            uid, pf, sym, sym, txn_date, typ, shares, cost, sell, div,
+            round(float(rng.uniform(0, 5)), 3), "portfolio", "MANUAL", now + k,
+        ))
+    exec_sql_many(
+        """INSERT INTO transactions
+               (user_id, portfolio, stock_symbol, symbol_key, txn_date, txn_type, shares,
+                purchase_cost, sell_value, cash_dividend, fees, category, source, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+
+
+def _deposits(uid: int, count: int, start: date, rng: np.random.Generator) -> None:
+    span = max((date.today() - start).days, 1)
+    now = int(time.time())
+    rows = []
+    for d in np.sort(rng.integers(0, span, count)):
+        pf, ccy = PORTFOLIOS[int(rng.integers(len(PORTFOLIOS)))]
+        amount = round(float(rng.uniform(500, 20000)), 3)
+        if rng.random() < 0.1:
+            amount = -amount / 4  # occasional withdrawal
+        rows.append((uid, pf, str(start + timedelta(days=int(d))), amount, ccy, now))
+    exec_sql_many(
+        """INSERT INTO cash_deposits (user_id, portfolio, deposit_date, amount, currency, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+
+
+def _snapshots(uid: int, count: int, start: date, rng: np.random.Generator) -> None:
+    dates = pd.bdate_range(start, periods=count)
+    values = 10000 * np.cumprod(1 + rng.normal(0.0004, 0.01, count))
+    now = int(time.time())
+    exec_sql_many(
+        """INSERT INTO portfolio_snapshots (user_id, snapshot_date, portfolio_value, created_at)
+           VALUES (?, ?, ?, ?)""",
+        [(uid, d.strftime("%Y-%m-%d"), round(float(v), 3), now) for d, v in zip(dates, values)],
+    )
+
+
+def _news(count: int, symbols: List[str], start: date, rng: np.random.Generator) -> None:
+    if not count:
+        return
+    span = (datetime.now() - datetime.combine(start, datetime.min.time())).total_seconds()
+    offsets = np.sort(rng.uniform(0, span, count))
+    fetched = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for i, off in enumerate(offsets):
+        published = datetime.combine(start, datetime.min.time()) + timedelta(seconds=float(off))
+        tagged = rng.choice(symbols, size=int(rng.integers(1, 3)), replace=False)
+        rows.append((
+            f"bench-{i}", f"Announcement {i} regarding {tagged[0]}",
+            "Synthetic summary text. " * 5,
+            NEWS_CATEGORIES[int(rng.integers(len(NEWS_CATEGORIES)))],
+            published.strftime("%Y-%m-%d %H:%M:%S.%f"), ",".join(tagged),
+            "en" if rng.random() < 0.8 else "ar", fetched,
+        ))
+    exec_sql_many(
+        """INSERT INTO news_articles
+               (news_id, title, summary, category, published_at, related_symbols, language, fetched_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
@@ -0,0 +1,234 @@
+"""
+Benchmark runner — times the backend hot paths against generated data.
+
+Creates a temp SQLite DB, fills it with :mod:`benchmarks.datagen`, then
+times each case (one warm-up call, then ``--repeat`` timed calls) and
+writes min / median / mean seconds to JSON.  ``--compare`` loads an
+earlier result file and flags cases whose median slowed down by more
+than ``--threshold``; the exit status is 1 when any did.
+
+Runs fully offline: the FX cache is primed with the default USD/KWD
+rate and generated stocks carry prices and P/E ratios.
+
+    python -m benchmarks.run --transactions 5000 --out bench.json
+    python -m benchmarks.run --transactions 5000 --compare bench.json --only twr,mwrr
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _prepare_env() -> str:
+    """Point the app at a fresh temp DB (must run before any ``app`` import)."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="bench_portfolio_")
+    os.close(fd)
+    os.environ["DATABASE_PATH"] = path
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.setdefault("ENVIRONMENT", "development")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-not-for-production")
+    os.environ.setdefault("CRON_SECRET_KEY", "benchmark-cron-key")
+    os.environ["PRICE_UPDATE_ENABLED"] = "false"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["FX_CACHE_TTL"] = str(10 ** 9)
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark-fake-key")
+    return path
+
+
+# ── Cases ────────────────────────────────────────────────────────────
+
+def _cases(uid: int) -> Dict[str, Callable[[], Any]]:
+    """Name → zero-arg callable for every timed hot path."""
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_user
+    from app.api.v1.tracker import recalculate_all_snapshots
+    from app.api.v1.trading import _build_position_state
+    from app.core.security import TokenData
+    from app.main import app
+    from app.services.backup_service import export_portfolio_excel, import_transactions_excel
+    from app.services.portfolio_service import PortfolioService
+    from benchmarks.datagen import create_user
+
+    app.dependency_overrides[get_current_user] = lambda: TokenData(user_id=uid, username="bench")
+    client = TestClient(app)
+    svc = PortfolioService(uid)
+    backup = export_portfolio_excel(uid).getvalue()
+    import_seq = iter(range(10 ** 6))
+
+    def get(url: str) -> Callable[[], Any]:
+        def call():
+            resp = client.get(url)
+            resp.raise_for_status()
+            return resp
+        return call
+
+    return {
+        "build_portfolio_table.KFH": lambda: svc.build_portfolio_table("KFH"),
+        "build_portfolio_table.USA": lambda: svc.build_portfolio_table("USA"),
+        "get_overview": svc.get_overview,
+        "twr": svc.calculate_twr,
+        "mwrr": svc.calculate_mwrr,
+        "build_position_state": lambda: _build_position_state(uid),
+        "trading_summary": get("/api/v1/portfolio/trading-summary?page_size=500"),
+        "recalculate_all_snapshots": lambda: recalculate_all_snapshots(uid),
+        "news_feed.default": get("/api/v1/news/feed?limit=15"),
+        "news_feed.category": get("/api/v1/news/feed?categories=dividend,earnings&limit=15"),
+        "news_feed.symbol": get("/api/v1/news/feed?symbols=KW000,US001&limit=15"),
+        "news_feed.deep_page": get("/api/v1/news/feed?cursor=1500&limit=15"),
+        "news_search.relevance": get("/api/v1/news/search?q=announcement%20KW00&limit=20"),
+        "news_search.recent": get("/api/v1/news/search?q=announcement&sort=recent&limit=20"),
+        "import_transactions_excel": lambda: import_transactions_excel(
+            create_user(f"bench_import{next(import_seq)}"), backup,
+        ),
+    }
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    fn()  # warm-up (imports, caches, lazy migrations)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "mean": round(statistics.fmean(samples), 6),
+        "repeat": repeat,
+    }
+
+
+# ── Comparison ───────────────────────────────────────────────────────
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Per-case median ratios vs *baseline*; True when any regressed."""
+    rows, regressed = [], False
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "median" not in res or not base.get("median"):
+            rows.append({"case": name, "median": res.get("median"), "baseline": None, "ratio": None})
+            continue
+        ratio = res["median"] / base["median"]
+        slow = ratio > 1 + threshold
+        regressed |= slow
+        rows.append({
+            "case": name, "median": res["median"], "baseline": base["median"],
+            "ratio": round(ratio, 3), "regressed": slow,
+        })
+    return rows, regressed
+
+
+def _git_sha() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--stocks", type=int, default=40)
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--deposits", type=int, default=100)
+    parser.add_argument("--snapshots", type=int, default=750)
+    parser.add_argument("--news", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Comma-separated case names (prefix match)")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Median slowdown that counts as a regression (0.20 = 20%%)")
+    args = parser.parse_args(argv)
+
+    db_path = _prepare_env()
+    import logging
+    logging.disable(logging.WARNING)
+
+    from app.core.schema import ensure_all_tables
+    from app.services import fx_service
+    from benchmarks.datagen import GenConfig, generate
+
+    ensure_all_tables()
+    fx_service._set_cached_rate(fx_service.DEFAULT_USD_TO_KWD)
+
+    cfg = GenConfig(
+        users=args.users, stocks=args.stocks, transactions=args.transactions,
+        deposits=args.deposits, snapshots=args.snapshots, news=args.news, seed=args.seed,
+    )
+    t0 = time.perf_counter()
+    user_ids = generate(cfg)
+    gen_s = time.perf_counter() - t0
+    print(f"Generated data in {gen_s:.2f}s ({db_path})")
+
+    cases = _cases(user_ids[0])
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",") if w.strip()]
+        cases = {k: v for k, v in cases.items() if any(k.startswith(w) for w in wanted)}
+
+    results: Dict[str, Any] = {}
+    for name, fn in cases.items():
+        try:
+            results[name] = _time(fn, args.repeat)
+        except Exception as exc:
+            results[name] = {"error": f"{type(exc).__name__}: {exc}"}
+        res = results[name]
+        print(f"  {name:<28} " + (
+            f"median {res['median'] * 1000:9.1f} ms   min {res['min'] * 1000:9.1f} ms"
+            if "median" in res else res["error"]
+        ))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_sha": _git_sha(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": cfg.to_dict(),
+            "generate_seconds": round(gen_s, 3),
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.out}")
+
+    os.unlink(db_path)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("meta", {}).get("config") != cfg.to_dict():
+            print("⚠️  Baseline was generated with a different config — ratios are not comparable")
+        rows, regressed = compare(report, baseline, args.threshold)
+        print(f"\n{'case':<28} {'median':>10} {'baseline':>10} {'ratio':>7}")
+        for r in rows:
+            if r["ratio"] is None:
+                print(f"{r['case']:<28} {'—':>10} {'—':>10} {'new':>7}")
+                continue
+            flag = "  ⛔" if r["regressed"] else ""
+            print(f"{r['case']:<28} {r['median'] * 1000:>8.1f}ms {r['baseline'] * 1000:>8.1f}ms "
+                  f"{r['ratio']:>7.2f}{flag}")
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
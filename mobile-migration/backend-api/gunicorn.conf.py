@@ -0,0 +1,35 @@
+"""
+Gunicorn settings — loaded automatically from the working directory.
+
+Only the multi-worker wiring lives here; bind / workers / timeout stay
+on the command line (Procfile, Dockerfile).  Workers inherit
+``PROMETHEUS_MULTIPROC_DIR`` from the master, write their samples there,
+and ``/metrics`` on any worker aggregates them all.  They also default
+to the shared SQLite cache backend, so caches and rate limits are
+per host rather than per worker (set ``CACHE_BACKEND=redis`` for
+several hosts).
+"""
+
+import os
+import shutil
+import tempfile
+
+_metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "portfolio_metrics")
+)
+
+os.environ.setdefault("CACHE_BACKEND", "sqlite")
+
+
+def on_starting(server):
+    # Counters from a previous run must not leak into this one
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -15,6 +15,8 @@ import os
 from datetime import date, timedelta
 from typing import Optional
 
+from app.services.symbol_service import resolve_symbol_key
+
 
 def get_test_db() -> sqlite3.Connection:
     """Get a connection to the test database."""
@@ -45,12 +47,13 @@ def create_transaction(
     now = int(time.time())
     cur.execute(
         """INSERT INTO transactions
-           (user_id, portfolio, stock_symbol, txn_date, txn_type, shares,
+           (user_id, portfolio, stock_symbol, symbol_key, txn_date, txn_type, shares,
             purchase_cost, sell_value, bonus_shares, cash_dividend,
             reinvested_dividend, fees, category, is_deleted, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)""",
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)""",
         (
-            user_id, portfolio, stock_symbol, txn_date, txn_type, shares,
+            user_id, portfolio, stock_symbol, resolve_symbol_key(user_id, stock_symbol),
+            txn_date, txn_type, shares,
             purchase_cost, sell_value, bonus_shares, cash_dividend,
             reinvested_dividend, fees, category, now,
         ),
@@ -176,9 +179,10 @@ def create_stock(
     now = int(time.time())
     cur.execute(
         """INSERT INTO stocks
-           (user_id, symbol, name, portfolio, currency, current_price, last_updated)
-           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-        (user_id, symbol, name, portfolio, currency, current_price, now),
+           (user_id, symbol, symbol_key, name, portfolio, currency, current_price, last_updated)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        (user_id, symbol, resolve_symbol_key(user_id, symbol), name, portfolio, currency,
+         current_price, now),
     )
     stock_id = cur.lastrowid
     conn.commit()
@@ -0,0 +1,107 @@
+"""
+Daily price + snapshot pipeline — failed quotes are retried on resume,
+startup catch-up and the cron trigger share the pipeline.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.config import get_settings
+from app.cron import daily_pipeline, price_updater, scheduler, snapshot_saver
+from app.services import price_service
+from tests.helpers import create_buy, create_stock
+
+CRON = "/api/v1/cron/update-prices-and-snapshot"
+
+
+@pytest.fixture
+def pipeline(monkeypatch, _init_test_db):
+    """Stub the per-user work; ``state["failed"]`` sets failed quotes per call."""
+    state = {"failed": 0, "calls": []}
+
+    def fake_price(user_id=1, price_map=None):
+        state["calls"].append(user_id)
+        return {"success": True, "result": {"updated": 1, "failed": state["failed"]}}
+
+    monkeypatch.setattr(price_service, "build_price_map", lambda user_ids: {})
+    monkeypatch.setattr(price_updater, "run_price_update", fake_price)
+    monkeypatch.setattr(snapshot_saver, "run_snapshot_save", lambda user_id=1: {"success": True})
+    monkeypatch.setattr(get_settings(), "DAILY_JOB_MAX_ATTEMPTS", 1)
+    return state
+
+
+def _status(user_id: int) -> str:
+    rows = [r for r in daily_pipeline.get_run_status() if r["user_id"] == user_id]
+    return rows[0]["status"]
+
+
+class TestPriceMap:
+    def test_failed_fetch_counts_as_failed(self, monkeypatch, _init_test_db):
+        create_stock(user_id=9100, symbol="PMFAIL", currency="USD")
+        create_buy(user_id=9100, symbol="PMFAIL")
+
+        def boom(yf, yahoo_sym):
+            raise ConnectionError("yahoo down")
+
+        monkeypatch.setattr(price_service, "_fetch_quote", boom)
+        price_map = price_service.build_price_map([9100])
+        assert price_map == {}
+
+        result = price_service.update_all_prices(user_id=9100, price_map=price_map)
+        assert (result.failed, result.skipped) == (1, 0)
+
+
+class TestResume:
+    def test_failed_quotes_leave_user_unfinished(self, pipeline):
+        pipeline["failed"] = 2
+        run = daily_pipeline.run_daily_pipeline([9101])
+        assert run["results"][9101]["status"] == "failed"
+        assert _status(9101) == "failed"
+        assert daily_pipeline.needs_catch_up()
+
+    def test_resume_retries_only_unfinished(self, pipeline):
+        pipeline["failed"] = 2
+        daily_pipeline.run_daily_pipeline([9102])
+        pipeline["failed"] = 0
+        daily_pipeline.run_daily_pipeline([9102])
+        assert _status(9102) == "done"
+
+        pipeline["calls"].clear()
+        run = daily_pipeline.run_daily_pipeline([9102])
+        assert pipeline["calls"] == []
+        assert run["summary"]["resumed_skipped"] == 1
+
+        daily_pipeline.run_daily_pipeline([9102], resume=False)
+        assert pipeline["calls"] == [9102]
+
+
+class TestCatchUp:
+    def test_slot_boundary(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "PRICE_UPDATE_HOUR", 14)
+        monkeypatch.setattr(settings, "PRICE_UPDATE_MINUTE", 30)
+        assert not scheduler._daily_slot_passed(datetime(2026, 1, 5, 14, 29))
+        assert scheduler._daily_slot_passed(datetime(2026, 1, 5, 14, 30))
+
+    def test_runs_when_today_unfinished(self, pipeline, monkeypatch):
+        monkeypatch.setattr(scheduler, "_daily_slot_passed", lambda: True)
+        monkeypatch.setattr(daily_pipeline, "needs_catch_up", lambda: True)
+        monkeypatch.setattr(daily_pipeline, "_users_with_stocks", lambda: [9103])
+        assert scheduler._catch_up_daily_run() is not None
+        assert pipeline["calls"] == [9103]
+
+    def test_skipped_before_slot(self, pipeline, monkeypatch):
+        monkeypatch.setattr(scheduler, "_daily_slot_passed", lambda: False)
+        assert scheduler._catch_up_daily_run() is None
+        assert pipeline["calls"] == []
+
+
+class TestCronTrigger:
+    def test_routes_through_pipeline(self, test_client, pipeline):
+        resp = test_client.post(CRON, params={"user_id": 9104}, headers={"X-Cron-Key": "test-cron-key"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["status"] == "ok"
+        assert body["data"]["summary"]["done"] == 1
+        assert _status(9104) == "done"
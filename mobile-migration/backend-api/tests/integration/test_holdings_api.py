@@ -0,0 +1,97 @@
+"""
+Point-in-time holdings endpoints — as-of, history and the
+position_snapshots rebuild, read from the transaction ledger.
+"""
+
+import pytest
+
+from app.core.database import query_all
+from tests.helpers import create_buy, create_sell
+
+ANALYTICS = "/api/v1/analytics"
+SYMBOL = "ASOF.KW"
+
+
+@pytest.fixture(scope="module")
+def ledger(test_client):
+    """Buy 100 for 1000 on 2024-01-10, sell 40 for 600 on 2024-02-10, sell the rest on 2024-03-10."""
+    create_buy(symbol=SYMBOL, txn_date="2024-01-10", shares=100, cost=1000.0)
+    create_sell(symbol=SYMBOL, txn_date="2024-02-10", shares=40, sell_value=600.0)
+    create_sell(symbol=SYMBOL, txn_date="2024-03-10", shares=60, sell_value=660.0)
+
+
+def _position(data, symbol=SYMBOL):
+    rows = [p for p in data["positions"] if p["symbol"] == symbol]
+    return rows[0] if rows else None
+
+
+class TestHoldingsAsOf:
+    def test_before_first_trade(self, test_client, auth_headers, ledger):
+        resp = test_client.get(f"{ANALYTICS}/holdings-as-of", params={"as_of": "2024-01-09"}, headers=auth_headers)
+        assert resp.status_code == 200
+        assert _position(resp.json()["data"]) is None
+
+    def test_after_partial_sell(self, test_client, auth_headers, ledger):
+        resp = test_client.get(f"{ANALYTICS}/holdings-as-of", params={"as_of": "2024-02-15"}, headers=auth_headers)
+        pos = _position(resp.json()["data"])
+        assert pos["shares"] == 60
+        assert pos["cost_basis"] == pytest.approx(600.0)
+        assert pos["realized_pnl"] == pytest.approx(200.0)
+
+    def test_closed_position_only_on_request(self, test_client, auth_headers, ledger):
+        params = {"as_of": "2024-03-31"}
+        resp = test_client.get(f"{ANALYTICS}/holdings-as-of", params=params, headers=auth_headers)
+        assert _position(resp.json()["data"]) is None
+
+        resp = test_client.get(
+            f"{ANALYTICS}/holdings-as-of", params={**params, "include_closed": True}, headers=auth_headers,
+        )
+        pos = _position(resp.json()["data"])
+        assert pos["shares"] == 0
+        assert pos["realized_pnl"] == pytest.approx(260.0)
+
+    def test_unknown_portfolio_rejected(self, test_client, auth_headers):
+        resp = test_client.get(
+            f"{ANALYTICS}/holdings-as-of", params={"as_of": "2024-02-15", "portfolio": "NOPE"}, headers=auth_headers,
+        )
+        assert resp.status_code == 400
+
+
+class TestHoldingsHistory:
+    def test_month_end_series(self, test_client, auth_headers, ledger):
+        resp = test_client.get(
+            f"{ANALYTICS}/holdings-history",
+            params={"start_date": "2024-01-01", "end_date": "2024-03-31", "frequency": "M"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        rows = [p for p in resp.json()["data"]["positions"] if p["symbol"] == SYMBOL]
+        assert [(p["date"], p["shares"]) for p in rows] == [("2024-01-31", 100), ("2024-02-29", 60)]
+
+    def test_reversed_range_rejected(self, test_client, auth_headers):
+        resp = test_client.get(
+            f"{ANALYTICS}/holdings-history",
+            params={"start_date": "2024-03-01", "end_date": "2024-01-01"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+
+
+class TestSnapshotRebuild:
+    def test_rebuild_writes_open_and_closing_rows(self, test_client, auth_headers, ledger):
+        resp = test_client.post(
+            f"{ANALYTICS}/position-snapshots/rebuild",
+            params={"start_date": "2024-03-08", "end_date": "2024-03-11"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+        rows = query_all(
+            """SELECT snapshot_date, total_shares, status FROM position_snapshots
+               WHERE user_id = 1 AND stock_symbol = ? ORDER BY snapshot_date""",
+            (SYMBOL,),
+        )
+        assert [(r["snapshot_date"], r["total_shares"], r["status"]) for r in rows] == [
+            ("2024-03-08", 60, "OPEN"),
+            ("2024-03-09", 60, "OPEN"),
+            ("2024-03-10", 0, "CLOSED"),
+        ]
@@ -0,0 +1,92 @@
+"""
+News search — Arabic-folded matching with snippets in the original
+spelling, and keyset cursors that walk every hit once.
+"""
+
+import pytest
+
+from app.services import news_search
+from tests.helpers import get_test_db
+
+SEARCH = "/api/v1/news/search"
+CATEGORY = "search_test"
+
+_ARTICLES = [
+    ("s-ar", "بيت التمويل الكويتي", "بيت التمويل الكويتي يعلن أرباحاً قياسية للربع الثالث", "ar", "2024-10-01 08:00:00"),
+    ("s-1", "Boubyan declares dividend", "Cash dividend of 10 fils per share", "en", "2024-09-01 08:00:00"),
+    ("s-2", "Zain dividend approved", "Shareholders approved the dividend", "en", "2024-09-02 08:00:00"),
+    ("s-3", "Agility dividend date", "Dividend record date announced", "en", "2024-09-03 08:00:00"),
+    ("s-4", "NBK interim dividend", "Interim dividend paid to shareholders", "en", "2024-09-03 08:00:00"),
+    ("s-5", "Gulf Bank dividend", "Dividend distribution schedule", "en", "2024-09-04 08:00:00"),
+]
+
+
+@pytest.fixture(scope="module")
+def articles(test_client):
+    news_search.ensure_search_index()
+    conn = get_test_db()
+    ids = {}
+    for news_id, title, summary, lang, published in _ARTICLES:
+        cur = conn.execute(
+            """INSERT INTO news_articles
+               (news_id, title, summary, category, published_at, language, fetched_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (news_id, title, summary, CATEGORY, published, lang, published),
+        )
+        ids[news_id] = cur.lastrowid
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def _walk(sort: str) -> list:
+    seen, cursor = [], None
+    while True:
+        hits, cursor = news_search.search("dividend", categories=[CATEGORY], sort=sort, cursor=cursor, limit=2)
+        seen += [h["id"] for h in hits]
+        if cursor is None:
+            return seen
+
+
+class TestSnippets:
+    def test_arabic_variant_matches_and_shows_original(self, articles):
+        hits, _ = news_search.search("ارباح", categories=[CATEGORY])
+        assert [h["id"] for h in hits] == [articles["s-ar"]]
+        assert "<mark>أرباحاً</mark>" in hits[0]["snippet"]
+
+    def test_english_snippet_marks_match(self, articles):
+        hits, _ = news_search.search("distribution", categories=[CATEGORY])
+        assert hits[0]["snippet"] == "Dividend <mark>distribution</mark> schedule"
+
+    def test_highlight_cuts_long_text(self):
+        text = " ".join(f"w{i}" for i in range(40)) + " target tail"
+        snippet = news_search.highlight("t", text, ["target"])
+        assert snippet.startswith("…") and "<mark>target</mark>" in snippet
+
+
+class TestCursor:
+    @pytest.mark.parametrize("sort", ["relevance", "recent"])
+    def test_pages_cover_every_hit_once(self, articles, sort):
+        seen = _walk(sort)
+        expected = {v for k, v in articles.items() if k != "s-ar"}
+        assert len(seen) == len(expected)
+        assert set(seen) == expected
+
+    def test_recent_order(self, articles):
+        seen = _walk("recent")
+        assert seen[0] == articles["s-5"]
+        assert seen[-1] == articles["s-1"]
+
+    def test_endpoint_rejects_bad_cursor(self, test_client, auth_headers, articles):
+        resp = test_client.get(SEARCH, params={"q": "dividend", "cursor": "%%%"}, headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_endpoint_pages(self, test_client, auth_headers, articles):
+        params = {"q": "dividend", "categories": CATEGORY, "limit": 3}
+        first = test_client.get(SEARCH, params=params, headers=auth_headers).json()
+        second = test_client.get(
+            SEARCH, params={**params, "cursor": first["nextPageCursor"]}, headers=auth_headers,
+        ).json()
+        news_ids = {i["id"] for i in first["items"] + second["items"]}
+        assert news_ids == {"s-1", "s-2", "s-3", "s-4", "s-5"}
+        assert second["nextPageCursor"] is None
@@ -0,0 +1,96 @@
+"""
+Snapshot backfill from stored closes — gap filling, bonus shares and
+idempotent re-runs.
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.core.database import query_all
+from app.services.price_history import backfill_snapshots, store_closes
+from tests.helpers import (
+    create_deposit,
+    create_snapshot,
+    create_stock,
+    create_transaction,
+    get_test_db,
+)
+
+START, END = date(2024, 1, 1), date(2024, 1, 4)
+
+
+@pytest.fixture(scope="module")
+def user(_init_test_db):
+    """
+    A fresh user: 1000 KWD deposited, then 100 PHA.KW for 100 and 10 PHB.KW
+    for 50 on Jan 1, 10 PHA.KW bonus shares on Jan 3.  PHB.KW has no bar
+    on Jan 3.  A snapshot already exists for Jan 2.
+    """
+    conn = get_test_db()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO users (username, password_hash, name, created_at) VALUES ('pricehist', 'x', 'Price History', 0)"
+    )
+    uid = cur.lastrowid
+    conn.commit()
+    conn.close()
+
+    create_deposit(user_id=uid, deposit_date="2023-12-31", amount=1000.0)
+    for sym in ("PHA.KW", "PHB.KW"):
+        create_stock(user_id=uid, symbol=sym)
+    create_transaction(user_id=uid, stock_symbol="PHA.KW", txn_date="2024-01-01", shares=100, purchase_cost=100.0)
+    create_transaction(user_id=uid, stock_symbol="PHB.KW", txn_date="2024-01-01", shares=10, purchase_cost=50.0)
+    create_transaction(
+        user_id=uid, stock_symbol="PHA.KW", txn_date="2024-01-03", txn_type="Bonus Shares",
+        shares=0, purchase_cost=0.0, bonus_shares=10,
+    )
+    create_snapshot(user_id=uid, snapshot_date="2024-01-02", portfolio_value=999.0)
+    store_closes(pd.DataFrame(
+        [("PHA.KW", f"2024-01-0{d}", 1.0, "KWD") for d in (1, 2, 3, 4)]
+        + [("PHB.KW", "2024-01-01", 5.0, "KWD"), ("PHB.KW", "2024-01-02", 5.0, "KWD"),
+           ("PHB.KW", "2024-01-04", 6.0, "KWD")],
+        columns=["symbol", "price_date", "close", "currency"],
+    ), "test")
+    return uid
+
+
+def _values(uid):
+    rows = query_all(
+        "SELECT snapshot_date, portfolio_value FROM portfolio_snapshots WHERE user_id = ? ORDER BY snapshot_date",
+        (uid,),
+    )
+    return {r["snapshot_date"]: r["portfolio_value"] for r in rows}
+
+
+class TestBackfillSnapshots:
+    def test_fills_gaps_and_keeps_existing(self, user):
+        result = backfill_snapshots(user, START, END, download=False)
+        assert result["created"] == 3
+        assert result["skipped_unpriced"] == 0
+        assert _values(user) == {
+            "2024-01-01": pytest.approx(1000.0),   # 100 + 10×5 + 850 cash
+            "2024-01-02": 999.0,                   # kept
+            "2024-01-03": pytest.approx(1010.0),   # bonus: 110 PHA, PHB close carried forward
+            "2024-01-04": pytest.approx(1020.0),
+        }
+
+    def test_second_run_is_a_no_op(self, user):
+        before = _values(user)
+        result = backfill_snapshots(user, START, END, download=False)
+        assert result["created"] == 0 and result["updated"] == 0
+        assert _values(user) == before
+
+    def test_overwrite_replaces_existing(self, user):
+        result = backfill_snapshots(user, START, END, download=False, overwrite=True)
+        assert result["created"] == 0
+        assert _values(user)["2024-01-02"] == pytest.approx(1000.0)
+
+    def test_position_snapshots_carry_the_bonus(self, user):
+        rows = query_all(
+            """SELECT snapshot_date, total_shares FROM position_snapshots
+               WHERE user_id = ? AND stock_symbol = 'PHA.KW' ORDER BY snapshot_date""",
+            (user,),
+        )
+        assert [r["total_shares"] for r in rows] == [100, 100, 110, 110]
@@ -0,0 +1,61 @@
+"""
+Screener — listing is read-only; POST stores at most one score per stock per day.
+"""
+
+import time
+
+import pytest
+
+from tests.helpers import get_test_db
+
+SCREENER = "/api/v1/fundamental/screener"
+
+
+def _score_rows(stock_id: int) -> int:
+    conn = get_test_db()
+    n = conn.execute("SELECT COUNT(*) FROM stock_scores WHERE stock_id = ?", (stock_id,)).fetchone()[0]
+    conn.close()
+    return n
+
+
+@pytest.fixture(scope="module")
+def analysis_stock(test_client) -> int:
+    conn = get_test_db()
+    cur = conn.cursor()
+    now = int(time.time())
+    cur.execute(
+        """INSERT INTO analysis_stocks (user_id, symbol, company_name, sector, created_at, updated_at)
+           VALUES (1, 'SCRN', 'Screener Co', 'Banks', ?, ?)""",
+        (now, now),
+    )
+    stock_id = cur.lastrowid
+    for name, value in [("ROE", 0.18), ("Net Margin", 0.22), ("Current Ratio", 1.6)]:
+        cur.execute(
+            """INSERT INTO stock_metrics
+               (stock_id, fiscal_year, period_end_date, metric_type, metric_name, metric_value, created_at)
+               VALUES (?, 2024, '2024-12-31', 'profitability', ?, ?, ?)""",
+            (stock_id, name, value, now),
+        )
+    conn.commit()
+    conn.close()
+    return stock_id
+
+
+class TestScreener:
+    def test_listing_does_not_persist(self, test_client, auth_headers, analysis_stock):
+        resp = test_client.get(SCREENER, headers=auth_headers)
+        assert resp.status_code == 200
+        symbols = [s["symbol"] for s in resp.json()["data"]["stocks"]]
+        assert "SCRN" in symbols
+        assert _score_rows(analysis_stock) == 0
+
+    def test_post_persists_once_per_day(self, test_client, auth_headers, analysis_stock):
+        first = test_client.post(f"{SCREENER}/scores", headers=auth_headers)
+        assert first.status_code == 200
+        assert first.json()["data"]["persisted"] >= 1
+        assert _score_rows(analysis_stock) == 1
+
+        again = test_client.post(f"{SCREENER}/scores", headers=auth_headers)
+        assert again.status_code == 200
+        assert again.json()["data"]["persisted"] == 0
+        assert _score_rows(analysis_stock) == 1
@@ -0,0 +1,79 @@
+"""
+Remote stock lookup — runs on its own pool, outlives the request's wait,
+and a failing ticker probe keeps the search results.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from app.core.config import get_settings
+from app.services import stock_search
+
+STOCK_LIST = "/api/v1/stocks/stock-list"
+
+
+@pytest.fixture
+def slow_yahoo(monkeypatch, _init_test_db):
+    """Yahoo search that blocks until ``release`` is set; records its thread."""
+    state = {"threads": [], "release": threading.Event()}
+
+    def fetch(query):
+        state["threads"].append(threading.current_thread().name)
+        state["release"].wait(5)
+        return [{"symbol": "QQZX", "name": "Qqzx Corp", "yf_ticker": "QQZX"}]
+
+    monkeypatch.setattr(stock_search, "_fetch_us", fetch)
+    monkeypatch.setattr(get_settings(), "SYMBOL_LOOKUP_TIMEOUT", 0.05)
+    yield state
+    state["release"].set()
+
+
+class TestRemoteLookup:
+    def test_request_returns_and_lookup_lands_in_cache(self, test_client, slow_yahoo):
+        resp = test_client.get(STOCK_LIST, params={"market": "US", "search": "qqzx corp"})
+        assert resp.status_code == 200
+        assert "QQZX" not in [s["symbol"] for s in resp.json()["data"]["stocks"]]
+
+        slow_yahoo["release"].set()
+        deadline = time.monotonic() + 5
+        while stock_search.cached_lookup("qqzx corp") is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert stock_search.cached_lookup("qqzx corp")[0]["symbol"] == "QQZX"
+        assert slow_yahoo["threads"][0].startswith("symbol-lookup")
+
+
+class TestTickerProbe:
+    def test_probe_errors_are_swallowed(self):
+        class Ticker:
+            def __init__(self, sym):
+                pass
+
+            def history(self, **kwargs):
+                assert kwargs["timeout"] == stock_search._PROBE_TIMEOUT
+                raise TimeoutError("chart timed out")
+
+        class FakeYf:
+            pass
+
+        FakeYf.Ticker = Ticker
+        assert stock_search._probe_ticker(FakeYf, "QQZX") == {}
+
+    def test_empty_chart_skips_metadata_fetch(self):
+        class Ticker:
+            def __init__(self, sym):
+                pass
+
+            def history(self, **kwargs):
+                return pd.DataFrame()
+
+            def get_history_metadata(self):
+                raise AssertionError("untimed metadata fetch")
+
+        class FakeYf:
+            pass
+
+        FakeYf.Ticker = Ticker
+        assert stock_search._probe_ticker(FakeYf, "QQZX") == {}
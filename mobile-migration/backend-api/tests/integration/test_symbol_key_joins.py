@@ -0,0 +1,75 @@
+"""
+symbol_key joins — an alias leaves two stocks rows on one key; transaction
+totals must not double-count.
+"""
+
+import pytest
+
+from app.services.portfolio_service import PortfolioService
+from tests.helpers import create_buy, create_dividend, create_sell, create_stock, ensure_user2
+
+SUMMARY = "/api/v1/portfolio/trading-summary"
+
+
+@pytest.fixture(scope="module")
+def aliased_user(test_client):
+    """user2 holding KW000 (3 rows + a dividend), then KW000X added and aliased to it."""
+    user = ensure_user2()
+    uid = user["user_id"]
+    create_stock(user_id=uid, symbol="KW000")
+    create_buy(user_id=uid, symbol="KW000", txn_date="2024-01-10", shares=100, cost=1000.0)
+    create_buy(user_id=uid, symbol="KW000", txn_date="2024-02-10", shares=100, cost=1200.0)
+    create_sell(user_id=uid, symbol="KW000", txn_date="2024-03-10", shares=50, sell_value=700.0)
+    create_dividend(user_id=uid, symbol="KW000", txn_date="2024-04-10", cash_dividend=25.0)
+
+    before = test_client.get(SUMMARY, headers=user["headers"]).json()["data"]["summary"]
+
+    create_stock(user_id=uid, symbol="KW000X")
+    resp = test_client.post(
+        "/api/v1/securities",
+        json={"canonical_ticker": "KW000", "exchange": "KSE", "aliases": ["KW000X"]},
+        headers=user["headers"],
+    )
+    assert resp.status_code == 201
+    return {**user, "before": before}
+
+
+class TestAliasedJoins:
+    def test_both_stock_rows_share_the_key(self, aliased_user):
+        from app.core.database import query_val
+
+        n = query_val(
+            "SELECT COUNT(*) FROM stocks WHERE user_id = ? AND symbol_key = 'KW000'",
+            (aliased_user["user_id"],),
+        )
+        assert n == 2
+
+    def test_trading_summary_totals_unchanged(self, test_client, aliased_user):
+        resp = test_client.get(SUMMARY, headers=aliased_user["headers"])
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        before = aliased_user["before"]
+
+        assert data["summary"]["total_transactions"] == before["total_transactions"] == 4
+        assert data["summary"]["total_buys"] == before["total_buys"] == 2200.0
+        assert data["summary"]["total_sells"] == before["total_sells"]
+        assert data["pagination"]["total_items"] == 4
+        assert len(data["transactions"]) == 4
+
+    def test_search_count_matches(self, test_client, aliased_user):
+        resp = test_client.get(SUMMARY, params={"search": "kw000"}, headers=aliased_user["headers"])
+        assert resp.json()["data"]["pagination"]["total_items"] == 4
+
+    def test_dividends_listed_once(self, test_client, aliased_user):
+        resp = test_client.get("/api/v1/dividends", headers=aliased_user["headers"])
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        assert data["pagination"]["total_items"] == 1
+        assert data["totals"]["total_cash_dividend_kwd"] == 25.0
+
+        by_stock = test_client.get("/api/v1/dividends/by-stock", headers=aliased_user["headers"])
+        assert by_stock.status_code == 200
+
+    def test_realized_profit_rows_once(self, aliased_user):
+        details = PortfolioService(aliased_user["user_id"]).calculate_realized_profit_details()
+        assert len(details["details"]) == 1
@@ -0,0 +1,72 @@
+"""
+Transactions list — keyset cursor pages walk every row once, in order.
+"""
+
+import pytest
+
+from tests.helpers import create_transaction
+
+TXNS = "/api/v1/portfolio/transactions"
+SYMBOL = "CURSOR.KW"
+
+
+@pytest.fixture(scope="module")
+def txn_ids(test_client):
+    """Seven rows: a shared date (id breaks the tie) and one without a date."""
+    dates = ["2024-03-01", "2024-05-01", "2024-05-01", "2024-01-01", None, "2024-05-01", "2023-12-31"]
+    rows = [(create_transaction(stock_symbol=SYMBOL, txn_date=d), d) for d in dates]
+    dated = sorted((r for r in rows if r[1]), key=lambda r: (r[1], r[0]), reverse=True)
+    undated = sorted((r for r in rows if not r[1]), reverse=True)
+    return [r[0] for r in dated + undated]
+
+
+def _page(test_client, auth_headers, cursor, **params):
+    resp = test_client.get(
+        TXNS, params={"stock_symbol": SYMBOL, "page_size": 3, "cursor": cursor, **params},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    return resp.json()["data"]
+
+
+class TestKeysetCursor:
+    def test_walks_all_rows_in_order(self, test_client, auth_headers, txn_ids):
+        seen, cursor = [], ""
+        while True:
+            data = _page(test_client, auth_headers, cursor)
+            seen += [t["id"] for t in data["transactions"]]
+            if not data["pagination"]["has_more"]:
+                assert data["pagination"]["next_cursor"] is None
+                break
+            cursor = data["pagination"]["next_cursor"]
+        assert seen == txn_ids
+
+    def test_total_only_on_request(self, test_client, auth_headers, txn_ids):
+        assert "total_items" not in _page(test_client, auth_headers, "")["pagination"]
+        data = _page(test_client, auth_headers, "", include_total=True)
+        assert data["pagination"]["total_items"] == len(txn_ids)
+
+    def test_offset_mode_unchanged(self, test_client, auth_headers, txn_ids):
+        resp = test_client.get(
+            TXNS, params={"stock_symbol": SYMBOL, "page": 3, "page_size": 3}, headers=auth_headers,
+        )
+        pagination = resp.json()["data"]["pagination"]
+        assert pagination["total_items"] == len(txn_ids)
+        assert pagination["total_pages"] == 3
+
+    def test_offset_pages_share_keyset_order(self, test_client, auth_headers, txn_ids):
+        seen = []
+        for page in (1, 2, 3):
+            resp = test_client.get(
+                TXNS, params={"stock_symbol": SYMBOL, "page": page, "page_size": 3}, headers=auth_headers,
+            )
+            seen += [t["id"] for t in resp.json()["data"]["transactions"]]
+        assert seen == txn_ids
+
+    def test_symbol_filter_is_key_based(self, test_client, auth_headers, txn_ids):
+        data = _page(test_client, auth_headers, "", stock_symbol=" cursor.kw ", include_total=True)
+        assert data["pagination"]["total_items"] == len(txn_ids)
+
+    def test_invalid_cursor_is_bad_request(self, test_client, auth_headers):
+        resp = test_client.get(TXNS, params={"cursor": "not-a-cursor"}, headers=auth_headers)
+        assert resp.status_code == 400
@@ -0,0 +1,35 @@
+"""
+Valuation endpoints — bad simulation input is a client error, not a 500.
+"""
+
+import pytest
+
+
+class TestEndpoints:
+    @pytest.fixture(scope="class")
+    def stock_id(self, test_client, auth_headers):
+        resp = test_client.post(
+            "/api/v1/fundamental/stocks",
+            json={"symbol": "VALU", "company_name": "Valuation Co"},
+            headers=auth_headers,
+        )
+        assert resp.status_code in (200, 201), resp.text
+        return resp.json()["data"]["id"]
+
+    def test_bad_spec_is_400(self, test_client, auth_headers, stock_id):
+        resp = test_client.post(
+            f"/api/v1/fundamental/stocks/{stock_id}/valuations/dcf/simulate",
+            json={"fcf": 100, "growth_rate_stage1": {"dist": "normal", "mean": None},
+                  "growth_rate_stage2": 0.03, "discount_rate": 0.09, "draws": 100},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+
+    def test_years_out_of_range_is_422(self, test_client, auth_headers, stock_id):
+        resp = test_client.post(
+            f"/api/v1/fundamental/stocks/{stock_id}/valuations/dcf/sensitivity",
+            json={"fcf": 100, "growth_rate_stage1": 0.05, "growth_rate_stage2": 0.03,
+                  "discount_rate": 0.09, "stage1_years": -1},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 422
@@ -0,0 +1,81 @@
+"""
+Stored WAC snapshots — backdated inserts, edits, deletes and restores must
+leave the ``*_at_txn`` columns equal to a full chronological replay.
+"""
+
+import pytest
+
+from app.api.v1.trading import _build_position_state
+from app.core.database import query_all
+
+TXNS = "/api/v1/portfolio/transactions"
+SUMMARY = "/api/v1/portfolio/trading-summary"
+SYMBOL = "WACX.KW"
+
+
+def _post(test_client, auth_headers, **fields):
+    body = {"portfolio": "KFH", "stock_symbol": SYMBOL, **fields}
+    resp = test_client.post(TXNS, json=body, headers=auth_headers)
+    assert resp.status_code == 201, resp.text
+    return resp.json()["data"]["id"]
+
+
+def _assert_matches_replay(test_client, auth_headers):
+    """Let the summary stamp pending rows, then compare them with the replay."""
+    assert test_client.get(SUMMARY, headers=auth_headers).status_code == 200
+    rows = query_all(
+        """SELECT id, cost_basis_at_txn, shares_held_at_txn, realized_pnl_at_txn
+           FROM transactions
+           WHERE user_id = 1 AND stock_symbol = ? AND is_deleted = 0""",
+        (SYMBOL,),
+    )
+    position_state, txn_state = _build_position_state(1)
+    assert rows
+    for r in rows:
+        snap = txn_state[r["id"]]
+        assert r["cost_basis_at_txn"] == pytest.approx(snap["cost_basis"], abs=1e-3)
+        assert r["shares_held_at_txn"] == pytest.approx(snap["shares_held"], abs=1e-5)
+        assert (r["realized_pnl_at_txn"] or 0) == pytest.approx(snap["realized_pnl"], abs=1e-3)
+    return position_state[(SYMBOL, "KFH")]
+
+
+@pytest.fixture(scope="module")
+def ledger(test_client, auth_headers):
+    """A stamped buy → sell position; returns the row ids."""
+    ids = {
+        "buy": _post(test_client, auth_headers, txn_date="2024-03-01", txn_type="Buy",
+                     shares=100, purchase_cost=1000.0),
+        "sell": _post(test_client, auth_headers, txn_date="2024-05-01", txn_type="Sell",
+                      shares=50, sell_value=700.0),
+    }
+    _assert_matches_replay(test_client, auth_headers)
+    return ids
+
+
+class TestSnapshotsFollowLedgerWrites:
+    def test_backdated_insert(self, test_client, auth_headers, ledger):
+        ledger["early"] = _post(test_client, auth_headers, txn_date="2024-01-01", txn_type="Buy",
+                                shares=100, purchase_cost=500.0)
+        state = _assert_matches_replay(test_client, auth_headers)
+        assert state["total_shares"] == 150
+
+    def test_edit(self, test_client, auth_headers, ledger):
+        resp = test_client.put(f"{TXNS}/{ledger['buy']}", json={"purchase_cost": 2000.0},
+                               headers=auth_headers)
+        assert resp.status_code == 200
+        _assert_matches_replay(test_client, auth_headers)
+
+    def test_move_after_sell(self, test_client, auth_headers, ledger):
+        resp = test_client.put(f"{TXNS}/{ledger['early']}", json={"txn_date": "2024-06-01"},
+                               headers=auth_headers)
+        assert resp.status_code == 200
+        _assert_matches_replay(test_client, auth_headers)
+
+    def test_delete_and_restore(self, test_client, auth_headers, ledger):
+        assert test_client.delete(f"{TXNS}/{ledger['buy']}", headers=auth_headers).status_code == 200
+        _assert_matches_replay(test_client, auth_headers)
+
+        resp = test_client.post(f"{TXNS}/{ledger['buy']}/restore", headers=auth_headers)
+        assert resp.status_code == 200
+        state = _assert_matches_replay(test_client, auth_headers)
+        assert state["total_shares"] == 150
@@ -0,0 +1,101 @@
+"""
+Shared cache backends and the SQLite rate-limit storage.
+"""
+
+import time
+
+import pytest
+from limits import RateLimitItemPerMinute
+from limits.strategies import FixedWindowRateLimiter
+
+from app.core.cache import MemoryCache, SQLiteCache
+from app.core.limiter import SQLiteLimiterStorage
+from app.services import extraction_service as es
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / "cache.db"))
+
+
+class TestCounters:
+    def test_fixed_window(self, backend):
+        assert backend.incr("hits", ttl=60) == 1
+        first_expiry = backend.expiry("hits")
+        assert backend.incr("hits", 2, ttl=60) == 3
+        assert backend.expiry("hits") == first_expiry
+
+    def test_expired_counter_restarts(self, backend):
+        backend.incr("hits", ttl=0.05)
+        time.sleep(0.1)
+        assert backend.get("hits") is None
+        assert backend.incr("hits", ttl=60) == 1
+
+    def test_clear_by_prefix(self, backend):
+        backend.incr("ratelimit:a")
+        backend.set("other", "x")
+        assert backend.clear("ratelimit:") == 1
+        assert backend.get("other") == "x"
+
+
+class TestMemoryByteCap:
+    def test_evicts_least_recent_past_cap(self):
+        cache = MemoryCache(max_bytes=100)
+        cache.set("a", [b"x" * 40])
+        cache.set("b", [b"x" * 40])
+        cache.get("a")
+        cache.set("c", [b"x" * 40])
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.size_bytes == 80
+
+    def test_oversized_value_not_stored(self):
+        cache = MemoryCache(max_bytes=100)
+        cache.set("a", b"x" * 50)
+        cache.set("big", b"x" * 101)
+        assert cache.get("big") is None
+        assert cache.get("a") is not None
+
+    def test_replace_and_delete_release_bytes(self):
+        cache = MemoryCache(max_bytes=100)
+        cache.set("a", b"x" * 60)
+        cache.set("a", b"x" * 30)
+        assert cache.size_bytes == 30
+        cache.delete("a")
+        assert cache.size_bytes == 0
+
+    def test_page_images_bounded(self):
+        for i in range(es._IMAGE_CACHE_MAX + 2):
+            es._cache_images(f"pdf{i}", [b"png"])
+        assert es._get_cached_images("pdf0") is None
+        assert es._get_cached_images(f"pdf{es._IMAGE_CACHE_MAX + 1}") == [b"png"]
+
+
+class TestSQLiteLimiterStorage:
+    @pytest.fixture
+    def uri(self, tmp_path):
+        return f"sqlite:///{tmp_path / 'limits.db'}"
+
+    def test_limit_holds_across_workers(self, uri):
+        item = RateLimitItemPerMinute(2)
+        worker_a = FixedWindowRateLimiter(SQLiteLimiterStorage(uri))
+        worker_b = FixedWindowRateLimiter(SQLiteLimiterStorage(uri))
+        assert worker_a.hit(item, "client")
+        assert worker_b.hit(item, "client")
+        assert not worker_a.hit(item, "client")
+        assert worker_b.hit(item, "other-client")
+
+    def test_counter_expiry_and_reset(self, uri):
+        storage = SQLiteLimiterStorage(uri)
+        assert storage.incr("k", expiry=60) == 1
+        assert storage.get("k") == 1
+        assert time.time() < storage.get_expiry("k") <= time.time() + 60
+        storage.clear("k")
+        assert storage.get("k") == 0
+
+        storage.incr("k1", expiry=60)
+        storage.incr("k2", expiry=60)
+        assert storage.reset() == 2
+        assert storage.check()
@@ -0,0 +1,58 @@
+"""
+Dated USD→KWD conversion — stored fixings, the as-of tolerance and the
+``FX_DATED_FLOWS`` switch.
+"""
+
+import pandas as pd
+import pytest
+
+from app.core.config import get_settings
+from app.core.database import exec_sql
+from app.services import fx_service as fx
+
+CURRENT = 0.305
+
+
+@pytest.fixture
+def fixings(monkeypatch, _init_test_db):
+    """Fixings on 2020-03-02 (Mon) and 2020-03-06 (Fri); no network, fixed current rate."""
+    monkeypatch.setattr(fx, "get_usd_kwd_rate", lambda: CURRENT)
+    monkeypatch.setattr(fx, "_backfill_rates", lambda start, end: 0)
+    monkeypatch.setattr(fx, "_history_misses", set())
+    for day, rate in (("2020-03-02", 0.308), ("2020-03-06", 0.309)):
+        exec_sql(
+            "INSERT INTO fx_rates (pair, rate_date, rate, source, fetched_at) VALUES (?, ?, ?, 'test', 0)",
+            (fx.USD_KWD_PAIR, day, rate),
+        )
+    yield
+    exec_sql("DELETE FROM fx_rates WHERE source = 'test'")
+
+
+class TestDatedRates:
+    def test_exact_date(self, fixings):
+        assert fx.get_usd_kwd_rates(["2020-03-02", "2020-03-06"]).tolist() == [0.308, 0.309]
+
+    def test_gap_within_tolerance_uses_prior_fixing(self, fixings):
+        # Saturday, and the following Thursday (6 days after the Friday fixing)
+        assert fx.get_usd_kwd_rates(["2020-03-07", "2020-03-12"]).tolist() == [0.309, 0.309]
+
+    def test_gap_beyond_tolerance_falls_back(self, fixings):
+        rates = fx.get_usd_kwd_rates(["2020-03-20", "2020-02-20", "not a date"])
+        assert rates.tolist() == [CURRENT] * 3
+
+    def test_today_uses_current_rate(self, fixings):
+        assert fx.get_usd_kwd_rates([pd.Timestamp.today()]).tolist() == [CURRENT]
+
+
+class TestDatedFlowsFlag:
+    def _convert(self, dates):
+        return fx.convert_series_to_kwd([100.0, 100.0], ["USD", "KWD"], fx.flow_dates(dates)).tolist()
+
+    def test_off_converts_at_current_rate(self, fixings, monkeypatch):
+        monkeypatch.setattr(get_settings(), "FX_DATED_FLOWS", False)
+        assert fx.flow_dates(["2020-03-02"]) is None
+        assert self._convert(["2020-03-02", "2020-03-02"]) == pytest.approx([100 * CURRENT, 100.0])
+
+    def test_on_converts_at_the_flow_date(self, fixings, monkeypatch):
+        monkeypatch.setattr(get_settings(), "FX_DATED_FLOWS", True)
+        assert self._convert(["2020-03-02", "2020-03-02"]) == pytest.approx([30.8, 100.0])
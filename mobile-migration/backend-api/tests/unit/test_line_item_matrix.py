@@ -0,0 +1,83 @@
+"""
+LineItemMatrix — pivot of (statement_type, CODE) × period, alias lookups
+and periods where a line item is missing.
+"""
+
+import numpy as np
+
+from app.services.line_item_matrix import REVENUE_CODES, LineItemMatrix
+
+# (statement_type, period_end_date, fiscal_year, fiscal_quarter, code, amount)
+ROWS = [
+    ("income", "2023-12-31", 2023, None, "revenue", 100.0),
+    ("income", "2023-12-31", 2023, None, "NET_INCOME", 10.0),
+    ("income", "2023-12-31", 2023, None, "REVENUE", 999.0),      # duplicate: first wins
+    ("income", "2024-12-31", 2024, None, "TOTAL_REVENUE", 120.0),  # alias only
+    ("income", "2024-12-31", 2024, None, "NET_INCOME", 12.0),
+    ("income", "2024-09-30_9M", 2024, 3, "REVENUE", 90.0),
+    ("balance", "2024-12-31", 2024, None, "TOTAL_ASSETS", 500.0),
+    ("balance", "2022-12-31", 2022, None, None, None),             # statement without items
+]
+
+
+def _matrix():
+    return LineItemMatrix.from_rows(7, ROWS)
+
+
+class TestPivot:
+    def test_shape_and_alignment(self):
+        m = _matrix()
+        assert m.periods == ["2022-12-31", "2023-12-31", "2024-09-30_9M", "2024-12-31"]
+        assert m.keys == [
+            ("income", "REVENUE"), ("income", "NET_INCOME"),
+            ("income", "TOTAL_REVENUE"), ("balance", "TOTAL_ASSETS"),
+        ]
+        assert m.values.shape == (4, 4)
+        np.testing.assert_array_equal(
+            m.values[1], [np.nan, 10.0, np.nan, 12.0],
+        )
+
+    def test_codes_upper_cased_and_first_duplicate_wins(self):
+        m = _matrix()
+        assert m.value("income", "Revenue", "2023-12-31") == 100.0
+
+    def test_period_items_flatten_statement_types(self):
+        assert _matrix().period_items("2024-12-31") == {
+            "NET_INCOME": 12.0, "TOTAL_REVENUE": 120.0, "TOTAL_ASSETS": 500.0,
+        }
+
+
+class TestMissingPeriods:
+    def test_missing_cells_are_none(self):
+        m = _matrix()
+        assert m.value("income", "REVENUE", "2024-12-31") is None
+        assert m.value("income", "REVENUE", "2030-12-31") is None
+        assert m.value("cashflow", "REVENUE", "2023-12-31") is None
+
+    def test_statement_without_items_keeps_its_period(self):
+        m = _matrix()
+        assert m.period_items("2022-12-31") == {}
+        assert ("2022-12-31", 2022, None) in m.statement_periods("balance")
+        assert m.latest_period() == ("2024-12-31", 2024)
+
+    def test_series_falls_back_to_alias_per_year(self):
+        series = _matrix().series("income", REVENUE_CODES, full_year_only=True)
+        assert {fy: (s["code"], s["amount"]) for fy, s in series.items()} == {
+            2023: ("REVENUE", 100.0),
+            2024: ("TOTAL_REVENUE", 120.0),
+        }
+
+    def test_interim_periods_filtered(self):
+        m = _matrix()
+        assert [p for p, _, _ in m.statement_periods("income", full_year_only=True)] == [
+            "2023-12-31", "2024-12-31",
+        ]
+        assert m.latest("income", ["REVENUE"]) == 90.0
+        assert m.latest("income", ["REVENUE"], annual_only=True) == 100.0
+
+    def test_empty_matrix(self):
+        m = LineItemMatrix.from_rows(7, [])
+        assert not m
+        assert m.values.shape == (0, 0)
+        assert m.latest_period() is None
+        assert m.series("income", REVENUE_CODES) == {}
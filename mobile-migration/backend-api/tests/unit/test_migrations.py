@@ -0,0 +1,68 @@
+"""
+Schema migrations — version bookkeeping and the cross-process lock.
+"""
+
+import pytest
+
+from app.core import migrations
+from app.core.database import exec_sql
+
+
+@pytest.fixture
+def steps(monkeypatch, _init_test_db):
+    """Two recording migration steps on an empty ``schema_version``."""
+    migrations._ensure_version_table()
+    exec_sql("DELETE FROM schema_version")
+    ran = []
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        (1, "one", lambda: ran.append(1)),
+        (2, "two", lambda: ran.append(2)),
+    ])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 2)
+    yield ran
+    exec_sql("DELETE FROM schema_version")
+
+
+class TestRunMigrations:
+    def test_applies_pending_once(self, steps):
+        assert migrations.run_migrations() == 2
+        assert steps == [1, 2]
+        assert migrations.current_version() == 2
+
+        assert migrations.run_migrations() == 0
+        assert steps == [1, 2]
+
+    def test_appended_step_runs_alone(self, steps, monkeypatch):
+        migrations.run_migrations()
+        monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(3, "three", lambda: steps.append(3))])
+        monkeypatch.setattr(migrations, "LATEST_VERSION", 3)
+        assert migrations.run_migrations() == 1
+        assert steps == [1, 2, 3]
+
+    def test_failed_step_is_retried(self, steps, monkeypatch):
+        def boom():
+            raise RuntimeError("step failed")
+
+        monkeypatch.setattr(migrations, "MIGRATIONS", [migrations.MIGRATIONS[0], (2, "two", boom)])
+        with pytest.raises(RuntimeError):
+            migrations.run_migrations()
+        assert migrations.current_version() == 1
+
+
+class TestMigrationLock:
+    def test_second_holder_is_refused(self, _init_test_db):
+        with migrations.migration_lock() as got:
+            assert got
+            with migrations.migration_lock(blocking=False) as other:
+                assert not other
+        with migrations.migration_lock(blocking=False) as again:
+            assert again
+
+    def test_backfills_skip_while_locked(self, monkeypatch, _init_test_db):
+        ran = []
+        monkeypatch.setattr(migrations, "BACKFILLS", [("probe", lambda: ran.append(1))])
+        with migrations.migration_lock():
+            migrations.run_backfills()
+        assert ran == []
+        migrations.run_backfills()
+        assert ran == [1]
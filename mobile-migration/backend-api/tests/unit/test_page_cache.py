@@ -0,0 +1,99 @@
+"""
+AI page cache — stock-independent keys, answering-model storage, one call per page.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services import extraction_service as es
+from app.services.page_selector import PageSelection
+from tests.helpers import get_test_db
+
+_TYPES = {b"page-balance": "balance", b"page-income": "income", b"page-cashflow": "cashflow"}
+
+
+def _reply(stmt_type: str, n_items: int = 12) -> str:
+    return json.dumps([{
+        "statement_type": stmt_type,
+        "periods": [{"label": "2024-12-31", "col_name": "2024"}],
+        "items": [
+            {"label_raw": f"{stmt_type} line {i}", "key": f"{stmt_type}_line_{i}",
+             "values": {"2024-12-31": 100 + i}}
+            for i in range(n_items)
+        ],
+    }])
+
+
+@pytest.fixture
+def gemini_calls(monkeypatch, _init_test_db):
+    """Fake Gemini that answers from the fallback model; records each call."""
+    calls = []
+
+    async def fake(api_key, prompt, page_images, model_name="gemini-2.5-flash"):
+        calls.append(list(page_images))
+        return _reply(_TYPES.get(page_images[0], "balance")), "gemini-2.5-pro"
+
+    monkeypatch.setattr(es, "_call_gemini_with_model", fake)
+    conn = get_test_db()
+    conn.execute("DELETE FROM ai_page_cache")
+    conn.commit()
+    conn.close()
+    return calls
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestCachedGemini:
+    def test_stored_under_answering_model_and_reused(self, gemini_calls):
+        prompt = es._build_extraction_prompt(1)
+        _run(es._cached_gemini("k", prompt, [b"page-balance"], "gemini-2.5-flash"))
+        _run(es._cached_gemini("k", prompt, [b"page-balance"], "gemini-2.5-flash"))
+        assert len(gemini_calls) == 1
+
+        conn = get_test_db()
+        models = [r[0] for r in conn.execute("SELECT model FROM ai_page_cache")]
+        conn.close()
+        assert models == ["gemini-2.5-pro"]
+
+    def test_prompts_carry_nothing_stock_specific(self):
+        assert es._build_extraction_prompt(2) == es._build_extraction_prompt(2)
+        assert "EXISTING" not in es._build_cashflow_extraction_prompt(2)
+
+
+class TestExistingCodes:
+    def test_keys_mapped_after_retrieval(self):
+        stmt = es.ExtractedStatement(statement_type="balance", items=[
+            es.ExtractedLineItem(key="provision_indemnity", label_raw="Provision for staff indemnity", values={}),
+            es.ExtractedLineItem(key="cash", label_raw="Cash", values={}),
+        ])
+        codes = [
+            {"code": "provision_for_staff_indemnity", "name": "Provision for staff indemnity", "type": "balance"},
+            {"code": "cash", "name": "Cash and bank", "type": "income"},
+        ]
+        assert es._apply_existing_codes([stmt], codes) == 1
+        assert [i.key for i in stmt.items] == ["provision_for_staff_indemnity", "cash"]
+
+
+class TestExtractFinancials:
+    def test_cold_cache_sends_each_page_once(self, gemini_calls, monkeypatch):
+        selection = PageSelection(
+            total_pages=5, by_type={"balance": [0], "income": [1], "cashflow": [2]},
+        )
+        images = {0: b"page-balance", 1: b"page-income", 2: b"page-cashflow"}
+        monkeypatch.setattr(
+            es, "_render_selected_pages",
+            lambda pdf: (selection, list(images.values()), images),
+        )
+
+        result = _run(es.extract_financials(
+            b"%PDF-fake", stock_id=999_001, api_key="k", use_cache=False,
+            existing_codes=[{"code": "balance_line_0", "name": "x", "type": "balance"}],
+        ))
+
+        sent = [page for call in gemini_calls for page in call]
+        assert sorted(sent) == sorted(images.values())
+        assert {s.statement_type for s in result.statements} == {"balance", "income", "cashflow"}
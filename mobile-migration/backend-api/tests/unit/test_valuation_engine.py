@@ -0,0 +1,38 @@
+"""
+Valuation engine — input validation for Monte Carlo and sensitivity grids.
+"""
+
+import numpy as np
+import pytest
+
+from app.services import valuation_engine as ve
+
+_DCF = {"fcf": 100.0, "g1": 0.05, "g2": 0.03, "dr": 0.09, "tg": 0.02}
+
+
+class TestDraw:
+    def test_null_parameter_is_value_error(self):
+        with pytest.raises(ValueError):
+            ve.draw({"dist": "normal", "mean": None}, 10, np.random.default_rng(0))
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            ve.draw({"dist": "cauchy"}, 10, np.random.default_rng(0))
+
+
+class TestYears:
+    def test_negative_stage_rejected(self):
+        with pytest.raises(ValueError):
+            ve.simulate_dcf({**_DCF, "s1": -3}, n=100, seed=1)
+
+    def test_oversized_work_rejected(self):
+        with pytest.raises(ValueError):
+            ve.simulate_dcf({**_DCF, "s1": 50, "s2": 50}, n=ve.MAX_DRAWS, seed=1)
+
+
+class TestSummary:
+    def test_zero_price_is_a_price(self):
+        out = ve.distribution_summary(np.array([1.0, 2.0, 3.0]), current_price=0.0)
+        assert out["current_price"] == 0.0
+        assert out["prob_undervalued"] == 1.0
+
@@ -22,6 +22,7 @@ import os
 from stock_analysis.database.analysis_db import AnalysisDatabase
 from stock_analysis.models.financial_data import FinancialDataManager
 from stock_analysis.models.metrics_calculator import MetricsCalculator
+from stock_analysis.ui import data_cache
 from stock_analysis.ui.stock_creation_ui import (
     render_stock_creation_page,
     ui_stock_analysis_create,
@@ -38,9 +39,7 @@ from stock_analysis.config import STATEMENT_TYPES
 # ── helpers ────────────────────────────────────────────────────────────
 
 def _get_db() -> AnalysisDatabase:
-    if "analysis_db" not in st.session_state:
-        st.session_state["analysis_db"] = AnalysisDatabase()
-    return st.session_state["analysis_db"]
+    return data_cache.get_db()
 
 
 # ── public API (for embedding in another Streamlit app) ────────────────
@@ -298,8 +297,7 @@ def show_fundamental_analysis() -> None:
 
 def show_financial_statements(stock: dict, db: AnalysisDatabase) -> None:
     """Display saved financial statements for a stock."""
-    manager = FinancialDataManager(db)
-    financials = manager.get_stock_financials(stock["id"])
+    financials = data_cache.stock_financials(stock["id"])
 
     if not financials:
         st.info(
@@ -374,11 +372,10 @@ def show_trend_analysis(stock: dict, db: AnalysisDatabase) -> None:
         "Charts will appear here once multiple periods are available."
     )
 
-    manager = FinancialDataManager(db)
-    all_periods = []
-    for stype in ["income", "balance", "cashflow", "equity"]:
-        all_periods.extend(manager.available_periods(stock["id"], stype))
-    unique_periods = sorted(set(all_periods))
+    unique_periods = sorted({
+        s["period_end_date"] for s in data_cache.statements(stock["id"])
+        if s["statement_type"] in ("income", "balance", "cashflow", "equity")
+    })
     if unique_periods:
         st.write(f"Available periods: {', '.join(unique_periods)}")
     else:
@@ -389,7 +386,6 @@ def show_ratio_analysis(stock: dict, db: AnalysisDatabase) -> None:
     """Display ratio analysis using MetricsCalculator."""
     st.subheader(f"🔍 Ratio Analysis — {stock['symbol']}")
 
-    manager = FinancialDataManager(db)
     calc = MetricsCalculator(db)
 
     stmt_type = st.selectbox(
@@ -400,7 +396,7 @@ def show_ratio_analysis(stock: dict, db: AnalysisDatabase) -> None:
     )
 
     try:
-        comp_df = manager.get_comparison_df(stock["id"], stmt_type)
+        comp_df = data_cache.comparison_df(stock["id"], stmt_type)
         if comp_df is not None and not comp_df.empty:
             st.dataframe(comp_df, use_container_width=True)
         else:
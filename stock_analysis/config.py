@@ -37,6 +37,12 @@ ANALYSIS_DB_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'stock_analysis.db'
 )
 
+# Streamlit page caches (seconds).  DB reads are also keyed by the write
+# version, so the TTL only bounds staleness from writes by other processes.
+UI_CACHE_TTL_DB = 600
+UI_CACHE_TTL_PRICE = 300       # live / last-close prices
+UI_CACHE_TTL_MARKET = 3600     # yfinance info: beta, peer EPS / P/E
+
 # ─────────────────────────────────────────────
 # Standardized Financial Line-Item Codes
 # Keys are machine-readable codes; values are display labels.
@@ -10,8 +10,9 @@ the portfolio tracker so there is a single connection pool.
 """
 
 import os
+import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 # ── Import the app-wide database abstraction layer ───────────────────
 import sys
@@ -32,6 +33,47 @@ from db_layer import (
     is_sqlite,
 )
 
+# Line-item columns returned by the joined statement loaders (``li_`` prefix
+# in SQL to avoid clashing with financial_statements.id / created_at).
+_LINE_ITEM_COLUMNS = (
+    "id", "statement_id", "line_item_code", "line_item_name", "amount",
+    "currency", "order_index", "parent_item_id", "is_total",
+    "manually_edited", "edited_by_user_id", "edited_at",
+)
+
+# ``VALUES (%s, %s, …)`` in a converted INSERT → execute_values template
+_VALUES_RE = re.compile(r"\bVALUES\s*(\([^()]*\))", re.IGNORECASE)
+
+# One statement for single-row and batch metric upserts; relies on the
+# UNIQUE (stock_id, metric_name, period_end_date) constraint.
+_METRIC_UPSERT_SQL = """INSERT INTO stock_metrics
+       (stock_id, fiscal_year, fiscal_quarter, period_end_date,
+        metric_type, metric_name, metric_value, created_at)
+       VALUES (?,?,?,?,?,?,?,?)
+       ON CONFLICT (stock_id, metric_name, period_end_date) DO UPDATE SET
+           fiscal_year = excluded.fiscal_year,
+           fiscal_quarter = excluded.fiscal_quarter,
+           metric_type = excluded.metric_type,
+           metric_value = excluded.metric_value,
+           created_at = excluded.created_at"""
+
+_wal_enabled = False  # journal_mode=WAL persists in the DB file; set it once
+
+# Bumped on every committed write; UI caches key their reads on it.
+_data_version = 0
+
+
+def data_version() -> int:
+    """Current write version of the analysis tables (this process)."""
+    return _data_version
+
+
+def bump_data_version() -> int:
+    """Mark cached reads stale (for writes that bypass AnalysisDatabase)."""
+    global _data_version
+    _data_version += 1
+    return _data_version
+
 
 class AnalysisDatabase:
     """Thread-safe* database manager for the stock analysis module.
@@ -270,11 +312,14 @@ class AnalysisDatabase:
         dict-like Row objects.  For PostgreSQL we use RealDictCursor
         at the query level instead.
         """
+        global _wal_enabled
         conn = get_conn()
         if is_sqlite():
             import sqlite3
             conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA journal_mode=WAL")
+            if not _wal_enabled:
+                conn.execute("PRAGMA journal_mode=WAL")
+                _wal_enabled = True
             conn.execute("PRAGMA foreign_keys=ON")
         return conn
 
@@ -308,23 +353,46 @@ class AnalysisDatabase:
             cur = conn.cursor()
             cur.execute(query, params)
             conn.commit()
+            bump_data_version()
             return get_last_insert_id(cur)
         finally:
             conn.close()
 
     def execute_many(self, query: str, params_list: List[tuple]) -> int:
-        """Batch insert/update → rows affected."""
+        """Batch insert/update → rows affected.
+
+        On PostgreSQL an ``INSERT … VALUES (…)`` is sent as multi-row
+        statements via ``execute_values``; any other statement goes
+        through ``execute_batch``.  Either way one round trip covers a
+        page of rows instead of one per row.
+        """
+        if not params_list:
+            return 0
         query = convert_sql(query)
         conn = self.get_connection()
         try:
             cur = conn.cursor()
             if is_postgres():
-                for params in params_list:
-                    cur.execute(query, convert_params(params))
-            else:
-                conn.executemany(query, params_list)
+                from psycopg2.extras import execute_batch, execute_values
+                rows = [convert_params(p) for p in params_list]
+                m = _VALUES_RE.search(query)
+                if m and query.lstrip().upper().startswith("INSERT"):
+                    execute_values(
+                        cur,
+                        query[:m.start(1)] + "%s" + query[m.end(1):],
+                        rows,
+                        template=m.group(1),
+                        page_size=500,
+                    )
+                else:
+                    execute_batch(cur, query, rows, page_size=500)
+                conn.commit()
+                bump_data_version()
+                return len(params_list)
+            cur.executemany(query, params_list)
             conn.commit()
-            return cur.rowcount if hasattr(cur, 'rowcount') else len(params_list)
+            bump_data_version()
+            return cur.rowcount if cur.rowcount >= 0 else len(params_list)
         finally:
             conn.close()
 
@@ -435,6 +503,7 @@ class AnalysisDatabase:
                 (stock_id,),
             )
             conn.commit()
+            bump_data_version()
         finally:
             conn.close()
 
@@ -529,6 +598,44 @@ class AnalysisDatabase:
                 ),
             )
 
+    def get_statements_with_items(
+        self,
+        stock_ids: Union[int, Iterable[int]],
+        statement_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Statements of one or many stocks, each with a ``line_items`` list.
+
+        One joined query instead of ``get_financial_statements`` plus a
+        ``get_line_items`` call per statement.  Statements are ordered by
+        stock, then ``period_end_date DESC``; line items by ``order_index``.
+        """
+        ids = [stock_ids] if isinstance(stock_ids, int) else list(dict.fromkeys(stock_ids))
+        if not ids:
+            return []
+        li_cols = ", ".join(f"li.{c} AS li_{c}" for c in _LINE_ITEM_COLUMNS)
+        sql = f"""SELECT fs.*, {li_cols}
+                  FROM financial_statements fs
+                  LEFT JOIN financial_line_items li ON li.statement_id = fs.id
+                  WHERE fs.stock_id IN ({", ".join("?" for _ in ids)})"""
+        params: List[Any] = list(ids)
+        if statement_type:
+            sql += " AND fs.statement_type = ?"
+            params.append(statement_type)
+        sql += " ORDER BY fs.stock_id, fs.period_end_date DESC, fs.id, li.order_index"
+
+        statements: Dict[int, Dict[str, Any]] = {}
+        for row in self.execute_query(sql, tuple(params)):
+            stmt = statements.get(row["id"])
+            if stmt is None:
+                stmt = {k: v for k, v in row.items() if not k.startswith("li_")}
+                stmt["line_items"] = []
+                statements[row["id"]] = stmt
+            if row["li_id"] is not None:
+                stmt["line_items"].append(
+                    {c: row[f"li_{c}"] for c in _LINE_ITEM_COLUMNS}
+                )
+        return list(statements.values())
+
     # ── line item helpers ──────────────────────────────────────────────
     def get_line_items(self, statement_id: int) -> List[Dict[str, Any]]:
         return self.execute_query(
@@ -600,31 +707,36 @@ class AnalysisDatabase:
         metric_type: str, metric_name: str, metric_value: float,
         fiscal_quarter: Optional[int] = None,
     ) -> int:
-        """Upsert a metric row (SELECT→UPDATE/INSERT for PG compat)."""
-        now = int(time.time())
-        existing = self.execute_query(
+        """Upsert a single metric row → its id (inserted or updated)."""
+        self.execute_update(
+            _METRIC_UPSERT_SQL,
+            (stock_id, fiscal_year, fiscal_quarter, period_end_date,
+             metric_type, metric_name, metric_value, int(time.time())),
+        )
+        row = self.execute_query(
             """SELECT id FROM stock_metrics
                WHERE stock_id = ? AND metric_name = ? AND period_end_date = ?""",
             (stock_id, metric_name, period_end_date),
         )
-        if existing:
-            return self.execute_update(
-                """UPDATE stock_metrics
-                   SET fiscal_year = ?, fiscal_quarter = ?,
-                       metric_type = ?, metric_value = ?, created_at = ?
-                   WHERE id = ?""",
-                (fiscal_year, fiscal_quarter, metric_type, metric_value, now,
-                 existing[0]['id']),
-            )
-        else:
-            return self.execute_update(
-                """INSERT INTO stock_metrics
-                   (stock_id, fiscal_year, fiscal_quarter, period_end_date,
-                    metric_type, metric_name, metric_value, created_at)
-                   VALUES (?,?,?,?,?,?,?,?)""",
-                (stock_id, fiscal_year, fiscal_quarter, period_end_date,
-                 metric_type, metric_name, metric_value, now),
-            )
+        return row[0]["id"] if row else 0
+
+    def upsert_metrics_bulk(self, rows: List[tuple]) -> int:
+        """Upsert many metric rows in one transaction.
+
+        Each row is ``(stock_id, fiscal_year, fiscal_quarter,
+        period_end_date, metric_type, metric_name, metric_value)``.
+        Duplicate (stock_id, metric_name, period_end_date) keys keep the
+        last row.  Relies on the UNIQUE constraint on those columns.
+        """
+        if not rows:
+            return 0
+        now = int(time.time())
+        latest: Dict[tuple, tuple] = {}
+        for r in rows:
+            latest[(r[0], r[5], r[3])] = r
+        return self.execute_many(
+            _METRIC_UPSERT_SQL, [(*r, now) for r in latest.values()]
+        )
 
     def get_metrics(
         self, stock_id: int, metric_type: Optional[str] = None
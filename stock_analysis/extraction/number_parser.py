@@ -21,7 +21,7 @@ import unicodedata
 from typing import Optional, Tuple
 
 # Bump this whenever the parsing logic changes materially.
-EXTRACTOR_VERSION = "v4.0"
+EXTRACTOR_VERSION = "v4.1"
 
 # ──────────────────────────────────────────────────────────────
 # Arabic-Indic → ASCII digit mapping
@@ -9,9 +9,14 @@ Purpose-built for scanned financial statements with a known layout:
 
 Each page is rendered at 350 DPI, pre-processed (grayscale, threshold,
 deskew), then OpenCV detects the table grid (horizontal / vertical lines)
-to produce per-cell bounding boxes.  Cells are OCR'd individually with
-tesseract (digits-only config for numeric columns, regular for the label
-column).
+to produce per-cell bounding boxes.  Each page gets ONE tesseract pass
+(``image_to_data`` word boxes); words are assigned to grid cells by their
+centre point.  Only cells whose words come back below
+``_LOW_CONF_THRESHOLD`` are re-OCR'd individually (digits-only config for
+numeric columns, regular for the label column).  If the page pass fails
+every cell is OCR'd on its own and the result is flagged
+``page_ocr_failed_<statement>``.  The mapped pages are processed in
+parallel across a small process pool.
 
 Amounts are parsed with :func:`number_parser.parse_amount`.
 Rows are **NEVER** dropped — if parsing fails the row keeps
@@ -26,10 +31,12 @@ Public API
 
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import json
 import logging
 import os
+import re
 import time
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
@@ -73,6 +80,13 @@ _CACHE_TTL_SECONDS = 86_400
 # Column names for the expected 3-column layout
 _EXPECTED_COLUMNS = ["label", "current_year", "prior_year"]
 
+# Cells whose mean word confidence (0-100) from the page-level OCR pass
+# falls below this are re-OCR'd on their own crop.
+_LOW_CONF_THRESHOLD = 60.0
+
+# Process pool size for per-page extraction (one page = one statement)
+_MAX_PAGE_WORKERS = 3
+
 
 # ─────────────────────────────────────────────────────────────────────
 # Data structures
@@ -394,6 +408,135 @@ def _ocr_cell(img: np.ndarray, bbox: Tuple[int, int, int, int], is_numeric: bool
     return text.strip()
 
 
+# ─────────────────────────────────────────────────────────────────────
+# PAGE-LEVEL OCR (one tesseract pass per page)
+# ─────────────────────────────────────────────────────────────────────
+
+_PAGE_CONFIG = r"--psm 6"
+_NUMERIC_CHARS_RE = re.compile(r"[^0-9,.\-()% ]")
+
+
+@dataclass
+class OcrWord:
+    """One word box from ``pytesseract.image_to_data``."""
+    text: str
+    conf: float
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+    line_key: Tuple[int, int, int]  # (block, paragraph, line) for ordering
+
+
+def _ocr_page_words(img: np.ndarray) -> Optional[List[OcrWord]]:
+    """Run a single tesseract pass over the whole page and return word boxes.
+
+    Non-word entries (conf == -1) and blank tokens are discarded.  Returns
+    None when the pass itself failed, so the caller can fall back to
+    per-cell OCR instead of treating every cell as empty.
+    """
+    if pytesseract is None:
+        return None
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    _, page_bin = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    try:
+        data = pytesseract.image_to_data(
+            page_bin, config=_PAGE_CONFIG,
+            output_type=pytesseract.Output.DICT,
+        )
+    except Exception as exc:
+        logger.warning("Page-level OCR failed: %s", exc)
+        return None
+
+    words: List[OcrWord] = []
+    for i, raw in enumerate(data.get("text", [])):
+        text = (raw or "").strip()
+        try:
+            conf = float(data["conf"][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        if not text or conf < 0:
+            continue
+        left, top = int(data["left"][i]), int(data["top"][i])
+        words.append(OcrWord(
+            text=text,
+            conf=conf,
+            x1=left,
+            y1=top,
+            x2=left + int(data["width"][i]),
+            y2=top + int(data["height"][i]),
+            line_key=(
+                int(data["block_num"][i]),
+                int(data["par_num"][i]),
+                int(data["line_num"][i]),
+            ),
+        ))
+    return words
+
+
+def _assign_words_to_cells(
+    words: List[OcrWord],
+    cells: List[List[Tuple[int, int, int, int]]],
+) -> Dict[Tuple[int, int], List[OcrWord]]:
+    """Bucket each word into the grid cell containing its centre point.
+
+    Rows and columns are located with a binary search over the cell edges,
+    so assignment is O(words · log cells).  Words outside the grid are
+    dropped.
+    """
+    if not cells or not cells[0]:
+        return {}
+
+    row_tops = np.array([row[0][1] for row in cells])
+    row_bottom = cells[-1][0][3]
+    col_lefts = np.array([c[0] for c in cells[0]])
+    col_right = cells[0][-1][2]
+
+    assigned: Dict[Tuple[int, int], List[OcrWord]] = {}
+    for w in words:
+        cx = (w.x1 + w.x2) // 2
+        cy = (w.y1 + w.y2) // 2
+        if cy >= row_bottom or cx >= col_right:
+            continue
+        ri = int(np.searchsorted(row_tops, cy, side="right")) - 1
+        ci = int(np.searchsorted(col_lefts, cx, side="right")) - 1
+        if ri < 0 or ci < 0:
+            continue
+        assigned.setdefault((ri, ci), []).append(w)
+    return assigned
+
+
+def _cell_text(
+    img: np.ndarray,
+    bbox: Tuple[int, int, int, int],
+    cell_words: List[OcrWord],
+    is_numeric: bool,
+) -> Tuple[str, float]:
+    """Return ``(text, confidence)`` for one cell from page-level words.
+
+    Empty cells cost nothing.  Cells whose mean word confidence is below
+    ``_LOW_CONF_THRESHOLD`` fall back to a dedicated :func:`_ocr_cell` call.
+    """
+    if not cell_words:
+        return "", 0.0
+
+    ordered = sorted(cell_words, key=lambda w: (w.line_key, w.x1))
+    text = " ".join(w.text for w in ordered)
+    conf = sum(w.conf for w in ordered) / len(ordered)
+
+    if is_numeric:
+        text = _NUMERIC_CHARS_RE.sub("", text)
+
+    if conf < _LOW_CONF_THRESHOLD:
+        retry = _ocr_cell(img, bbox, is_numeric=is_numeric)
+        if retry:
+            return retry, conf
+
+    return text.strip(), conf
+
+
 # ─────────────────────────────────────────────────────────────────────
 # TEXT vs SCANNED detection
 # ─────────────────────────────────────────────────────────────────────
@@ -491,13 +634,29 @@ def _extract_page(
     # Determine which columns are numeric (all except the first)
     num_cols = len(cells[0]) if cells else 0
 
+    # One OCR pass for the whole page, then bucket words into cells
+    page_words = _ocr_page_words(img)
+    method = "opencv_ocr"
+    if page_words is None:
+        # Without page words every cell would read as empty and every row
+        # would be skipped below — OCR each cell on its own instead.
+        logger.warning(
+            "Page %d: page-level OCR failed, falling back to per-cell OCR",
+            page_idx + 1,
+        )
+        method = "opencv_ocr_cells"
+    cell_words = _assign_words_to_cells(page_words or [], cells)
+
+    def _text(ri: int, ci: int, is_numeric: bool) -> Tuple[str, float]:
+        if page_words is None:
+            return _ocr_cell(img, cells[ri][ci], is_numeric=is_numeric), 0.0
+        return _cell_text(img, cells[ri][ci], cell_words.get((ri, ci), []), is_numeric)
+
     # Detect column headers from first row
     column_headers: List[str] = []
     data_start = 0
     if cells:
-        first_row_texts = [
-            _ocr_cell(img, cells[0][ci], is_numeric=False) for ci in range(num_cols)
-        ]
+        first_row_texts = [_text(0, ci, False)[0] for ci in range(num_cols)]
         # If first row looks like headers (contains year-like numbers or text)
         has_year = any(
             _looks_like_year(t) for t in first_row_texts
@@ -508,43 +667,33 @@ def _extract_page(
         else:
             column_headers = _EXPECTED_COLUMNS[:num_cols]
 
-    # OCR each data cell
+    # Read each data cell from the page-level words
     extracted_rows: List[ExtractedRow] = []
     for ri in range(data_start, len(cells)):
-        if ri >= len(cells):
-            break
-        row_cells = cells[ri]
-
         # First column = label (text)
-        label = _ocr_cell(img, row_cells[0], is_numeric=False) if num_cols > 0 else ""
-        label = label.strip()
-
-        # Skip empty label rows (likely separator lines)
-        if not label and num_cols > 1:
-            # Still check if numeric cells have content
-            any_content = any(
-                _ocr_cell(img, row_cells[ci], is_numeric=True).strip()
-                for ci in range(1, min(num_cols, 3))
-            )
-            if not any_content:
-                continue  # truly empty separator row
+        label, label_conf = _text(ri, 0, False) if num_cols > 0 else ("", 0.0)
 
         # Numeric columns
-        raw_col1 = ""
-        raw_col2 = ""
+        raw_col1, conf1 = _text(ri, 1, True) if num_cols > 1 else ("", 0.0)
+        raw_col2, conf2 = _text(ri, 2, True) if num_cols > 2 else ("", 0.0)
+
+        # Skip truly empty separator rows
+        if not label and not raw_col1 and not raw_col2:
+            continue
+
         amt1: Optional[float] = None
         amt2: Optional[float] = None
         err1: Optional[str] = None
         err2: Optional[str] = None
 
         if num_cols > 1:
-            raw_col1 = _ocr_cell(img, row_cells[1], is_numeric=True)
             amt1, err1 = parse_amount(raw_col1)
 
         if num_cols > 2:
-            raw_col2 = _ocr_cell(img, row_cells[2], is_numeric=True)
             amt2, err2 = parse_amount(raw_col2)
 
+        confs = [c for c in (label_conf, conf1, conf2) if c > 0]
+
         extracted_rows.append(ExtractedRow(
             label=label,
             amount_raw_col1=raw_col1,
@@ -555,6 +704,7 @@ def _extract_page(
             parse_error_col2=err2,
             page_num=page_idx,
             row_index=ri,
+            confidence=round(sum(confs) / len(confs) / 100.0, 3) if confs else 0.0,
         ))
 
     elapsed = round(time.time() - t0, 2)
@@ -564,11 +714,64 @@ def _extract_page(
         rows=extracted_rows,
         column_headers=column_headers,
         is_scanned=True,
-        method="opencv_ocr",
+        method=method,
         extraction_time_s=elapsed,
     )
 
 
+def _extract_page_from_path(
+    pdf_path: str,
+    page_idx: int,
+    statement_type: str,
+) -> Tuple[StatementResult, float]:
+    """Process-pool entry point: open the PDF locally and extract one page.
+
+    ``fitz.Document`` is not picklable, so each worker opens its own handle.
+    Returns the result together with the wall time spent in the worker.
+    """
+    t0 = time.time()
+    doc = fitz.open(pdf_path)
+    try:
+        result = _extract_page(doc, page_idx, statement_type)
+    finally:
+        doc.close()
+    return result, round(time.time() - t0, 2)
+
+
+def _extract_pages_parallel(
+    pdf_path: str,
+    jobs: List[Tuple[int, str]],
+) -> Dict[str, Tuple[StatementResult, float]]:
+    """Extract ``(page_idx, statement_type)`` jobs across a process pool.
+
+    Falls back to in-process extraction if the pool cannot be started
+    (e.g. restricted environments) or a worker dies.
+    """
+    out: Dict[str, Tuple[StatementResult, float]] = {}
+    if not jobs:
+        return out
+
+    if len(jobs) > 1:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(_MAX_PAGE_WORKERS, len(jobs))
+            ) as executor:
+                futures = {
+                    executor.submit(_extract_page_from_path, pdf_path, page_idx, stype): stype
+                    for page_idx, stype in jobs
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    out[futures[future]] = future.result()
+            return out
+        except (OSError, concurrent.futures.BrokenExecutor) as exc:
+            logger.warning("Process pool unavailable (%s) — extracting pages serially", exc)
+            out.clear()
+
+    for page_idx, stype in jobs:
+        out[stype] = _extract_page_from_path(pdf_path, page_idx, stype)
+    return out
+
+
 def _text_rows_to_result(
     raw_rows: List[List[str]],
     page_idx: int,
@@ -747,8 +950,11 @@ def extract_financials_from_pdf(
         doc.close()
         raise RuntimeError("PDF has zero pages")
 
-    # ── Step 4: Extract each mapped page ─────────────────────────
+    doc.close()
+
+    # ── Step 4: Extract each mapped page (in parallel) ───────────
     statements: Dict[str, StatementResult] = {}
+    jobs: List[Tuple[int, str]] = []
 
     for page_idx, stmt_type in PAGE_STATEMENT_MAP.items():
         if page_idx >= total_pages:
@@ -758,13 +964,21 @@ def extract_financials_from_pdf(
                 total_pages, page_idx + 1, stmt_type,
             )
             continue
+        jobs.append((page_idx, stmt_type))
 
-        t0 = time.time()
-        stmt_result = _extract_page(doc, page_idx, stmt_type)
-        timings[f"extract_{stmt_type}"] = round(time.time() - t0, 2)
+    page_results = _extract_pages_parallel(pdf_path, jobs)
+    for _, stmt_type in jobs:
+        stmt_result, elapsed = page_results[stmt_type]
+        timings[f"extract_{stmt_type}"] = elapsed
         statements[stmt_type] = stmt_result
-
-    doc.close()
+        if stmt_result.method == "opencv_ocr_cells":
+            flags.append(f"page_ocr_failed_{stmt_type}")
+        if not stmt_result.rows:
+            flags.append(f"no_rows_{stmt_type}")
+            logger.warning(
+                "Page %d (%s): no rows extracted (method=%s)",
+                stmt_result.page_num + 1, stmt_type, stmt_result.method,
+            )
 
     # ── Step 5: Aggregate metrics ────────────────────────────────
     total_rows = sum(len(s.rows) for s in statements.values())
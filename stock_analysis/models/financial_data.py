@@ -6,6 +6,7 @@ Includes:
   • create_stock_profile  — quick stock creation from this manager
   • upload_financial_statement — end-to-end PDF → extract → validate → save
   • get_stock_financials   — structured dict of all statements + items
+    (get_financials_for_stocks for many stocks in one query)
   • calculate_metrics      — key ratios across Income / Balance / CashFlow
   • save / edit / delete helpers
 """
@@ -28,6 +29,13 @@ _AI_TYPE_TO_LEGACY = {
     "equity_statement": "equity",
 }
 
+# Line-item insert carrying the manual-edit columns (restore / normalise)
+_LINE_ITEM_INSERT_SQL = """INSERT INTO financial_line_items
+    (statement_id, line_item_code, line_item_name,
+     amount, currency, order_index, parent_item_id,
+     is_total, manually_edited, edited_by_user_id, edited_at)
+    VALUES (?,?,?,?,?,?,?,?,?,?,?)"""
+
 
 class FinancialDataManager:
     """High-level CRUD for financial statements & line items."""
@@ -814,6 +822,7 @@ class FinancialDataManager:
 
             # Insert line items (use .get() to guard against missing keys
             # — Gemini may occasionally omit 'amount' or 'code').
+            rows = []
             for item in extracted_data.get("line_items", []):
                 code = item.get("code") or item.get("name", "UNKNOWN").upper().replace(" ", "_")
                 code = normalize_line_item_code(code)
@@ -830,22 +839,23 @@ class FinancialDataManager:
                         amount = float(amount)
                     except (ValueError, TypeError):
                         amount = 0.0
-                self.db.execute_update(
-                    """INSERT INTO financial_line_items
-                       (statement_id, line_item_code, line_item_name,
-                        amount, currency, order_index, parent_item_id, is_total)
-                       VALUES (?,?,?,?,?,?,?,?)""",
-                    (
-                        statement_id,
-                        code,
-                        item.get("name", code),
-                        amount,
-                        extracted_data.get("currency", "USD"),
-                        item.get("order", 0),
-                        None,
-                        item.get("is_total", False),
-                    ),
-                )
+                rows.append((
+                    statement_id,
+                    code,
+                    item.get("name", code),
+                    amount,
+                    extracted_data.get("currency", "USD"),
+                    item.get("order", 0),
+                    None,
+                    item.get("is_total", False),
+                ))
+            self.db.execute_many(
+                """INSERT INTO financial_line_items
+                   (statement_id, line_item_code, line_item_name,
+                    amount, currency, order_index, parent_item_id, is_total)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                rows,
+            )
 
             return statement_id
 
@@ -939,8 +949,20 @@ class FinancialDataManager:
         Structure:
             { "income": { "2023": { "statement_id": …, "items": { CODE: {...} } } }, … }
         """
-        statements = self.db.get_financial_statements(stock_id, statement_type)
-        result: Dict[str, Any] = {}
+        return self.get_financials_for_stocks(
+            [stock_id], statement_type
+        ).get(stock_id, {})
+
+    def get_financials_for_stocks(
+        self, stock_ids: List[int], statement_type: Optional[str] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """``get_stock_financials`` for many stocks in one query.
+
+        Returns ``{stock_id: {type: {period: {...}}}}``; stocks without
+        statements are omitted.
+        """
+        statements = self.db.get_statements_with_items(stock_ids, statement_type)
+        by_stock: Dict[int, Dict[str, Any]] = {}
 
         for stmt in statements:
             stmt_id = stmt["id"]
@@ -950,7 +972,7 @@ class FinancialDataManager:
             if fq:
                 period_key = f"{stmt['fiscal_year']}Q{fq}"
 
-            line_items = self.db.get_line_items(stmt_id)
+            line_items = stmt["line_items"]
             items_dict = {
                 item["line_item_code"]: {
                     "name": item["line_item_name"],
@@ -963,6 +985,7 @@ class FinancialDataManager:
                 for item in line_items
             }
 
+            result = by_stock.setdefault(stmt["stock_id"], {})
             result.setdefault(stmt_type, {})[period_key] = {
                 "statement_id": stmt_id,
                 "period_end": stmt["period_end_date"],
@@ -974,7 +997,7 @@ class FinancialDataManager:
                 "items": items_dict,
             }
 
-        return result
+        return by_stock
 
     # ──────────────────────────────────────────────────────────────────
     # Multi-period comparison pivot
@@ -983,14 +1006,13 @@ class FinancialDataManager:
         self, stock_id: int, statement_type: str
     ) -> pd.DataFrame:
         """Build a pivot table: rows = line items, columns = periods."""
-        stmts = self.db.get_financial_statements(stock_id, statement_type)
+        stmts = self.db.get_statements_with_items(stock_id, statement_type)
         if not stmts:
             return pd.DataFrame()
 
         frames = []
         for st in stmts:
-            items = self.db.get_line_items(st["id"])
-            for it in items:
+            for it in st["line_items"]:
                 frames.append({
                     "code": it["line_item_code"],
                     "name": it["line_item_name"],
@@ -1198,11 +1220,11 @@ class FinancialDataManager:
         stored in ``st.session_state`` so it can be restored later.
         Returns a summary string.
         """
-        stmts = self.get_statements(stock_id)
+        stmts = self.db.get_statements_with_items(stock_id)
         backup: Dict[int, List[Dict[str, Any]]] = {}
         total_items = 0
         for s in stmts:
-            items = self.db.get_line_items(s["id"])
+            items = s["line_items"]
             backup[s["id"]] = [dict(i) for i in items]
             total_items += len(items)
         return json.dumps(backup), total_items
@@ -1220,13 +1242,9 @@ class FinancialDataManager:
             # Wipe current items
             self.db.delete_line_items_for_statement(stmt_id)
             # Re-insert from backup
-            for it in items:
-                self.db.execute_update(
-                    """INSERT INTO financial_line_items
-                       (statement_id, line_item_code, line_item_name,
-                        amount, currency, order_index, parent_item_id,
-                        is_total, manually_edited, edited_by_user_id, edited_at)
-                       VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
+            self.db.execute_many(
+                _LINE_ITEM_INSERT_SQL,
+                [
                     (
                         stmt_id,
                         it.get("line_item_code", "UNKNOWN"),
@@ -1239,9 +1257,11 @@ class FinancialDataManager:
                         it.get("manually_edited", False),
                         it.get("edited_by_user_id"),
                         it.get("edited_at"),
-                    ),
-                )
-                restored += 1
+                    )
+                    for it in items
+                ],
+            )
+            restored += len(items)
         try:
             self.db.log_audit(
                 user_id, "RESTORE", "line_items", stock_id,
@@ -1254,12 +1274,12 @@ class FinancialDataManager:
     def build_normalization_payload(self, stock_id: int) -> Dict[str, Any]:
         """Build a JSON-serializable dict of all statements + line items
         for the normalization prompt."""
-        stmts = self.get_statements(stock_id)
+        stmts = self.db.get_statements_with_items(stock_id)
         payload: Dict[str, List[Dict[str, Any]]] = {}
         for s in stmts:
             stype = s["statement_type"]
             fy = s.get("fiscal_year", "unknown")
-            items = self.db.get_line_items(s["id"])
+            items = s["line_items"]
             entry = {
                 "statement_id": s["id"],
                 "fiscal_year": fy,
@@ -1300,6 +1320,8 @@ class FinancialDataManager:
                 items = period_data.get("line_items", [])
                 # Wipe old items and insert normalised ones
                 self.db.delete_line_items_for_statement(stmt_id)
+                now = int(time.time())
+                rows = []
                 for idx, it in enumerate(items, 1):
                     code = it.get("code") or it.get("key", "UNKNOWN")
                     name = it.get("name") or it.get("label", code)
@@ -1311,27 +1333,21 @@ class FinancialDataManager:
                             amount = float(amount.replace(",", ""))
                         except (ValueError, TypeError):
                             amount = 0.0
-                    self.db.execute_update(
-                        """INSERT INTO financial_line_items
-                           (statement_id, line_item_code, line_item_name,
-                            amount, currency, order_index, parent_item_id,
-                            is_total, manually_edited, edited_by_user_id, edited_at)
-                           VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                        (
-                            stmt_id,
-                            normalize_line_item_code(code),
-                            name,
-                            float(amount),
-                            it.get("currency", "USD"),
-                            it.get("order", idx),
-                            None,
-                            it.get("is_total", False),
-                            True,       # mark as edited
-                            user_id,
-                            int(time.time()),
-                        ),
-                    )
-                    written += 1
+                    rows.append((
+                        stmt_id,
+                        normalize_line_item_code(code),
+                        name,
+                        float(amount),
+                        it.get("currency", "USD"),
+                        it.get("order", idx),
+                        None,
+                        it.get("is_total", False),
+                        True,       # mark as edited
+                        user_id,
+                        now,
+                    ))
+                self.db.execute_many(_LINE_ITEM_INSERT_SQL, rows)
+                written += len(rows)
         try:
             self.db.log_audit(
                 user_id, "NORMALIZE", "line_items", stock_id,
@@ -189,14 +189,14 @@ class MetricsCalculator:
 
         results["cashflow"] = cfm
 
-        # ── persist all metrics ────────────────────────────────────────
-        for category, metrics in results.items():
-            for name, value in metrics.items():
-                if value is not None:
-                    self.db.upsert_metric(
-                        stock_id, fiscal_year, period_end_date,
-                        category, name, value, fiscal_quarter,
-                    )
+        # ── persist all metrics (one batch) ────────────────────────────
+        self.db.upsert_metrics_bulk([
+            (stock_id, fiscal_year, fiscal_quarter, period_end_date,
+             category, name, value)
+            for category, metrics in results.items()
+            for name, value in metrics.items()
+            if value is not None
+        ])
 
         return results
 
@@ -206,6 +206,7 @@ class MetricsCalculator:
     ) -> Dict[str, List[Dict[str, Any]]]:
         """YoY growth rates for key items across all available periods."""
         growth: Dict[str, List[Dict[str, Any]]] = {}
+        rows: List[tuple] = []
         growth_items = [
             ("REVENUE", "Revenue Growth"),
             ("NET_INCOME", "Net Income Growth"),
@@ -235,17 +236,19 @@ class MetricsCalculator:
                         "prev_period": prev["period"],
                         "growth": round(g, 4),
                     })
-                    # persist
-                    self.db.upsert_metric(
+                    rows.append((
                         stock_id,
                         curr.get("fiscal_year", 0),
+                        None,
                         curr["period"],
                         "growth",
                         label,
                         round(g, 4),
-                    )
+                    ))
             growth[label] = rates
 
+        # persist every growth rate in one batch
+        self.db.upsert_metrics_bulk(rows)
         return growth
 
     # ── scoring (CFA principles) ───────────────────────────────────────
@@ -0,0 +1,151 @@
+"""
+Data Cache — Streamlit caching layer for the stock analysis pages.
+
+Every widget interaction reruns the page script; without caching each
+rerun re-queries statements, metrics and valuations and re-fetches live
+prices from Yahoo Finance.
+
+  • ``get_db``         — one shared ``AnalysisDatabase`` (cache_resource)
+  • DB reads           — ``st.cache_data`` keyed by ``(stock_id, data_version)``;
+                         every committed write through ``AnalysisDatabase``
+                         bumps the version, so upload / edit flows invalidate
+                         automatically.  ``invalidate()`` covers writes that
+                         bypass it.
+  • market data        — keyed by ticker with a TTL (``UI_CACHE_TTL_*``)
+
+``st.cache_data`` hands each caller its own copy, so pages may mutate the
+returned dicts / DataFrames freely.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from stock_analysis.config import UI_CACHE_TTL_DB, UI_CACHE_TTL_MARKET, UI_CACHE_TTL_PRICE
+from stock_analysis.database.analysis_db import (
+    AnalysisDatabase,
+    bump_data_version,
+    data_version,
+)
+from stock_analysis.models.financial_data import FinancialDataManager
+
+
+@st.cache_resource(show_spinner=False)
+def get_db() -> AnalysisDatabase:
+    """Process-wide database handle (schema init + migrations run once)."""
+    return AnalysisDatabase()
+
+
+def invalidate() -> None:
+    """Drop cached DB reads after a write that bypassed ``AnalysisDatabase``."""
+    bump_data_version()
+
+
+# ── DB reads (keyed by stock_id + data version) ──────────────────────
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _stock_financials(stock_id: int, version: int, statement_type: Optional[str]) -> Dict[str, Any]:
+    return FinancialDataManager(get_db()).get_stock_financials(stock_id, statement_type)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _comparison_df(stock_id: int, version: int, statement_type: str) -> pd.DataFrame:
+    return FinancialDataManager(get_db()).get_comparison_df(stock_id, statement_type)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _statements(stock_id: int, version: int, statement_type: Optional[str]) -> List[Dict[str, Any]]:
+    return get_db().get_financial_statements(stock_id, statement_type)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _metrics(stock_id: int, version: int, metric_type: Optional[str]) -> List[Dict[str, Any]]:
+    return get_db().get_metrics(stock_id, metric_type)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _scores(stock_id: int, version: int) -> List[Dict[str, Any]]:
+    return get_db().get_scores(stock_id)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _valuations(stock_id: int, version: int) -> List[Dict[str, Any]]:
+    return get_db().get_valuations(stock_id)
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_DB, show_spinner=False)
+def _stock(stock_id: int, version: int) -> Optional[Dict[str, Any]]:
+    return get_db().get_stock_by_id(stock_id)
+
+
+def stock_financials(stock_id: int, statement_type: Optional[str] = None) -> Dict[str, Any]:
+    return _stock_financials(stock_id, data_version(), statement_type)
+
+
+def comparison_df(stock_id: int, statement_type: str) -> pd.DataFrame:
+    return _comparison_df(stock_id, data_version(), statement_type)
+
+
+def statements(stock_id: int, statement_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    return _statements(stock_id, data_version(), statement_type)
+
+
+def metrics(stock_id: int, metric_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    return _metrics(stock_id, data_version(), metric_type)
+
+
+def scores(stock_id: int) -> List[Dict[str, Any]]:
+    return _scores(stock_id, data_version())
+
+
+def valuations(stock_id: int) -> List[Dict[str, Any]]:
+    return _valuations(stock_id, data_version())
+
+
+def stock(stock_id: int) -> Optional[Dict[str, Any]]:
+    return _stock(stock_id, data_version())
+
+
+# ── Market data (keyed by ticker, TTL) ───────────────────────────────
+
+@st.cache_data(ttl=UI_CACHE_TTL_MARKET, show_spinner=False)
+def ticker_info(symbol: str) -> Dict[str, Any]:
+    """yfinance ``Ticker.info`` ({} on failure)."""
+    try:
+        import yfinance as yf
+        return dict(yf.Ticker(symbol).info or {})
+    except Exception:
+        return {}
+
+
+@st.cache_data(ttl=UI_CACHE_TTL_PRICE, show_spinner=False)
+def last_price(symbol: str) -> Optional[float]:
+    """Current / last-close price from Yahoo Finance.
+
+    Kuwaiti (.KW) tickers are quoted in fils on Yahoo; divide by 1000
+    to convert to KWD.
+    """
+    try:
+        import yfinance as yf
+        ticker = yf.Ticker(symbol)
+        info = ticker.info or {}
+        raw: Optional[float] = None
+        # Try multiple fields — yfinance varies by market
+        for field in ("currentPrice", "regularMarketPrice",
+                      "previousClose", "regularMarketPreviousClose"):
+            p = info.get(field)
+            if p and float(p) > 0:
+                raw = float(p)
+                break
+        # Fallback to last row of history
+        if raw is None:
+            hist = ticker.history(period="5d")
+            if hist is not None and not hist.empty:
+                raw = float(hist["Close"].iloc[-1])
+        if raw is not None and symbol.upper().endswith(".KW"):
+            raw = raw / 1000.0
+        return raw
+    except Exception:
+        pass
+    return None
@@ -24,6 +24,7 @@ from stock_analysis.utils.validators import (
     check_balance_sheet_balance,
 )
 from stock_analysis.utils.helpers import fmt_number, badge_html
+from stock_analysis.ui import data_cache
 from stock_analysis.config import (
     STATEMENT_TYPES,
     FINANCIAL_LINE_ITEM_CODES,
@@ -111,9 +112,7 @@ _DEFAULT_LINE_ITEMS: Dict[str, List[Dict[str, Any]]] = {
 
 
 def _get_db() -> AnalysisDatabase:
-    if "analysis_db" not in st.session_state:
-        st.session_state["analysis_db"] = AnalysisDatabase()
-    return st.session_state["analysis_db"]
+    return data_cache.get_db()
 
 
 def _resolve_gemini_key(input_key: str = "gemini_key_resolve") -> Optional[str]:
@@ -1461,7 +1460,7 @@ def _auto_migrate_equity_items(
 
     import time as _time
 
-    stmts = fdm.get_statements(stock_id)
+    stmts = db.get_statements_with_items(stock_id)
     if not stmts:
         st.session_state[cache_key] = True
         return
@@ -1471,7 +1470,7 @@ def _auto_migrate_equity_items(
     for s in stmts:
         if s["statement_type"] == "equity":
             continue
-        items = db.get_line_items(s["id"])
+        items = s["line_items"]
         if not items:
             continue
 
@@ -1507,15 +1506,13 @@ def _auto_migrate_equity_items(
             continue
 
         # Otherwise, remove only the equity items from this statement
-        for eq_item in equity_items:
-            try:
-                db.execute_update(
-                    "DELETE FROM financial_line_items WHERE id = ?",
-                    (eq_item["id"],),
-                )
-                moved_count += 1
-            except Exception:
-                pass
+        try:
+            moved_count += db.execute_many(
+                "DELETE FROM financial_line_items WHERE id = ?",
+                [(eq_item["id"],) for eq_item in equity_items],
+            )
+        except Exception:
+            pass
 
     st.session_state[cache_key] = True
 
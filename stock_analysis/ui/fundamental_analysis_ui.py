@@ -23,6 +23,7 @@ from stock_analysis.utils.helpers import (
     fiscal_year_label,
 )
 from stock_analysis.config import STATEMENT_TYPES, METRIC_CATEGORIES, FINANCIAL_LINE_ITEM_CODES
+from stock_analysis.ui import data_cache
 from stock_analysis.ui.financial_upload_ui import (
     _render_data_organizer,
     _render_editable_statement_table,
@@ -44,9 +45,7 @@ def _ccy(stock: Optional[Dict]) -> str:
 
 
 def _get_db() -> AnalysisDatabase:
-    if "analysis_db" not in st.session_state:
-        st.session_state["analysis_db"] = AnalysisDatabase()
-    return st.session_state["analysis_db"]
+    return data_cache.get_db()
 
 
 # ── yfinance price helper ─────────────────────────────────────────────
@@ -55,33 +54,9 @@ def _fetch_current_price(symbol: str) -> Optional[float]:
     """Fetch the current / last-close price from Yahoo Finance.
     Returns None on any failure so the UI can degrade gracefully.
 
-    Kuwaiti (.KW) tickers are quoted in fils on Yahoo; divide by 1000
-    to convert to KWD.
+    Cached per ticker (``UI_CACHE_TTL_PRICE``); see ``data_cache.last_price``.
     """
-    try:
-        import yfinance as yf
-        ticker = yf.Ticker(symbol)
-        info = ticker.info or {}
-        raw: Optional[float] = None
-        # Try multiple fields — yfinance varies by market
-        for field in ("currentPrice", "regularMarketPrice",
-                      "previousClose", "regularMarketPreviousClose"):
-            price = info.get(field)
-            if price and float(price) > 0:
-                raw = float(price)
-                break
-        # Fallback to last row of history
-        if raw is None:
-            hist = ticker.history(period="5d")
-            if hist is not None and not hist.empty:
-                raw = float(hist["Close"].iloc[-1])
-        # Kuwaiti tickers: Yahoo quotes in fils → convert to KWD
-        if raw is not None and symbol.upper().endswith(".KW"):
-            raw = raw / 1000.0
-        return raw
-    except Exception:
-        pass
-    return None
+    return data_cache.last_price(symbol)
 
 
 # ── financials data-extraction helper ──────────────────────────────────
@@ -312,7 +287,7 @@ def _render_statements_tab(stock_id: int, user_id: int, db: AnalysisDatabase) ->
         format_func=lambda x: STATEMENT_TYPES[x],
         key="fa_stmt_type",
     )
-    stmts = fdm.get_statements(stock_id, stmt_type)
+    stmts = data_cache.statements(stock_id, stmt_type)
 
     if not stmts:
         st.info(f"No {STATEMENT_TYPES[stmt_type]} data. Upload a PDF first.")
@@ -324,7 +299,7 @@ def _render_statements_tab(stock_id: int, user_id: int, db: AnalysisDatabase) ->
     )
 
     # ── Data Organizer — AI normalization ──────────────────────────
-    all_stmts = fdm.get_statements(stock_id)  # all types for organizer
+    all_stmts = data_cache.statements(stock_id)  # all types for organizer
     _render_data_organizer(stock_id, user_id, db, fdm, all_stmts, key_prefix="fa")
 
 
@@ -340,7 +315,7 @@ def _render_comparison_tab(stock_id: int, db: AnalysisDatabase) -> None:
         key="fa_compare_type",
     )
 
-    pivot = fdm.get_comparison_df(stock_id, stmt_type)
+    pivot = data_cache.comparison_df(stock_id, stmt_type)
     if pivot.empty:
         st.info("Need ≥ 1 period of data.")
         return
@@ -359,7 +334,7 @@ def _render_comparison_tab(stock_id: int, db: AnalysisDatabase) -> None:
     # YoY change table
     if len(period_cols) >= 2:
         st.subheader("Year-over-Year Change")
-        raw_pivot = fdm.get_comparison_df(stock_id, stmt_type)
+        raw_pivot = data_cache.comparison_df(stock_id, stmt_type)
         rp_cols = [c for c in raw_pivot.columns if c not in ("code", "name")]
         change_data = []
         for _, row in raw_pivot.iterrows():
@@ -383,13 +358,13 @@ def _render_metrics_tab(
 ) -> None:
     """CFA-level Ratios & Metrics — five sections all rendered as tables."""
     fdm = FinancialDataManager(db)
-    financials = fdm.get_stock_financials(stock_id)
+    financials = data_cache.stock_financials(stock_id)
 
     if not financials:
         st.info("Upload financial statements to see metrics.")
         return
 
-    stock = db.get_stock_by_id(stock_id)
+    stock = data_cache.stock(stock_id)
     symbol = stock.get("symbol", "") if stock else ""
     ccy = _ccy(stock)
     outstanding_shares = float(stock.get("outstanding_shares") or 0) if stock else 0
@@ -712,7 +687,7 @@ def _render_growth_tab(stock_id: int, db: AnalysisDatabase) -> None:
 
     # Show stored growth metrics
     growth_metrics = [
-        m for m in db.get_metrics(stock_id) if m["metric_type"] == "growth"
+        m for m in data_cache.metrics(stock_id) if m["metric_type"] == "growth"
     ]
     if not growth_metrics:
         st.info("Click **Calculate Growth Rates** (requires ≥ 2 periods).")
@@ -760,7 +735,7 @@ def _render_score_tab(
         st.success("✅ Score computed and saved")
 
     # Show latest score
-    scores = db.get_scores(stock_id)
+    scores = data_cache.scores(stock_id)
     if not scores:
         st.info("Click **Compute Score** after calculating metrics.")
         return
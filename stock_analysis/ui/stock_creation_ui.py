@@ -12,6 +12,7 @@ from stock_analysis.models.stock_profile import StockProfileManager
 from stock_analysis.models.financial_data import FinancialDataManager
 from stock_analysis.utils.validators import validate_stock_profile
 from stock_analysis.utils.helpers import badge_html, iso_today
+from stock_analysis.ui import data_cache
 from stock_analysis.config import (
     EXCHANGE_CHOICES,
     SECTOR_CHOICES,
@@ -21,9 +22,7 @@ from stock_analysis.config import (
 
 
 def _get_db() -> AnalysisDatabase:
-    if "analysis_db" not in st.session_state:
-        st.session_state["analysis_db"] = AnalysisDatabase()
-    return st.session_state["analysis_db"]
+    return data_cache.get_db()
 
 
 def _get_mgr() -> StockProfileManager:
@@ -13,15 +13,13 @@ from typing import Any, Dict, List, Optional
 from stock_analysis.database.analysis_db import AnalysisDatabase
 from stock_analysis.models.stock_profile import StockProfileManager
 from stock_analysis.models.valuation_models import ValuationModels
-from stock_analysis.models.financial_data import FinancialDataManager
 from stock_analysis.utils.helpers import fmt_number, fmt_percent, iso_today
-from stock_analysis.config import VALUATION_MODEL_TYPES
+from stock_analysis.config import UI_CACHE_TTL_MARKET, VALUATION_MODEL_TYPES
+from stock_analysis.ui import data_cache
 
 
 def _get_db() -> AnalysisDatabase:
-    if "analysis_db" not in st.session_state:
-        st.session_state["analysis_db"] = AnalysisDatabase()
-    return st.session_state["analysis_db"]
+    return data_cache.get_db()
 
 
 # ── helpers shared across tabs ─────────────────────────────────────────
@@ -53,7 +51,7 @@ def _load_saved_params(
     Returns the parsed *parameters* dict, or {} if nothing saved.
     """
     try:
-        history = vm.get_history(stock_id)
+        history = data_cache.valuations(stock_id)
         for h in history:
             if h.get("model_type") == model_type:
                 raw = h.get("parameters", "{}")
@@ -71,29 +69,10 @@ def _fetch_price(symbol: str) -> Optional[float]:
     """Fetch current / last-close price from Yahoo Finance.
 
     Kuwaiti (.KW) tickers are quoted in fils on Yahoo; divide by 1000
-    to convert to KWD.
+    to convert to KWD.  Cached per ticker (``UI_CACHE_TTL_PRICE``) so
+    slider moves don't refetch.
     """
-    try:
-        import yfinance as yf
-        ticker = yf.Ticker(symbol)
-        info = ticker.info or {}
-        raw: Optional[float] = None
-        for field in ("currentPrice", "regularMarketPrice",
-                      "previousClose", "regularMarketPreviousClose"):
-            p = info.get(field)
-            if p and float(p) > 0:
-                raw = float(p)
-                break
-        if raw is None:
-            hist = ticker.history(period="5d")
-            if hist is not None and not hist.empty:
-                raw = float(hist["Close"].iloc[-1])
-        if raw is not None and symbol.upper().endswith(".KW"):
-            raw = raw / 1000.0
-        return raw
-    except Exception:
-        pass
-    return None
+    return data_cache.last_price(symbol)
 
 
 def _item_amount(items: Dict[str, Any], *codes: str) -> Optional[float]:
@@ -164,8 +143,7 @@ def _render_graham(
     _P = f"graham_params_{stock_id}"   # saved parameter dict
     _C = f"graham_calc_{stock_id}"     # True when results should show
 
-    fdm = FinancialDataManager(db)
-    financials = fdm.get_stock_financials(stock_id)
+    financials = data_cache.stock_financials(stock_id)
 
     outstanding = float(stock.get("outstanding_shares") or 0)
     symbol = stock.get("symbol", "")
@@ -469,8 +447,7 @@ def _render_dcf(
     _P = f"dcf_params_{stock_id}"
     _C = f"dcf_calc_{stock_id}"
 
-    fdm = FinancialDataManager(db)
-    financials = fdm.get_stock_financials(stock_id)
+    financials = data_cache.stock_financials(stock_id)
     outstanding = float(stock.get("outstanding_shares") or 0)
     symbol = stock.get("symbol", "")
     ccy = _ccy(stock)
@@ -560,8 +537,7 @@ def _render_dcf(
     # ── Beta from yfinance ───────────────────────────────────────
     beta_val = 1.0
     try:
-        import yfinance as yf
-        info = yf.Ticker(symbol).info or {}
+        info = data_cache.ticker_info(symbol)
         b = info.get("beta")
         if b and float(b) > 0:
             beta_val = round(float(b), 4)
@@ -956,6 +932,7 @@ def _render_dcf(
 
 # ── 3. Multiple Model ────────────────────────────────────────────────
 
+@st.cache_data(ttl=UI_CACHE_TTL_MARKET, show_spinner=False)
 def _fetch_peer_data(ticker: str) -> Dict[str, Any]:
     """Fetch company name, price, EPS, and P/E from yfinance for a peer ticker."""
     try:
@@ -1013,8 +990,7 @@ def _render_multiples(
     _SKIP = f"mult_skip_{stock_id}"         # skip checkbox
     _C = f"mult_calc_{stock_id}"            # calculated flag
 
-    fdm = FinancialDataManager(db)
-    financials = fdm.get_stock_financials(stock_id)
+    financials = data_cache.stock_financials(stock_id)
     outstanding = float(stock.get("outstanding_shares") or 0)
     symbol = stock.get("symbol", "")
     company_name = stock.get("company_name", symbol)
@@ -1273,8 +1249,7 @@ def _render_ddm(
     _P = f"ddm_params_{stock_id}"
     _C = f"ddm_calc_{stock_id}"
 
-    fdm = FinancialDataManager(db)
-    financials = fdm.get_stock_financials(stock_id)
+    financials = data_cache.stock_financials(stock_id)
     outstanding = float(stock.get("outstanding_shares") or 0)
     symbol = stock.get("symbol", "")
     ccy = _ccy(stock)
@@ -1311,7 +1286,7 @@ def _render_ddm(
             dps_map[yr] = val
     else:
         # Fall back to DB-persisted manual overrides
-        saved_metrics = db.get_metrics(stock_id, metric_type="ddm_manual_dps")
+        saved_metrics = data_cache.metrics(stock_id, metric_type="ddm_manual_dps")
         if saved_metrics:
             cache = {}
             for m in saved_metrics:
@@ -1462,7 +1437,7 @@ def _render_ddm(
     # Also try to get from DB (last saved DCF valuation)
     if wacc_from_dcf is None:
         try:
-            history = vm.get_history(stock_id)
+            history = data_cache.valuations(stock_id)
             for h in history:
                 if h.get("model_type") == "dcf":
                     import json as _json
@@ -1677,7 +1652,7 @@ def _render_result(
 
     # Fill remaining from DB history
     try:
-        history = vm.get_history(stock_id)
+        history = data_cache.valuations(stock_id)
         for h in history:
             mt = h.get("model_type", "")
             if mt in model_labels and mt not in iv_map:
@@ -1762,7 +1737,7 @@ def _render_result(
     # Try DB-saved valuations
     if price is None:
         try:
-            for h in vm.get_history(stock_id):
+            for h in data_cache.valuations(stock_id):
                 raw = h.get("parameters", "{}")
                 params = json.loads(raw) if isinstance(raw, str) else (raw or {})
                 if params.get("price"):